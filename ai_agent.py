@@ -1,8 +1,10 @@
 import os
 import logging
 import json
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 import httpx
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
@@ -18,7 +20,9 @@ from constants import (
     BankingIntents, TransactionTypes, Currencies, DatabaseFields, Limits, 
     ResponseFormats, ContextStates, ConfirmationWords, GreetingWords,
     ExitCommands, Months, RegexPatterns, BalanceKeywords, TransactionKeywords,
-    LLMConfig, MongoConfig, WebhookConfig, StatusMessages, TransferSignals
+    LLMConfig, MongoConfig, WebhookConfig, StatusMessages, TransferSignals,
+    ResponseFormatConfig, PipelineConfig, VerificationStages, HistoryBudgetConfig,
+    ToolAgentConfig, DeadlineConfig, MessageCatalogConfig
 )
 
 from prompts import (
@@ -27,7 +31,38 @@ from prompts import (
     response_prompt,
     query_prompt,
     intent_prompt,
-    transfer_prompt
+    transfer_prompt,
+    history_summary_prompt,
+    contextual_resolution_prompt,
+    entity_extraction_prompt,
+    entity_resolution_prompt,
+    exit_detection_prompt,
+    cancel_detection_prompt,
+    transfer_extraction_prompt,
+    non_banking_check_prompt
+)
+
+from turn_trace import traced_stage, trace_stage, llm_trace_handler, mongo_trace_listener
+from turn_deadline import allow_optional_stage, budget_exhausted, stage_timeout
+from response_language import target_language, language_instruction, mark_generated
+from message_catalog import message_catalog
+from cassette import cassette
+from local_classifiers import local_classifiers, log_llm_decision
+from few_shot import filter_examples_block, pipeline_examples_block
+from history_budget import history_budget
+from number_normalizer import amounts_in, normalize_numbers, parse_amount
+from tool_agent import ToolCallingAgent
+from structured_output import (
+    FilterExtraction, PipelineOutput, EntityExtraction, CurrencyConversionDetails, TransferDetails,
+    llm_kwargs, parse_structured, structured_output_stats
+)
+from non_banking_rules import (
+    ALLOW_ASSISTANT, ALLOW_CORE, FLAGGED, classify_keyword_tiers, is_banking_credential
+)
+
+from response_format_selector import (
+    profile_data, summarize_profile, select_response_format_from_profile,
+    get_format_instruction, log_llm_format_choice, should_shadow_format_choice
 )
 
 # Configure structured logging
@@ -40,12 +75,14 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Initialize LangChain LLM
-llm = ChatOpenAI(
+# Initialize LangChain LLM (wrapped for record/replay when CASSETTE_MODE is set)
+llm = cassette.wrap_chat_model(ChatOpenAI(
     model=LLMConfig.MODEL_NAME,
     api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=LLMConfig.TEMPERATURE
-)
+    base_url=os.getenv(LLMConfig.BASE_URL_ENV),
+    temperature=LLMConfig.TEMPERATURE,
+    callbacks=[llm_trace_handler]
+))
 
 # MongoDB pipeline schema for validation
 PIPELINE_SCHEMA = {
@@ -65,18 +102,6 @@ PIPELINE_SCHEMA = {
 }
 
 # === DATA MODELS ====
-class FilterExtraction(BaseModel):
-    description: Optional[str] = None
-    category: Optional[str] = None
-    month: Optional[str] = None
-    year: Optional[int] = None
-    transaction_type: Optional[str] = None
-    amount_range: Optional[Dict[str, float]] = None
-    date_range: Optional[Dict[str, str]] = None
-    limit: Optional[int] = None
-    currency: Optional[str] = None
-    intent_hint: Optional[str] = None
-
 class QueryResult(BaseModel):
     intent: str = Field(default=BankingIntents.GENERAL)
     pipeline: List[Dict[str, Any]] = Field(default_factory=list)
@@ -92,7 +117,67 @@ class ContextualQuery(BaseModel):
     clarification_needed: Optional[str] = None
     resolved_query: Optional[str] = None
 
+class SpeculationStats:
+    """Counters for speculative filter extraction in process_query."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.balance_prefetch_used = 0
+        self.time_saved_seconds = 0.0
+        self.time_wasted_seconds = 0.0
+
+    def record(self, hit: bool, resolve_seconds: float, filters_seconds: float, wall_seconds: float) -> None:
+        """Record one speculation outcome with its stage timings."""
+        self.attempts += 1
+        if hit:
+            self.hits += 1
+            # Sequential execution would have cost resolve + filters
+            self.time_saved_seconds += max(0.0, resolve_seconds + filters_seconds - wall_seconds)
+        else:
+            self.misses += 1
+            # Speculative filters are discarded and recomputed
+            self.time_wasted_seconds += filters_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export counters with derived rates."""
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "success_rate": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+            "balance_prefetch_used": self.balance_prefetch_used,
+            "time_saved_seconds": round(self.time_saved_seconds, 3),
+            "time_wasted_seconds": round(self.time_wasted_seconds, 3),
+            "avg_time_saved_per_hit_ms": round(self.time_saved_seconds / self.hits * 1000, 1) if self.hits else 0.0
+        }
+
+speculation_stats = SpeculationStats()
+
 # === HELPER FUNCTIONS ====
+def _normalize_query(query: str) -> str:
+    """Normalize a query for equivalence checks (case, quotes, punctuation, spacing)."""
+    normalized = re.sub(r"[^\w\s%$.]", " ", (query or "").lower())
+    normalized = re.sub(r"\.(?!\d)", " ", normalized)
+    return " ".join(normalized.split())
+
+def queries_equivalent(original: str, resolved: str) -> bool:
+    """Check whether contextual resolution left the query effectively unchanged."""
+    return _normalize_query(original) == _normalize_query(resolved)
+
+_ANAPHORA_RE = re.compile(
+    r"\b(?:it|its|that|those|these|them|same|previous|above|again|what about|how about|"
+    r"wo|woh|uska|uski|unka|inka|inki|usmein|ismein|wahi)\b|^\s*(?:and|or|but|aur)\b",
+    re.IGNORECASE
+)
+
+def has_anaphora(message: str) -> bool:
+    """Check whether a message leans on earlier turns (pronouns, follow-ups like "and in july?")."""
+    return bool(_ANAPHORA_RE.search(message or ""))
+
 def month_to_number(month: str) -> int:
     """Convert month name to number."""
     return Months.NAMES_TO_NUMBERS.get(month.lower(), 1)
@@ -138,17 +223,56 @@ def _json_fix(raw: str) -> str:
     fixed = re.sub(r'\\(?!["\\/bfnrtu])', r'\\\\', fixed)
     return fixed
 
+# === LOCAL EXIT DETECTION ===
+def _phrase_alternation(phrases: List[str]) -> str:
+    return "|".join(re.escape(phrase).replace(r"\ ", r"\s+") for phrase in sorted(phrases, key=len, reverse=True))
+
+_EXIT_MESSAGE_RE = re.compile(
+    rf"^(?:(?:{_phrase_alternation(ExitCommands.POLITE_WORDS)})[\s,]+)*"
+    rf"(?:{_phrase_alternation(ExitCommands.COMMANDS + ExitCommands.PHRASES)})"
+    rf"(?:[\s,]+(?:{_phrase_alternation(ExitCommands.POLITE_WORDS)}))*$"
+)
+_EXIT_VOCABULARY_RE = re.compile(rf"\b(?:{_phrase_alternation(ExitCommands.VOCABULARY)})\b")
+_NON_EXIT_PHRASE_RE = re.compile(rf"\b(?:{_phrase_alternation(ExitCommands.NON_EXIT_PHRASES)})\b")
+_QUERY_WORD_RE = re.compile(rf"\b(?:{_phrase_alternation(ExitCommands.QUERY_WORDS)})\b")
+_OTP_RE = re.compile(RegexPatterns.OTP_PATTERN)
+_CNIC_RE = re.compile(RegexPatterns.CNIC_PATTERN)
+_NUMERIC_INPUT_RE = re.compile(r"^[\d\s\-.,+]+$")
+_CONFIRMATION_STAGES = {VerificationStages.TRANSFER_CONFIRMATION_PENDING}
+_OTP_STAGES = {VerificationStages.OTP_PENDING, VerificationStages.TRANSFER_OTP_PENDING}
+
+def detect_exit_locally(user_message: str, verification_stage: Optional[str] = None) -> Tuple[Optional[bool], str]:
+    """Decide exit intent without the LLM; returns (None, reason) when the message is ambiguous."""
+    text = " ".join(re.sub(r"[!?.;:\"]+$", "", (user_message or "").strip().lower()).split())
+    if not text:
+        return False, "empty"
+    if _EXIT_MESSAGE_RE.match(text):
+        return True, "exit_command"
+    if _NUMERIC_INPUT_RE.match(text) or _CNIC_RE.search(text):
+        return False, "otp_input" if verification_stage in _OTP_STAGES and _OTP_RE.match(text) else "numeric_input"
+    if text in ConfirmationWords.POSITIVE:
+        return False, "confirmation"
+    if verification_stage in _CONFIRMATION_STAGES and text in ConfirmationWords.NEGATIVE:
+        return False, "confirmation"
+    if _EXIT_VOCABULARY_RE.search(_NON_EXIT_PHRASE_RE.sub(" ", text)):
+        return None, "ambiguous"
+    if classify_keyword_tiers(text)[0] in (ALLOW_CORE, ALLOW_ASSISTANT) or _QUERY_WORD_RE.search(text):
+        return False, "banking_query"
+    return None, "unknown_phrasing"  # Exit phrasings outside the vocabulary still reach the classifier
+
 
 class BankingAIAgent:
     def __init__(self, mongodb_uri: str = MongoConfig.DEFAULT_URI, db_name: str = MongoConfig.DEFAULT_DB_NAME):
         """Initialize the Banking AI Agent with MongoDB connection."""
-        self.client = MongoClient(mongodb_uri)
+        self.client = MongoClient(mongodb_uri, event_listeners=[mongo_trace_listener])
         self.db = self.client[db_name]
         self.collection = self.db[MongoConfig.TRANSACTIONS_COLLECTION]
         self.backend_url = WebhookConfig.BACKEND_URL
         # Use LangChain memory directly without ConversationChain
         self.user_memories: Dict[str, ConversationBufferMemory] = {}
         self.llm = llm  # Make the global llm accessible as instance attribute
+        self.tool_agent = ToolCallingAgent(llm, self.collection)
+        self._format_shadow_tasks: Set[asyncio.Task] = set()
 
     def extract_json_from_response(self, raw: str) -> Optional[Any]:
         """Extract the first JSON value from an LLM reply."""
@@ -187,6 +311,7 @@ class BankingAIAgent:
             del self.user_memories[account_number]
             logger.info(f"Cleared memory for account: {account_number}")
     
+    @traced_stage("history_summary")
     def _get_context_summary(self, chat_history: List) -> str:
         """Get an enhanced summary of recent conversation with structured data extraction."""
         if not chat_history:
@@ -225,149 +350,38 @@ class BankingAIAgent:
         full_context = "\n".join(conversation_flow)
         
         # Enhanced summarization that preserves banking context
-        if len(full_context) > Limits.MAX_CONTEXT_LENGTH:
+        if history_budget.total_tokens(conversation_flow) > HistoryBudgetConfig.SECTION_BUDGETS["history_summary"]:
+            # Short on time: trimming keeps the most relevant turns without an LLM call
+            if not allow_optional_stage("history_summary"):
+                return history_budget.fit(full_context, "history_summary")
             try:
-                enhanced_summary_prompt = f"""
-                Create a structured summary of this banking conversation that preserves ALL important context for future queries.
-
-                CONVERSATION:
-                {full_context}
-
-                Create a summary with these sections:
-                1. RECENT BALANCE INFO: Any balance amounts, account numbers mentioned
-                2. TRANSACTION DATA: Recent transactions shown (amounts, descriptions, dates)
-                3. SPENDING ANALYSIS: Any spending totals, categories, comparisons discussed
-                4. TRANSFER CONTEXT: Any transfer amounts, recipients, percentages mentioned
-                5. USER PATTERNS: What the user typically asks about or references
-                6. PENDING ACTIONS: Any incomplete requests or multi-step processes
-
-                Focus on preserving:
-                - Exact amounts, percentages, and calculations
-                - Specific transaction details and timeframes
-                - Any "that amount", "those transactions" references
-                - Transfer recipients and amounts
-                - Categories and spending breakdowns
-
-                Keep it detailed enough for contextual query resolution.
-                """
-                response = llm.invoke([SystemMessage(content=enhanced_summary_prompt)])
+                response = llm.invoke(
+                    history_summary_prompt.messages(conversation=full_context),
+                    timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+                )
                 return response.content.strip()
             except Exception as e:
                 logger.error(f"Error in enhanced summarization: {e}")
-                return full_context[:Limits.MAX_CONTEXT_LENGTH] + "..."
+                return history_budget.fit(full_context, "history_summary")
         
         return full_context
 
+    @traced_stage("resolution")
     def resolve_contextual_query(self, user_message: str, conversation_history: str) -> str:
         """Enhanced contextual query resolution with multi-turn conversation analysis."""
         try:
             if not conversation_history or len(conversation_history.strip()) < 10:
                 return user_message  # No context to work with
             
-            # Enhanced prompt with better multi-turn handling
-            enhanced_contextual_prompt = f"""
-            You are an advanced query resolver for banking conversations. Analyze the ENTIRE conversation history to resolve contextual queries that may reference information from multiple previous exchanges.
-
-            FULL CONVERSATION HISTORY:
-            {conversation_history}
-
-            CURRENT CONTEXTUAL QUERY: "{user_message}"
-            CRITICAL REQUIREMENT: Return ONLY the resolved standalone query - NO explanations, NO reasoning, just the final query.
-
-            ADVANCED RESOLUTION RULES:
-
-            1. MULTI-TURN CONTEXT ANALYSIS:
-            - Look across previous messages, not just the last one
-            - Track evolving context (e.g., user asked about transactions, then spending, now asking "what about that category")
-            - Identify chains of related queries and their evolution
-            - emphasize on latest entity in case of multiple references (like if 2nd last transaction talks about july and last one talks about june, then resolve to june)
-
-            2. REFERENCE RESOLUTION PATTERNS:
-
-            a) TRANSACTION REFERENCES:
-            - "which one" → find most recent transaction list
-            - "that transaction" → identify specific transaction mentioned
-            - "those amounts" → find all amounts in recent context
-            - "the expensive one" → find highest amount mentioned
-
-            b) BALANCE & TRANSFER REFERENCES:
-            - "that balance" → find most recent balance mentioned
-            - "1% of that" → calculate percentage of most recent amount
-            - "from that account" → identify account number in context
-            - "to that person" → find recipient name in conversation
-
-            c) CATEGORY & SPENDING REFERENCES:
-            - "food spending" after showing categories → reference food category data
-            - "that month" → identify timeframe from previous discussion
-            - "those expenses" → find expense list from conversation
-
-            d) CROSS-MESSAGE REFERENCES:
-            - User: "show transactions" → Assistant: [shows 5 transactions] → User: "what about june ones" 
-            - Resolve: "show me transactions for June" (combining transaction request + timeframe)
-
-            3. CONTEXT CHAIN EXAMPLES:
-
-            Message 1: "show my balance" → "Balance: $1,500"
-            Message 2: "show my spending" → "June spending: $800"  
-            Message 3: "can I afford 1000 with that" 
-            → Resolve: "can I afford $1000 based on my current balance of $1500"
-
-            Message 1: "transaction history" → "Last 5 transactions: Netflix $15, Grocery $50..."
-            Message 2: "which category spent most" → "Grocery category spent $200 total"
-            Message 3: "show me more of those" 
-            → Resolve: "show me more grocery transactions from my transaction history"
-
-            4. PERCENTAGE & CALCULATION HANDLING:
-            - Always calculate percentages when referenced
-            - Include both percentage and calculated amount
-            - Reference the original amount being calculated from
-
-            5. MULTI-LANGUAGE SUPPORT:
-            - "inka total" = "their total" 
-            - "kitna" = "how much"
-            - "usmein se" = "from those"
-            - Convert to English while preserving intent
-
-            6. INCOMPLETE TRANSFER RESOLUTION:
-            Message 1: "transfer 100" → "Need recipient"
-            Message 2: "to john"
-            → Resolve: "transfer 100 to john" (combining amount + recipient)
-
-            7. EVOLVING CONTEXT:
-            - Track how user's focus shifts (balance → transactions → specific category)
-            - Maintain context of what data was last shown
-            - Understand follow-up questions in context of previous answers
-
-            ENHANCED EXAMPLES:
-
-            History: 
-            Human: "show my transactions"
-            Assistant: "Here are your last 4 transactions: 1. Netflix $15, 2. Grocery $77, 3. Gas $45, 4. Coffee $8"
-            Human: "spending breakdown"  
-            Assistant: "Entertainment: $15, Food: $85, Transportation: $45"
-            Query: "food wala expand karo"
-            → "show me detailed breakdown of food category spending including grocery and coffee transactions"
-
-            History:
-            Human: "my balance"
-            Assistant: "Account Balance: PKR 245,600 as of July 29"
-            Human: "recent spending"
-            Assistant: "July spending: PKR 25,000 across 15 transactions"  
-            Query: "kitna bacha hai percentage mein"
-            → "what percentage of my PKR 245,600 balance remains after PKR 25,000 spending"
-
-            RESOLUTION STRATEGY:
-            1. Identify ALL relevant context from conversation history
-            2. Determine what "that", "those", "it", "them" refer to specifically
-            3. Include exact amounts, names, timeframes from context
-            4. Calculate any percentages or math operations
-            5. Preserve user's original intent and language preference
-            6. Create a complete, standalone query
-
-            RESOLVED STANDALONE QUERY:
-            """
+            # A self-contained message is usable as-is when the turn is short on time
+            if not has_anaphora(user_message) and not allow_optional_stage("contextual_resolution"):
+                return user_message
             
-            response = llm.invoke([SystemMessage(content=enhanced_contextual_prompt)])
+            # Enhanced prompt with better multi-turn handling
+            response = llm.invoke(contextual_resolution_prompt.messages(
+                conversation_history=history_budget.fit(conversation_history, "contextual_resolution", user_message),
+                user_message=user_message
+            ), timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS))
             resolved_query = response.content.strip()
             
             # Remove any quotes or extra formatting
@@ -384,41 +398,11 @@ class BankingAIAgent:
     def _extract_banking_entities_from_history(self, conversation_history: str) -> Dict[str, Any]:
         """Extract banking entities and context from conversation history for better resolution."""
         try:
-            entity_extraction_prompt = f"""
-            Extract key banking entities and context from this conversation history for contextual query resolution.
-
-            CONVERSATION HISTORY:
-            {conversation_history}
-
-            Extract and return JSON with:
-            {{
-                "balances": [
-                    {{"amount": 1500, "currency": "USD", "date": "recent", "context": "current balance"}}
-                ],
-                "transactions": [
-                    {{"description": "Netflix", "amount": 15, "type": "debit", "mentioned_when": "recent"}}
-                ],
-                "amounts_mentioned": [
-                    {{"value": 1000, "currency": "USD", "context": "affordability question"}}
-                ],
-                "recipients": ["john", "ali raza"],
-                "categories": [
-                    {{"name": "food", "amount": 85, "context": "spending breakdown"}}
-                ],
-                "timeframes": ["june", "last month", "recent"],
-                "pending_transfers": [
-                    {{"amount": 100, "recipient": "john", "status": "needs_confirmation"}}
-                ],
-                "user_focus": "last thing user was asking about",
-                "conversation_flow": "summary of how conversation evolved"
-            }}
-
-            Focus on preserving exact amounts, names, and contextual relationships.
-            """
-            
-            response = llm.invoke([SystemMessage(content=entity_extraction_prompt)])
-            entities = self.extract_json_from_response(response.content)
-            return entities if entities else {}
+            response = llm.invoke(entity_extraction_prompt.messages(
+                conversation_history=history_budget.fit(conversation_history, "entity_extraction")
+            ), **llm_kwargs(EntityExtraction))
+            entities = parse_structured(response.content, EntityExtraction, "entities", self.extract_json_from_response)
+            return entities.model_dump() if entities else {}
             
         except Exception as e:
             logger.error(f"Error extracting banking entities: {e}")
@@ -427,25 +411,10 @@ class BankingAIAgent:
     def _resolve_with_entity_context(self, user_message: str, entities: Dict[str, Any]) -> str:
         """Resolve query using extracted banking entities."""
         try:
-            entity_resolution_prompt = f"""
-            Resolve this contextual query using extracted banking entities from conversation history.
-
-            USER QUERY: "{user_message}"
-            
-            AVAILABLE CONTEXT:
-            {json.dumps(entities, indent=2)}
-
-            Resolution rules:
-            1. Map references like "that", "those", "it" to specific entities
-            2. Calculate percentages using actual amounts from context
-            3. Combine incomplete information (amount + recipient, etc.)
-            4. Reference specific timeframes, categories, or transactions
-            5. Preserve user's intent while making query standalone
-
-            Return the resolved standalone query:
-            """
-            
-            response = llm.invoke([SystemMessage(content=entity_resolution_prompt)])
+            response = llm.invoke(entity_resolution_prompt.messages(
+                user_message=user_message,
+                entities=json.dumps(entities, indent=2)
+            ))
             return response.content.strip()
             
         except Exception as e:
@@ -453,38 +422,30 @@ class BankingAIAgent:
             return user_message
 
 
-    async def detect_exit_intent_with_llm(self, user_message: str) -> bool:
+    @traced_stage("exit_check")
+    async def detect_exit_intent_with_llm(self, user_message: str, verification_stage: Optional[str] = None) -> bool:
         """Use LLM to detect if user wants to exit/logout, even in natural language."""
-        try:
-            exit_detection_prompt = f"""
-            You are an exit intent detector for a banking application. Analyze if the user wants to exit, logout, end session, or quit.
-
-            User message: "{user_message}"
-
-            Exit Intent Indicators:
-            - Direct commands: "exit", "quit", "logout", "end", "bye", "goodbye"
-            - Natural phrases: "ok exit", "I want to exit", "please logout", "end session", "log me out"
-            - Contextual: "I'm done", "that's all", "finish", "close", "stop"
-            - Polite: "thank you, exit", "thanks, bye", "good day, logout"
-
-            NOT Exit Intent:
-            - Banking queries: "exit strategy", "quit spending", "end of month"
-            - General conversation: "exit the building", "quit my job"
-            - Questions: "how do I exit?", "what does exit mean?"
-
-            Rules:
-            1. If the message contains clear exit/logout/quit/end intent → return "YES"
-            2. If it's a banking query or general conversation → return "NO"
-            3. When in doubt, lean towards "NO" for security
+        is_exit, reason = detect_exit_locally(user_message, verification_stage)
+        if is_exit is not None:
+            logger.info({
+                "action": "exit_intent_fast_path",
+                "is_exit": is_exit,
+                "reason": reason,
+                "verification_stage": verification_stage
+            })
+            return is_exit
 
-            Return ONLY "YES" or "NO".
-            """
+        local_label = local_classifiers.classify("exit", user_message)
+        if local_label is not None:
+            return local_label == "YES"
 
-            response = await self.llm.ainvoke([SystemMessage(content=exit_detection_prompt)])
+        try:
+            response = await self.llm.ainvoke(exit_detection_prompt.messages(user_message=user_message))
             result = response.content.strip().upper()
             
             # Log the detection for debugging
             logger.info(f"Exit intent detection: '{user_message}' → {result}")
+            log_llm_decision("exit", user_message, "YES" if result == "YES" else "NO")
             
             return result == "YES"
             
@@ -502,37 +463,19 @@ class BankingAIAgent:
             
             return is_exit
     
+    @traced_stage("cancel_check")
     async def detect_cancel_transfer_intent_with_llm(self, user_message: str) -> bool:
         """Use LLM to detect if user wants to cancel the current transfer process."""
-        try:
-            cancel_detection_prompt = f"""
-            You are analyzing if a user wants to cancel their current money transfer process.
-
-            User message: "{user_message}"
-
-            Cancel Transfer Intent Indicators:
-            - Direct commands: "cancel", "cancel transfer", "cancel transaction", "stop", "abort"
-            - Natural phrases: "leave this", "forget it", "never mind", "don't want to", "changed my mind"
-            - Contextual: "go back", "exit transfer", "stop transfer", "cancel this process"
-            - Polite: "please cancel", "can you cancel", "I don't want to proceed"
+        local_label = local_classifiers.classify("cancel", user_message)
+        if local_label is not None:
+            return local_label == "YES"
 
-            NOT Cancel Intent:
-            - Banking queries: "cancel my card", "cancel subscription" (different context)
-            - Asking questions: "how do I cancel?", "what happens if I cancel?"
-            - Transfer details: "cancel the Netflix payment" (referring to other transactions)
-
-            Rules:
-            1. If the message contains clear intent to stop/cancel the CURRENT transfer process → return "YES"
-            2. If it's asking about other cancellations or just questions → return "NO"
-            3. When in doubt about transfer cancellation, lean towards "YES" for user safety
-
-            Return ONLY "YES" or "NO".
-            """
-
-            response = await self.llm.ainvoke([SystemMessage(content=cancel_detection_prompt)])
+        try:
+            response = await self.llm.ainvoke(cancel_detection_prompt.messages(user_message=user_message))
             result = response.content.strip().upper()
             
             logger.info(f"Cancel transfer intent detection: '{user_message}' → {result}")
+            log_llm_decision("cancel", user_message, "YES" if result == "YES" else "NO")
             
             return result == "YES"
             
@@ -785,6 +728,7 @@ class BankingAIAgent:
         
             
     # === QUERY PIPELINE FLOW ===
+    @traced_stage("intent")
     def detect_intent_from_filters(self, user_message: str, filters: FilterExtraction) -> str:
         """Detect intent using LLM for more flexible understanding."""
         try:
@@ -797,13 +741,18 @@ class BankingAIAgent:
                 return BankingIntents.SPENDING_ANALYSIS
             elif intent_hint == "balance_query":
                 return BankingIntents.BALANCE_INQUIRY
+
+            local_intent = local_classifiers.classify("intent", user_message)
+            if local_intent is not None:
+                return local_intent
+
+            if budget_exhausted("intent", DeadlineConfig.RESPONSE_RESERVE_SECONDS):
+                return BankingIntents.GENERAL
             
-            response = llm.invoke([
-                SystemMessage(content=intent_prompt.format(
-                    user_message=user_message,
-                    filters=json.dumps(filters.dict())
-                ))
-            ])
+            response = llm.invoke(intent_prompt.messages(
+                user_message=user_message,
+                filters=json.dumps(filters.dict())
+            ), timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS))
             
             detected_intent = response.content.strip().lower()
             
@@ -816,13 +765,13 @@ class BankingAIAgent:
                 BankingIntents.GENERAL
             ]
             
-            if detected_intent in valid_intents:
-                return detected_intent
-            else:
-                for intent in valid_intents:
-                    if intent in detected_intent:
-                        return intent
-                return BankingIntents.GENERAL
+            if detected_intent not in valid_intents:
+                detected_intent = next(
+                    (intent for intent in valid_intents if intent in detected_intent),
+                    BankingIntents.GENERAL
+                )
+            log_llm_decision("intent", user_message, detected_intent)
+            return detected_intent
                 
         except Exception as e:
             logger.error({
@@ -832,29 +781,28 @@ class BankingAIAgent:
             })
             return BankingIntents.GENERAL
 
+    @traced_stage("filters")
     def extract_filters_with_llm(self, user_message: str) -> FilterExtraction:
         """Use LLM to extract filters from user query with enhanced date handling."""
         try:
-            response = llm.invoke([SystemMessage(content=filter_extraction_prompt.format(
-                user_message=user_message,
-                current_date=datetime.now().strftime("%Y-%m-%d")
-            ))])
-            
-            try:
-                filters_obj = self.extract_json_from_response(response.content)
-                if filters_obj is None:
-                    raise ValueError("Could not parse filter JSON")
-                filters = FilterExtraction(**filters_obj)
-                logger.info(f"LLM extracted filters: {filters.dict()}")
-                return filters
-            
-            except (json.JSONDecodeError, TypeError) as e:
+            response = llm.invoke(filter_extraction_prompt.messages(
+                user_message=normalize_numbers(user_message),
+                current_date=datetime.now().strftime("%Y-%m-%d"),
+                examples=filter_examples_block(user_message)
+            ), timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS),
+               **llm_kwargs(FilterExtraction))
+            
+            filters = parse_structured(response.content, FilterExtraction, "filters", self.extract_json_from_response)
+            if filters is None:
                 logger.error({
                     "action": "filter_extraction_parse_error",
-                    "error": str(e),
                     "raw_response": response.content
                 })
+                structured_output_stats.record("filters", "fallback")
                 return FilterExtraction()
+
+            logger.info(f"LLM extracted filters: {filters.dict()}")
+            return filters
                 
         except Exception as e:
             logger.error({
@@ -863,23 +811,28 @@ class BankingAIAgent:
             })
             return FilterExtraction()
 
+    @traced_stage("pipeline")
     def generate_pipeline_from_filters(self, filters: FilterExtraction, intent: str, account_number: str) -> List[Dict[str, Any]]:
         """Generate MongoDB pipeline from extracted filters using LLM."""
+        # Out of time: the rule-based pipeline needs no LLM call
+        if budget_exhausted("pipeline", DeadlineConfig.RESPONSE_RESERVE_SECONDS):
+            return self._generate_fallback_pipeline(filters, intent, account_number)
         try:
-            response = llm.invoke([
-                SystemMessage(content=pipeline_generation_prompt.format(
-                    filters=json.dumps(filters.dict()),
-                    intent=intent,
-                    account_number=account_number
-                ))
-            ])
-            
-            cleaned_response = self.extract_json_from_response(response.content)
+            response = llm.invoke(pipeline_generation_prompt.messages(
+                filters=json.dumps(filters.dict()),
+                intent=intent,
+                account_number=account_number,
+                examples=pipeline_examples_block(intent, filters.dict(), account_number)
+            ), timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS),
+               **llm_kwargs(PipelineOutput))
+            
+            output = parse_structured(response.content, PipelineOutput, "pipeline", self.extract_json_from_response)
         
-            if not cleaned_response:
+            if not output or not output.pipeline:
+                structured_output_stats.record("pipeline", "fallback")
                 return self._generate_fallback_pipeline(filters, intent, account_number)
             
-            pipeline = cleaned_response
+            pipeline = output.pipeline
             jsonschema.validate(pipeline, PIPELINE_SCHEMA)
             return pipeline
             
@@ -888,26 +841,33 @@ class BankingAIAgent:
                 "action": "generate_pipeline_from_filters",
                 "error": str(e)
             })
+            structured_output_stats.record("pipeline", "fallback")
             return self._generate_fallback_pipeline(filters, intent, account_number)
 
     async def _execute_llm_pipeline(self, account_number: str, pipeline: List[Dict[str, Any]], 
                           user_message: str, first_name: str, memory: ConversationBufferMemory, 
-                          intent: str, is_balance_query: bool = False) -> str:
+                          intent: str, is_balance_query: bool = False,
+                          prefetched_data: Optional[Dict[str, Any]] = None) -> str:
         """Execute LLM-generated pipeline and format response naturally."""
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.backend_url}/execute_pipeline",
-                    json={"account_number": account_number, "pipeline": pipeline}
-                )
-                response.raise_for_status()
-                data = response.json()
+                if prefetched_data is not None:
+                    data = prefetched_data
+                else:
+                    with trace_stage("db", endpoint="/execute_pipeline"):
+                        response = await client.post(
+                            f"{self.backend_url}/execute_pipeline",
+                            json={"account_number": account_number, "pipeline": pipeline},
+                            timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS)
+                        )
+                        response.raise_for_status()
+                        data = response.json()
                 
                 # Set appropriate context state for balance queries
                 if is_balance_query:
                     context_state = ContextStates.BALANCE_INQUIRY
                     conversation_history = self._get_context_summary(memory.chat_memory.messages)
-                    response_text = await self.generate_natural_response(context_state, data, user_message, first_name, conversation_history)
+                    response_text = await self.generate_natural_response(context_state, data, user_message, first_name, conversation_history, intent=intent)
                     
                     # ADD THIS: Update memory for balance queries - CRITICAL FIX
                     memory.chat_memory.add_user_message(user_message)
@@ -933,6 +893,75 @@ class BankingAIAgent:
 
 
 
+    @traced_stage("db")
+    def _fetch_latest_balance(self, account_number: str) -> Optional[Dict[str, Any]]:
+        """Read the latest balance in the same envelope /execute_pipeline returns."""
+        latest_txn = self.collection.find_one(
+            {DatabaseFields.ACCOUNT_NUMBER: account_number},
+            {DatabaseFields.ACCOUNT_BALANCE: 1, DatabaseFields.DATE: 1, DatabaseFields.ACCOUNT_CURRENCY: 1},
+            sort=[(DatabaseFields.DATE, -1), ("_id", -1)]
+        )
+        if not latest_txn:
+            return None
+
+        date_value = latest_txn.get(DatabaseFields.DATE)
+        row = {
+            "_id": str(latest_txn.get("_id")),
+            DatabaseFields.ACCOUNT_BALANCE: latest_txn.get(DatabaseFields.ACCOUNT_BALANCE, 0),
+            DatabaseFields.DATE: date_value.isoformat() if isinstance(date_value, datetime) else date_value,
+            DatabaseFields.ACCOUNT_CURRENCY: latest_txn.get(DatabaseFields.ACCOUNT_CURRENCY, Currencies.PKR_LOWER)
+        }
+        return {"status": StatusMessages.SUCCESS, "data": [row], "count": 1}
+
+    async def _speculative_resolve_and_extract(self, user_message: str, conversation_history: str,
+                                               account_number: str) -> Tuple[str, Optional[FilterExtraction], Optional[Dict[str, Any]]]:
+        """Run contextual resolution, filter extraction on the raw message and a balance prefetch concurrently.
+
+        Returns (resolved_query, filters, prefetched_balance). filters is None when the
+        resolved query differs from the raw message and the speculative result was discarded.
+        """
+        timings = {}
+
+        async def timed(name, func, *args):
+            started = time.perf_counter()
+            try:
+                return await asyncio.to_thread(func, *args)
+            finally:
+                timings[name] = time.perf_counter() - started
+
+        wall_started = time.perf_counter()
+        resolved_query, speculative_filters, prefetched_balance = await asyncio.gather(
+            timed("resolve", self.resolve_contextual_query, user_message, conversation_history),
+            timed("filters", self.extract_filters_with_llm, user_message),
+            timed("balance", self._fetch_latest_balance, account_number),
+            return_exceptions=True
+        )
+        wall_seconds = time.perf_counter() - wall_started
+
+        if isinstance(resolved_query, Exception):
+            logger.error(f"Speculative contextual resolution failed: {resolved_query}")
+            resolved_query = user_message
+        if isinstance(prefetched_balance, Exception):
+            logger.error(f"Balance prefetch failed: {prefetched_balance}")
+            prefetched_balance = None
+        if isinstance(speculative_filters, Exception):
+            logger.error(f"Speculative filter extraction failed: {speculative_filters}")
+            speculation_stats.errors += 1
+            return resolved_query, None, prefetched_balance
+
+        hit = queries_equivalent(user_message, resolved_query)
+        speculation_stats.record(hit, timings.get("resolve", 0.0), timings.get("filters", 0.0), wall_seconds)
+
+        logger.info({
+            "action": "speculative_filter_extraction",
+            "hit": hit,
+            "resolve_ms": round(timings.get("resolve", 0.0) * 1000, 1),
+            "filters_ms": round(timings.get("filters", 0.0) * 1000, 1),
+            "wall_ms": round(wall_seconds * 1000, 1)
+        })
+
+        return resolved_query, speculative_filters if hit else None, prefetched_balance
+
     async def process_query(self, user_message: str, account_number: str, first_name: str) -> str:
         """Enhanced process query with contextual awareness (exit detection handled at webhook level)."""
         memory = self.get_user_memory(account_number)
@@ -957,8 +986,8 @@ class BankingAIAgent:
             memory.chat_memory.add_ai_message(response)
             return response
         
-        # Check for currency conversion requests BEFORE non-banking filter
-        if self.detect_currency_conversion_intent(user_message, conversation_history):
+        # Check for currency conversion requests BEFORE non-banking filter (tool mode has a conversion tool)
+        if not ToolAgentConfig.ENABLED and self.detect_currency_conversion_intent(user_message, conversation_history):
             logger.info("Currency conversion intent detected for: " + user_message)
             response = await self.handle_currency_conversion(user_message, conversation_history, first_name, memory)
             memory.chat_memory.add_user_message(user_message)
@@ -973,9 +1002,19 @@ class BankingAIAgent:
             memory.chat_memory.add_ai_message(response)
             return response
 
+        if ToolAgentConfig.ENABLED:
+            return await self._process_query_with_tools(user_message, account_number, first_name, memory, conversation_history)
+
         # Resolve contextual queries into standalone queries
         original_message = user_message
-        resolved_query = self.resolve_contextual_query(user_message, conversation_history)
+        speculative_filters = None
+        prefetched_balance = None
+        if PipelineConfig.SPECULATIVE_EXECUTION:
+            resolved_query, speculative_filters, prefetched_balance = await self._speculative_resolve_and_extract(
+                user_message, conversation_history, account_number
+            )
+        else:
+            resolved_query = self.resolve_contextual_query(user_message, conversation_history)
         
         if resolved_query != original_message:
             logger.info(f"Using resolved query for processing: '{resolved_query}'")
@@ -987,8 +1026,13 @@ class BankingAIAgent:
         try:
             logger.info("Attempting context-aware LLM-first approach")
             
-            # Step 1: Extract filters using resolved query
-            filters = self.extract_filters_with_llm(processing_message)
+            # Step 1: Extract filters using resolved query (reuse speculative result when still valid)
+            if speculative_filters is not None:
+                filters = speculative_filters
+            elif budget_exhausted("filters", DeadlineConfig.RESPONSE_RESERVE_SECONDS):
+                return self.budget_fallback(first_name)
+            else:
+                filters = self.extract_filters_with_llm(processing_message)
             logger.info(f"LLM extracted filters from resolved query: {filters.dict()}")
             
             # Step 2: Detect intent using resolved query
@@ -997,6 +1041,20 @@ class BankingAIAgent:
             
             # Step 3: Handle based on intent
             if intent == BankingIntents.BALANCE_INQUIRY:
+                # Current balance needs no pipeline when it was prefetched
+                if prefetched_balance and not (filters.date_range or filters.month) and "average" not in processing_message.lower():
+                    speculation_stats.balance_prefetch_used += 1
+                    return await self._execute_llm_pipeline(
+                        account_number=account_number,
+                        pipeline=[],
+                        user_message=user_message,
+                        first_name=first_name,
+                        memory=memory,
+                        intent=intent,
+                        is_balance_query=True,
+                        prefetched_data=prefetched_balance
+                    )
+
                 # Generate pipeline for balance inquiry
                 pipeline = self.generate_pipeline_from_filters(filters, intent, account_number)
                 return await self._execute_llm_pipeline(
@@ -1052,6 +1110,7 @@ class BankingAIAgent:
             # FALLBACK PATH with resolved query
             try:
                 logger.info("Using contextual fallback approach")
+                structured_output_stats.record("reasoning", "fallback")
                 reasoning_result = await self._reason_about_query(processing_message, memory, account_number, first_name)
                 
                 # Handle with fallback methods using original message for response
@@ -1080,6 +1139,28 @@ class BankingAIAgent:
 
 
 
+    @traced_stage("tool_agent")
+    async def _process_query_with_tools(self, user_message: str, account_number: str, first_name: str,
+                                        memory: ConversationBufferMemory, conversation_history: str) -> str:
+        """Tool-calling mode: the model fetches the data it needs through typed tools and answers directly."""
+        result = None
+        try:
+            result = await self.tool_agent.run(user_message, account_number, first_name, conversation_history)
+        except Exception as e:
+            logger.error({"action": "tool_agent_failed", "error": str(e), "user_message": user_message})
+
+        if result is not None and result.transfer_requested:
+            response = await self._handle_money_transfer_with_otp(account_number, user_message, first_name, memory)
+        elif result is not None and result.response:
+            response = result.response
+        else:
+            context_state = ContextStates.ERROR_OCCURRED
+            response = await self.generate_natural_response(context_state, {"error": "tool_agent_no_answer"}, user_message, first_name, conversation_history)
+
+        memory.chat_memory.add_user_message(user_message)
+        memory.chat_memory.add_ai_message(response)
+        return response
+
     async def handle_transfer_cancellation_during_process(self, first_name: str, stage: str) -> str:
         """Handle transfer cancellation during the transfer process (OTP or confirmation stage)."""
         try:
@@ -1144,54 +1225,25 @@ class BankingAIAgent:
             # Get conversation history for contextual transfers
             conversation_history = self._get_context_summary(memory.chat_memory.messages)
 
-            # Enhanced transfer prompt with context
-            enhanced_transfer_prompt = f"""
-                    Extract transfer details from the query, using conversation history for context. Handle multi-turn transfer conversations.
-
-                    CONVERSATION HISTORY:
-                    {conversation_history}
-
-                    CURRENT TRANSFER REQUEST: "{user_message}"
-
-                    Rules:
-                    - If message mentions percentages of "that" or "it", calculate based on amounts in conversation history
-                    - Extract exact amount, currency, and recipient
-                    - For "1% of that $1,554.41" → amount should be 15.54, currency USD
-                    - For "transfer 10% of that PKR amount" → calculate 10% of the PKR amount mentioned
-                    - If only recipient is provided ("to ahmed abrar"), look for amount/percentage in recent conversation
-                    - If only amount is provided, look for recipient in recent conversation
-                    - Combine information from multiple recent messages to complete transfer details
-
-                    Enhanced Examples:
-                    History: "Here's your current account balance: USD 1,554.41"
-                    Current: "ok transfer 1% of that" → {{"amount": 15.54, "currency": "USD", "recipient": null}}
-
-                    History: "transfer 1% of 1554.41 USD which is 15.54 USD"  
-                    Current: "to ahmed abrar" → {{"amount": 15.54, "currency": "USD", "recipient": "ahmed abrar"}}
-
-                    History: "send 100 USD"
-                    Current: "to john smith" → {{"amount": 100, "currency": "USD", "recipient": "john smith"}}
-
-                    History: "Assistant: I need more details. User: transfer 50 PKR"
-                    Current: "to sarah" → {{"amount": 50, "currency": "PKR", "recipient": "sarah"}}
-
-                    Multi-turn completion rules:
-                    - Look at last 3-4 conversation turns for missing transfer details
-                    - If current message only has recipient, search history for amount
-                    - If current message only has amount, search history for recipient
-                    - Prioritize most recent complete transfer attempt
+            # Enhanced transfer prompt with context; amounts such as "5 hazaar" or "1,50,000" arrive as plain numbers
+            normalized_message = normalize_numbers(user_message)
+            logger.info(f"🔍 TRANSFER DEBUG - Using enhanced prompt for: {normalized_message}")
 
-                    Return JSON: {{"amount": number, "currency": string, "recipient": string}}
-                    Set null for missing fields, but try to complete from conversation history first.
-                    """
-            logger.info(f"🔍 TRANSFER DEBUG - Using enhanced prompt for: {user_message}")
-
-            response = await llm.ainvoke([SystemMessage(content=enhanced_transfer_prompt)])
+            response = await llm.ainvoke(transfer_extraction_prompt.messages(
+                conversation_history=history_budget.fit(conversation_history, "transfer_extraction", normalized_message),
+                user_message=normalized_message
+            ), **llm_kwargs(TransferDetails))
 
             logger.info(f"🔍 TRANSFER DEBUG - LLM response: {response.content}") 
 
-            transfer_details = self.extract_json_from_response(response.content)
-            transfer_details = self.extract_json_from_response(response.content)
+            details = parse_structured(response.content, TransferDetails, "transfer", self.extract_json_from_response)
+            transfer_details = details.model_dump(exclude_none=True) if details else None
+
+            # The LLM found no amount: a message with exactly one amount supplies it
+            amounts = amounts_in(normalized_message)
+            if transfer_details and not transfer_details.get("amount") and len(amounts) == 1:
+                logger.info(f"Transfer amount missing from extraction, using message amount {amounts[0]}")
+                transfer_details["amount"] = parse_amount(amounts[0])
 
             # If transfer details are incomplete, try to complete from conversation history
             if not transfer_details or not all([transfer_details.get("amount"), transfer_details.get("recipient")]):
@@ -1370,10 +1422,10 @@ class BankingAIAgent:
         try:
             from prompts import currency_conversion_intent_prompt
             
-            response = llm.invoke([SystemMessage(content=currency_conversion_intent_prompt.format(
+            response = llm.invoke(currency_conversion_intent_prompt.messages(
                 user_message=user_message,
-                conversation_history=conversation_history
-            ))])
+                conversation_history=history_budget.fit(conversation_history, "currency", user_message)
+            ))
             
             result = response.content.strip().upper()
             logger.info(f"Currency conversion intent detection: {result} for message: '{user_message}'")
@@ -1391,12 +1443,14 @@ class BankingAIAgent:
             from currency_service import currency_converter
             
             # Extract conversion details using LLM
-            response = await llm.ainvoke([SystemMessage(content=currency_extraction_prompt.format(
+            response = await llm.ainvoke(currency_extraction_prompt.messages(
                 user_message=user_message,
-                conversation_history=conversation_history
-            ))])
+                conversation_history=history_budget.fit(conversation_history, "currency", user_message)
+            ), **llm_kwargs(CurrencyConversionDetails))
             
-            conversion_details = self.extract_json_from_response(response.content)
+            details = parse_structured(response.content, CurrencyConversionDetails, "currency",
+                                       self.extract_json_from_response)
+            conversion_details = details.model_dump(exclude_none=True) if details else None
             
             if not conversion_details:
                 context_state = "Could not understand currency conversion request, asking for clarification"
@@ -1465,10 +1519,45 @@ class BankingAIAgent:
             )
 
     # === NATURAL LANGUAGE RESPONSE GENERATION ===
-    async def _determine_response_format_with_llm(self, user_message: str, data: Any, context_state: str) -> str:
-        """Use LLM to determine appropriate response format based on query complexity and data."""
+    @traced_stage("formatting")
+    async def _determine_response_format(self, user_message: str, data: Any, context_state: str, intent: Optional[str] = None) -> str:
+        """Choose the response format with local rules, asking the LLM only to break ties."""
+        profile = profile_data(data)
+        response_format, decisive = select_response_format_from_profile(user_message, context_state, profile, intent)
+        method = "rules"
+
+        if not decisive and ResponseFormatConfig.LLM_TIEBREAKER and allow_optional_stage("response_format_llm"):
+            llm_format = await self._determine_response_format_with_llm(user_message, profile, context_state)
+            if llm_format:
+                log_llm_format_choice(user_message, context_state, profile, intent, llm_format, response_format)
+                response_format = llm_format
+                method = "llm_tiebreaker"
+        elif should_shadow_format_choice():
+            # Sampled turns: the LLM also chooses in the background so the parity report covers decisive turns too
+            task = asyncio.create_task(self._shadow_response_format(user_message, profile, context_state, intent, response_format))
+            self._format_shadow_tasks.add(task)
+            task.add_done_callback(self._format_shadow_tasks.discard)
+
+        logger.info({
+            "action": "response_format_selected",
+            "format": response_format,
+            "method": method,
+            "decisive": decisive,
+            "intent": intent
+        })
+        return get_format_instruction(response_format)
 
-        data_summary = self._summarize_data_for_format_analysis(data)
+    async def _shadow_response_format(self, user_message: str, profile: Dict[str, Any], context_state: str,
+                                      intent: Optional[str], rule_format: str) -> None:
+        """Log the LLM's format choice for a turn the rules decided, without using it."""
+        llm_format = await self._determine_response_format_with_llm(user_message, profile, context_state)
+        if llm_format:
+            log_llm_format_choice(user_message, context_state, profile, intent, llm_format, rule_format, source="shadow")
+
+    async def _determine_response_format_with_llm(self, user_message: str, profile: Dict[str, Any], context_state: str) -> Optional[str]:
+        """Ask the LLM to choose a response format; used as a tiebreaker or sampled in shadow mode."""
+
+        data_summary = summarize_profile(profile)
         
         format_analysis_prompt = f"""
     You are a response format analyzer. Analyze the user query, available data, and context to determine the best response format.
@@ -1499,104 +1588,30 @@ class BankingAIAgent:
     Return ONLY one of: {ResponseFormats.CONCISE_ONE_LINER}, {ResponseFormats.STRUCTURED_LIST}, {ResponseFormats.DETAILED_EXPLANATION}, or {ResponseFormats.HELPFUL_GUIDANCE}
     """
         try:
-            response = await llm.ainvoke([SystemMessage(content=format_analysis_prompt)])
+            response = await llm.ainvoke(
+                [SystemMessage(content=format_analysis_prompt)],
+                timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+            )
             format_type = response.content.strip().upper()
-            
-            # Map LLM decision to formatting instructions (NO ASTERISKS)
-            format_instructions = {
-                ResponseFormats.CONCISE_ONE_LINER: """
-            FORMAT: CONCISE ONE-LINER
-            - Give a direct, single sentence answer with the specific number
-            - Reference previous context naturally but keep it brief
-            - No bullet points or lists needed
-            - Example: "Your current balance is $1,234.56" or "You spent $45.20 on Netflix in April"
-            - NEVER use asterisks in your response
-            """,
-                        ResponseFormats.STRUCTURED_LIST: """
-            FORMAT: STRUCTURED DATA PRESENTATION
-            - Use bullet points (•) or numbering for multiple items/transactions
-            - Organize data clearly with proper formatting
-            - Include all relevant details, amounts, dates, and descriptions
-            - Group related information logically
-            - End with a helpful summary line if appropriate
-            - Preserve ALL data - never omit important details
-            - NEVER use asterisks in your response
-            """,
-                        ResponseFormats.DETAILED_EXPLANATION: """
-            FORMAT: DETAILED EXPLANATION WITH CONTEXT
-            - Provide thorough explanation with context
-            - Include all relevant numbers and comparisons
-            - Use paragraphs and logical flow
-            - Reference previous conversation context
-            - Help user understand patterns or insights
-            - Structure with natural breaks between topics
-            - NEVER use asterisks in your response
-            """,
-                        ResponseFormats.HELPFUL_GUIDANCE: """
-            FORMAT: HELPFUL GUIDANCE
-            - Provide clear, supportive guidance
-            - Explain what's needed or what went wrong
-            - Offer specific next steps
-            - Keep it friendly and helpful
-            - Include examples if relevant
-            - NEVER use asterisks in your response
-            """
-            }
-            
-            return format_instructions.get(format_type, format_instructions[ResponseFormats.DETAILED_EXPLANATION])
+            return format_type if format_type in ResponseFormats.ALL else None
             
         except Exception as e:
             logger.error(f"Error in LLM format analysis: {e}")
-            # Fallback to default detailed format
-            return """
-        FORMAT: CONVERSATIONAL RESPONSE
-        - Provide appropriate detail based on the data available
-        - Reference context naturally
-        - Include all important information
-        - Make it helpful and clear
-        - NEVER use asterisks in your response
-        """
+            return None
 
 
-    def _summarize_data_for_format_analysis(self, data: Any) -> str:
-        """Create a summary of available data for format analysis."""
-        if not data:
-            return "No data available"
-        
-        if isinstance(data, dict):
-            summary_parts = []
-            
-            # Check for single values
-            single_values = ["current_balance", "total_spent", "total_amount"]
-            for key in single_values:
-                if key in data:
-                    summary_parts.append(f"Single value: {key}")
-            
-            # Check for lists/multiple items
-            if "transactions" in data:
-                count = len(data["transactions"]) if isinstance(data["transactions"], list) else 0
-                summary_parts.append(f"Transaction list: {count} items")
-            
-            if "category_breakdown" in data:
-                count = len(data["category_breakdown"]) if isinstance(data["category_breakdown"], list) else 0
-                summary_parts.append(f"Category breakdown: {count} categories")
-            
-            # Check for error states
-            if "error" in data or "missing" in str(data):
-                summary_parts.append("Error or missing information")
-            
-            # Check for complex analysis data
-            complex_keys = ["comparison", "analysis", "breakdown", "facet"]
-            if any(key in data for key in complex_keys):
-                summary_parts.append("Complex analysis data")
-            
-            return "; ".join(summary_parts) if summary_parts else "Simple data object"
-        
-        return f"Data type: {type(data).__name__}"
+    def budget_fallback(self, first_name: str, language: Optional[str] = None) -> str:
+        """Catalog reply for a turn whose budget ran out before the answer was ready."""
+        language = target_language(language)
+        return mark_generated(message_catalog.message("turn_budget_exhausted", language, first_name=first_name), language)
 
+    @traced_stage("generation")
+    async def generate_natural_response(self, context_state: str, data: Any, user_message: str, first_name: str, conversation_history: str = "", intent: Optional[str] = None, language: Optional[str] = None) -> str:
+        """Generate contextual LLM responses with ChatGPT-style direct, structured formatting (no emojis or asterisks).
 
-    async def generate_natural_response(self, context_state: str, data: Any, user_message: str, first_name: str, conversation_history: str = "") -> str:
-        """Generate contextual LLM responses with ChatGPT-style direct, structured formatting (no emojis or asterisks)."""
+        language (default: the turn's response language) makes the LLM write the final-language text directly.
+        """
+        language = target_language(language)
         
         # Special handling for non-banking queries (keep existing)
         if "non-banking question" in context_state or data and data.get("query_type") == "non_banking":
@@ -1611,16 +1626,19 @@ class BankingAIAgent:
             4. Redirect to specific banking services you can help with
             5. Keep it concise and professional
 
-            Generate a response that maintains boundaries while being helpful about banking topics."""
+            Generate a response that maintains boundaries while being helpful about banking topics.""" + language_instruction(language)
             
             try:
-                response = await llm.ainvoke([SystemMessage(content=non_banking_prompt)])
-                return response.content.strip()
+                response = await llm.ainvoke([SystemMessage(content=non_banking_prompt)], timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS))
+                return mark_generated(response.content.strip(), language)
             except:
                 return f"I'm a banking assistant, {first_name}, and I can only help with your account-related questions like checking balances, viewing transactions, analyzing spending, or transferring money. I don't have information about topics outside of banking. What banking question can I help you with today?"
 
-        # Use LLM to determine response format for banking queries (keep existing)
-        response_format_instruction = await self._determine_response_format_with_llm(user_message, data, context_state)
+        if budget_exhausted("generation"):
+            return self.budget_fallback(first_name, language)
+
+        # Choose response format locally (LLM only breaks ties when enabled)
+        response_format_instruction = await self._determine_response_format(user_message, data, context_state, intent)
         
         # FIXED system prompt - NO ASTERISKS AT ALL
         system_prompt = f"""You are Sage, a professional banking assistant. Generate responses in ChatGPT banking style: direct, structured, and to-the-point. NEVER use asterisks (*) in any form.
@@ -1730,20 +1748,24 @@ class BankingAIAgent:
 
             CRITICAL: NEVER USE ASTERISKS (*) IN ANY FORM. Use plain text only.
 
-            Generate a contextual response that feels like a natural continuation of your ongoing conversation with {first_name}."""
+            Generate a contextual response that feels like a natural continuation of your ongoing conversation with {first_name}.""" + language_instruction(language)
         
         try:
-            response = await llm.ainvoke([SystemMessage(content=system_prompt)])
-            return response.content.strip()
+            response = await llm.ainvoke([SystemMessage(content=system_prompt)], timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS))
+            return mark_generated(response.content.strip(), language)
         except Exception as e:
             logger.error(f"Error generating contextual response: {e}")
+            if budget_exhausted("generation"):
+                return self.budget_fallback(first_name, language)
             return f"I'm having some technical difficulties right now, {first_name}. Could you try that again?"
 
 
 
 
-    async def generate_contextual_banking_response(self, query_result: Any, user_message: str, first_name: str, memory: ConversationBufferMemory, intent: str) -> str:
+    @traced_stage("generation")
+    async def generate_contextual_banking_response(self, query_result: Any, user_message: str, first_name: str, memory: ConversationBufferMemory, intent: str, language: Optional[str] = None) -> str:
         """Generate banking responses with ChatGPT-style direct, structured formatting (no asterisks)."""
+        language = target_language(language)
         
         conversation_history = self._get_context_summary(memory.chat_memory.messages)
         
@@ -1785,76 +1807,57 @@ class BankingAIAgent:
             6. NO ASTERISKS: Never use asterisk (*) symbols anywhere in your response
         
 
-            Generate a direct, structured response that presents the banking information clearly in ChatGPT style. NEVER use asterisks in any form."""
+            Generate a direct, structured response that presents the banking information clearly in ChatGPT style. NEVER use asterisks in any form.""" + language_instruction(language)
 
         try:
-            response = await llm.ainvoke([SystemMessage(content=banking_context_prompt)])
+            response = await llm.ainvoke([SystemMessage(content=banking_context_prompt)], timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS))
             
             # Add to memory
             memory.chat_memory.add_user_message(user_message)
             memory.chat_memory.add_ai_message(response.content.strip())
             
-            return response.content.strip()
+            return mark_generated(response.content.strip(), language)
         except Exception as e:
             logger.error(f"Error generating contextual banking response: {e}")
-            return await self.generate_natural_response(ContextStates.ERROR_OCCURRED, {"error": str(e)}, user_message, first_name, conversation_history)
+            return await self.generate_natural_response(ContextStates.ERROR_OCCURRED, {"error": str(e)}, user_message, first_name, conversation_history, language=language)
             
                     
+    @traced_stage("non_banking_check")
     def is_clearly_non_banking_query(self, user_message: str, conversation_history: str = "") -> bool:
         """Enhanced non-banking detection with proper blocking logic."""
         try:
             # CRITICAL: Never block banking credentials
-            if re.match(r'^\d{5}-\d{7}-\d{1}$', user_message.strip()):
-                return False
-                
-            if re.match(r'^\d+$', user_message.strip()):
+            if is_banking_credential(user_message):
                 return False
 
-            user_lower = user_message.lower().strip()
-            
-            # TIER 1: ALWAYS ALLOW - Core banking operations
-            banking_core_keywords = [
-                "balance", "transaction", "transfer", "money", "account", "spending",
-                "pay", "deposit", "withdraw", "statement", "bill", "payment", 
-                "bank", "cash", "fund", "amount", "rupee", "dollar", "pkr", "usd",
-                "debit", "credit", "cnic", "otp"
-            ]
-            
-            if any(keyword in user_lower for keyword in banking_core_keywords):
-                logger.info(f"✅ TIER 1 ALLOWED: Core banking keyword detected - '{user_message}'")
+            # TIERS 1-3: compiled keyword tables, one pass per tier
+            outcome, hits = classify_keyword_tiers(user_message)
+
+            if outcome == ALLOW_CORE:
+                logger.info(f"✅ TIER 1 ALLOWED: Core banking keyword detected {hits} - '{user_message}'")
                 return False
 
-            # TIER 2: ALLOW - Banking assistant features (currency conversion, etc.)
-            banking_assistant_keywords = [
-                "convert", "conversion", "exchange rate", "currency", "cad", "gbp", "eur",
-                "pounds", "euros", "canadian", "what is", "tell me", "show me", 
-                "how much", "calculate", "in dollars", "in pkr", "in usd",
-                "translate", "translation", "in urdu", "in arabic", "in english",
-                "urdu me", "arabic me", "english me", "language", "bolo", "kaho",
-                "write in", "respond in", "reply in", "answer in"
-            ]
-            
-            # Check if it's a banking-related conversion/calculation
-            if any(keyword in user_lower for keyword in banking_assistant_keywords):
-                # If it also contains banking context or numbers, allow it
-                if (any(banking_word in user_lower for banking_word in ["balance", "spent", "amount", "money", "$", "pkr", "usd"]) or
-                    re.search(r'\d+', user_message)):
-                    logger.info(f"✅ TIER 2 ALLOWED: Banking assistant feature - '{user_message}'")
-                    return False
+            if outcome == ALLOW_ASSISTANT:
+                logger.info(f"✅ TIER 2 ALLOWED: Banking assistant feature {hits} - '{user_message}'")
+                return False
 
-            # TIER 3: KEYWORD-BASED BLOCKING - Check for clearly non-banking topics
-            tier3_result = self._tier3_keyword_analysis(user_message, user_lower)
+            tier3_result = outcome == FLAGGED
+            if tier3_result:
+                logger.info(f"🔍 TIER 3: Found non-banking keywords {hits} in '{user_message}'")
+            else:
+                logger.info(f"✅ TIER 3: No clear non-banking indicators found in '{user_message}'")
             
-            # TIER 4: LLM-BASED BLOCKING - Use AI to analyze unclear cases
-            tier4_result = self._tier4_llm_analysis(user_message, conversation_history) if len(user_message.strip()) > 10 else False
+            # TIER 4: LLM-BASED BLOCKING - Only confirm what tier 3 flagged (blocking needs both tiers)
+            if tier3_result and len(user_message.strip()) > 10:
+                tier4_result = self._tier4_llm_analysis(user_message, conversation_history)
+            else:
+                tier4_result = False
             
-            # CHANGED: Use OR logic instead of AND logic for blocking
-            # If EITHER tier wants to block, then block it
             if tier3_result and tier4_result:
                 logger.info(f"🚫 NON-BANKING QUERY BLOCKED: Tier3={tier3_result}, Tier4={tier4_result} - '{user_message}'")
                 return True
             else:
-                logger.info(f"✅ BANKING QUERY ALLOWED: Both tiers agreed to allow - '{user_message}'")
+                logger.info(f"✅ BANKING QUERY ALLOWED: Tier3={tier3_result}, Tier4={tier4_result} - '{user_message}'")
                 return False
                     
         except Exception as e:
@@ -1862,116 +1865,22 @@ class BankingAIAgent:
             # Safe fallback - allow if error (better for banking users)
             return False
 
-
-
-    def _tier3_keyword_analysis(self, user_message: str, user_lower: str) -> bool:
-        """Tier 3: Keyword-based analysis for clearly non-banking topics."""
-        try:
-            # TIER 3: BLOCK - Clearly non-banking topics
-            non_banking_blacklist = [
-                # Technology/Programming
-                "python", "programming", "code", "ai", "technology", "computer", "software",
-                "algorithm", "machine learning", "data science", "javascript", "html",
-                
-                # General knowledge
-                "president", "ceo", "apple", "google", "microsoft", "amazon", "facebook", "tesla",
-                "steve jobs", "bill gates", "elon musk", "mark zuckerberg",
-                
-                # Entertainment
-                "weather", "sports", "movie", "celebrity", "politics", "news",
-                "music", "song", "album", "actor", "actress", "film", "tv show",
-                "joke", "sing", "entertainment",
-                
-                # Health/Lifestyle
-                "health", "doctor", "medicine", "recipe", "cook", "food recipe",
-                "workout", "exercise", "diet", "travel", "vacation", "hotel",
-                
-                # Education/Career
-                "job", "career", "university", "college", "education", "study",
-                "homework", "assignment", "research", "thesis"
-            ]
-            
-            # Check for strong non-banking indicators
-            strong_non_banking_count = sum(1 for keyword in non_banking_blacklist if keyword in user_lower)
-            
-            if strong_non_banking_count >= 1:
-                logger.info(f"🔍 TIER 3: Found {strong_non_banking_count} non-banking keywords in '{user_message}'")
-                return True
-            
-            # Additional context checks
-            # Check if it's asking about companies in non-financial context
-            company_context_phrases = [
-                "who is ceo", "who founded", "when was founded", "headquarters of",
-                "what does company do", "company history", "company products",
-                "who is president", "who is the president"
-            ]
-            
-            if any(phrase in user_lower for phrase in company_context_phrases):
-                logger.info(f"🔍 TIER 3: Company context phrase detected in '{user_message}'")
-                return True
-            
-            # Check for general knowledge patterns
-            general_knowledge_patterns = [
-                "what is the capital of", "who invented", "when did", "where is",
-                "how to make", "recipe for", "weather in", "temperature in",
-                "tell me about", "what do you know about"
-            ]
-            
-            if any(pattern in user_lower for pattern in general_knowledge_patterns):
-                logger.info(f"🔍 TIER 3: General knowledge pattern detected in '{user_message}'")
-                return True
-            
-            logger.info(f"✅ TIER 3: No clear non-banking indicators found in '{user_message}'")
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error in Tier 3 keyword analysis: {e}")
-            return False
-
     def _tier4_llm_analysis(self, user_message: str, conversation_history: str) -> bool:
         """Tier 4: LLM-based analysis with stricter blocking."""
-        try:
-            enhanced_llm_prompt = f"""
-            You are a banking query analyzer. Determine if this query is clearly non-banking and should be blocked.
-
-            CONVERSATION CONTEXT:
-            {conversation_history[-500:] if conversation_history else "No context"}
-
-            USER MESSAGE: "{user_message}"
-
-            **DEFINITELY ALLOW (return "ALLOW"):**
-            ✅ Account operations: balance, transactions, transfer, payments, spending analysis
-            ✅ Financial calculations: currency conversion of amounts, budgeting
-            ✅ Banking assistance: "what can you do", general banking help
-            ✅ Language support: translation requests for banking responses
-
-            **DEFINITELY BLOCK (return "BLOCK"):**
-            ❌ General knowledge: "Who is president", "Weather today", "Sports scores"
-            ❌ Entertainment: "Tell jokes", "Sing songs", "Recommend movies"
-            ❌ Technology help: "How to program", "Fix computer"
-            ❌ Personal advice: "Health tips", "Dating advice"
-            ❌ Academic help: "Solve homework", "Write essay"
-            ❌ Company info (non-financial): "Apple's history", "Google's products"
-
-            **CRITICAL DECISION RULE:**
-            - If it's clearly about general knowledge, entertainment, technology, etc. → "BLOCK"
-            - If it's banking-related or unclear → "ALLOW"
-
-            **EXAMPLES:**
-            "Who is CEO of Apple?" → BLOCK
-            "What's the weather?" → BLOCK  
-            "Who is president of USA?" → BLOCK
-            "Convert $100 to PKR" → ALLOW
-            "What can you do?" → ALLOW
-            "How much is my balance?" → ALLOW
-
-            Return ONLY "BLOCK" or "ALLOW".
-            """
+        local_label = local_classifiers.classify("non_banking", user_message)
+        if local_label is not None:
+            return local_label == "BLOCK"
 
-            response = llm.invoke([SystemMessage(content=enhanced_llm_prompt)])
+        try:
+            response = llm.invoke(non_banking_check_prompt.messages(
+                conversation_context=(history_budget.fit(conversation_history, "non_banking_check", user_message)
+                                      if conversation_history else "No context"),
+                user_message=user_message
+            ))
             result = response.content.strip().upper()
             
             is_blocked = result == "BLOCK"
+            log_llm_decision("non_banking", user_message, "BLOCK" if is_blocked else "ALLOW")
             
             if is_blocked:
                 logger.info(f"🔍 TIER 4 (LLM): BLOCK decision for '{user_message}'")
@@ -1987,6 +1896,10 @@ class BankingAIAgent:
 
     async def handle_non_banking_query(self, user_message: str, first_name: str) -> str:
         """Handle clearly non-banking related queries with firm but polite decline."""
+        if MessageCatalogConfig.ENABLED:
+            # Fixed decline from the catalog: no generation call, and no translation call afterwards
+            language = target_language()
+            return mark_generated(message_catalog.message("non_banking_decline", language, first_name=first_name), language)
         try:
             non_banking_prompt = f"""You are Sage, a strict banking assistant. The user {first_name} asked a non-banking question that you must firmly refuse to answer.
 
@@ -2009,10 +1922,10 @@ class BankingAIAgent:
             Generate a firm but polite refusal that maintains strict banking boundaries."""
             
             try:
-                response = await llm.ainvoke([SystemMessage(content=non_banking_prompt)])
+                response = await llm.ainvoke([SystemMessage(content=non_banking_prompt)], timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS))
                 return response.content.strip()
             except:
-                return f"I'm a banking assistant, {first_name}, and I can only help with your bank account questions like checking your balance, viewing transactions, analyzing spending, or transferring money. I don't provide information about other topics. What banking question can I help you with?"
+                return message_catalog.message("non_banking_decline", first_name=first_name)
                 
         except Exception as e:
             logger.error(f"Error in non-banking response: {e}")
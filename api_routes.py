@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from mongo import transactions
 from typing import Dict, Any, List, Optional
@@ -7,12 +7,16 @@ from bson import ObjectId
 import json
 import re
 import logging
-from ai_agent import BankingAIAgent
+from ai_agent import BankingAIAgent, speculation_stats
+from turn_trace import turn_trace
+from structured_output import structured_output_stats
+from turn_deadline import turn_deadline, deadline_stats
+from response_language import respond_in
 
 # Import constants
 from constants import (
     DatabaseFields, StatusMessages, Currencies, TransactionTypes, 
-    WebhookConfig, MongoConfig, Limits
+    WebhookConfig, MongoConfig, Limits, PipelineConfig, TraceConfig, DeadlineConfig, APIEndpoints
 )
 
 # Set up logging
@@ -48,11 +52,14 @@ class ProcessQueryRequest(BaseModel):
     user_message: str
     account_number: str
     first_name: str
+    language: Optional[str] = None  # Write the response in this language instead of English
 
 class ProcessQueryResponse(BaseModel):
     status: str
     response: str
     error: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
+    language: Optional[str] = None  # Set when response was generated directly in the requested language
 
 def convert_objectid_to_string(doc):
     """Recursively convert ObjectId to string in documents."""
@@ -351,8 +358,10 @@ async def transfer_money(data: MoneyTransferRequest):
         return {"status": StatusMessages.FAIL, "error": str(e)}
 
 @router.post("/process_query", response_model=ProcessQueryResponse)
-async def process_query(data: ProcessQueryRequest):
+async def process_query(data: ProcessQueryRequest, request: Request):
     """Process user banking queries using AI agent with contextual awareness."""
+    trace_id = request.headers.get(TraceConfig.TRACE_ID_HEADER)
+    deadline_ms = request.headers.get(DeadlineConfig.HEADER)
     try:
         logger.info({
             "action": "api_process_query_start",
@@ -361,12 +370,14 @@ async def process_query(data: ProcessQueryRequest):
             "first_name": data.first_name
         })
         
-        # Use the AI agent to process the query
-        response = await ai_agent.process_query(
-            user_message=data.user_message,
-            account_number=data.account_number,
-            first_name=data.first_name
-        )
+        # Use the AI agent to process the query (trace and deadline join the webhook turn when sent)
+        with turn_trace(data.account_number, trace_id=trace_id, service="backend") as trace, \
+                turn_deadline(header_value=deadline_ms), respond_in(data.language) as direct_language:
+            response = await ai_agent.process_query(
+                user_message=data.user_message,
+                account_number=data.account_number,
+                first_name=data.first_name
+            )
         
         logger.info({
             "action": "api_process_query_success",
@@ -376,7 +387,9 @@ async def process_query(data: ProcessQueryRequest):
         
         return ProcessQueryResponse(
             status=StatusMessages.SUCCESS,
-            response=response
+            response=response,
+            trace=trace.to_dict() if trace_id else None,
+            language=direct_language.language if direct_language and direct_language.covers(response) else None
         )
         
     except Exception as e:
@@ -393,6 +406,25 @@ async def process_query(data: ProcessQueryRequest):
             error=str(e)
         )
 
+@router.get(APIEndpoints.SPECULATION_METRICS)
+async def get_speculation_metrics():
+    """Speculative query pipeline success rate and wall-time saved."""
+    return {
+        "status": StatusMessages.SUCCESS,
+        "speculative_execution": PipelineConfig.SPECULATIVE_EXECUTION,
+        "metrics": speculation_stats.to_dict()
+    }
+
+@router.get("/metrics/structured_output")
+async def get_structured_output_metrics():
+    """JSON parse outcomes per prompt: direct, repaired, invalid, unparseable and fallbacks."""
+    return {"status": StatusMessages.SUCCESS, "metrics": structured_output_stats.to_dict()}
+
+@router.get("/metrics/deadline")
+async def get_deadline_metrics():
+    """Turns run under a deadline, optional stages skipped and turns that overran it."""
+    return {"status": StatusMessages.SUCCESS, "metrics": deadline_stats.to_dict()}
+
 # Health check endpoint
 @router.get("/health")
 async def health_check():
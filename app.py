@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from api_routes import router
+from debug_routes import router as debug_router
 
 # Import constants
 from constants import (
@@ -45,6 +46,7 @@ app = FastAPI(
 )
 
 app.include_router(router)
+app.include_router(debug_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+build_message_catalog.py
+
+Generates the pre-translated system message catalog (system_messages.json) offline: every
+English message of SystemMessages whose stored translations are missing or stale is
+translated once per catalog language with the translation service, and the catalog version
+is bumped when anything changed. Translations that lose a {field} are reported and left out,
+so they can be fixed by hand. Review the diff of the JSON file before committing it.
+
+Usage:
+    python build_message_catalog.py                 (translate missing and stale messages)
+    python build_message_catalog.py --force         (retranslate everything)
+    python build_message_catalog.py --check         (exit non-zero if the catalog is incomplete or stale)
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+from typing import Any, Dict, List
+
+from constants import Languages, MessageCatalogConfig, SystemMessages
+from message_catalog import placeholders
+
+
+def load_catalog(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"version": 0, "messages": {}}
+    with open(path, encoding="utf-8") as catalog_file:
+        return json.load(catalog_file)
+
+
+def outdated(catalog: Dict[str, Any]) -> List[str]:
+    """One line per message variant that is missing, stale or lost a {field}."""
+    problems = []
+    for key, english in SystemMessages.ENGLISH.items():
+        variants = catalog["messages"].get(key, {})
+        if variants.get(Languages.ENGLISH) != english:
+            problems.append(f"{key}: English source changed or missing")
+            continue
+        for language in MessageCatalogConfig.LANGUAGES:
+            if language not in variants:
+                problems.append(f"{key} [{language}]: missing")
+            elif placeholders(variants[language]) != placeholders(english):
+                problems.append(f"{key} [{language}]: fields {placeholders(variants[language])}, expected {placeholders(english)}")
+    problems += [f"{key}: no longer in SystemMessages" for key in catalog["messages"] if key not in SystemMessages.ENGLISH]
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate the pre-translated system message catalog")
+    parser.add_argument("--path", default=os.getenv(MessageCatalogConfig.PATH_ENV, MessageCatalogConfig.DEFAULT_PATH))
+    parser.add_argument("--force", action="store_true", help="retranslate messages that are already current")
+    parser.add_argument("--check", action="store_true", help="only report missing or stale translations")
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.path)
+    if args.check:
+        problems = outdated(catalog)
+        print(f"{args.path}: version {catalog.get('version')}, {len(SystemMessages.ENGLISH)} messages")
+        for problem in problems:
+            print(f"    {problem}")
+        return 1 if problems else 0
+
+    from translation_service import translation_service  # Needs the OpenAI key; --check does not
+
+    messages: Dict[str, Dict[str, str]] = {}
+    translated, failed = 0, []
+    for key, english in SystemMessages.ENGLISH.items():
+        stored = catalog["messages"].get(key, {})
+        current = stored.get(Languages.ENGLISH) == english and not args.force
+        variants = {Languages.ENGLISH: english}
+        for language in MessageCatalogConfig.LANGUAGES:
+            if current and language in stored and placeholders(stored[language]) == placeholders(english):
+                variants[language] = stored[language]
+                continue
+            text = translation_service.translate_from_english(english, language)
+            if placeholders(text) != placeholders(english):
+                failed.append(f"{key} [{language}]: '{text}'")
+                continue
+            variants[language] = text
+            translated += 1
+            print(f"{key} [{language}]: {text}")
+        messages[key] = variants
+
+    changed = messages != catalog["messages"]
+    if changed:
+        catalog = {"version": catalog.get("version", 0) + 1, "generated": date.today().isoformat(), "messages": messages}
+        with open(args.path, "w", encoding="utf-8") as catalog_file:
+            json.dump(catalog, catalog_file, ensure_ascii=False, indent=2)
+            catalog_file.write("\n")
+    print(f"{translated} translations generated, catalog version {catalog['version']}"
+          f"{' (unchanged)' if not changed else ''}")
+    for failure in failed:
+        print(f"FAIL: lost a field, fix by hand: {failure}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Record-and-replay cassette for outbound calls (LLM, translation, FX, Graph API).
+In record mode every call is captured to a JSONL cassette keyed by its normalized
+request; in replay mode the cassette answers instead, with synthetic latency.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from langchain_core.messages import AIMessage
+
+from constants import CassetteConfig
+from turn_trace import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+# Values that change between runs but not between equivalent requests. Only the current
+# date the prompts inject is masked; dates from the user or from data stay part of the key.
+_VOLATILE_PATTERNS = [
+    (re.compile(r"((?:Current|Today's) date: )\d{4}-\d{2}-\d{2}"), r"\1<DATE>"),
+    (re.compile(r"access_token=[^&\s]+"), "access_token=<TOKEN>"),
+]
+
+
+class CassetteMiss(LookupError):
+    """Replay mode found no recorded response for a request."""
+
+
+def normalize_request(value: Any) -> Any:
+    """Collapse whitespace and mask volatile values so equivalent requests share a key."""
+    if isinstance(value, str):
+        text = " ".join(value.split())
+        for pattern, replacement in _VOLATILE_PATTERNS:
+            text = pattern.sub(replacement, text)
+        return text
+    if isinstance(value, dict):
+        return {key: normalize_request(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_request(item) for item in value]
+    return value
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    payload = json.dumps({"kind": kind, "request": normalize_request(request)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """JSONL cassette of outbound requests and their responses."""
+
+    def __init__(self, mode: str = CassetteConfig.MODE_OFF, path: str = CassetteConfig.DEFAULT_PATH,
+                 latency: str = CassetteConfig.LATENCY_RECORDED, jitter_ms: float = 0.0):
+        self.mode = mode
+        self.path = path
+        self.latency = latency
+        self.jitter_ms = jitter_ms
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+        if self.mode == CassetteConfig.MODE_REPLAY:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            mode=os.getenv(CassetteConfig.MODE_ENV, CassetteConfig.MODE_OFF).lower(),
+            path=os.getenv(CassetteConfig.PATH_ENV, CassetteConfig.DEFAULT_PATH),
+            latency=os.getenv(CassetteConfig.LATENCY_ENV, CassetteConfig.LATENCY_RECORDED),
+            jitter_ms=float(os.getenv(CassetteConfig.JITTER_ENV, "0") or 0)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in (CassetteConfig.MODE_RECORD, CassetteConfig.MODE_REPLAY)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning(f"Cassette file not found, every replayed call will miss: {self.path}")
+            return
+        with open(self.path, encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info({
+            "action": "cassette_loaded",
+            "path": self.path,
+            "requests": len(self._entries),
+            "responses": sum(len(entries) for entries in self._entries.values())
+        })
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as cassette_file:
+                cassette_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.stats["recorded"] += 1
+
+    def _next_entry(self, kind: str, key: str) -> Dict[str, Any]:
+        """Recorded responses for a key are served in order, cycling when exhausted."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind} response for request key {key[:12]}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.stats["replayed"] += 1
+            return entries[cursor % len(entries)]
+
+    def _latency_seconds(self, entry: Dict[str, Any]) -> float:
+        if self.latency == CassetteConfig.LATENCY_RECORDED:
+            base_ms = entry.get("latency_ms", 0.0)
+        else:
+            try:
+                base_ms = float(self.latency)
+            except ValueError:
+                base_ms = 0.0
+        if self.jitter_ms:
+            base_ms += random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(base_ms, 0.0) / 1000
+
+    def _entry(self, kind: str, key: str, request: Dict[str, Any], response: Any, latency_ms: float) -> Dict[str, Any]:
+        return {
+            "key": key,
+            "kind": kind,
+            "request": normalize_request(request),
+            "response": response,
+            "latency_ms": round(latency_ms, 2),
+            "recorded_at": time.time()
+        }
+
+    def call(self, kind: str, request: Dict[str, Any], func: Callable[[], Any]) -> Any:
+        """Run a sync outbound call through the cassette; func must return JSON-serializable data."""
+        if not self.enabled:
+            return func()
+
+        key = request_key(kind, request)
+        if self.mode == CassetteConfig.MODE_REPLAY:
+            entry = self._next_entry(kind, key)
+            time.sleep(self._latency_seconds(entry))
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = func()
+        self._append(self._entry(kind, key, request, response, (time.perf_counter() - started) * 1000))
+        return response
+
+    async def acall(self, kind: str, request: Dict[str, Any], func: Callable[[], Any]) -> Any:
+        """Async variant of call; func returns an awaitable of JSON-serializable data."""
+        if not self.enabled:
+            return await func()
+
+        key = request_key(kind, request)
+        if self.mode == CassetteConfig.MODE_REPLAY:
+            entry = self._next_entry(kind, key)
+            await asyncio.sleep(self._latency_seconds(entry))
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = await func()
+        self._append(self._entry(kind, key, request, response, (time.perf_counter() - started) * 1000))
+        return response
+
+    def wrap_chat_model(self, model: Any) -> Any:
+        """Return the chat model itself when disabled, otherwise a recording/replaying proxy."""
+        return CassetteChatModel(model, self) if self.enabled else model
+
+
+def _message_request(model: Any, messages: List[Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    serialized = []
+    for message in messages:
+        if isinstance(message, dict):
+            serialized.append({"role": message.get("role", "user"), "content": message.get("content", "")})
+            continue
+        entry = {"role": getattr(message, "type", "user"), "content": message.content}
+        if getattr(message, "tool_calls", None):
+            entry["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in message.tool_calls]
+        serialized.append(entry)
+    request = {
+        "model": getattr(model, "model_name", ""),
+        "temperature": getattr(model, "temperature", None),
+        "messages": serialized
+    }
+    if options.get("response_format"):
+        request["response_format"] = options["response_format"]
+    if options.get("tools"):
+        request["tools"] = [tool["function"]["name"] for tool in options["tools"]]
+        request["tool_choice"] = options.get("tool_choice", "auto")
+    return request
+
+
+def _message_response(message: Any) -> Dict[str, Any]:
+    response = {
+        "content": message.content,
+        "usage_metadata": dict(getattr(message, "usage_metadata", None) or {})
+    }
+    if getattr(message, "tool_calls", None):
+        response["tool_calls"] = [dict(call) for call in message.tool_calls]
+    return response
+
+
+def _to_ai_message(response: Dict[str, Any]) -> AIMessage:
+    fields = {"content": response["content"]}
+    if response.get("usage_metadata"):
+        fields["usage_metadata"] = response["usage_metadata"]
+    if response.get("tool_calls"):
+        fields["tool_calls"] = response["tool_calls"]
+    return AIMessage(**fields)
+
+
+class CassetteChatModel:
+    """Proxy for a LangChain chat model that routes invoke/ainvoke through a cassette."""
+
+    def __init__(self, model: Any, cassette: Cassette):
+        self._model = model
+        self._cassette = cassette
+
+    def _record_replay(self, started: float, response: Dict[str, Any]) -> None:
+        """A replayed call bypasses the LangChain trace callback, so record its span here."""
+        if self._cassette.mode != CassetteConfig.MODE_REPLAY:
+            return
+        usage = response.get("usage_metadata") or {}
+        record_llm_call(getattr(self._model, "model_name", ""), (time.perf_counter() - started) * 1000,
+                        usage.get("input_tokens", 0), usage.get("output_tokens", 0), source="cassette",
+                        cached_tokens=(usage.get("input_token_details") or {}).get("cache_read", 0))
+
+    def invoke(self, messages, *args, **kwargs):
+        started = time.perf_counter()
+        response = self._cassette.call(
+            "llm", _message_request(self._model, messages, kwargs),
+            lambda: _message_response(self._model.invoke(messages, *args, **kwargs))
+        )
+        self._record_replay(started, response)
+        return _to_ai_message(response)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        async def live():
+            return _message_response(await self._model.ainvoke(messages, *args, **kwargs))
+
+        started = time.perf_counter()
+        response = await self._cassette.acall(
+            "llm", _message_request(self._model, messages, kwargs), live
+        )
+        self._record_replay(started, response)
+        return _to_ai_message(response)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+# Global instance
+cassette = Cassette.from_env()
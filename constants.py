@@ -88,6 +88,48 @@ class ResponseFormats:
     DETAILED_EXPLANATION = "DETAILED_EXPLANATION"
     HELPFUL_GUIDANCE = "HELPFUL_GUIDANCE"
 
+    ALL = [CONCISE_ONE_LINER, STRUCTURED_LIST, DETAILED_EXPLANATION, HELPFUL_GUIDANCE]
+
+# ===== RESPONSE FORMAT SELECTION =====
+class ResponseFormatKeywords:
+    # Query wording that points to a single direct answer
+    CONCISE = [
+        "balance", "how much", "what's my", "whats my", "what is my", "total",
+        "current", "kitna", "how many"
+    ]
+
+    # Query wording that asks for several items
+    LIST = [
+        "show", "list", "transactions", "history", "breakdown", "all my",
+        "recent", "last", "statement", "by category", "each"
+    ]
+
+    # Query wording that needs interpretation or comparison
+    DETAILED = [
+        "compare", "comparison", "why", "analyze", "analyse", "analysis",
+        "pattern", "trend", "habit", "more than", "less than", " vs ",
+        "versus", "explain", "insight", "afford", "save", "target", "goal"
+    ]
+
+    # Context-state wording that signals errors or missing information
+    GUIDANCE_CONTEXT = [
+        "error", "fail", "invalid", "unclear", "incomplete", "missing",
+        "could not", "clarification", "not understood", "cancel"
+    ]
+
+class ResponseFormatConfig:
+    # Ask the LLM only when the rule scores are tied
+    LLM_TIEBREAKER = False
+    # Minimum score lead the winning format needs to be considered decisive
+    MIN_SCORE_MARGIN = 1
+    # Format used when no rule fires and the tiebreaker is disabled
+    DEFAULT_FORMAT = ResponseFormats.DETAILED_EXPLANATION
+    # JSONL file receiving LLM format choices for the parity report (env override)
+    CHOICE_LOG_ENV = "RESPONSE_FORMAT_CHOICE_LOG"
+    # Share of all turns on which the LLM also picks a format in the background, logged but never used
+    SHADOW_SAMPLE_RATE = 0.0
+    SHADOW_SAMPLE_RATE_ENV = "RESPONSE_FORMAT_SHADOW_RATE"
+
 # ===== CONTEXT STATES =====
 class ContextStates:
     # Session management
@@ -151,6 +193,37 @@ class GreetingWords:
 class ExitCommands:
     COMMANDS = ['exit', 'quit', 'logout', 'end']
 
+    # Whole messages that always mean "end the session"
+    PHRASES = [
+        "bye", "goodbye", "good bye", "bye bye", "log out", "log me out", "sign out",
+        "sign me out", "end session", "end the session", "end chat", "close session",
+        "i'm done", "im done", "i am done", "that's all", "thats all", "khuda hafiz",
+        "allah hafiz"
+    ]
+
+    # Courtesy words that may surround an exit command ("ok exit", "thanks, bye")
+    POLITE_WORDS = ["ok", "okay", "thanks", "thank you", "please", "fine", "alright", "now", "sir"]
+
+    # Words that must appear somewhere for a message to possibly be an exit request
+    VOCABULARY = [
+        "exit", "quit", "logout", "log", "sign", "end", "bye", "goodbye", "done",
+        "finish", "finished", "close", "stop", "leave", "all", "hafiz", "enough", "bas"
+    ]
+
+    # Banking and everyday phrases that use exit words without meaning exit
+    NON_EXIT_PHRASES = [
+        "exit strategy", "quit spending", "quit smoking", "quit my job", "end of month",
+        "end of the month", "end of year", "end of the year", "month end", "year end",
+        "all transactions", "all my", "show all", "list all", "close to", "done on",
+        "transfer done", "payment done", "stop payment"
+    ]
+
+    # Banking query words beyond the non-banking keyword tiers; with no exit word, such a message is not an exit
+    QUERY_WORDS = [
+        "spend", "spent", "expense", "expenses", "history", "last", "recent", "convert", "send",
+        "kharch", "kharcha", "kitna", "kitne", "bhejo", "paise", "paisay", "raqam"
+    ]
+
 # ===== MONTHS =====
 class Months:
     NAMES_TO_NUMBERS = {
@@ -189,6 +262,65 @@ class BalanceKeywords:
 class TransactionKeywords:
     KEYWORDS = ["transaction", "transactions", "last", "recent", "history", "may", "june", "july"]
 
+# ===== NON-BANKING DETECTION KEYWORDS =====
+class NonBankingKeywords:
+    # Tier 1: core banking words, matched as word prefixes ("transfer" also hits "transferred")
+    BANKING_CORE = [
+        "balance", "transaction", "transfer", "money", "account", "spending",
+        "pay", "deposit", "withdraw", "statement", "bill", "payment",
+        "bank", "cash", "fund", "amount", "rupee", "dollar", "pkr", "usd",
+        "debit", "credit", "cnic", "otp"
+    ]
+
+    # Tier 2: assistant features, allowed only alongside BANKING_CONTEXT words or numbers
+    ASSISTANT_FEATURES = [
+        "convert", "conversion", "exchange rate", "currency", "cad", "gbp", "eur",
+        "pounds", "euros", "canadian", "what is", "tell me", "show me",
+        "how much", "calculate", "in dollars", "in pkr", "in usd",
+        "translate", "translation", "in urdu", "in arabic", "in english",
+        "urdu me", "arabic me", "english me", "language", "bolo", "kaho",
+        "write in", "respond in", "reply in", "answer in"
+    ]
+    BANKING_CONTEXT = ["balance", "spent", "amount", "money", "$", "pkr", "usd"]
+
+    # Tier 3: clearly non-banking topics, matched as whole words (plural/-ing/-ed allowed)
+    BLACKLIST = [
+        # Technology/Programming
+        "python", "programming", "code", "ai", "technology", "computer", "software",
+        "algorithm", "machine learning", "data science", "javascript", "html",
+
+        # General knowledge
+        "president", "ceo", "apple", "google", "microsoft", "amazon", "facebook", "tesla",
+        "steve jobs", "bill gates", "elon musk", "mark zuckerberg",
+
+        # Entertainment
+        "weather", "sports", "movie", "celebrity", "politics", "news",
+        "music", "song", "album", "actor", "actress", "film", "tv show",
+        "joke", "sing", "entertainment",
+
+        # Health/Lifestyle
+        "health", "doctor", "medicine", "recipe", "cook", "food recipe",
+        "workout", "exercise", "diet", "travel", "vacation", "hotel",
+
+        # Education/Career
+        "job", "career", "university", "college", "education", "study",
+        "homework", "assignment", "research", "thesis"
+    ]
+
+    # Companies asked about in a non-financial context
+    COMPANY_CONTEXT = [
+        "who is ceo", "who founded", "when was founded", "headquarters of",
+        "what does company do", "company history", "company products",
+        "who is president", "who is the president"
+    ]
+
+    # General knowledge question openers
+    GENERAL_KNOWLEDGE = [
+        "what is the capital of", "who invented", "when did", "where is",
+        "how to make", "recipe for", "weather in", "temperature in",
+        "tell me about", "what do you know about"
+    ]
+
 # ===== LLM CONFIGURATION =====
 class LLMConfig:
     MODEL_NAME = "gpt-4o"
@@ -196,6 +328,103 @@ class LLMConfig:
     MAX_TOKENS_OTP = 10
     TEMPERATURE_TRANSLATION = 0.1
     TIMEOUT_SECONDS = 60.0
+    BASE_URL_ENV = "OPENAI_BASE_URL"  # Point at fake_openai_server.py for load tests
+
+# ===== QUERY PIPELINE CONFIGURATION =====
+class PipelineConfig:
+    # Run contextual resolution, filter extraction and balance prefetch concurrently
+    SPECULATIVE_EXECUTION = True
+
+# ===== TOOL-CALLING AGENT =====
+class ToolAgentConfig:
+    # Let the model fetch data through typed tools instead of intent -> pipeline -> response
+    ENABLED = False
+    MAX_ROUNDS = 3                 # Tool-call round-trips before the model must answer
+    TOOL_TIMEOUT_SECONDS = 10
+    TOOLS = ["get_balance", "list_transactions", "spending_by_category", "convert_currency", "request_transfer"]
+
+# ===== DYNAMIC FEW-SHOT EXAMPLES =====
+class FewShotConfig:
+    # Insert only the most similar bank examples; False sends the whole bank
+    ENABLED = True
+    FILTER_K = 3
+    FILTER_TOKEN_BUDGET = 300      # Tokens allowed for the filter prompt's examples
+    PIPELINE_K = 3
+    PIPELINE_TOKEN_BUDGET = 450    # Tokens allowed for the pipeline prompt's examples
+
+# ===== STRUCTURED OUTPUT =====
+class StructuredOutputConfig:
+    # "json_schema" constrains replies to the pydantic model, "json_object" only to valid JSON,
+    # "off" sends no response_format (for OpenAI-compatible servers without support)
+    MODE = "json_schema"
+
+# ===== HISTORY TOKEN BUDGETS =====
+class HistoryBudgetConfig:
+    # Tokens of conversation history each prompt section may carry
+    SECTION_BUDGETS = {
+        "contextual_resolution": 1200,
+        "entity_extraction": 1200,
+        "transfer_extraction": 800,
+        "currency": 600,
+        "non_banking_check": 150,
+        "history_summary": 1250    # Recent history above this is summarized by the LLM
+    }
+    DEFAULT_BUDGET = 800
+    MAX_MESSAGE_TOKENS = 300       # A single message longer than this is cut
+    KEEP_RECENT_MESSAGES = 2       # Latest messages kept ahead of any relevance ranking
+    RECENCY_DECAY = 0.8            # Weight multiplier per message of age
+    MAX_CACHED_MESSAGES = 4096     # Per-message token counts kept in memory
+
+# ===== TURN DEADLINES =====
+class DeadlineConfig:
+    TURN_BUDGET_SECONDS = 20.0     # Whole turn, from webhook receipt to reply
+    HEADER = "X-Turn-Deadline-Ms"  # Remaining budget sent to the backend
+    NETWORK_MARGIN_SECONDS = 0.5   # Kept back for the backend reply to travel to the webhook
+    RESPONSE_RESERVE_SECONDS = 4.0  # Kept back for the final response generation
+    MANDATORY_STAGE_MIN_SECONDS = 1.0  # Below this (after reserves) a mandatory stage is not attempted
+    # An optional stage runs only while at least this much budget remains
+    OPTIONAL_STAGE_MIN_SECONDS = {
+        "history_summary": 14.0,
+        "contextual_resolution": 10.0,
+        "response_format_llm": 8.0,
+        "tool_round": 8.0
+    }
+
+# ===== TURN TRACING =====
+class TraceConfig:
+    MAX_LLM_CALLS_PER_TURN = 6     # Turns above this are logged as over budget
+    MAX_STORED_TRACES = 200        # Finished traces kept for the debug endpoint
+    TRACE_ID_HEADER = "X-Turn-Trace-Id"
+    DEBUG_TOKEN_ENV = "DEBUG_TOKEN"        # Trace endpoints are served only when this is set
+    DEBUG_TOKEN_HEADER = "X-Debug-Token"   # ... and the request carries the same token
+
+# ===== RECORD / REPLAY CASSETTE =====
+class CassetteConfig:
+    MODE_ENV = "CASSETTE_MODE"             # off | record | replay
+    PATH_ENV = "CASSETTE_PATH"
+    LATENCY_ENV = "CASSETTE_LATENCY_MS"    # "recorded" or a fixed number of milliseconds
+    JITTER_ENV = "CASSETTE_JITTER_MS"      # +/- uniform jitter added to replay latency
+    MODE_OFF = "off"
+    MODE_RECORD = "record"
+    MODE_REPLAY = "replay"
+    LATENCY_RECORDED = "recorded"
+    DEFAULT_PATH = "cassette.jsonl"
+
+# ===== LOCAL CLASSIFIERS =====
+class ClassifierConfig:
+    ENABLED = True
+    MODEL_DIR = "classifier_models"           # One <task>.json per trained model
+    DECISION_LOG_ENV = "LLM_DECISION_LOG"     # JSONL harvest of LLM decisions for retraining
+    TASKS = ["exit", "cancel", "non_banking", "intent", "language"]
+    # Below these confidences the LLM decides instead
+    THRESHOLDS = {"exit": 0.95, "cancel": 0.95, "non_banking": 0.9, "intent": 0.85}
+    DEFAULT_THRESHOLD = 0.95
+    MIN_NGRAM = 2
+    MAX_NGRAM = 4
+    MIN_FEATURE_COUNT = 2
+    EPOCHS = 15
+    LEARNING_RATE = 0.5
+    L2 = 1e-5
 
 # ===== API ENDPOINTS =====
 class APIEndpoints:
@@ -206,6 +435,8 @@ class APIEndpoints:
     TRANSFER_MONEY = "/transfer_money"
     PROCESS_QUERY = "/process_query"
     HEALTH = "/health"
+    SPECULATION_METRICS = "/metrics/speculation"
+    DEBUG_TRACES = "/debug/traces"
 
 # ===== HTTP STATUS MESSAGES =====
 class StatusMessages:
@@ -227,6 +458,192 @@ class Languages:
     
     URDU_VARIANTS = [URDU_ROMAN, URDU_ARABIC]
 
+# ===== LOCAL LANGUAGE IDENTIFICATION =====
+class LanguageIdConfig:
+    ENABLED = True
+    THRESHOLD = 0.9                # Below this confidence the LLM detects the language
+    SCRIPT_MIN_RATIO = 0.5         # Share of letters in the Arabic block that makes a text Urdu script
+    ARABIC_SCRIPT_CONFIDENCE = 0.8  # Arabic script without Urdu-only letters (could be Arabic or Persian)
+    LEXICON_SLOPE = 1.5            # Confidence = sigmoid(slope * (Roman Urdu weight - English weight))
+
+# ===== LANGUAGE PROFILE =====
+class LanguageProfileConfig:
+    ENABLED = True                 # Skip LLM language detection for messages consistent with a confident user profile
+    SMOOTHING = 0.3                # EMA weight of the newest detection
+    SKIP_THRESHOLD = 0.85          # Profile confidence needed to skip detection
+    MIN_DETECTIONS = 3             # Detections before a profile is trusted
+    CONSISTENCY_MIN = 0.35         # Lexicon probability of the profile language a message must keep (0.5 = no markers)
+    UNOBSERVED_METHODS = ["profile", "profile+translate", "profile+grammar",
+                          "context", "context+translate", "context+grammar", "error"]  # Did not detect
+
+class LanguageMarkers:
+    # Urdu-only letters of the Arabic block (not used in Arabic or mostly absent from Persian)
+    URDU_SCRIPT_LETTERS = "ٹڈڑںےۓہھ"
+    # Roman Urdu words that are not English words
+    ROMAN_URDU_STRONG = [
+        "hai", "hain", "kya", "kia", "mera", "meri", "mere", "mujhe", "muje", "karo", "karein", "kar", "kardo",
+        "batao", "bataein", "bata", "dikhao", "dikhayen", "kitna", "kitni", "kitne", "paisa", "paise", "raqam",
+        "pichla", "pichli", "pichle", "akhri", "aakhri", "mahine", "mahina", "hafte", "saal", "kharcha",
+        "kharch", "khracha", "kiya", "kiye", "gaya", "gayi", "gaye", "bhejo", "bhejna", "bhej", "chahiye",
+        "nahi", "nahin", "haan", "jee", "ji", "shukriya", "aap", "aapka", "aapki", "apna", "apni", "hum",
+        "humein", "wala", "wali", "wale", "kal", "aaj", "abhi", "kaise", "kab", "kahan", "kyun", "kaun",
+        "konsa", "konsi", "sirf", "aur", "lekin", "phir", "bhi", "mein", "usmein", "ismein", "uska", "uski",
+        "inka", "inki", "wahi", "yeh", "woh", "wo", "hazaar", "hazar", "lakh", "crore", "rupay", "rupaye",
+        "khata", "tabadla", "jama", "nikala", "nikalwaye", "batayein", "dekhna", "dekho", "samjhao"
+    ]
+    # Roman Urdu words that also read as English or as a typo of one
+    ROMAN_URDU_WEAK = ["me", "main", "ko", "se", "ka", "ki", "ke", "ho", "na", "tha", "thi", "ab"]
+    # English function words and verbs; the ones Roman Urdu borrows (last, check) keep mixed messages uncertain
+    ENGLISH = [
+        "the", "my", "is", "are", "was", "were", "what", "how", "much", "many", "show", "tell", "give",
+        "please", "last", "previous", "did", "does", "spend", "spent", "send", "sent", "check", "convert", "transfer",
+        "want", "would", "could", "can", "of", "in", "on", "for", "from", "with", "and", "this", "that",
+        "month", "week", "year", "today", "yesterday", "money", "all", "your", "you", "i", "have", "has",
+        "thanks", "thank", "yes", "no", "where", "when", "why", "which", "who", "about", "than", "more"
+    ]
+    WEAK_WEIGHT = 0.4
+
+# ===== TRANSLATION SERVICE =====
+class TranslationConfig:
+    TIMEOUT_SECONDS = 15.0          # Per OpenAI / Google translation call
+    MAX_RETRIES = 1                 # OpenAI client retries on connection errors and 5xx
+    MAX_CONCURRENT_REQUESTS = 16    # In-flight async translation calls across all turns
+    MAX_CONNECTIONS = 32            # Pooled HTTP connections of the async OpenAI client
+    MAX_KEEPALIVE_CONNECTIONS = 16
+
+# ===== TRANSLATION MEMORY =====
+class TranslationMemoryConfig:
+    ENABLED = True
+    PATH_ENV = "TRANSLATION_MEMORY_PATH"
+    DEFAULT_PATH = "translation_memory.jsonl"  # Appended to; reloaded on startup
+    MAX_ENTRIES = 20000            # Segments kept in memory (least recently used are dropped)
+    COMPACT_RATIO = 1.5            # File rewritten with the live entries past this many times MAX_ENTRIES lines
+    MAX_SEGMENT_CHARS = 400        # Longer sentences are translated but not remembered
+    # Capitalized words that are not names; a segment with any other unmasked mid-sentence capitalized
+    # word (a recipient, merchant or beneficiary) is translated but not remembered
+    COMMON_CAPITALIZED = [
+        "I", "OTP", "CNIC", "PKR", "USD", "EUR", "GBP", "ATM", "IBAN", "Urdu", "English", "Roman",
+        "January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+        "November", "December", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+        "Food", "Travel", "Telecom", "Shopping", "Finance", "Utilities", "Income", "Entertainment"
+    ]
+
+# ===== TRANSLATION BATCHING =====
+class TranslationBatchConfig:
+    ENABLED = True                 # Coalesce concurrent back-translations into one multi-segment call
+    MAX_BATCH_SEGMENTS = 24        # A batch this full is sent at once
+    MAX_WAIT_MS = 5.0              # How long the first request of a batch waits for others to join
+
+# ===== DIRECT RESPONSE LANGUAGE =====
+class DirectResponseConfig:
+    ENABLED = False                # Generate responses in the user's language instead of translating English ones
+    LANGUAGES = [Languages.URDU_ROMAN, Languages.URDU_ARABIC]
+
+# ===== SYSTEM MESSAGE CATALOG =====
+class MessageCatalogConfig:
+    ENABLED = True                 # Serve fixed system messages from the pre-translated catalog
+    PATH_ENV = "SYSTEM_MESSAGES_PATH"
+    DEFAULT_PATH = "system_messages.json"  # Generated offline by build_message_catalog.py
+    LANGUAGES = [Languages.URDU_ROMAN, Languages.URDU_ARABIC]
+
+class SystemMessages:
+    # English source of every catalog message; changing one makes its stored translations stale
+    ENGLISH = {
+        "voice_cooldown": "I'm still processing your previous voice message. Please wait a moment.",
+        "voice_error": "Sorry, I couldn't process your voice message. Please try typing your question instead.",
+        "rate_limited": "I appreciate your enthusiasm! Please give me just a moment to process your previous message before sending another.",
+        "processing_error": "Sorry, there was an error processing your request.",
+        "request_failed": "Sorry, I couldn't process your request. Please try again.",
+        "transfer_request_error": "Sorry, there was an error processing your transfer request. Please try again.",
+        "session_expired": "Session expired. Please start over by sending 'hi'.",
+        "account_missing": "Account information missing. Please restart your session.",
+        "no_pending_transfer": "No pending transfer found. Please start the transfer process again.",
+        "transfer_otp_error": "Sorry, there was an error processing your transfer OTP. Please try again or restart the transfer process.",
+        "confirmation_error": "Sorry, there was an error processing your confirmation. Please try again.",
+        "turn_budget_exhausted": "Sorry {first_name}, that took longer than expected. Please ask again, or try a shorter question like 'my balance' or 'last 5 transactions'.",
+        "backend_error": "Backend service error. Please try again later.",
+        "unexpected_error": "Unexpected error occurred. Please try again.",
+        "non_banking_decline": "I'm a banking assistant, {first_name}, and I can only help with your bank account questions like checking your balance, viewing transactions, analyzing spending, or transferring money. I don't provide information about other topics. What banking question can I help you with?",
+    }
+
+# ===== NUMBER NORMALIZATION =====
+class NumberWords:
+    # Number words; they only count as numbers before a multiplier ("do hazaar") or a currency
+    UNITS = {
+        "ek": 1, "aik": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4, "panch": 5, "paanch": 5, "chay": 6,
+        "chhe": 6, "saat": 7, "sath": 7, "aath": 8, "nau": 9, "das": 10, "bees": 20, "pachas": 50, "sau": 100,
+        "dedh": 1.5, "dhai": 2.5,
+        "ایک": 1, "دو": 2, "تین": 3, "چار": 4, "پانچ": 5, "چھ": 6, "سات": 7, "آٹھ": 8, "نو": 9, "دس": 10,
+        "بیس": 20, "پچاس": 50, "سو": 100, "ڈیڑھ": 1.5, "ڈھائی": 2.5
+    }
+    MULTIPLIERS = {
+        "sau": 100, "hundred": 100, "hazaar": 1000, "hazar": 1000, "hajar": 1000, "hajaar": 1000, "thousand": 1000,
+        "lakh": 100000, "lakhs": 100000,
+        "lac": 100000, "lacs": 100000, "crore": 10000000, "crores": 10000000, "karor": 10000000,
+        "million": 1000000, "سو": 100, "ہزار": 1000, "لاکھ": 100000, "کروڑ": 10000000
+    }
+    # A bare number after "5 hazaar" only joins the amount before one of these or at the end of the phrase;
+    # a multiplier with no count before one of these is one of it ("sau rupay" = 100)
+    CURRENCY_WORDS = [
+        "rs", "pkr", "usd", "rupay", "rupaye", "rupees", "rupee", "dollar", "dollars", "روپے", "روپیہ", "ڈالر"
+    ]
+
+# ===== ROMAN URDU GRAMMAR =====
+class RomanUrduConfig:
+    ENABLED = True                 # Parse common Roman Urdu commands locally instead of translating them
+    MAX_NAME_WORDS = 3             # Longest recipient / merchant name accepted before "ko" / "pe"
+
+class RomanUrduLexicon:
+    # Words that carry no filter of their own (pronouns, postpositions, auxiliaries, politeness)
+    FILLERS = [
+        "mera", "meri", "mere", "mujhe", "muje", "apna", "apni", "apne", "hamara", "hamari", "hamare", "ka", "ki",
+        "ke", "me", "mein", "mai", "main", "meine", "maine", "mene", "hai", "hain", "he", "ho", "hua", "hui", "hue", "huay", "kya", "kia",
+        "zara", "please", "plz", "pls", "bhai", "jee", "ji", "yaar", "sir", "tha", "thi", "kiya", "kiye",
+        "gaya", "gayi", "gaye", "sab", "sari", "saari", "sare", "saare", "tamam", "wala", "wali", "wale", "ab",
+        "abhi", "to", "tou", "bhi", "account", "khata", "khate", "se", "mujhko", "hamein", "humein", "kitna",
+        "kitni", "kitne", "karo", "karein", "kardo", "kar", "do", "dein", "dijiye", "de", "dena", "hy"
+    ]
+    # Verbs that make a message a request ("batao", "dikhao"); at least one Roman Urdu word must be present
+    REQUEST_VERBS = [
+        "batao", "btao", "bataein", "batayein", "bataen", "bata", "dikhao", "dikhayen", "dikhaein", "dikha",
+        "dikhado", "dekhao", "dekhna", "dekho", "chahiye", "chahiyen", "check", "samjhao"
+    ]
+    BALANCE_WORDS = ["balance", "baqaya", "baqi"]
+    MONEY_WORDS = ["paisa", "paise", "paisay", "raqam", "pese", "paison"]
+    TRANSACTION_WORDS = ["transactions", "transaction", "transection", "transections", "lain", "dain", "len",
+                         "den", "statement", "history", "entries"]
+    SPEND_WORDS = ["kharcha", "kharch", "khracha", "kharchay", "kharche", "kharchey", "spending", "lage", "lagay"]
+    TRANSFER_VERBS = ["bhejo", "bhej", "bhejna", "bhejdo", "bhejein", "bhejen", "transfer"]
+    CREDIT_WORDS = ["jama", "credit", "credits", "aaye", "aye", "aayi"]
+    DEBIT_WORDS = ["nikala", "nikale", "nikalwaye", "debit", "debits"]
+    # Words that refer back to the conversation; those messages need contextual resolution
+    ANAPHORA = ["usmein", "ismein", "usme", "isme", "uska", "uski", "uske", "iska", "iski", "inka", "inki",
+                "wahi", "yeh", "woh", "wo", "unmein", "usi", "isi"]
+    LIMIT_WORDS = ["pichli", "pichle", "pichla", "akhri", "aakhri", "last", "latest", "akhiri"]
+    PREVIOUS = ["pichla", "pichle", "pichli", "guzishta", "last"]
+    CURRENT = ["is", "iss", "this"]
+    PERIODS = {
+        "mahina": "month", "mahine": "month", "mahinay": "month", "month": "month",
+        "hafta": "week", "hafte": "week", "haftay": "week", "week": "week",
+        "saal": "year", "sal": "year", "baras": "year", "year": "year"
+    }
+    DAYS = {"aaj": "today", "aj": "today", "kal": "yesterday"}
+    MONTHS = {
+        "janwari": "january", "farwari": "february", "mayi": "may", "julai": "july", "agast": "august",
+        "sitambar": "september", "aktubar": "october", "disambar": "december"
+    }
+    CURRENCIES = {
+        "rupay": "PKR", "rupaye": "PKR", "rupees": "PKR", "rupee": "PKR", "rs": "PKR", "pkr": "PKR",
+        "dollar": "USD", "dollars": "USD", "usd": "USD"
+    }
+    CATEGORIES = {
+        "khana": "Food", "khane": "Food", "khanay": "Food", "food": "Food", "safar": "Travel", "travel": "Travel",
+        "shopping": "Shopping", "bijli": "Utilities", "bill": "Utilities", "bills": "Utilities",
+        "mobile": "Telecom", "entertainment": "Entertainment"
+    }
+    TARGET_POSTPOSITIONS = ["pe", "par", "per"]  # "<merchant/category> pe kitna kharch"
+    RECIPIENT_POSTPOSITION = "ko"              # "<recipient> ko bhejo"
+
 # ===== MONGODB CONFIGURATION =====
 class MongoConfig:
     DEFAULT_URI = "mongodb://localhost:27017/"
@@ -2,6 +2,8 @@ import httpx
 import logging
 from typing import Dict, Optional
 
+from cassette import cassette
+
 logger = logging.getLogger(__name__)
 
 class CurrencyConverter:
@@ -18,20 +20,24 @@ class CurrencyConverter:
             if from_currency == to_currency:
                 return 1.0
                 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/{from_currency}")
-                response.raise_for_status()
-                
-                data = response.json()
-                rates = data.get("rates", {})
-                
-                if to_currency in rates:
-                    rate = rates[to_currency]
-                    logger.info(f"Exchange rate {from_currency} to {to_currency}: {rate}")
-                    return rate
-                else:
-                    logger.error(f"Currency {to_currency} not found in rates")
-                    return None
+            url = f"{self.base_url}/{from_currency}"
+            
+            async def fetch_rates():
+                async with httpx.AsyncClient(timeout=10.0) as client:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    return response.json()
+            
+            data = await cassette.acall("fx_rates", {"url": url}, fetch_rates)
+            rates = data.get("rates", {})
+            
+            if to_currency in rates:
+                rate = rates[to_currency]
+                logger.info(f"Exchange rate {from_currency} to {to_currency}: {rate}")
+                return rate
+            else:
+                logger.error(f"Currency {to_currency} not found in rates")
+                return None
                     
         except Exception as e:
             logger.error(f"Error getting exchange rate: {e}")
@@ -0,0 +1,41 @@
+"""
+Debug endpoints for Banking AI Assistant.
+Turn traces carry raw user messages, so the routes answer only when DEBUG_TOKEN is set and
+the request sends the same value in the X-Debug-Token header; without the variable they
+do not exist (404). The webhook and the backend both include this router, each serving
+the traces of its own process.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from constants import APIEndpoints, StatusMessages, TraceConfig
+from turn_trace import get_trace, list_traces
+
+
+def require_debug_token(token: Optional[str] = Header(default=None, alias=TraceConfig.DEBUG_TOKEN_HEADER)) -> None:
+    expected = os.getenv(TraceConfig.DEBUG_TOKEN_ENV)
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+router = APIRouter(dependencies=[Depends(require_debug_token)])
+
+
+@router.get(APIEndpoints.DEBUG_TRACES)
+async def get_recent_traces(limit: int = 20):
+    """Per-turn stage, LLM call and token summaries for recent turns."""
+    return {"status": StatusMessages.SUCCESS, "traces": list_traces(limit)}
+
+
+@router.get(f"{APIEndpoints.DEBUG_TRACES}/{{trace_id}}")
+async def get_turn_trace(trace_id: str, format: str = "json"):
+    """Full span tree of one turn as JSON or OpenTelemetry (format=otel)."""
+    trace = get_trace(trace_id, format)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+direct_language_report.py
+
+Quality and latency of generating responses directly in the user's language versus
+generating English and back-translating it. Both approaches answer the same banking
+contexts for Roman Urdu and Urdu script; each output is checked for kept numbers, the
+right script and language, and no asterisks. Calls the configured LLM. Exits non-zero
+if direct generation keeps fewer numbers than back-translation.
+
+Usage:
+    python direct_language_report.py
+    python direct_language_report.py --languages ur-roman --repeat 3 --show-outputs
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from typing import Any, Dict, List, Tuple
+
+from constants import ContextStates, DirectResponseConfig, Languages
+from language_id import language_identifier
+from response_language import respond_in
+from translation_service import translation_service
+from turn_trace import turn_trace
+
+# (name, context_state, data, user_message, intent)
+CASES: List[Tuple[str, str, Any, str, str]] = [
+    ("balance", ContextStates.BALANCE_INQUIRY,
+     {"balance": 245600.0, "currency": "PKR", "as_of": "2025-07-29"}, "what is my balance", "balance_inquiry"),
+    ("transactions", ContextStates.TRANSACTION_HISTORY, [
+        {"date": "2025-07-28", "description": "Amazon", "type": "debit", "amount": 4500, "currency": "PKR", "balance": 245600},
+        {"date": "2025-07-26", "description": "Salary", "type": "credit", "amount": 150000, "currency": "PKR", "balance": 250100},
+        {"date": "2025-07-21", "description": "Uber", "type": "debit", "amount": 820, "currency": "PKR", "balance": 100100}
+    ], "show my last 3 transactions", "transaction_history"),
+    ("spending", ContextStates.SPENDING_ANALYSIS,
+     [{"_id": "Food", "total_spent": 18450, "count": 12}, {"_id": "Travel", "total_spent": 9200, "count": 4}],
+     "how much did i spend by category in june", "category_spending"),
+    ("transfer", ContextStates.TRANSFER_EXECUTED_SUCCESS,
+     {"amount": 5000, "currency": "PKR", "recipient": "Ali Raza", "reference": "TXN-20250729-8812", "new_balance": 240600},
+     "transfer 5000 pkr to ali raza", "transfer_money"),
+    ("no_data", ContextStates.SPENDING_ANALYSIS, [], "how much did i spend on netflix in march", "category_spending"),
+]
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_ARABIC = re.compile(r"[\u0600-\u06FF]")
+
+
+def numbers_in(text: str) -> set:
+    return {number.replace(",", "").rstrip(".").removesuffix(".00") for number in _NUMBER.findall(text)}
+
+
+def check(output: str, english: str, language: str) -> Dict[str, bool]:
+    """Quality checks of one final-language output against the English answer."""
+    arabic_letters = len(_ARABIC.findall(output))
+    letters = sum(1 for char in output if char.isalpha()) or 1
+    return {
+        "numbers_kept": numbers_in(english) <= numbers_in(output),
+        "script_ok": arabic_letters == 0 if language == Languages.URDU_ROMAN else arabic_letters / letters >= 0.5,
+        "language_ok": language_identifier.identify(output).language == language,
+        "no_asterisks": "*" not in output
+    }
+
+
+def _cost(trace: Any) -> Dict[str, Any]:
+    summary = trace.summary()
+    return {"llm_calls": summary["llm_calls"], "total_tokens": summary["total_tokens"], "duration_ms": summary["duration_ms"]}
+
+
+async def run_case(ai_agent: Any, case: Tuple[str, str, Any, str, str], language: str) -> Dict[str, Any]:
+    name, context_state, data, user_message, intent = case
+
+    with turn_trace("direct_language_report", service="report") as translated_trace:
+        english = await ai_agent.generate_natural_response(context_state, data, user_message, "Sara", intent=intent)
+        translated = await translation_service.atranslate_from_english(english, language)
+
+    with turn_trace("direct_language_report", service="report") as direct_trace, respond_in(language):
+        direct = await ai_agent.generate_natural_response(context_state, data, user_message, "Sara", intent=intent)
+
+    return {
+        "case": name,
+        "language": language,
+        "english": english,
+        "translate": {"output": translated, **_cost(translated_trace), **check(translated, english, language)},
+        "direct": {"output": direct, **_cost(direct_trace), **check(direct, english, language)}
+    }
+
+
+def aggregate(rows: List[Dict[str, Any]], approach: str) -> Dict[str, float]:
+    results = [row[approach] for row in rows]
+    count = len(results) or 1
+    return {
+        "avg_ms": sum(result["duration_ms"] or 0 for result in results) / count,
+        "llm_calls": sum(result["llm_calls"] for result in results) / count,
+        "tokens": sum(result["total_tokens"] for result in results) / count,
+        **{key: sum(result[key] for result in results) / count
+           for key in ("numbers_kept", "script_ok", "language_ok", "no_asterisks")}
+    }
+
+
+async def run(languages: List[str], repeat: int) -> List[Dict[str, Any]]:
+    from ai_agent import BankingAIAgent
+    ai_agent = BankingAIAgent()
+    rows = []
+    for _ in range(repeat):
+        for language in languages:
+            for case in CASES:
+                rows.append(await run_case(ai_agent, case, language))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Direct target-language generation vs English + back-translation")
+    parser.add_argument("--languages", default=",".join(DirectResponseConfig.LANGUAGES))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--show-outputs", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print every output and check as JSON")
+    args = parser.parse_args()
+
+    languages = [language for language in args.languages.split(",") if language]
+    configured = DirectResponseConfig.ENABLED
+    DirectResponseConfig.ENABLED = True
+    try:
+        rows = asyncio.run(run(languages, args.repeat))
+    finally:
+        DirectResponseConfig.ENABLED = configured
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"{len(CASES)} cases x {len(languages)} languages x {args.repeat}")
+    print(f"{'language':<10}{'approach':<11}{'avg ms':>9}{'calls':>7}{'tokens':>8}"
+          f"{'numbers':>9}{'script':>8}{'lang':>7}{'no *':>7}")
+    exit_code = 0
+    for language in languages:
+        language_rows = [row for row in rows if row["language"] == language]
+        summary = {approach: aggregate(language_rows, approach) for approach in ("translate", "direct")}
+        for approach, stats in summary.items():
+            print(f"{language:<10}{approach:<11}{stats['avg_ms']:>9.0f}{stats['llm_calls']:>7.1f}{stats['tokens']:>8.0f}"
+                  f"{stats['numbers_kept']:>9.1%}{stats['script_ok']:>8.1%}{stats['language_ok']:>7.1%}"
+                  f"{stats['no_asterisks']:>7.1%}")
+        if summary["direct"]["numbers_kept"] < summary["translate"]["numbers_kept"]:
+            print(f"FAIL: direct generation keeps fewer numbers than back-translation for {language}")
+            exit_code = 1
+
+    if args.show_outputs:
+        for row in rows:
+            print(f"\n[{row['language']}] {row['case']}")
+            print(f"  translate: {row['translate']['output']}")
+            print(f"  direct:    {row['direct']['output']}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
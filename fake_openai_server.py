@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+fake_openai_server.py
+
+OpenAI-compatible stand-in for load and capacity testing. Serves /v1/chat/completions
+(plain and streamed) and /v1/audio/transcriptions, recognizes each of our prompts and
+returns plausible canned answers, with configurable latency and error injection.
+Repeated system prompts report cached prompt tokens the way the real API does.
+
+Usage:
+    python fake_openai_server.py --port 8900 --latency lognormal:5.5,0.4 --error-rate 0.01
+    OPENAI_BASE_URL=http://localhost:8900/v1 OPENAI_API_KEY=fake python app.py
+
+Latency specs (milliseconds): fixed:200 | uniform:100,400 | normal:300,80 | lognormal:mu,sigma
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from constants import BankingIntents, ExitCommands, Languages
+
+# Substrings that identify each prompt the pipeline sends
+PROMPT_MARKERS = [
+    ("exit intent detector", "exit"),
+    ("cancel their current money transfer", "cancel"),
+    ("wants to convert currency amounts", "currency_intent"),
+    ("Extract currency conversion details", "currency_details"),
+    ("advanced query resolver", "resolve"),
+    ("Extract relevant filters from the user's query", "filters"),
+    ("Generate a MongoDB aggregation pipeline", "pipeline"),
+    ("classify it into one of these intents", "intent"),
+    ("Extract transfer details from the query", "transfer"),
+    ("helping a user select their account", "account"),
+    ("banking query analyzer", "non_banking"),
+    ("response format analyzer", "response_format"),
+    ("analyzing a banking query to understand what the user really wants", "reasoning"),
+    ("language detection and translation expert", "normalize"),
+    ("language detection expert", "language"),
+    ("Translate each segment", "segments"),
+    ("translator. Translate", "translation"),
+    ("Fetch account data with the tools", "tool_agent"),
+]
+
+# Labels our prompts put in front of the user's text
+_USER_TEXT_PATTERNS = [
+    re.compile(r'CURRENT CONTEXTUAL QUERY: "(.*?)"'),
+    re.compile(r'CURRENT TRANSFER REQUEST: "(.*?)"'),
+    re.compile(r'(?:User|USER) (?:message|MESSAGE|Message|input|QUERY|query): "(.*?)"'),
+    re.compile(r'Current User Message: "(.*?)"'),
+    re.compile(r"User's current message: \"(.*?)\""),
+    re.compile(r'User query: (.*)'),
+    re.compile(r'Text to translate: "(.*?)"', re.S),
+    re.compile(r'Text: "(.*?)"', re.S),
+]
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+
+ROMAN_URDU_HINTS = ["mera", "meri", "kitna", "kya", "hai", "karo", "batao", "paisa", "mujhe", "kar"]
+
+stats = Counter()
+
+
+def classify_prompt(prompt: str) -> str:
+    return next((kind for marker, kind in PROMPT_MARKERS if marker in prompt), "response")
+
+
+def user_text(prompt: str) -> str:
+    for pattern in _USER_TEXT_PATTERNS:
+        match = pattern.search(prompt)
+        if match:
+            return match.group(1).strip()
+    return ""
+
+
+def _filters_for(message: str) -> Dict:
+    lower = message.lower()
+    filters = {}
+    limit = re.search(r"last (\d+)", lower)
+    if limit:
+        filters["limit"] = int(limit.group(1))
+    month = next((name for name in MONTHS if name in lower), None)
+    if month:
+        filters["month"] = month
+        filters["year"] = 2025
+    if any(word in lower for word in ["spend", "spent", "spending", "total"]):
+        filters["transaction_type"] = "debit"
+        filters["intent_hint"] = "spending_total"
+    elif "balance" in lower:
+        filters["intent_hint"] = "balance_query"
+    elif "transaction" in lower or "show" in lower:
+        filters["intent_hint"] = "transaction_list"
+    return filters
+
+
+def _intent_for(message: str) -> str:
+    lower = message.lower()
+    if any(word in lower for word in ["transfer", "send", "pay "]):
+        return BankingIntents.TRANSFER_MONEY
+    if "balance" in lower:
+        return BankingIntents.BALANCE_INQUIRY
+    if any(word in lower for word in ["spend", "spent", "spending"]):
+        return BankingIntents.SPENDING_ANALYSIS
+    if "transaction" in lower:
+        return BankingIntents.TRANSACTION_HISTORY
+    return BankingIntents.GENERAL
+
+
+def _transfer_for(message: str) -> Dict:
+    amount = re.search(r"(\d+(?:\.\d+)?)", message)
+    currency = "USD" if re.search(r"usd|dollar|\$", message, re.I) else "PKR"
+    recipient = re.search(r"\bto ([A-Za-z][A-Za-z ]+)$", message.strip())
+    return {
+        "amount": float(amount.group(1)) if amount else None,
+        "currency": currency,
+        "recipient": recipient.group(1).strip() if recipient else None
+    }
+
+
+def canned_tool_calls(body: Dict, prompt: str) -> List[Dict]:
+    """One round of tool calls for the tool-agent prompt; once tool results are in, the model answers."""
+    if not body.get("tools") or body.get("tool_choice") == "none":
+        return []
+    if any(message.get("role") == "tool" for message in body.get("messages", [])):
+        return []
+
+    text = user_text(prompt)
+    lower = text.lower()
+    month = next((name for name in MONTHS if name in lower), None)
+    calls = []
+    if _intent_for(text) == BankingIntents.TRANSFER_MONEY:
+        calls.append(("request_transfer", _transfer_for(text)))
+    else:
+        if "balance" in lower:
+            calls.append(("get_balance", {}))
+        if any(word in lower for word in ["spend", "spent", "spending", "category"]):
+            calls.append(("spending_by_category", {"month": month} if month else {}))
+        if re.search(r"convert|in (usd|gbp|eur|pkr|dollars)", lower):
+            calls.append(("convert_currency", {"amount": 10000, "from_currency": "PKR", "to_currency": "USD"}))
+        if not calls:
+            calls.append(("list_transactions", {"month": month, "limit": 5} if month else {"limit": 5}))
+
+    available = {tool["function"]["name"] for tool in body["tools"]}
+    return [
+        {"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+         "function": {"name": name, "arguments": json.dumps(args)}}
+        for name, args in calls if name in available
+    ]
+
+
+def _language_for(text: str) -> str:
+    if re.search(r"[؀-ۿ]", text):
+        return Languages.URDU_ARABIC
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    if words & set(ROMAN_URDU_HINTS):
+        return Languages.URDU_ROMAN
+    return Languages.ENGLISH
+
+
+def canned_reply(prompt: str) -> str:
+    """Plausible answer for one of our prompts."""
+    kind = classify_prompt(prompt)
+    text = user_text(prompt)
+    stats[kind] += 1
+
+    if kind == "exit":
+        return "YES" if any(command in text.lower().split() for command in ExitCommands.COMMANDS) else "NO"
+    if kind == "cancel":
+        return "YES" if re.search(r"\b(cancel|stop|abort|never mind|forget it)\b", text, re.I) else "NO"
+    if kind == "currency_intent":
+        return "YES" if re.search(r"\bconvert|\bin (usd|gbp|eur|pkr|dollars|pounds|euros)\b", text, re.I) else "NO"
+    if kind == "currency_details":
+        return json.dumps({"amount": 10000, "from_currency": "PKR", "to_currency": "USD", "context": "account balance"})
+    if kind in ("resolve", "translation"):
+        return text
+    if kind == "segments":
+        segments = re.search(r"Segments: (\[.*\])", prompt, re.S)
+        return json.dumps({"translations": json.loads(segments.group(1)) if segments else []}, ensure_ascii=False)
+    if kind == "filters":
+        return json.dumps(_filters_for(text))
+    if kind == "pipeline":
+        account = re.search(r"Account Number: (\S+)", prompt)
+        limit = re.search(r'"limit": (\d+)', prompt)
+        return json.dumps([
+            {"$match": {"account_number": account.group(1) if account else ""}},
+            {"$sort": {"date": -1, "_id": -1}},
+            {"$limit": int(limit.group(1)) if limit else 10}
+        ])
+    if kind == "intent":
+        return _intent_for(text)
+    if kind == "transfer":
+        return json.dumps(_transfer_for(text))
+    if kind == "account":
+        accounts = re.findall(r"Account: (\d+)", prompt)
+        return accounts[0] if accounts else "NO_MATCH"
+    if kind == "non_banking":
+        return "ALLOW"
+    if kind == "response_format":
+        return "STRUCTURED_LIST" if "Item list" in prompt else "CONCISE_ONE_LINER"
+    if kind == "reasoning":
+        intent = _intent_for(text)
+        action = "balance_check" if intent == BankingIntents.BALANCE_INQUIRY else "transaction_history"
+        return json.dumps({"action_needed": action, "analysis_type": "transaction_history",
+                           "reasoning": "canned response from the local fake server"})
+    if kind == "language":
+        return _language_for(text)
+    if kind == "normalize":
+        return json.dumps({"language": _language_for(text), "english_text": text, "confidence": 0.9}, ensure_ascii=False)
+    if "Write the ENTIRE response in Roman Urdu" in prompt:
+        return ("Hello there! Aap ki maloomat yeh hai.\n"
+                "Account Balance: PKR 245,600.00 As of: 29th July 2025\n"
+                "Kya main aur kuch madad kar sakta hoon?")
+    if "Write the ENTIRE response in natural Urdu" in prompt:
+        return ("ہیلو! آپ کی معلومات یہ ہے۔\n"
+                "Account Balance: PKR 245,600.00 As of: 29th July 2025\n"
+                "کیا میں مزید مدد کر سکتا ہوں؟")
+    return ("Hello there! Here is the information you asked for.\n"
+            "Account Balance: PKR 245,600.00 As of: 29th July 2025\n"
+            "Let me know if you'd like anything else.")
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turn a latency spec into a sampler returning seconds."""
+    name, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if name == "fixed":
+        return lambda: values[0] / 1000
+    if name == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if name == "normal":
+        return lambda: max(random.gauss(values[0], values[1]), 0.0) / 1000
+    if name == "lognormal":
+        return lambda: random.lognormvariate(values[0], values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def count_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+
+def cached_prefix_tokens(messages: List[Dict], seen_prefixes: set) -> int:
+    """Mimic provider prefix caching: a repeated system message of 1024+ tokens is cached in 128-token blocks."""
+    if not messages or messages[0].get("role") != "system":
+        return 0
+    prefix = str(messages[0].get("content") or "")
+    tokens = count_tokens(prefix)
+    if prefix not in seen_prefixes:
+        seen_prefixes.add(prefix)
+        return 0
+    return (tokens // 128) * 128 if tokens >= 1024 else 0
+
+
+def create_app(latency: str = "fixed:0", token_delay_ms: float = 0.0, error_rate: float = 0.0,
+               error_codes: Optional[List[int]] = None, transcription: str = "mera balance kya hai") -> FastAPI:
+    app = FastAPI()
+    sample_latency = parse_latency(latency)
+    error_codes = error_codes or [429, 500, 503]
+    seen_prefixes: set = set()
+
+    def injected_error() -> Optional[JSONResponse]:
+        if error_rate and random.random() < error_rate:
+            status = random.choice(error_codes)
+            stats[f"error_{status}"] += 1
+            return JSONResponse(status_code=status, content={"error": {
+                "message": f"Injected error {status} from fake server",
+                "type": "rate_limit_error" if status == 429 else "server_error",
+                "code": None
+            }})
+        return None
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(sample_latency())
+        error = injected_error()
+        if error:
+            return error
+
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        reply = canned_reply(prompt)
+        if (body.get("response_format") or {}).get("type") in ("json_object", "json_schema") and reply.startswith("["):
+            # JSON modes only produce objects; our single-list schemas wrap the array under "pipeline"
+            reply = json.dumps({"pipeline": json.loads(reply)})
+        max_tokens = body.get("max_tokens")
+        if max_tokens:
+            reply = reply[:max_tokens * 4]
+
+        model = body.get("model", "gpt-4o")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": count_tokens(prompt),
+            "completion_tokens": count_tokens(reply),
+            "total_tokens": count_tokens(prompt) + count_tokens(reply),
+            "prompt_tokens_details": {"cached_tokens": cached_prefix_tokens(body.get("messages", []), seen_prefixes)}
+        }
+        stats["cached_tokens"] += usage["prompt_tokens_details"]["cached_tokens"]
+
+        tool_calls = canned_tool_calls(body, prompt)
+        if tool_calls and not body.get("stream"):
+            stats["tool_calls"] += len(tool_calls)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": None, "tool_calls": tool_calls},
+                             "finish_reason": "tool_calls"}],
+                "usage": usage
+            }
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def stream():
+            def chunk(delta: Dict, finish_reason: Optional[str] = None, chunk_usage: Optional[Dict] = None) -> str:
+                payload = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                }
+                if chunk_usage:
+                    payload["usage"] = chunk_usage
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in re.findall(r"\S+\s*|\s+", reply):
+                if token_delay_ms:
+                    await asyncio.sleep(token_delay_ms / 1000)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            if include_usage:
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/transcriptions")
+    async def audio_transcriptions(request: Request):
+        body = await request.body()
+        await asyncio.sleep(sample_latency())
+        error = injected_error()
+        if error:
+            return error
+
+        stats["transcription"] += 1
+        response_format = re.search(rb'name="response_format"\r\n\r\n(\w+)', body)
+        if response_format and response_format.group(1) == b"text":
+            return PlainTextResponse(transcription)
+        return {"text": transcription}
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="fixed:0", help="Latency distribution in ms (see module docstring)")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="Delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-codes", default="429,500,503", help="HTTP codes used for injected errors")
+    parser.add_argument("--transcription", default="mera balance kya hai", help="Text returned for audio")
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(
+        latency=args.latency,
+        token_delay_ms=args.token_delay_ms,
+        error_rate=args.error_rate,
+        error_codes=[int(code) for code in args.error_codes.split(",") if code],
+        transcription=args.transcription
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
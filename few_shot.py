@@ -0,0 +1,207 @@
+"""
+Dynamic few-shot examples for the filter extraction and pipeline generation prompts.
+Keeps a bank of worked examples and inserts only the k most similar ones for the
+current query, within a per-prompt token budget.
+"""
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from constants import FewShotConfig, Months
+from token_counter import count_tokens
+
+FILTER_FIELDS = [
+    "description", "category", "month", "year", "transaction_type", "amount_range",
+    "date_range", "limit", "currency", "intent_hint"
+]
+
+# === EXAMPLE BANKS ===
+FILTER_EXAMPLES: List[Dict[str, Any]] = [
+    {"query": "how much did i spend on netflix in june",
+     "filters": {"description": "netflix", "month": "june", "year": 2025, "transaction_type": "debit", "intent_hint": "spending_total"}},
+    {"query": "show me all amazon transactions",
+     "filters": {"description": "amazon", "intent_hint": "transaction_list"}},
+    {"query": "show my last 10 transactions",
+     "filters": {"limit": 10, "intent_hint": "transaction_list"}},
+    {"query": "how much did i spend on food last month",
+     "filters": {"category": "Food", "month": "june", "year": 2025, "transaction_type": "debit", "intent_hint": "spending_total"}},
+    {"query": "what was my balance on june 15th",
+     "filters": {"date_range": {"start": "2025-06-15", "end": "2025-06-15"}, "intent_hint": "balance_inquiry"}},
+    {"query": "average balance in may",
+     "filters": {"month": "may", "year": 2025, "intent_hint": "balance_inquiry"}},
+    {"query": "show my credit transactions in march",
+     "filters": {"month": "march", "year": 2025, "transaction_type": "credit", "intent_hint": "transaction_list"}},
+    {"query": "list transactions above 5000 pkr",
+     "filters": {"amount_range": {"min": 5000, "max": None}, "currency": "pkr", "intent_hint": "transaction_list"}},
+    {"query": "how much did i spend on uber between june 1 and june 10",
+     "filters": {"description": "uber", "date_range": {"start": "2025-06-01", "end": "2025-06-10"}, "transaction_type": "debit", "intent_hint": "spending_total"}},
+    {"query": "total entertainment spending this year",
+     "filters": {"category": "Entertainment", "year": 2025, "transaction_type": "debit", "intent_hint": "spending_total"}},
+    {"query": "show my last 5 foodpanda orders",
+     "filters": {"description": "foodpanda", "limit": 5, "intent_hint": "transaction_list"}},
+    {"query": "how much did i spend in usd in may",
+     "filters": {"month": "may", "year": 2025, "transaction_type": "debit", "currency": "usd", "intent_hint": "spending_total"}},
+    {"query": "how much salary did i receive in april",
+     "filters": {"category": "Income", "month": "april", "year": 2025, "transaction_type": "credit", "intent_hint": "spending_total"}},
+]
+
+_MATCH_ACCOUNT = '"account_number": "{account_number}"'
+_JUNE = '"date": {"$gte": {"$date": "2025-06-01T00:00:00.000Z"}, "$lte": {"$date": "2025-06-30T23:59:59.999Z"}}'
+_APRIL = '"date": {"$gte": {"$date": "2025-04-01T00:00:00.000Z"}, "$lte": {"$date": "2025-04-30T23:59:59.999Z"}}'
+_MAY = '"date": {"$gte": {"$date": "2025-05-01T00:00:00.000Z"}, "$lte": {"$date": "2025-05-31T23:59:59.999Z"}}'
+_SUM_GROUP = '{"$group": {"_id": null, "total_amount": {"$sum": "$amount_deducted_from_account"}, "currency": {"$first": "$account_currency"}}}'
+_SORT_DESC = '{"$sort": {"date": -1, "_id": -1}}'
+
+PIPELINE_EXAMPLES: List[Dict[str, Any]] = [
+    {"heading": 'Intent: spending_analysis, Query: "how much did i spend on McDonald\'s in june" (WANTS TOTAL - FLEXIBLE MATCHING)',
+     "intent": "spending_analysis",
+     "filters": {"description": "McDonald's", "month": "june", "year": 2025, "transaction_type": "debit"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "type": "debit", "description": {"$regex": "mcdonald", "$options": "i"}, ' + _JUNE + '}}', _SUM_GROUP]},
+    {"heading": 'Intent: spending_analysis, Query: "how much did i spend on netflix in april" (WANTS TOTAL)',
+     "intent": "spending_analysis",
+     "filters": {"description": "netflix", "month": "april", "year": 2025, "transaction_type": "debit"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "type": "debit", "description": {"$regex": "netflix", "$options": "i"}, ' + _APRIL + '}}', _SUM_GROUP]},
+    {"heading": 'Intent: transaction_history, Query: "show me all netflix transactions" (WANTS LIST)',
+     "intent": "transaction_history",
+     "filters": {"description": "netflix"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "description": {"$regex": "netflix", "$options": "i"}}}', _SORT_DESC]},
+    {"heading": 'Intent: transaction_history, Query: "list of mcdonald transactions" (WANTS LIST - FLEXIBLE MATCHING)',
+     "intent": "transaction_history",
+     "filters": {"description": "mcdonald"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "description": {"$regex": "mcdonald", "$options": "i"}}}', _SORT_DESC]},
+    {"heading": 'Intent: transaction_history, Query: "show my last 12 transactions" (WANTS LIST with limit)',
+     "intent": "transaction_history",
+     "filters": {"limit": 12},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + '}}', _SORT_DESC, '{"$limit": 12}']},
+    {"heading": 'Intent: category_spending, Filters: {"category": "Food", "month": "april", "year": 2025, "transaction_type": "debit"}',
+     "intent": "category_spending",
+     "filters": {"category": "Food", "month": "april", "year": 2025, "transaction_type": "debit"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "type": "debit", "category": {"$regex": "Food", "$options": "i"}, ' + _APRIL + '}}', _SUM_GROUP]},
+    {"heading": 'Intent: balance_inquiry , Query: "what was my balance on may 15th" (BALANCE QUERY)',
+     "intent": "balance_inquiry",
+     "filters": {"date_range": {"start": "2025-05-15", "end": "2025-05-15"}},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "date": {"$lte": {"$date": "2025-05-15T23:59:59.999Z"}}}}', _SORT_DESC,
+                  '{"$limit": 1}', '{"$project": {"account_balance": 1, "date": 1, "account_currency": 1}}']},
+    {"heading": 'Intent: balance_inquiry, Query: "average balance in june" (BALANCE QUERY)',
+     "intent": "balance_inquiry",
+     "filters": {"month": "june", "year": 2025},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', ' + _JUNE + '}}',
+                  '{"$group": {"_id": null, "average_balance": {"$avg": "$account_balance"}, "currency": {"$first": "$account_currency"}}}']},
+    {"heading": 'Intent: transaction_history, Query: "show my food transactions in may" (WANTS LIST - NO $group)',
+     "intent": "transaction_history",
+     "filters": {"category": "Food", "month": "may", "year": 2025},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "category": {"$regex": "Food", "$options": "i"}, ' + _MAY + '}}', _SORT_DESC]},
+    {"heading": 'Intent: spending_analysis, Query: "did i spend more on food in june than in may" (COMPARISON - USE $facet)',
+     "intent": "spending_analysis",
+     "filters": {"category": "Food", "transaction_type": "debit", "comparison": True},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "type": "debit", "category": {"$regex": "Food", "$options": "i"}}}',
+                  '{"$facet": {"june": [{"$match": {' + _JUNE + '}}, ' + _SUM_GROUP + '], "may": [{"$match": {' + _MAY + '}}, ' + _SUM_GROUP + ']}}']},
+    {"heading": 'Intent: spending_analysis, Query: "how much salary did i receive in april" (CREDIT TOTAL)',
+     "intent": "spending_analysis",
+     "filters": {"category": "Income", "month": "april", "year": 2025, "transaction_type": "credit"},
+     "pipeline": ['{"$match": {' + _MATCH_ACCOUNT + ', "type": "credit", "category": {"$regex": "Income", "$options": "i"}, ' + _APRIL + '}}', _SUM_GROUP]},
+]
+
+# === LEXICAL RETRIEVAL ===
+_STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "did", "do", "does", "is", "was", "what", "of", "on",
+    "in", "to", "for", "and", "or", "please", "can", "you", "how", "all", "from", "at"
+}
+_WORD_RE = re.compile(r"[a-z]+|\d+")
+
+
+def query_features(text: str) -> Set[str]:
+    """Content words (lightly stemmed), with months and numbers reduced to placeholders."""
+    features = set()
+    for token in _WORD_RE.findall(text.lower()):
+        if token.isdigit():
+            features.add("<num>")
+        elif token in Months.NAMES_TO_NUMBERS:
+            features.add("<month>")
+        elif token not in _STOPWORDS:
+            features.add(token[:-1] if len(token) > 3 and token.endswith("s") else token)
+    return features
+
+
+def filter_features(intent: str, filters: Dict[str, Any]) -> Set[str]:
+    """Intent plus the shape of the filters (which fields are set, debit/credit)."""
+    features = {f"intent:{intent}"}
+    for field, value in filters.items():
+        if value in (None, "", {}, []):
+            continue
+        features.add(f"has:{field}")
+        if field == "transaction_type":
+            features.add(f"type:{value}")
+    return features
+
+
+class LexicalRetriever:
+    """Ranks bank entries by idf-weighted cosine similarity of their feature sets."""
+
+    def __init__(self, feature_sets: List[Set[str]]):
+        self.feature_sets = feature_sets
+        document_frequency = Counter(feature for features in feature_sets for feature in features)
+        total = len(feature_sets)
+        self.idf = {feature: math.log((total + 1) / (count + 0.5)) for feature, count in document_frequency.items()}
+        self.norms = [math.sqrt(sum(self.idf[f] ** 2 for f in features)) or 1.0 for features in feature_sets]
+
+    def rank(self, features: Set[str]) -> List[int]:
+        """Bank indices from most to least similar; ties keep bank order."""
+        query_norm = math.sqrt(sum(self.idf.get(f, 0.0) ** 2 for f in features)) or 1.0
+        scores = [
+            sum(self.idf[f] ** 2 for f in features & entry) / (query_norm * self.norms[index])
+            for index, entry in enumerate(self.feature_sets)
+        ]
+        return sorted(range(len(scores)), key=lambda index: -scores[index])
+
+
+_filter_retriever = LexicalRetriever([query_features(example["query"]) for example in FILTER_EXAMPLES])
+_pipeline_retriever = LexicalRetriever([
+    filter_features(example["intent"], example["filters"]) for example in PIPELINE_EXAMPLES
+])
+
+
+# === RENDERING ===
+def render_filter_example(example: Dict[str, Any]) -> str:
+    response = {field: example["filters"].get(field) for field in FILTER_FIELDS}
+    return f'Query: "{example["query"]}"\nResponse: {json.dumps(response)}'
+
+
+def render_pipeline_example(example: Dict[str, Any], account_number: str) -> str:
+    stages = ",\n    ".join(stage.replace("{account_number}", account_number) for stage in example["pipeline"])
+    return f'{example["heading"]}\nPipeline: [\n    {stages}\n]'
+
+
+def _select(rendered: List[str], ranking: List[int], k: Optional[int], token_budget: Optional[int]) -> List[str]:
+    """Take ranked examples up to k and the token budget; the best match is always kept."""
+    selected, used = [], 0
+    for index in ranking[:k] if k else ranking:
+        tokens = count_tokens(rendered[index])
+        if selected and token_budget is not None and used + tokens > token_budget:
+            break
+        selected.append(rendered[index])
+        used += tokens
+    return selected
+
+
+def filter_examples_block(user_message: str, k: Optional[int] = FewShotConfig.FILTER_K,
+                          token_budget: Optional[int] = FewShotConfig.FILTER_TOKEN_BUDGET) -> str:
+    """Examples for filter_extraction_prompt; the whole bank when dynamic selection is off."""
+    rendered = [render_filter_example(example) for example in FILTER_EXAMPLES]
+    if not FewShotConfig.ENABLED:
+        return "\n\n".join(rendered)
+    ranking = _filter_retriever.rank(query_features(user_message))
+    return "\n\n".join(_select(rendered, ranking, k, token_budget))
+
+
+def pipeline_examples_block(intent: str, filters: Dict[str, Any], account_number: str,
+                            k: Optional[int] = FewShotConfig.PIPELINE_K,
+                            token_budget: Optional[int] = FewShotConfig.PIPELINE_TOKEN_BUDGET) -> str:
+    """Examples for pipeline_generation_prompt; the whole bank when dynamic selection is off."""
+    rendered = [render_pipeline_example(example, account_number) for example in PIPELINE_EXAMPLES]
+    if not FewShotConfig.ENABLED:
+        return "\n\n".join(rendered)
+    ranking = _pipeline_retriever.rank(filter_features(intent, filters))
+    return "\n\n".join(_select(rendered, ranking, k, token_budget))
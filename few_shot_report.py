@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+few_shot_report.py
+
+Prompt size, latency and accuracy of the filter and pipeline prompts with the
+whole static example bank ("before") and with dynamic few-shot selection ("after").
+
+Usage:
+    python few_shot_report.py              # token counts and selection cost only
+    python few_shot_report.py --live       # also calls the LLM and scores the regression set
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from constants import FewShotConfig
+from few_shot import filter_examples_block, pipeline_examples_block
+from prompts import filter_extraction_prompt, pipeline_generation_prompt
+from token_counter import count_tokens
+
+ACCOUNT_NUMBER = "1234567890"
+
+# (query, expected filter fields, intent, expected pipeline stage operators in order)
+REGRESSION_SET: List[Tuple[str, Dict[str, Any], str, List[str]]] = [
+    ("how much did i spend on careem in march",
+     {"description": "careem", "month": "march", "transaction_type": "debit", "intent_hint": "spending_total"},
+     "spending_analysis", ["$match", "$group"]),
+    ("show all my jazzcash transactions",
+     {"description": "jazzcash", "intent_hint": "transaction_list"},
+     "transaction_history", ["$match", "$sort"]),
+    ("show my last 3 transactions",
+     {"limit": 3, "intent_hint": "transaction_list"},
+     "transaction_history", ["$match", "$sort", "$limit"]),
+    ("total spent on travel in may",
+     {"category": "Travel", "month": "may", "transaction_type": "debit", "intent_hint": "spending_total"},
+     "category_spending", ["$match", "$group"]),
+    ("what was my balance on april 2nd",
+     {"date_range": {"start": "2025-04-02", "end": "2025-04-02"}},
+     "balance_inquiry", ["$match", "$sort", "$limit", "$project"]),
+    ("average balance in march",
+     {"month": "march"},
+     "balance_inquiry", ["$match", "$group"]),
+    ("list my shopping transactions in june",
+     {"category": "Shopping", "month": "june", "intent_hint": "transaction_list"},
+     "transaction_history", ["$match", "$sort"]),
+    ("how much did i receive as credit in april",
+     {"month": "april", "transaction_type": "credit"},
+     "spending_analysis", ["$match", "$group"]),
+]
+
+
+def build_prompts(query: str, filters: Dict[str, Any], intent: str, dynamic: bool) -> Tuple[str, str]:
+    """Filter and pipeline prompts for one query with static or dynamic examples."""
+    enabled = FewShotConfig.ENABLED
+    FewShotConfig.ENABLED = dynamic
+    try:
+        filter_prompt = filter_extraction_prompt.format(
+            user_message=query,
+            current_date=datetime.now().strftime("%Y-%m-%d"),
+            examples=filter_examples_block(query)
+        )
+        pipeline_prompt = pipeline_generation_prompt.format(
+            filters=json.dumps(filters),
+            intent=intent,
+            account_number=ACCOUNT_NUMBER,
+            examples=pipeline_examples_block(intent, filters, ACCOUNT_NUMBER)
+        )
+    finally:
+        FewShotConfig.ENABLED = enabled
+    return filter_prompt, pipeline_prompt
+
+
+def filters_match(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    for field, value in expected.items():
+        got = actual.get(field)
+        if isinstance(value, str):
+            if not isinstance(got, str) or got.lower() != value.lower():
+                return False
+        elif got != value:
+            return False
+    return True
+
+
+def pipeline_match(expected_ops: List[str], pipeline: Any) -> bool:
+    if isinstance(pipeline, dict):
+        pipeline = pipeline.get("pipeline")
+    if not isinstance(pipeline, list):
+        return False
+    return [next(iter(stage), None) for stage in pipeline if isinstance(stage, dict)] == expected_ops
+
+
+def run_live(dynamic: bool) -> Dict[str, Any]:
+    """Call the LLM for every regression query and score the results."""
+    from ai_agent import BankingAIAgent, llm
+    from langchain_core.messages import SystemMessage
+
+    ai_agent = BankingAIAgent()
+
+    latencies, filter_hits, pipeline_hits = [], 0, 0
+    for query, expected, intent, expected_ops in REGRESSION_SET:
+        filter_prompt, pipeline_prompt = build_prompts(query, expected, intent, dynamic)
+
+        started = time.perf_counter()
+        filter_reply = llm.invoke([SystemMessage(content=filter_prompt)])
+        pipeline_reply = llm.invoke([SystemMessage(content=pipeline_prompt)])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        filters = ai_agent.extract_json_from_response(filter_reply.content) or {}
+        filter_hits += isinstance(filters, dict) and filters_match(expected, filters)
+        pipeline_hits += pipeline_match(expected_ops, ai_agent.extract_json_from_response(pipeline_reply.content))
+
+    total = len(REGRESSION_SET)
+    return {
+        "latency_ms": statistics.mean(latencies),
+        "filter_accuracy": filter_hits / total,
+        "pipeline_accuracy": pipeline_hits / total
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Static vs dynamic few-shot prompt report")
+    parser.add_argument("--live", action="store_true", help="Call the LLM and score the regression set")
+    args = parser.parse_args()
+
+    sizes = {False: {"filter": [], "pipeline": []}, True: {"filter": [], "pipeline": []}}
+    started = time.perf_counter()
+    for query, expected, intent, _ in REGRESSION_SET:
+        for dynamic in (False, True):
+            filter_prompt, pipeline_prompt = build_prompts(query, expected, intent, dynamic)
+            sizes[dynamic]["filter"].append(count_tokens(filter_prompt))
+            sizes[dynamic]["pipeline"].append(count_tokens(pipeline_prompt))
+    build_us = (time.perf_counter() - started) / (len(REGRESSION_SET) * 2) * 1e6
+
+    print(f"{len(REGRESSION_SET)} regression queries, k={FewShotConfig.FILTER_K}/{FewShotConfig.PIPELINE_K}, "
+          f"budgets={FewShotConfig.FILTER_TOKEN_BUDGET}/{FewShotConfig.PIPELINE_TOKEN_BUDGET} tokens")
+    print(f"{'prompt':<10}{'before':>10}{'after':>10}{'saved':>10}")
+    for name in ("filter", "pipeline"):
+        before = statistics.mean(sizes[False][name])
+        after = statistics.mean(sizes[True][name])
+        print(f"{name:<10}{before:>10.0f}{after:>10.0f}{(1 - after / before):>10.1%}")
+    print(f"prompt build (both prompts, incl. retrieval): {build_us:.0f} us")
+
+    if not args.live:
+        return 0
+
+    before, after = run_live(dynamic=False), run_live(dynamic=True)
+    print()
+    print(f"{'live':<18}{'before':>10}{'after':>10}")
+    for key in ("latency_ms", "filter_accuracy", "pipeline_accuracy"):
+        print(f"{key:<18}{before[key]:>10.2f}{after[key]:>10.2f}")
+
+    if after["filter_accuracy"] < before["filter_accuracy"] or after["pipeline_accuracy"] < before["pipeline_accuracy"]:
+        print("FAIL: dynamic examples lost accuracy on the regression set")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
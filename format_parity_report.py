@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+format_parity_report.py
+
+Compares the rule-based response-format selector against logged LLM choices. Shadow
+choices are sampled from all turns, including those the rules decide on their own, so
+"agreement when decisive" shows whether the LLM call can go from every turn; tiebreaker
+choices only cover ties.
+
+Usage:
+    RESPONSE_FORMAT_CHOICE_LOG=format_choices.jsonl RESPONSE_FORMAT_SHADOW_RATE=0.1  (while the assistant runs)
+    python format_parity_report.py format_choices.jsonl [--show-mismatches 20]
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Dict, List
+
+from constants import ResponseFormats
+from response_format_selector import select_response_format_from_profile
+
+
+def load_choices(path: str) -> List[Dict]:
+    """Load logged LLM format choices, skipping malformed lines."""
+    records = []
+    with open(path, encoding="utf-8") as log_file:
+        for line in log_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("llm_format") in ResponseFormats.ALL and isinstance(record.get("profile"), dict):
+                records.append(record)
+    return records
+
+
+def build_report(records: List[Dict]) -> Dict:
+    """Re-run the rule selector over every record and tally agreement."""
+    confusion = Counter()
+    mismatches = []
+    agree = 0
+    decisive_total = 0
+    decisive_agree = 0
+
+    for record in records:
+        rule_format, decisive = select_response_format_from_profile(
+            record.get("user_message", ""),
+            record.get("context_state", ""),
+            record["profile"],
+            record.get("intent")
+        )
+        llm_format = record["llm_format"]
+        confusion[(llm_format, rule_format)] += 1
+
+        if rule_format == llm_format:
+            agree += 1
+        else:
+            mismatches.append({**record, "rule_format": rule_format, "decisive": decisive})
+
+        if decisive:
+            decisive_total += 1
+            decisive_agree += rule_format == llm_format
+
+    total = len(records)
+    return {
+        "total": total,
+        "sources": Counter(record.get("source", "tiebreaker") for record in records),
+        "agreement": agree / total if total else 0.0,
+        "decisive_share": decisive_total / total if total else 0.0,
+        "decisive_agreement": decisive_agree / decisive_total if decisive_total else 0.0,
+        "confusion": confusion,
+        "mismatches": mismatches
+    }
+
+
+def print_report(report: Dict, show_mismatches: int) -> None:
+    """Print agreement figures and a confusion matrix (rows: LLM, columns: rules)."""
+    print(f"Logged LLM choices:        {report['total']} "
+          f"({', '.join(f'{count} {source}' for source, count in report['sources'].most_common())})")
+    print(f"Overall agreement:         {report['agreement']:.1%}")
+    print(f"Decisive rule decisions:   {report['decisive_share']:.1%}")
+    print(f"Agreement when decisive:   {report['decisive_agreement']:.1%}")
+    print()
+
+    short = {fmt: fmt.split("_")[0][:8] for fmt in ResponseFormats.ALL}
+    print("LLM \\ rules".ljust(22) + "".join(short[fmt].rjust(10) for fmt in ResponseFormats.ALL))
+    for llm_format in ResponseFormats.ALL:
+        row = "".join(str(report["confusion"][(llm_format, fmt)]).rjust(10) for fmt in ResponseFormats.ALL)
+        print(llm_format.ljust(22) + row)
+
+    if show_mismatches and report["mismatches"]:
+        print()
+        print(f"First {min(show_mismatches, len(report['mismatches']))} mismatches:")
+        for record in report["mismatches"][:show_mismatches]:
+            print(f"- '{record.get('user_message', '')[:60]}' | intent={record.get('intent')} "
+                  f"| llm={record['llm_format']} rules={record['rule_format']} decisive={record['decisive']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rule-based vs LLM response-format parity report")
+    parser.add_argument("log_path", help="JSONL file written via RESPONSE_FORMAT_CHOICE_LOG")
+    parser.add_argument("--show-mismatches", type=int, default=10)
+    args = parser.parse_args()
+
+    records = load_choices(args.log_path)
+    if not records:
+        print("No usable LLM format choices found.")
+        return 1
+
+    print_report(build_report(records), args.show_mismatches)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Token budgets for conversation history in prompts.
+Each prompt section gets a fixed token allowance; history that does not fit is trimmed
+by relevance to the current query and by recency, so prompt cost stays bounded however
+long the conversation runs. Token counts are cached per message, so each new turn only
+counts the messages it has not seen before.
+"""
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+from constants import HistoryBudgetConfig
+from token_counter import count_tokens, truncate_to_last_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+_TURN_SPLIT = re.compile(r"(?m)^(?=(?:Human|Assistant): )")
+_WORD = re.compile(r"[a-z0-9]+")
+_AMOUNT = re.compile(r"\d[\d,]*(?:\.\d+)?|\$|\b(?:pkr|usd|rs)\b", re.IGNORECASE)
+_STOP_WORDS = {
+    "the", "and", "for", "you", "your", "are", "was", "that", "this", "with", "what", "how",
+    "can", "please", "show", "tell", "here", "have", "from", "into", "about", "mera", "meri", "kya", "hai"
+}
+
+
+def _keywords(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in _STOP_WORDS}
+
+
+class HistoryBudget:
+    """Fits conversation history into per-section token budgets."""
+
+    def __init__(self, max_cached: int = HistoryBudgetConfig.MAX_CACHED_MESSAGES):
+        self._token_cache: "OrderedDict[str, int]" = OrderedDict()
+        self.max_cached = max_cached
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "trimmed": 0, "untouched": 0}
+
+    def message_tokens(self, message: str) -> int:
+        """Token count of one message, cached by its text."""
+        tokens = self._token_cache.get(message)
+        if tokens is not None:
+            self._token_cache.move_to_end(message)
+            self.stats["cache_hits"] += 1
+            return tokens
+
+        tokens = count_tokens(message)
+        self._token_cache[message] = tokens
+        if len(self._token_cache) > self.max_cached:
+            self._token_cache.popitem(last=False)
+        self.stats["cache_misses"] += 1
+        return tokens
+
+    def total_tokens(self, messages: List[str]) -> int:
+        """Tokens of messages joined one per line."""
+        return sum(self.message_tokens(message) for message in messages) + max(len(messages) - 1, 0)
+
+    @staticmethod
+    def split_turns(conversation_history: str) -> List[str]:
+        """Break a "Human: ... / Assistant: ..." history into its messages."""
+        return [turn.strip() for turn in _TURN_SPLIT.split(conversation_history) if turn.strip()]
+
+    @staticmethod
+    def _relevance(message: str, query_words: Set[str]) -> float:
+        overlap = len(query_words & _keywords(message))
+        has_amounts = 1.0 if _AMOUNT.search(message) else 0.0
+        return 1.0 + overlap + 0.5 * has_amounts
+
+    def select(self, messages: List[str], budget: int, query: str = "") -> List[str]:
+        """Most relevant and recent messages that fit in budget, in their original order."""
+        limit = HistoryBudgetConfig.MAX_MESSAGE_TOKENS
+        messages = [
+            truncate_to_tokens(message, limit) + "..." if self.message_tokens(message) > limit else message
+            for message in messages
+        ]
+        if self.total_tokens(messages) <= budget:
+            return messages
+
+        newest = len(messages) - 1
+        keep_recent = set(range(max(newest - HistoryBudgetConfig.KEEP_RECENT_MESSAGES + 1, 0), newest + 1))
+        query_words = _keywords(query)
+
+        def score(index: int) -> float:
+            recency = HistoryBudgetConfig.RECENCY_DECAY ** (newest - index)
+            return recency * self._relevance(messages[index], query_words)
+
+        chosen: Dict[int, str] = {}
+        used = 0
+        # The latest messages always go in, cut to what is left of the budget if need be
+        for index in sorted(keep_recent, reverse=True):
+            message, remaining = messages[index], budget - used - 1
+            if self.message_tokens(message) > remaining:
+                if remaining <= 1:
+                    break
+                message = truncate_to_tokens(message, remaining - 1) + "..."
+            chosen[index] = message
+            used += self.message_tokens(message) + 1
+
+        # Older messages fill the rest by relevance and recency
+        for index in sorted(set(range(len(messages))) - keep_recent, key=score, reverse=True):
+            cost = self.message_tokens(messages[index]) + 1
+            if used + cost > budget:
+                continue
+            chosen[index] = messages[index]
+            used += cost
+        return [chosen[index] for index in sorted(chosen)]
+
+    def fit(self, conversation_history: Optional[str], section: str, query: str = "") -> str:
+        """conversation_history trimmed to the token budget of one prompt section."""
+        if not conversation_history:
+            return conversation_history or ""
+        budget = HistoryBudgetConfig.SECTION_BUDGETS.get(section, HistoryBudgetConfig.DEFAULT_BUDGET)
+
+        messages = self.split_turns(conversation_history)
+        if len(messages) <= 1:
+            # A summary or other free text: keep its tail, where the latest turns are
+            if self.message_tokens(conversation_history) <= budget:
+                self.stats["untouched"] += 1
+                return conversation_history
+            self.stats["trimmed"] += 1
+            return "..." + truncate_to_last_tokens(conversation_history, budget - 1)
+
+        kept = self.select(messages, budget, query)
+        if len(kept) == len(messages) and kept == messages:
+            self.stats["untouched"] += 1
+        else:
+            self.stats["trimmed"] += 1
+            logger.debug({
+                "action": "history_trimmed",
+                "section": section,
+                "budget": budget,
+                "messages_kept": len(kept),
+                "messages_dropped": len(messages) - len(kept)
+            })
+        return "\n".join(kept)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            **self.stats,
+            "cached_messages": len(self._token_cache),
+            "cache_hit_ratio": round(self.stats["cache_hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance
+history_budget = HistoryBudget()
@@ -0,0 +1,114 @@
+"""
+Local language identification for Banking AI Assistant.
+Tells English, Roman Urdu and Urdu script apart without an LLM call. Characters in the
+Arabic block settle Urdu script, and weighted Roman Urdu / English marker words separate
+the two Latin-script languages. When a "language" model has been trained from logged LLM
+decisions (train_classifiers.py), its n-gram probabilities are combined with the lexicon.
+"""
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, NamedTuple
+
+from constants import LanguageIdConfig, LanguageMarkers, Languages
+from local_classifiers import local_classifiers
+
+logger = logging.getLogger(__name__)
+
+_LATIN_WORD = re.compile(r"[a-z]+")
+_ARABIC_LETTER = re.compile(r"[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]")
+_LETTER = re.compile(r"[^\W\d_]")
+
+_STRONG = frozenset(LanguageMarkers.ROMAN_URDU_STRONG)
+_WEAK = frozenset(LanguageMarkers.ROMAN_URDU_WEAK)
+_ENGLISH = frozenset(LanguageMarkers.ENGLISH)
+
+
+class LanguageGuess(NamedTuple):
+    language: str
+    confidence: float
+    method: str
+
+
+def _combine(first: float, second: float) -> float:
+    """Naive-Bayes combination of two independent probabilities of the same label."""
+    joint = first * second
+    total = joint + (1 - first) * (1 - second)
+    return joint / total if total else 0.5
+
+
+class LanguageIdentifier:
+    """Script, lexicon and optional n-gram model identification with a confidence score."""
+
+    def __init__(self):
+        self.stats = Counter()
+        self.total_seconds = 0.0
+
+    @staticmethod
+    def script_guess(text: str) -> LanguageGuess:
+        """Urdu script when enough letters fall in the Arabic block."""
+        letters = _LETTER.findall(text)
+        arabic = _ARABIC_LETTER.findall(text)
+        ratio = len(arabic) / len(letters) if letters else 0.0
+        if ratio < LanguageIdConfig.SCRIPT_MIN_RATIO:
+            return LanguageGuess(Languages.ENGLISH, 0.0, "script")
+        if any(letter in LanguageMarkers.URDU_SCRIPT_LETTERS for letter in arabic):
+            return LanguageGuess(Languages.URDU_ARABIC, max(ratio, LanguageIdConfig.THRESHOLD), "script")
+        return LanguageGuess(Languages.URDU_ARABIC, min(ratio, LanguageIdConfig.ARABIC_SCRIPT_CONFIDENCE), "script")
+
+    @staticmethod
+    def roman_urdu_probability(text: str) -> float:
+        """Probability that Latin-script text is Roman Urdu rather than English, from marker words."""
+        score = 0.0
+        for word in _LATIN_WORD.findall(text.lower()):
+            if word in _STRONG:
+                score += 1.0
+            elif word in _WEAK:
+                score += LanguageMarkers.WEAK_WEIGHT
+            elif word in _ENGLISH:
+                score -= 1.0
+        return 1 / (1 + math.exp(-LanguageIdConfig.LEXICON_SLOPE * score))
+
+    def identify(self, text: str) -> LanguageGuess:
+        """Most likely of en / ur-roman / ur with its confidence; the caller decides on a threshold."""
+        started = time.perf_counter()
+        guess = self.script_guess(text)
+        if guess.confidence == 0.0:
+            guess = self._latin_guess(text)
+        self.total_seconds += time.perf_counter() - started
+        self.stats[guess.method] += 1
+        return guess
+
+    def _latin_guess(self, text: str) -> LanguageGuess:
+        p_roman = self.roman_urdu_probability(text)
+        method = "lexicon"
+
+        model = local_classifiers.predict_proba("language", text)
+        if model and Languages.URDU_ROMAN in model and Languages.ENGLISH in model:
+            latin_total = model[Languages.URDU_ROMAN] + model[Languages.ENGLISH]
+            if latin_total > 0:
+                p_roman = _combine(p_roman, model[Languages.URDU_ROMAN] / latin_total)
+                method = "lexicon+ngram"
+
+        if p_roman >= 0.5:
+            return LanguageGuess(Languages.URDU_ROMAN, p_roman, method)
+        return LanguageGuess(Languages.ENGLISH, 1 - p_roman, method)
+
+    def record_outcome(self, local: bool) -> None:
+        """Count whether a guess was used or the LLM had to decide."""
+        self.stats["local" if local else "llm_fallback"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        identified = self.stats["local"] + self.stats["llm_fallback"]
+        calls = sum(count for key, count in self.stats.items() if key not in ("local", "llm_fallback"))
+        return {
+            **dict(self.stats),
+            "local_ratio": round(self.stats["local"] / identified, 3) if identified else 0.0,
+            "avg_us": round(self.total_seconds / calls * 1e6, 1) if calls else 0.0
+        }
+
+
+# Global instance
+language_identifier = LanguageIdentifier()
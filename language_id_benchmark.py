@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+language_id_benchmark.py
+
+Accuracy and latency of the local language identifier over labeled English, Roman Urdu
+and Urdu-script banking messages. Reports how many messages it answers without the LLM
+(confidence at or above LanguageIdConfig.THRESHOLD) and how accurate those answers are,
+next to langdetect for reference. Exits non-zero if a confident answer is wrong.
+
+Usage:
+    python language_id_benchmark.py [--iterations 500] [--threshold 0.9] [--show-errors]
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from constants import LanguageIdConfig, Languages
+from language_id import language_identifier
+
+EN, ROMAN, URDU = Languages.ENGLISH, Languages.URDU_ROMAN, Languages.URDU_ARABIC
+
+LABELED_MESSAGES: List[Tuple[str, str]] = [
+    # English
+    ("what is my balance", EN),
+    ("show my last 5 transactions", EN),
+    ("how much did I spend on food last month", EN),
+    ("transfer 5000 to ali", EN),
+    ("check my balance please", EN),
+    ("what are my last 3 transactions", EN),
+    ("show me transaction history", EN),
+    ("convert 100 usd to pkr", EN),
+    ("did my salary get credited this month", EN),
+    ("how much money do I have in my account", EN),
+    ("send 2000 to my brother", EN),
+    ("what did I pay for groceries in may", EN),
+    ("thank you so much", EN),
+    ("yes please go ahead", EN),
+    ("my spending on uber this year", EN),
+    ("can you show all deposits from june", EN),
+    ("which category did I spend the most on", EN),
+    ("tell me about my netflix payments", EN),
+    # Roman Urdu
+    ("mera balance kya hai", ROMAN),
+    ("meri pichli 8 transactions batao", ROMAN),
+    ("meine last mahine kitna khracha kiya", ROMAN),
+    ("account me kitna paisa hai", ROMAN),
+    ("balance check karo", ROMAN),
+    ("ali ko 5000 bhej do", ROMAN),
+    ("mujhe apni transactions dikhao", ROMAN),
+    ("khane pe kitna kharch kiya june mein", ROMAN),
+    ("pichle hafte ki transactions batao", ROMAN),
+    ("mere account mein kitne paise hain", ROMAN),
+    ("shukriya bhai", ROMAN),
+    ("haan theek hai bhej do", ROMAN),
+    ("usmein se kitna grocery pe gaya", ROMAN),
+    ("aaj kitna kharcha hua", ROMAN),
+    ("mujhe apna balance dollar mein chahiye", ROMAN),
+    ("do hazaar rupay ammi ko bhejna hai", ROMAN),
+    ("kya meri salary aa gayi", ROMAN),
+    ("netflix pe kitne paise gaye is saal", ROMAN),
+    # Urdu script
+    ("میرا بیلنس کیا ہے", URDU),
+    ("میری پچھلی پانچ ٹرانزیکشنز دکھائیں", URDU),
+    ("پچھلے مہینے میں نے کتنا خرچ کیا", URDU),
+    ("علی کو پانچ ہزار روپے بھیجیں", URDU),
+    ("شکریہ", URDU),
+    ("میرے اکاؤنٹ میں کتنے پیسے ہیں", URDU),
+]
+
+
+def local_label(threshold: float) -> Callable[[str], Tuple[str, bool]]:
+    def classify(message: str) -> Tuple[str, bool]:
+        guess = language_identifier.identify(message)
+        return guess.language, guess.confidence >= threshold
+    return classify
+
+
+def langdetect_label(message: str) -> Tuple[str, bool]:
+    """langdetect as the previous fallback saw it: no Roman Urdu label at all."""
+    from langdetect import DetectorFactory, detect
+    DetectorFactory.seed = 0
+    try:
+        detected = detect(message)
+    except Exception:
+        return EN, True
+    return (URDU if detected == "ur" else EN if detected == "en" else detected), True
+
+
+def evaluate(classify: Callable[[str], Tuple[str, bool]]) -> Tuple[float, float, float, List[Tuple[str, str, str, bool]]]:
+    """(accuracy, coverage, accuracy when confident, errors)."""
+    results = [(message, expected, *classify(message)) for message, expected in LABELED_MESSAGES]
+    correct = sum(1 for _, expected, got, _ in results if got == expected)
+    confident = [(expected, got) for _, expected, got, sure in results if sure]
+    confident_correct = sum(1 for expected, got in confident if got == expected)
+    errors = [(message, expected, got, sure) for message, expected, got, sure in results if got != expected]
+    return (
+        correct / len(results),
+        len(confident) / len(results),
+        confident_correct / len(confident) if confident else 0.0,
+        errors
+    )
+
+
+def microseconds_per_message(classify: Callable[[str], Tuple[str, bool]], iterations: int) -> float:
+    messages = [message for message, _ in LABELED_MESSAGES]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            classify(message)
+    return (time.perf_counter() - started) / (iterations * len(messages)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local language identifier accuracy and latency")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=LanguageIdConfig.THRESHOLD)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{len(LABELED_MESSAGES)} labeled messages, {args.iterations} iterations, threshold {args.threshold}")
+    print(f"{'identifier':<12}{'accuracy':>10}{'local':>8}{'acc@local':>11}{'us/msg':>10}")
+
+    local_errors = []
+    for name, classify in (("local", local_label(args.threshold)), ("langdetect", langdetect_label)):
+        try:
+            accuracy, coverage, confident_accuracy, errors = evaluate(classify)
+        except ImportError:
+            print(f"{name:<12}  (not installed)")
+            continue
+        iterations = args.iterations if name == "local" else max(args.iterations // 50, 1)
+        print(f"{name:<12}{accuracy:>10.3f}{coverage:>8.1%}{confident_accuracy:>11.3f}"
+              f"{microseconds_per_message(classify, iterations):>10.1f}")
+        if args.show_errors:
+            for message, expected, got, sure in errors:
+                print(f"    '{message}' expected {expected}, got {got}{'' if sure else ' (sent to LLM)'}")
+        if name == "local":
+            local_errors = [error for error in errors if error[3]]
+
+    if local_errors:
+        print(f"FAIL: {len(local_errors)} confident local answers are wrong")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
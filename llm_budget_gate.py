@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+llm_budget_gate.py
+
+LLM call-count regression gate for the scripted conversation flows
+(auth, balance, history, spending, transfer, currency conversion, exit).
+
+Every LLM call goes to a counting fake and every backend/FX HTTP call to a scripted
+in-process transport, so the gate needs no OpenAI key, MongoDB or running backend.
+Flows enter at process_user_message (English, after the translation layer).
+Exits non-zero when any turn exceeds its budget in llm_budgets.json.
+tests/test_llm_budgets.py runs the same check under pytest.
+
+Usage:
+    python llm_budget_gate.py                 # check against llm_budgets.json
+    python llm_budget_gate.py --verbose       # also list the calls made in each turn
+    python llm_budget_gate.py --record        # rewrite budgets from this run (review the diff!)
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-budget-gate")
+
+import httpx
+from langchain_core.messages import AIMessage
+
+import ai_agent
+import webhook
+from constants import VerificationStages, WebhookConfig
+from fake_openai_server import PROMPT_MARKERS
+from state import clear_user_state, set_user_verification_stage
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_budgets.json")
+
+# Headroom added to measured prompt tokens when recording budgets
+TOKEN_HEADROOM = 1.15
+
+# Approximate tokens; fixed so the gate is deterministic across environments
+CHARS_PER_TOKEN = 4
+
+ACCOUNT_NUMBER = "1234567890"
+CNIC = "42101-1234567-1"
+USER_NAME = "Ali Raza Khan"
+
+DEFAULT_REPLIES = {
+    "exit": "NO",
+    "cancel": "NO",
+    "currency_intent": "NO",
+    "non_banking": "ALLOW",
+    "filters": "{}",
+    "pipeline": json.dumps([{"$match": {"account_number": ACCOUNT_NUMBER}}, {"$limit": 5}]),
+    "account": ACCOUNT_NUMBER,
+    "response": "Hello Ali! Here is the information you asked for."
+}
+
+FLOWS: Dict[str, Dict[str, Any]] = {
+    "auth": {
+        "authenticated": False,
+        "turns": [
+            {"message": "hi"},
+            {"message": f"my cnic is {CNIC}"},
+            {"message": "12345"},
+            {"message": "my pkr account"},
+        ]
+    },
+    "balance": {
+        "turns": [
+            {"message": "what is my balance", "replies": {"filters": '{"intent_hint": "balance_query"}'}},
+        ]
+    },
+    "history": {
+        "turns": [
+            {"message": "show my last 5 transactions",
+             "replies": {"filters": '{"limit": 5, "intent_hint": "transaction_list"}'}},
+        ]
+    },
+    "spending": {
+        "turns": [
+            {"message": "how much did I spend on food in june",
+             "replies": {"filters": '{"category": "Food", "month": "june", "year": 2025, '
+                                    '"transaction_type": "debit", "intent_hint": "spending_total"}'}},
+        ]
+    },
+    "transfer": {
+        "turns": [
+            {"message": "transfer 5000 PKR to Ahmed Abrar",
+             "replies": {"intent": "transfer_money",
+                         "transfer": '{"amount": 5000, "currency": "PKR", "recipient": "Ahmed Abrar"}'}},
+            {"message": "4321"},
+            {"message": "yes"},
+        ]
+    },
+    "currency": {
+        "turns": [
+            {"message": "what is my balance", "replies": {"filters": '{"intent_hint": "balance_query"}'}},
+            {"message": "convert this to USD",
+             "replies": {"currency_intent": "YES",
+                         "currency_details": '{"amount": 245600, "from_currency": "PKR", '
+                                             '"to_currency": "USD", "context": "account balance"}'}},
+        ]
+    },
+    "exit": {
+        "turns": [
+            {"message": "logout please", "replies": {"exit": "YES"}},
+        ]
+    },
+}
+
+
+class CountingFakeLLM:
+    """Stands in for the ChatOpenAI instance; answers by prompt marker and counts usage."""
+
+    def __init__(self):
+        self.replies: Dict[str, str] = {}
+        self.user_message = ""
+        self.calls: List[Dict[str, Any]] = []
+
+    def start_turn(self, user_message: str, replies: Optional[Dict[str, str]] = None) -> None:
+        self.user_message = user_message
+        self.replies = {**DEFAULT_REPLIES, **(replies or {})}
+        self.calls = []
+
+    def _respond(self, messages) -> AIMessage:
+        prompt = "\n".join(
+            message.get("content", "") if isinstance(message, dict) else str(message.content)
+            for message in messages
+        )
+        kind = next((kind for marker, kind in PROMPT_MARKERS if marker in prompt), "response")
+        self.calls.append({"kind": kind, "prompt_tokens": math.ceil(len(prompt) / CHARS_PER_TOKEN)})
+
+        if kind == "resolve" and kind not in self.replies:
+            match = re.search(r'CURRENT CONTEXTUAL QUERY: "(.*)"', prompt)
+            return AIMessage(content=match.group(1) if match else self.user_message)
+        return AIMessage(content=self.replies.get(kind, self.replies["response"]))
+
+    def invoke(self, messages, *args, **kwargs) -> AIMessage:
+        return self._respond(messages)
+
+    async def ainvoke(self, messages, *args, **kwargs) -> AIMessage:
+        return self._respond(messages)
+
+
+class FakeTransactionsCollection:
+    """Just enough of the transactions collection for the balance prefetch."""
+
+    def find_one(self, *args, **kwargs):
+        return {
+            "_id": "gate-txn-1",
+            "account_balance": 245600.0,
+            "date": datetime(2025, 7, 29),
+            "account_currency": "pkr"
+        }
+
+
+SAMPLE_TRANSACTIONS = [
+    {"date": "2025-06-28", "description": "Foodpanda", "category": "Food", "type": "debit",
+     "transaction_amount": 2450.0, "transaction_currency": "pkr", "account_balance": 245600.0},
+    {"date": "2025-06-21", "description": "Careem", "category": "Travel", "type": "debit",
+     "transaction_amount": 890.0, "transaction_currency": "pkr", "account_balance": 248050.0},
+    {"date": "2025-06-15", "description": "Salary", "category": "Income", "type": "credit",
+     "transaction_amount": 150000.0, "transaction_currency": "pkr", "account_balance": 248940.0},
+]
+
+
+async def fake_backend(request: httpx.Request) -> httpx.Response:
+    """Scripted responses for the banking backend and the FX rate API."""
+    if not str(request.url).startswith(WebhookConfig.BACKEND_URL):
+        return httpx.Response(200, json={"base": "PKR", "rates": {"PKR": 1.0, "USD": 0.0036, "GBP": 0.0028}})
+
+    path = request.url.path
+    body = json.loads(request.content or b"{}")
+
+    if path == "/verify_cnic":
+        return httpx.Response(200, json={"status": "success", "user": {
+            "cnic": CNIC, "name": USER_NAME, "accounts": [ACCOUNT_NUMBER, "9876543210"]}})
+    if path == "/user_balance":
+        return httpx.Response(200, json={"status": "success", "user": {
+            "account_currency": "pkr", "current_balance_pkr": 245600.0, "current_balance_usd": 870.5}})
+    if path == "/select_account":
+        return httpx.Response(200, json={"status": "success"})
+    if path == "/execute_pipeline":
+        return httpx.Response(200, json={"status": "success", "data": SAMPLE_TRANSACTIONS,
+                                         "count": len(SAMPLE_TRANSACTIONS)})
+    if path == "/transfer_money":
+        return httpx.Response(200, json={"status": "success", "message": "Transfer completed",
+                                         "new_balance": 240600.0})
+    if path == "/process_query":
+        response = await webhook.ai_agent.process_query(
+            user_message=body["user_message"],
+            account_number=body["account_number"],
+            first_name=body["first_name"]
+        )
+        return httpx.Response(200, json={"status": "success", "response": response})
+
+    return httpx.Response(404, json={"detail": "Not Found"})
+
+
+def install_fakes() -> CountingFakeLLM:
+    """Route LLM and HTTP traffic to the fakes."""
+    fake_llm = CountingFakeLLM()
+    ai_agent.llm = fake_llm
+    webhook.llm = fake_llm
+    webhook.ai_agent.llm = fake_llm
+    webhook.ai_agent.collection = FakeTransactionsCollection()
+
+    real_async_client = httpx.AsyncClient
+
+    class ScriptedAsyncClient(real_async_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(fake_backend)
+            super().__init__(*args, **kwargs)
+
+    httpx.AsyncClient = ScriptedAsyncClient
+    return fake_llm
+
+
+async def run_flow(name: str, flow: Dict[str, Any], fake_llm: CountingFakeLLM) -> List[Dict[str, Any]]:
+    """Run one scripted flow with a fresh session and return per-turn usage."""
+    sender_id = f"budget-gate-{name}"
+    clear_user_state(sender_id)
+    webhook.ai_agent.clear_user_memory(ACCOUNT_NUMBER)
+    if flow.get("authenticated", True):
+        set_user_verification_stage(
+            sender_id, VerificationStages.ACCOUNT_SELECTED,
+            cnic=CNIC, name=USER_NAME, selected_account=ACCOUNT_NUMBER
+        )
+
+    results = []
+    for turn in flow["turns"]:
+        # Turns are scripted back to back; skip the per-user rate limit and duplicate cache
+        webhook.user_last_message_time.pop(sender_id, None)
+        webhook.user_request_cache.clear()
+
+        fake_llm.start_turn(turn["message"], turn.get("replies"))
+        response = await webhook.process_user_message(sender_id, turn["message"])
+        results.append({
+            "message": turn["message"],
+            "llm_calls": len(fake_llm.calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in fake_llm.calls),
+            "calls": [call["kind"] for call in fake_llm.calls],
+            "response": response
+        })
+    return results
+
+
+def load_budgets(path: str) -> Dict[str, List[Dict[str, int]]]:
+    with open(path, encoding="utf-8") as budgets_file:
+        return json.load(budgets_file)
+
+
+def check_budgets(measured: Dict[str, List[Dict[str, Any]]], budgets: Dict[str, List[Dict[str, int]]]) -> List[str]:
+    """Return one failure line per turn over budget (or missing a budget)."""
+    failures = []
+    for flow_name, turns in measured.items():
+        flow_budgets = budgets.get(flow_name, [])
+        for index, turn in enumerate(turns):
+            if index >= len(flow_budgets):
+                failures.append(f"{flow_name}[{index}] '{turn['message']}': no budget recorded")
+                continue
+            budget = flow_budgets[index]
+            if turn["llm_calls"] > budget["max_llm_calls"]:
+                failures.append(f"{flow_name}[{index}] '{turn['message']}': {turn['llm_calls']} LLM calls "
+                                f"> budget {budget['max_llm_calls']} ({', '.join(turn['calls'])})")
+            if turn["prompt_tokens"] > budget["max_prompt_tokens"]:
+                failures.append(f"{flow_name}[{index}] '{turn['message']}': {turn['prompt_tokens']} prompt tokens "
+                                f"> budget {budget['max_prompt_tokens']}")
+    return failures
+
+
+def record_budgets(measured: Dict[str, List[Dict[str, Any]]], path: str) -> None:
+    budgets = {
+        flow_name: [
+            {
+                "message": turn["message"],
+                "max_llm_calls": turn["llm_calls"],
+                "max_prompt_tokens": int(math.ceil(turn["prompt_tokens"] * TOKEN_HEADROOM / 100.0) * 100)
+            }
+            for turn in turns
+        ]
+        for flow_name, turns in measured.items()
+    }
+    with open(path, "w", encoding="utf-8") as budgets_file:
+        json.dump(budgets, budgets_file, indent=2)
+        budgets_file.write("\n")
+
+
+def print_usage(measured: Dict[str, List[Dict[str, Any]]], verbose: bool) -> None:
+    print(f"{'flow':<10} {'turn':<40} {'calls':>5} {'tokens':>7}")
+    for flow_name, turns in measured.items():
+        for turn in turns:
+            print(f"{flow_name:<10} {turn['message'][:40]:<40} {turn['llm_calls']:>5} {turn['prompt_tokens']:>7}")
+            if verbose:
+                print(f"{'':<10}   calls: {', '.join(turn['calls']) or '-'}")
+
+
+async def run_all() -> Dict[str, List[Dict[str, Any]]]:
+    fake_llm = install_fakes()
+    return {name: await run_flow(name, flow, fake_llm) for name, flow in FLOWS.items()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM call and prompt-token budget gate for conversation flows")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="Budget file (default: llm_budgets.json)")
+    parser.add_argument("--record", action="store_true", help="Rewrite the budget file from this run")
+    parser.add_argument("--verbose", action="store_true", help="List the prompt kinds called in each turn")
+    args = parser.parse_args()
+
+    measured = asyncio.run(run_all())
+    print_usage(measured, args.verbose)
+
+    if args.record:
+        record_budgets(measured, args.budgets)
+        print(f"\nBudgets written to {args.budgets}")
+        return 0
+
+    failures = check_budgets(measured, load_budgets(args.budgets))
+    if failures:
+        print("\nLLM budget gate FAILED:")
+        for failure in failures:
+            print(f"- {failure}")
+        return 1
+
+    print("\nLLM budget gate passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Distilled local classifiers for Banking AI Assistant.
+Character n-gram logistic regression models trained on logged LLM decisions
+(exit, cancel, non-banking, intent). Pure Python, CPU-only, sub-millisecond.
+"""
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from constants import ClassifierConfig
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def char_ngrams(text: str, min_n: int = ClassifierConfig.MIN_NGRAM, max_n: int = ClassifierConfig.MAX_NGRAM) -> Dict[str, float]:
+    """L2-normalized character n-gram counts of the padded, lowercased text."""
+    normalized = f" {_WHITESPACE.sub(' ', text.lower().strip())} "
+    counts = Counter(
+        normalized[start:start + n]
+        for n in range(min_n, max_n + 1)
+        for start in range(len(normalized) - n + 1)
+    )
+    norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+    return {gram: count / norm for gram, count in counts.items()}
+
+
+class CharNgramClassifier:
+    """Multinomial logistic regression over character n-grams."""
+
+    def __init__(self, labels: Optional[List[str]] = None):
+        self.labels: List[str] = labels or []
+        self.weights: Dict[str, List[float]] = {}
+        self.bias: List[float] = [0.0] * len(self.labels)
+
+    def _scores(self, features: Dict[str, float]) -> List[float]:
+        scores = list(self.bias)
+        for gram, value in features.items():
+            weights = self.weights.get(gram)
+            if weights is None:
+                continue
+            for index, weight in enumerate(weights):
+                scores[index] += weight * value
+        return scores
+
+    @staticmethod
+    def _softmax(scores: List[float]) -> List[float]:
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        probabilities = self._softmax(self._scores(char_ngrams(text)))
+        return dict(zip(self.labels, probabilities))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label and its probability."""
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def fit(self, texts: List[str], labels: List[str], epochs: int = ClassifierConfig.EPOCHS,
+            learning_rate: float = ClassifierConfig.LEARNING_RATE, l2: float = ClassifierConfig.L2,
+            min_count: int = ClassifierConfig.MIN_FEATURE_COUNT, seed: int = 13) -> "CharNgramClassifier":
+        """Train with shuffled SGD; n-grams seen in fewer than min_count examples are dropped."""
+        self.labels = sorted(set(labels))
+        label_index = {label: index for index, label in enumerate(self.labels)}
+        examples = [char_ngrams(text) for text in texts]
+
+        document_frequency = Counter(gram for features in examples for gram in features)
+        vocabulary = {gram for gram, count in document_frequency.items() if count >= min_count}
+        examples = [{gram: value for gram, value in features.items() if gram in vocabulary} for features in examples]
+
+        self.weights = {gram: [0.0] * len(self.labels) for gram in vocabulary}
+        self.bias = [0.0] * len(self.labels)
+        order = list(range(len(examples)))
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for position in order:
+                features = examples[position]
+                probabilities = self._softmax(self._scores(features))
+                target = label_index[labels[position]]
+                for index, probability in enumerate(probabilities):
+                    gradient = probability - (1.0 if index == target else 0.0)
+                    self.bias[index] -= rate * gradient
+                    for gram, value in features.items():
+                        weights = self.weights[gram]
+                        weights[index] -= rate * (gradient * value + l2 * weights[index])
+
+        # Drop n-grams that ended up with no influence
+        self.weights = {
+            gram: [round(weight, 6) for weight in weights]
+            for gram, weights in self.weights.items()
+            if any(abs(weight) > 1e-6 for weight in weights)
+        }
+        return self
+
+    def to_dict(self) -> Dict:
+        return {"labels": self.labels, "bias": self.bias, "weights": self.weights}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CharNgramClassifier":
+        model = cls(data["labels"])
+        model.bias = data["bias"]
+        model.weights = data["weights"]
+        return model
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as model_file:
+            json.dump(self.to_dict(), model_file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "CharNgramClassifier":
+        with open(path, encoding="utf-8") as model_file:
+            return cls.from_dict(json.load(model_file))
+
+
+def model_path(task: str, model_dir: str = ClassifierConfig.MODEL_DIR) -> str:
+    return os.path.join(model_dir, f"{task}.json")
+
+
+class LocalClassifiers:
+    """Lazily loaded per-task models with confidence-gated decisions."""
+
+    def __init__(self, model_dir: str = ClassifierConfig.MODEL_DIR):
+        self.model_dir = model_dir
+        self._models: Dict[str, Optional[CharNgramClassifier]] = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _model(self, task: str) -> Optional[CharNgramClassifier]:
+        if task not in self._models:
+            with self._lock:
+                if task not in self._models:
+                    path = model_path(task, self.model_dir)
+                    try:
+                        self._models[task] = CharNgramClassifier.load(path) if os.path.exists(path) else None
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error(f"Could not load local {task} classifier from {path}: {e}")
+                        self._models[task] = None
+        return self._models[task]
+
+    def reload(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def predict_proba(self, task: str, text: str) -> Optional[Dict[str, float]]:
+        """Label probabilities of the task's model, or None when no model is trained."""
+        if not ClassifierConfig.ENABLED:
+            return None
+        model = self._model(task)
+        return model.predict_proba(text) if model is not None else None
+
+    def classify(self, task: str, text: str) -> Optional[str]:
+        """Local label when the model is confident enough, otherwise None (caller asks the LLM)."""
+        if not ClassifierConfig.ENABLED:
+            return None
+        model = self._model(task)
+        if model is None:
+            return None
+
+        label, confidence = model.predict(text)
+        threshold = ClassifierConfig.THRESHOLDS.get(task, ClassifierConfig.DEFAULT_THRESHOLD)
+        if confidence < threshold:
+            self.stats[f"{task}_fallback"] += 1
+            return None
+
+        self.stats[f"{task}_local"] += 1
+        logger.info({
+            "action": "local_classifier_decision",
+            "task": task,
+            "label": label,
+            "confidence": round(confidence, 3)
+        })
+        return label
+
+
+def log_llm_decision(task: str, text: str, label: str) -> None:
+    """Append an LLM decision to the harvest log used for retraining."""
+    log_path = os.getenv(ClassifierConfig.DECISION_LOG_ENV)
+    if not log_path:
+        return
+    try:
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps({"task": task, "text": text, "label": label}, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.error(f"Could not write LLM decision log: {e}")
+
+
+def load_decisions(paths: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+    """Read harvested decisions per task, keeping the latest label for duplicate texts."""
+    latest: Dict[str, Dict[str, str]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("task") in ClassifierConfig.TASKS and record.get("text") and record.get("label"):
+                    text = _WHITESPACE.sub(" ", record["text"].strip().lower())
+                    latest.setdefault(record["task"], {})[text] = record["label"]
+    return {task: list(pairs.items()) for task, pairs in latest.items()}
+
+
+# Global instance
+local_classifiers = LocalClassifiers()
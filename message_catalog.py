@@ -0,0 +1,133 @@
+"""
+System message catalog for Banking AI Assistant.
+Fixed messages (rate-limit and cooldown notices, error fallbacks, the non-banking decline)
+are looked up by key and language instead of being translated by the LLM on every turn.
+English comes from SystemMessages; the Urdu and Roman Urdu variants are generated offline
+by build_message_catalog.py into a versioned JSON file. A variant whose English source has
+changed since it was generated is ignored, so the message falls back to runtime translation.
+"""
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Optional, Pattern, Tuple
+
+from constants import Languages, MessageCatalogConfig, SystemMessages
+
+logger = logging.getLogger(__name__)
+
+_FIELD = re.compile(r"\{(\w+)\}")
+
+
+def placeholders(template: str) -> Tuple[str, ...]:
+    """Names of the {fields} of a template, sorted."""
+    return tuple(sorted(_FIELD.findall(template)))
+
+
+def _template_pattern(template: str) -> Pattern:
+    """Regex that reads the field values back out of a rendered English template."""
+    pattern, end = "", 0
+    for match in _FIELD.finditer(template):
+        pattern += re.escape(template[end:match.start()]) + rf"(?P<{match.group(1)}>.*?)"
+        end = match.end()
+    return re.compile(pattern + re.escape(template[end:]) + r"\Z", re.DOTALL)
+
+
+class MessageCatalog:
+    """Pre-translated system messages keyed by (message key, language)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv(MessageCatalogConfig.PATH_ENV, MessageCatalogConfig.DEFAULT_PATH)
+        self.version: Optional[int] = None
+        self._variants: Dict[str, Dict[str, str]] = {}
+        self._static = {template: key for key, template in SystemMessages.ENGLISH.items() if not placeholders(template)}
+        self._templates = {key: _template_pattern(template) for key, template in SystemMessages.ENGLISH.items()
+                           if placeholders(template)}
+        self.stats = Counter()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning(f"System message catalog {self.path} not found; system messages will be translated at runtime")
+            return
+        try:
+            with open(self.path, encoding="utf-8") as catalog_file:
+                catalog = json.load(catalog_file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read system message catalog {self.path}: {e}")
+            return
+
+        self.version = catalog.get("version")
+        stale = []
+        for key, variants in catalog.get("messages", {}).items():
+            english = SystemMessages.ENGLISH.get(key)
+            if english is None or variants.get(Languages.ENGLISH) != english:
+                stale.append(key)
+                continue
+            self._variants[key] = {
+                language: text for language, text in variants.items()
+                if language in MessageCatalogConfig.LANGUAGES and placeholders(text) == placeholders(english)
+            }
+        if stale:
+            logger.warning({"action": "system_messages_stale", "path": self.path, "keys": stale})
+        logger.info({"action": "system_messages_loaded", "path": self.path, "version": self.version,
+                     "messages": len(self._variants)})
+
+    def variant(self, key: str, language: Optional[str]) -> Optional[str]:
+        """Stored template of key in language; None when the catalog has none."""
+        if language == Languages.ENGLISH:
+            return SystemMessages.ENGLISH[key]
+        if not MessageCatalogConfig.ENABLED:
+            return None
+        return self._variants.get(key, {}).get(language or "")
+
+    def message(self, key: str, language: Optional[str] = None, **values: Any) -> str:
+        """Message key in language, falling back to English when the catalog has no variant."""
+        template = self.variant(key, language or Languages.ENGLISH)
+        if template is None:
+            self.stats["english_fallbacks"] += 1
+            template = SystemMessages.ENGLISH[key]
+        elif language and language != Languages.ENGLISH:
+            self.stats["served"] += 1
+        return template.format(**values) if values else template
+
+    def match(self, text: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Key and field values of an English system message as rendered by message(); None for other text."""
+        key = self._static.get(text.strip())
+        if key is not None:
+            return key, {}
+        for key, pattern in self._templates.items():
+            rendered = pattern.match(text.strip())
+            if rendered:
+                return key, rendered.groupdict()
+        return None
+
+    def localize(self, text: str, language: str) -> Optional[str]:
+        """Catalog variant of an English system message, so it needs no translation call; None if there is none."""
+        if not MessageCatalogConfig.ENABLED or not text or language == Languages.ENGLISH:
+            return None
+        matched = self.match(text)
+        if matched is None:
+            return None
+        key, values = matched
+        template = self.variant(key, language)
+        if template is None:
+            self.stats["missing_variants"] += 1
+            return None
+        self.stats["localized"] += 1
+        self.stats[f"localized:{key}"] += 1
+        return template.format(**values)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "messages": len(SystemMessages.ENGLISH),
+            "translated": {language: sum(language in variants for variants in self._variants.values())
+                           for language in MessageCatalogConfig.LANGUAGES},
+            **self.stats
+        }
+
+
+# Global instance
+message_catalog = MessageCatalog()
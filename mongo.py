@@ -1,7 +1,8 @@
 from pymongo import MongoClient
+from turn_trace import mongo_trace_listener
 
 # --- 1️⃣ Connect to MongoDB ---
-client = MongoClient("mongodb://localhost:27017/")
+client = MongoClient("mongodb://localhost:27017/", event_listeners=[mongo_trace_listener])
 
 # --- 2️⃣ Access database and collections ---
 db = client["bank_database"]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+non_banking_benchmark.py
+
+Accuracy check and microbenchmark for the keyword tiers of non-banking detection.
+Compares the compiled word-boundary matchers with the previous substring scan
+over a labeled query set. Exits non-zero if any labeled query is misrouted.
+
+Usage:
+    python non_banking_benchmark.py [--iterations 2000] [--show-errors]
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from constants import NonBankingKeywords
+from non_banking_rules import FLAGGED, classify_keyword_tiers, is_banking_credential
+
+# (query, expected) where expected is "flag" when tier 3 must send it to the LLM check
+# and "allow" when the keyword tiers must let it through without any LLM call
+LABELED_QUERIES: List[Tuple[str, str]] = [
+    # Banking queries
+    ("what is my balance", "allow"),
+    ("show my last 5 transactions", "allow"),
+    ("how much did I spend on food last month", "allow"),
+    ("transfer 5000 to ali", "allow"),
+    ("I paid my electricity bill, show it", "allow"),
+    ("what did I pay for groceries in may", "allow"),
+    ("convert 100 usd to pkr", "allow"),
+    ("my deposits this year", "allow"),
+    ("did my salary get credited", "allow"),
+    ("show me spending in euros", "allow"),
+    ("how much in pkr", "allow"),
+    ("translate my balance in urdu", "allow"),
+    ("12345-1234567-1", "allow"),
+    ("4321", "allow"),
+    ("yes", "allow"),
+    ("my pkr account", "allow"),
+    ("again please", "allow"),
+    ("he said it was processing", "allow"),
+    ("missing entry from april", "allow"),
+    ("thank you", "allow"),
+    ("what can you do", "allow"),
+    ("hello", "allow"),
+    # Substring traps the old scan flagged
+    ("I said show it again", "allow"),
+    ("wait, it is still processing", "allow"),
+    ("what about the missing one", "allow"),
+    ("any cookies for me", "allow"),
+    ("okay raised concern earlier", "allow"),
+    # Non-banking queries
+    ("who is the ceo of apple", "flag"),
+    ("what's the weather in lahore", "flag"),
+    ("tell me a joke", "flag"),
+    ("sing me a song", "flag"),
+    ("recommend a movie for tonight", "flag"),
+    ("how to learn python programming", "flag"),
+    ("what is ai", "flag"),
+    ("who is president of usa", "flag"),
+    ("best hotels for vacation", "flag"),
+    ("help me with my homework", "flag"),
+    ("what is the capital of france", "flag"),
+    ("who invented the telephone", "flag"),
+    ("latest sports news", "flag"),
+    ("give me a workout plan", "flag"),
+    ("how to cook biryani", "flag"),
+    ("jobs in karachi", "flag"),
+    ("tell me about elon musk", "flag"),
+]
+
+
+def legacy_outcome(user_message: str) -> str:
+    """Previous implementation: substring scan over every keyword list."""
+    user_lower = user_message.lower().strip()
+    if re.match(r'^\d{5}-\d{7}-\d{1}$', user_message.strip()) or re.match(r'^\d+$', user_message.strip()):
+        return "allow"
+    if any(keyword in user_lower for keyword in NonBankingKeywords.BANKING_CORE):
+        return "allow"
+    if any(keyword in user_lower for keyword in NonBankingKeywords.ASSISTANT_FEATURES):
+        if any(word in user_lower for word in NonBankingKeywords.BANKING_CONTEXT) or re.search(r'\d+', user_message):
+            return "allow"
+    if sum(1 for keyword in NonBankingKeywords.BLACKLIST if keyword in user_lower) >= 1:
+        return "flag"
+    if any(phrase in user_lower for phrase in NonBankingKeywords.COMPANY_CONTEXT):
+        return "flag"
+    if any(pattern in user_lower for pattern in NonBankingKeywords.GENERAL_KNOWLEDGE):
+        return "flag"
+    return "allow"
+
+
+def compiled_outcome(user_message: str) -> str:
+    if is_banking_credential(user_message):
+        return "allow"
+    outcome, _ = classify_keyword_tiers(user_message)
+    return "flag" if outcome == FLAGGED else "allow"
+
+
+def accuracy(classify: Callable[[str], str]) -> Tuple[float, List[Tuple[str, str, str]]]:
+    errors = [(query, expected, classify(query)) for query, expected in LABELED_QUERIES if classify(query) != expected]
+    return 1 - len(errors) / len(LABELED_QUERIES), errors
+
+
+def microseconds_per_query(classify: Callable[[str], str], iterations: int) -> float:
+    queries = [query for query, _ in LABELED_QUERIES]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            classify(query)
+    return (time.perf_counter() - started) / (iterations * len(queries)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Non-banking keyword tier accuracy and microbenchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{len(LABELED_QUERIES)} labeled queries, {args.iterations} iterations")
+    print(f"{'matcher':<10}{'accuracy':>10}{'us/query':>12}")
+
+    compiled_errors = []
+    for name, classify in (("substring", legacy_outcome), ("compiled", compiled_outcome)):
+        score, errors = accuracy(classify)
+        print(f"{name:<10}{score:>10.3f}{microseconds_per_query(classify, args.iterations):>12.2f}")
+        if args.show_errors:
+            for query, expected, got in errors:
+                print(f"    '{query}' expected {expected}, got {got}")
+        if classify is compiled_outcome:
+            compiled_errors = errors
+
+    if compiled_errors:
+        print(f"FAIL: compiled matcher misroutes {len(compiled_errors)} labeled queries")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Keyword tiers for non-banking query detection.
+Each tier's keyword table is compiled once into a single word-boundary regex so a
+message is scanned in one pass per tier and every hit is returned.
+"""
+import re
+from typing import Dict, List, Tuple
+
+from constants import NonBankingKeywords
+
+# Tier outcomes
+ALLOW_CORE = "allow_core"              # Tier 1 banking keyword
+ALLOW_ASSISTANT = "allow_assistant"    # Tier 2 assistant feature with banking context
+FLAGGED = "flagged"                    # Tier 3 non-banking topic, LLM confirms
+NO_MATCH = "no_match"
+
+_CNIC_MESSAGE_RE = re.compile(r'^\d{5}-\d{7}-\d{1}$')
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """Regex alternation factored by shared prefixes, so matching branches per character."""
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        optional = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Single-pass matcher for a keyword table.
+
+    Keywords match at word boundaries (so "ai" never fires inside "paid").
+    With prefix=True a keyword may be followed by any letters ("transfer" hits
+    "transferred"); otherwise only a plural, -ing or -ed ending is accepted.
+    """
+
+    def __init__(self, keywords: List[str], prefix: bool = False):
+        alternation = _trie_pattern(sorted(set(keyword.lower() for keyword in keywords)))
+        suffix = r"\w*" if prefix else r"(?:s|es|ing|ed)?"
+        # \b is cheaper than a lookbehind but only works before word characters ("$" is a keyword)
+        start = r"\b" if all(re.match(r"\w", keyword) for keyword in keywords) else r"(?<!\w)"
+        self.pattern = re.compile(rf"{start}({alternation}){suffix}(?!\w)")
+
+    def find_all(self, text: str) -> List[str]:
+        """All keywords found in lowercased text, in order of appearance."""
+        return [" ".join(match.split()) for match in self.pattern.findall(text)]
+
+    def search(self, text: str) -> bool:
+        return self.pattern.search(text) is not None
+
+
+banking_core_matcher = KeywordMatcher(NonBankingKeywords.BANKING_CORE, prefix=True)
+assistant_feature_matcher = KeywordMatcher(NonBankingKeywords.ASSISTANT_FEATURES)
+banking_context_matcher = KeywordMatcher(NonBankingKeywords.BANKING_CONTEXT, prefix=True)
+non_banking_topic_matcher = KeywordMatcher(
+    NonBankingKeywords.BLACKLIST + NonBankingKeywords.COMPANY_CONTEXT + NonBankingKeywords.GENERAL_KNOWLEDGE
+)
+
+
+def is_banking_credential(user_message: str) -> bool:
+    """CNICs and bare numbers (OTPs, amounts) are never blocked."""
+    text = user_message.strip()
+    return bool(_CNIC_MESSAGE_RE.match(text)) or text.isdigit()
+
+
+def classify_keyword_tiers(user_message: str) -> Tuple[str, List[str]]:
+    """Run tiers 1-3 and return the outcome with the keywords that decided it."""
+    user_lower = user_message.lower().strip()
+
+    core_hits = banking_core_matcher.find_all(user_lower)
+    if core_hits:
+        return ALLOW_CORE, core_hits
+
+    feature_hits = assistant_feature_matcher.find_all(user_lower)
+    if feature_hits and (banking_context_matcher.search(user_lower) or _DIGITS_RE.search(user_message)):
+        return ALLOW_ASSISTANT, feature_hits
+
+    flagged = non_banking_topic_matcher.find_all(user_lower)
+    if flagged:
+        return FLAGGED, flagged
+
+    return NO_MATCH, []
@@ -0,0 +1,162 @@
+"""
+South Asian number and amount normalization for Banking AI Assistant.
+Urdu-script and Arabic-Indic digits become ASCII, lakh/crore and thousands grouping
+("1,50,000", "150,000") is dropped, and amounts written with multiplier words ("5 hazaar",
+"2.5 lakh", "ek crore", "پانچ ہزار", "5k", "sau rupay") become plain numbers. Inbound text goes through
+this before any LLM or translation step, so every later stage sees one canonical form.
+"""
+import logging
+import re
+from collections import Counter
+from typing import Any, List, Optional
+
+from constants import NumberWords
+
+logger = logging.getLogger(__name__)
+
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹٫٬", "01234567890123456789.,")
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_NUMBER = rf"\d+(?:\.\d+)?|{_alternation(NumberWords.UNITS)}"
+_MULTIPLIER = _alternation(NumberWords.MULTIPLIERS)
+_GROUP_BODY = rf"(?:{_NUMBER})\s*(?:{_MULTIPLIER})(?!\w)"
+
+_GROUPED = re.compile(r"(?<![\d,.])(\d{1,3}(?:,\d{2})*,\d{3}|\d{1,3}(?:,\d{3})+)(?!\d|,\d)")
+_THOUSANDS_SUFFIX = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)k(?!\w)", re.IGNORECASE)
+_GROUP = re.compile(rf"(?P<number>{_NUMBER})\s*(?P<multiplier>{_MULTIPLIER})(?!\w)", re.IGNORECASE)
+# A bare number after the groups joins the amount only after a leading currency ("Rs 5 hazaar 500") or before
+# a currency or the end of the phrase ("5 hazaar 500 rupay"); "2 lakh 15 tareekh" and "5 thousand 3 times" do not
+_CURRENCY_WORD = rf"(?:{_alternation(NumberWords.CURRENCY_WORDS)})(?!\w)"
+_AMOUNT_END = rf"(?=\s*(?:{_CURRENCY_WORD}|[!?;:)]|\.(?!\d)|$))"
+_EXPRESSION = re.compile(
+    rf"(?<![\w.,])(?P<currency>(?:rs|pkr|usd)\.?\s*|[$€£]\s*)?{_GROUP_BODY}(?:\s+{_GROUP_BODY})*"
+    rf"(?:\s+\d+(?:\.\d+)?(?![\w,]|\.\d)(?(currency)|{_AMOUNT_END}))?",
+    re.IGNORECASE
+)
+# A multiplier with no count before a currency is one of it: "sau rupay", "hazar rupay"
+_BARE_MULTIPLIER = re.compile(rf"(?<![\w.,])(?P<multiplier>{_MULTIPLIER})(?=\s*{_CURRENCY_WORD})", re.IGNORECASE)
+# Standalone amounts: not part of a CNIC, date, time, phone or account reference
+_AMOUNT = re.compile(r"(?<![\w\-/:.])\d+(?:\.\d+)?(?![\w\-/:]|\.\d)")
+_NOT_NUMBER = re.compile(r"[\s\-\.\,\(\)\/]+")
+_CURRENCY = re.compile(r"(?i)\b(?:rs|pkr|usd|rupees?|rupay|rupaye)\b\.?|[$€£]")
+
+
+def format_number(value: float) -> str:
+    """Plain digits: no grouping, no trailing ".0", at most two decimals."""
+    value = round(value, 2)
+    return str(int(value)) if value.is_integer() else f"{value:.2f}".rstrip("0")
+
+
+def _unit(word: str) -> float:
+    return float(word) if word[0].isdigit() else float(NumberWords.UNITS[word.lower()])
+
+
+def _expand(match: re.Match) -> str:
+    """Value of "1 lakh 50 hazaar 300"; groups that do not descend are kept as separate numbers."""
+    currency = match.group("currency") or ""
+    text = match.group(0)[len(currency):]
+    pieces: List[str] = []
+    total: Optional[float] = None
+    last_multiplier = 0
+    end = 0
+    for group in _GROUP.finditer(text):
+        multiplier = NumberWords.MULTIPLIERS[group.group("multiplier").lower()]
+        value = _unit(group.group("number")) * multiplier
+        if total is not None and multiplier < last_multiplier:
+            total += value
+        else:
+            if total is not None:
+                pieces.append(format_number(total))
+            total = value
+        last_multiplier, end = multiplier, group.end()
+
+    rest = text[end:].strip()
+    if rest:
+        if float(rest) < last_multiplier:
+            total += float(rest)
+            rest = ""
+    pieces.append(format_number(total))
+    if rest:
+        pieces.append(rest)
+    return currency + " ".join(pieces)
+
+
+def normalize_digits(text: str) -> str:
+    """ASCII digits for Urdu-script and Arabic-Indic ones."""
+    return text.translate(_DIGITS)
+
+
+def normalize_numbers(text: str) -> str:
+    """Canonical numbers: ASCII digits, no lakh/crore or thousands grouping, multiplier words expanded."""
+    normalized = normalize_digits(text)
+    normalized = _GROUPED.sub(lambda match: match.group(1).replace(",", ""), normalized)
+    normalized = _THOUSANDS_SUFFIX.sub(lambda match: format_number(float(match.group(1)) * 1000), normalized)
+    normalized = _EXPRESSION.sub(_expand, normalized)
+    return _BARE_MULTIPLIER.sub(
+        lambda match: format_number(float(NumberWords.MULTIPLIERS[match.group("multiplier").lower()])), normalized
+    )
+
+
+def amounts_in(text: str) -> List[str]:
+    """Standalone numbers of the normalized text, in order (CNICs, dates and times excluded)."""
+    return _AMOUNT.findall(normalize_numbers(text))
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Number from "5 hazaar", "Rs. 1,50,000", "۵۰۰" or a plain number; None if value is not one amount."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    cleaned = _CURRENCY.sub(" ", normalize_numbers(value)).strip()
+    return float(cleaned) if re.fullmatch(r"\d+(?:\.\d+)?", cleaned) else None
+
+
+def is_number_only(text: str) -> bool:
+    """Whether text is only numbers (in any script or written as an amount) and separators."""
+    cleaned = _NOT_NUMBER.sub("", normalize_numbers(text))
+    return bool(cleaned) and cleaned.isascii() and cleaned.isdigit()
+
+
+def restore_numbers(source: str, translated: str) -> str:
+    """Translation with numbers the LLM changed put back from the source.
+
+    Numbers of the translation that are not in the source are replaced, in order, by the
+    source numbers it lost; when the counts differ the translation is only normalized.
+    """
+    translated = normalize_numbers(translated)
+    expected = Counter(amounts_in(source))
+    found = list(_AMOUNT.finditer(translated))
+    missing = list((expected - Counter(match.group(0) for match in found)).elements())
+    if not missing:
+        return translated
+
+    extra = []
+    remaining = Counter(expected)
+    for match in found:
+        if remaining[match.group(0)] > 0:
+            remaining[match.group(0)] -= 1
+        else:
+            extra.append(match)
+    if len(extra) != len(missing):
+        logger.warning({"action": "translation_numbers_mismatch", "source": source, "translated": translated})
+        return translated
+
+    lost, ordered = Counter(missing), []
+    for number in amounts_in(source):
+        if lost[number] > 0:
+            lost[number] -= 1
+            ordered.append(number)
+    repaired, offset = translated, 0
+    for match, number in zip(extra, ordered):
+        start, end = match.start() + offset, match.end() + offset
+        repaired = repaired[:start] + number + repaired[end:]
+        offset += len(number) - (match.end() - match.start())
+    logger.warning({"action": "translation_numbers_restored", "translated": translated, "restored": repaired})
+    return repaired
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+number_normalizer_check.py
+
+Property checks for the South Asian number normalizer over randomly generated amounts:
+every way of writing an amount (grouping, Urdu digits, hazaar/lakh/crore words, "5k")
+normalizes to the same plain number, a bare number after a multiplier that is not followed
+by a currency or the end of the amount ("2 lakh 15 tareekh") stays separate, every spelling
+of a multiplier ("hazar", "hajar", "thousand") counts the same and a bare one before a
+currency ("sau rupay") is one of it, normalization
+is idempotent, CNICs, dates and times are never touched, text without numbers is left
+alone, and a translation that changed one number gets it back. Prints the first
+counterexample of each failing property and exits non-zero if any property fails.
+
+Usage:
+    python number_normalizer_check.py [--cases 2000] [--seed 7]
+"""
+
+import argparse
+import logging
+import random
+import sys
+from typing import Callable, Dict, List, Optional
+
+from constants import LanguageMarkers, NumberWords, RomanUrduLexicon
+from number_normalizer import amounts_in, is_number_only, normalize_numbers, parse_amount, restore_numbers
+
+URDU_DIGITS = "۰۱۲۳۴۵۶۷۸۹"
+ARABIC_INDIC_DIGITS = "٠١٢٣٤٥٦٧٨٩"
+MULTIPLIER_WORDS = {
+    "roman": {10000000: "crore", 100000: "lakh", 1000: "hazaar"},
+    "english": {10000000: "crore", 100000: "lakh", 1000: "thousand"},
+    "urdu": {10000000: "کروڑ", 100000: "لاکھ", 1000: "ہزار"},
+}
+UNIT_WORDS = {
+    "roman": {value: word for word, value in NumberWords.UNITS.items() if word.isascii() and float(value).is_integer()},
+    "urdu": {value: word for word, value in NumberWords.UNITS.items() if not word.isascii() and float(value).is_integer()},
+}
+CARRIERS = ["{} rupay Ali ko bhejo", "transfer Rs {} to Ahmed", "transfer {} rupees to Ahmed", "{} روپے بھیجیں",
+            "mujhe {} rupay chahiye", "mujhe {}", "{}"]
+# A bare number after a multiplier that is not an amount: dates, times, counts
+NOT_AMOUNT_TAILS = ["Ali ko {} {} tareekh ko bhejo", "send {} {} times to Ali", "Ali ko {} {} baje bhejo"]
+# Before a currency a multiplier needs no count ("sau rupay")
+CURRENCY_CARRIERS = ["{} rupay Ali ko bhejo", "mujhe {} rupay chahiye", "{} rupees", "{} روپے بھیجیں", "{} Rs"]
+UNTOUCHED = ["12345-1234567-1", "2025-07-29", "29/07/2025", "10:30", "0300-1234567", "PK36SCBL0000001123456702"]
+
+
+def western(number: int) -> str:
+    return f"{number:,}"
+
+
+def indian(number: int) -> str:
+    digits = str(number)
+    if len(digits) <= 3:
+        return digits
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return ",".join([head] + groups + [tail])
+
+
+def script_digits(text: str, digits: str) -> str:
+    return "".join(digits[int(char)] if char.isdigit() else char for char in text)
+
+
+def in_words(number: int, rng: random.Random, style: str) -> str:
+    """number as "1 crore 25 lakh 40 hazaar 300", with small counts sometimes spelled out."""
+    words = MULTIPLIER_WORDS[style]
+    units = UNIT_WORDS["urdu" if style == "urdu" else "roman"]
+    parts, rest = [], number
+    for size in (10000000, 100000, 1000):
+        count = rest // size if size == 10000000 else (rest // size) % 100
+        rest -= count * size
+        if count:
+            count_text = units[count] if count in units and rng.random() < 0.5 else str(count)
+            parts.append(f"{count_text} {words[size]}")
+    if rest:
+        parts.append(str(rest))
+    return " ".join(parts)
+
+
+def written_forms(number: int, rng: random.Random) -> List[str]:
+    forms = [str(number), western(number), indian(number), script_digits(indian(number), URDU_DIGITS),
+             script_digits(str(number), ARABIC_INDIC_DIGITS)]
+    if number >= 1000:
+        forms += [in_words(number, rng, style) for style in MULTIPLIER_WORDS]
+        forms.append(script_digits(in_words(number, rng, "urdu"), URDU_DIGITS))
+    if number % 1000 == 0:
+        forms.append(f"{number // 1000}k")
+    return forms
+
+
+def random_number(rng: random.Random) -> int:
+    magnitude = rng.choice([1, 2, 3, 4, 5, 6, 7, 8, 9])
+    number = rng.randint(10 ** (magnitude - 1), 10 ** magnitude - 1)
+    rounded = number - number % rng.choice([1000, 100000])
+    return number if rng.random() < 0.6 or not rounded else rounded
+
+
+def plain_words() -> List[str]:
+    numeric = set(NumberWords.UNITS) | set(NumberWords.MULTIPLIERS)
+    vocabulary = RomanUrduLexicon.FILLERS + RomanUrduLexicon.REQUEST_VERBS + LanguageMarkers.ENGLISH
+    return sorted(set(word for word in vocabulary if word not in numeric))
+
+
+def check_round_trip(rng: random.Random) -> Optional[str]:
+    number = random_number(rng)
+    for form in written_forms(number, rng):
+        carrier = rng.choice(CARRIERS)
+        text = carrier.format(form)
+        if amounts_in(text) != [str(number)]:
+            return f"{text!r} -> {normalize_numbers(text)!r}, expected {number}"
+        if parse_amount(form) != number:
+            return f"parse_amount({form!r}) = {parse_amount(form)}, expected {number}"
+        if not is_number_only(form):
+            return f"is_number_only({form!r}) is False"
+    return None
+
+
+def check_decimal_multiplier(rng: random.Random) -> Optional[str]:
+    count = rng.randint(1, 199) / 2
+    style = rng.choice(list(MULTIPLIER_WORDS))
+    size = rng.choice([1000, 100000, 10000000])
+    text = f"{count:g} {MULTIPLIER_WORDS[style][size]}"
+    expected = count * size
+    return None if parse_amount(text) == expected else f"parse_amount({text!r}) = {parse_amount(text)}, expected {expected:g}"
+
+
+def check_separate_tail(rng: random.Random) -> Optional[str]:
+    style = rng.choice(list(MULTIPLIER_WORDS))
+    size = rng.choice([1000, 100000, 10000000])
+    count, tail = rng.randint(1, 99), rng.randint(1, 31)
+    text = rng.choice(NOT_AMOUNT_TAILS).format(f"{count} {MULTIPLIER_WORDS[style][size]}", tail)
+    expected = [str(count * size), str(tail)]
+    return None if amounts_in(text) == expected else f"{text!r} -> {normalize_numbers(text)!r}, expected {expected}"
+
+
+def check_word_forms(rng: random.Random) -> Optional[str]:
+    word, size = rng.choice(list(NumberWords.MULTIPLIERS.items()))
+    count = rng.choice([None, rng.randint(1, 99)])
+    text = rng.choice(CURRENCY_CARRIERS).format(word if count is None else f"{count} {word}")
+    expected = [str(size * (count or 1))]
+    return None if amounts_in(text) == expected else f"{text!r} -> {normalize_numbers(text)!r}, expected {expected}"
+
+
+def check_idempotent(rng: random.Random) -> Optional[str]:
+    number = random_number(rng)
+    text = rng.choice(CARRIERS).format(rng.choice(written_forms(number, rng)))
+    once = normalize_numbers(text)
+    twice = normalize_numbers(once)
+    return None if once == twice else f"{text!r} -> {once!r} -> {twice!r}"
+
+
+def check_untouched(rng: random.Random) -> Optional[str]:
+    value = rng.choice(UNTOUCHED)
+    text = rng.choice(["CNIC {}", "on {}", "{}", "account {} ka balance"]).format(value)
+    return None if normalize_numbers(text) == text else f"{text!r} -> {normalize_numbers(text)!r}"
+
+
+def check_plain_text(rng: random.Random, words: List[str]) -> Optional[str]:
+    text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+    if normalize_numbers(text) != text:
+        return f"{text!r} -> {normalize_numbers(text)!r}"
+    return f"is_number_only({text!r}) is True" if is_number_only(text) else None
+
+
+def check_restore(rng: random.Random) -> Optional[str]:
+    numbers = [str(random_number(rng)) for _ in range(rng.randint(1, 3))]
+    source = " aur ".join(f"{number} rupay" for number in numbers)
+    translated = " and ".join(f"{number} rupees" for number in numbers)
+    index = rng.randrange(len(numbers))
+    corrupted_number = str(int(numbers[index]) + rng.randint(1, 9))
+    if corrupted_number in numbers:
+        return None
+    corrupted = " and ".join(f"{corrupted_number if position == index else number} rupees"
+                             for position, number in enumerate(numbers))
+    restored = restore_numbers(source, corrupted)
+    return None if restored == translated else f"{corrupted!r} restored to {restored!r}, expected {translated!r}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Property checks for the number normalizer")
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.getLogger("number_normalizer").setLevel(logging.ERROR)  # Restores are the point here, not news
+    rng = random.Random(args.seed)
+    words = plain_words()
+    properties: Dict[str, Callable[[random.Random], Optional[str]]] = {
+        "round_trip": check_round_trip,
+        "decimal_multiplier": check_decimal_multiplier,
+        "separate_tail": check_separate_tail,
+        "word_forms": check_word_forms,
+        "idempotent": check_idempotent,
+        "untouched": check_untouched,
+        "plain_text": lambda generator: check_plain_text(generator, words),
+        "restore": check_restore,
+    }
+
+    failed = 0
+    print(f"{args.cases} cases per property, seed {args.seed}")
+    for name, check in properties.items():
+        failures, first = 0, None
+        for _ in range(args.cases):
+            problem = check(rng)
+            if problem:
+                failures += 1
+                first = first or problem
+        print(f"{name:<20}{'ok' if not failures else f'{failures} failures':>14}")
+        if first:
+            print(f"    e.g. {first}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+prompt_cache_report.py
+
+Static prefix vs dynamic suffix size of every registered prompt. The static block is
+sent first and unchanged on every call, so providers that cache prompt prefixes
+(1024+ tokens, in 128-token steps) only bill and process the dynamic part at full cost.
+
+Usage:
+    python prompt_cache_report.py
+    python prompt_cache_report.py --json
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+
+import prompts  # noqa: F401  (registers every prompt)
+from few_shot import filter_examples_block, pipeline_examples_block
+from prompt_registry import prompt_registry
+
+CACHE_MIN_TOKENS = 1024
+
+ACCOUNT_NUMBER = "1234567890"
+HISTORY = (
+    "Human: show my balance\n"
+    "Assistant: Your current account balance is PKR 245,600 as of July 29.\n"
+    "Human: how much did i spend on food in june\n"
+    "Assistant: You spent PKR 18,450 on Food in June across 12 transactions."
+)
+FILTERS = {"category": "Food", "month": "june", "transaction_type": "debit", "intent_hint": "spending_total"}
+
+# Representative per-call values for each prompt's dynamic block
+SAMPLES = {
+    "filter_extraction": {
+        "user_message": "how much did i spend on food in june",
+        "current_date": datetime.now().strftime("%Y-%m-%d"),
+        "examples": filter_examples_block("how much did i spend on food in june")
+    },
+    "pipeline_generation": {
+        "filters": json.dumps(FILTERS),
+        "intent": "category_spending",
+        "account_number": ACCOUNT_NUMBER,
+        "examples": pipeline_examples_block("category_spending", FILTERS, ACCOUNT_NUMBER)
+    },
+    "response": {
+        "user_message": "how much did i spend on food in june",
+        "data": json.dumps([{"_id": None, "total_spent": 18450, "count": 12}]),
+        "intent": "category_spending"
+    },
+    "query": {"user_message": "how much did i spend on food in june", "current_date": datetime.now().strftime("%Y-%m-%d")},
+    "transfer": {"user_message": "send 5000 pkr to ali"},
+    "intent": {"user_message": "how much did i spend on food in june", "filters": json.dumps(FILTERS)},
+    "account_selection": {
+        "user_input": "my usd account",
+        "account_details": "1. Account: 1234567890, Currency: PKR\n2. Account: 9876543210, Currency: USD"
+    },
+    "history_summary": {"conversation": HISTORY},
+    "contextual_resolution": {"conversation_history": HISTORY, "user_message": "and in july?"},
+    "entity_extraction": {"conversation_history": HISTORY},
+    "entity_resolution": {"user_message": "and in july?", "entities": json.dumps({"categories": ["food"]}, indent=2)},
+    "exit_detection": {"user_message": "ok thanks bye"},
+    "cancel_detection": {"user_message": "never mind"},
+    "transfer_extraction": {"conversation_history": HISTORY, "user_message": "send 10% of that to ali"},
+    "non_banking_check": {"conversation_context": HISTORY, "user_message": "who won the match yesterday"},
+    "currency_conversion_intent": {"conversation_history": HISTORY, "user_message": "what is that in usd"},
+    "currency_extraction": {"conversation_history": HISTORY, "user_message": "what is that in usd"},
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Static vs dynamic token split of registered prompts")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args()
+
+    rows = prompt_registry.report(SAMPLES)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{'prompt':<28}{'static':>8}{'dynamic':>9}{'static %':>10}  cacheable")
+    for row in rows:
+        cacheable = "yes" if row["static_tokens"] >= CACHE_MIN_TOKENS else "no"
+        print(f"{row['name']:<28}{row['static_tokens']:>8}{row['dynamic_tokens']:>9}"
+              f"{row['static_ratio']:>10.1%}  {cacheable}")
+
+    static_total = sum(row["static_tokens"] for row in rows)
+    total = static_total + sum(row["dynamic_tokens"] for row in rows)
+    print(f"{'all prompts':<28}{static_total:>8}{total - static_total:>9}{static_total / total:>10.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Prompt registry for Banking AI Assistant.
+Every prompt is compiled at import into a static instruction block, sent first as a
+byte-identical system message so provider prefix caching can reuse it, and a small
+dynamic template holding the per-call variables, sent after it.
+"""
+import logging
+import textwrap
+from string import Formatter
+from typing import Any, Dict, List
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledPrompt:
+    """Static system prefix plus a dynamic suffix template."""
+
+    def __init__(self, name: str, static: str, dynamic: str):
+        self.name = name
+        # The static block is never formatted, so braces in it are literal
+        self.static = textwrap.dedent(static).strip()
+        self.dynamic_template = textwrap.dedent(dynamic).strip()
+        self.input_variables = sorted({
+            field for _, field, _, _ in Formatter().parse(self.dynamic_template) if field
+        })
+        self.static_tokens = count_tokens(self.static)
+
+    def render(self, **values: Any) -> str:
+        """Dynamic part only."""
+        missing = set(self.input_variables) - set(values)
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing variables: {sorted(missing)}")
+        return self.dynamic_template.format(**values)
+
+    def format(self, **values: Any) -> str:
+        """Whole prompt as one string, static block first."""
+        return f"{self.static}\n\n{self.render(**values)}"
+
+    def messages(self, **values: Any) -> List[Any]:
+        """System message with the static block, then a human message with the variables."""
+        return [SystemMessage(content=self.static), HumanMessage(content=self.render(**values))]
+
+    def token_counts(self, **values: Any) -> Dict[str, Any]:
+        dynamic_tokens = count_tokens(self.render(**values))
+        total = self.static_tokens + dynamic_tokens
+        return {
+            "static_tokens": self.static_tokens,
+            "dynamic_tokens": dynamic_tokens,
+            "static_ratio": round(self.static_tokens / total, 3) if total else 0.0
+        }
+
+
+class PromptRegistry:
+    """Named, precompiled prompts."""
+
+    def __init__(self):
+        self._prompts: Dict[str, CompiledPrompt] = {}
+
+    def register(self, name: str, static: str, dynamic: str) -> CompiledPrompt:
+        if name in self._prompts:
+            raise ValueError(f"Prompt '{name}' is already registered")
+        prompt = CompiledPrompt(name, static, dynamic)
+        self._prompts[name] = prompt
+        return prompt
+
+    def get(self, name: str) -> CompiledPrompt:
+        return self._prompts[name]
+
+    def names(self) -> List[str]:
+        return list(self._prompts)
+
+    def report(self, samples: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Static vs dynamic token counts per prompt, using sample variable values."""
+        rows = []
+        for name, prompt in self._prompts.items():
+            values = samples.get(name)
+            if values is None:
+                values = {variable: "" for variable in prompt.input_variables}
+            rows.append({"name": name, **prompt.token_counts(**values)})
+        return rows
+
+
+# Global instance
+prompt_registry = PromptRegistry()
@@ -1,12 +1,13 @@
-from langchain.prompts import PromptTemplate
+from prompt_registry import prompt_registry
 
-filter_extraction_prompt = PromptTemplate(
-    input_variables=["user_message", "current_date"],
-    template="""
+# Each prompt keeps its instructions in a static block (sent first, identical on every
+# call so the provider can cache it) and the per-call variables in the dynamic block.
+
+filter_extraction_prompt = prompt_registry.register(
+    "filter_extraction",
+    static="""
     You are a banking AI assistant. Extract relevant filters from the user's query for MongoDB aggregation.
-    
-    Current date: {current_date}
-    
+
     Available database fields for new dataset structure:
     - name (string: user's full name)
     - cnic (string: National ID)
@@ -22,18 +23,18 @@ filter_extraction_prompt = PromptTemplate(
     - account_balance (number)
     
     Extract the following filters from the user query and return as JSON:
-    {{
+    {
         "description": "description name if mentioned (e.g., Netflix, Uber, Amazon)",
         "category": "category if mentioned (e.g., Food, Entertainment, Travel)",
         "month": "month name if mentioned (e.g., january, june, december)",
         "year": "year if mentioned (default to 2025 if not specified)",
         "transaction_type": "debit or credit if specified",
-        "amount_range": {{"min": number, "max": number}} if amount range mentioned,
-        "date_range": {{"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}} if specific date range,
+        "amount_range": {"min": number, "max": number} if amount range mentioned,
+        "date_range": {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"} if specific date range,
         "limit": number if specific count mentioned (e.g., last 10 transactions),
         "currency": "pkr or usd if specified",
         "intent_hint": "transaction_list or spending_total based on user language"
-    }}
+    }
     
     Rules:
     - Only include fields that are explicitly mentioned or can be inferred
@@ -48,115 +49,34 @@ filter_extraction_prompt = PromptTemplate(
     **CRITICAL INTENT DETECTION:**
     - If user says "show me", "list", "all transactions", "transaction list", "display" → set intent_hint to "transaction_list"
     - If user says "how much", "total", "spent", "spending" → set intent_hint to "spending_total"
+    - Use the current date given below to resolve relative dates ("last month", "this year")
     
-    Examples:
-    
-    Query: "how much did i spend on netflix in june"
-    Response: {{
-        "description": "netflix",
-        "category": null,
-        "month": "june",
-        "year": 2025,
-        "transaction_type": "debit",
-        "amount_range": null,
-        "date_range": null,
-        "limit": null,
-        "currency": null,
-        "intent_hint": "spending_total"
-    }}
-
-    Query: "show me all amazon transactions"
-    Response: {{
-        "description": "amazon",
-        "category": null,
-        "month": null,
-        "year": null,
-        "transaction_type": null,
-        "amount_range": null,
-        "date_range": null,
-        "limit": null,
-        "currency": null,
-        "intent_hint": "transaction_list"
-    }}
-    
-    Query: "show my last 10 transactions"
-    Response: {{
-        "description": null,
-        "category": null,
-        "month": null,
-        "year": null,
-        "transaction_type": null,
-        "amount_range": null,
-        "date_range": null,
-        "limit": 10,
-        "currency": null,
-        "intent_hint": "transaction_list"
-    }}
-    
-    Query: "how much did i spend on food last month"
-    Response: {{
-        "description": null,
-        "category": "Food",
-        "month": "june",
-        "year": 2025,
-        "transaction_type": "debit",
-        "amount_range": null,
-        "date_range": null,
-        "limit": null,
-        "currency": null,
-        "intent_hint": "spending_total"
-    }}
-
-    Query: "what was my balance on june 15th"
-    Response: {{
-        "description": null,
-        "category": null,
-        "month": null,
-        "year": null,
-        "transaction_type": null,
-        "amount_range": null,
-        "date_range": {{"start": "2025-06-15", "end": "2025-06-15"}},
-        "limit": null,
-        "currency": null,
-        "intent_hint": "balance_inquiry"
-    }}
-
-    Query: "average balance in may"
-    Response: {{
-        "description": null,
-        "category": null,
-        "month": "may",
-        "year": 2025,
-        "transaction_type": null,
-        "amount_range": null,
-        "date_range": null,
-        "limit": null,
-        "currency": null,
-        "intent_hint": "balance_inquiry"
-    }}
-    
-    User query: {user_message}
     ### RESPONSE FORMAT – READ CAREFULLY
     Return **exactly one** valid JSON value that fits the schema above.
     • No Markdown, no ``` fences, no comments, no keys other than the schema.
     • Do not pretty‑print; a single‑line minified object/array is required.
     • If a value is unknown, use null.
     Your entire reply must be parsable by `json.loads`.
+    """,
+    dynamic="""
+    Current date: {current_date}
+
+    Examples:
+
+    {examples}
+
+    User query: {user_message}
     """
 )
 
 
-pipeline_generation_prompt = PromptTemplate(
-    input_variables=["filters", "intent", "account_number"],
-    template="""
+pipeline_generation_prompt = prompt_registry.register(
+    "pipeline_generation",
+    static="""
     Generate a MongoDB aggregation pipeline based on the extracted filters and intent for the new dataset structure.
 
-    IMPORTANT: Return ONLY the JSON array, no explanatory text, no markdown formatting.
-    CRITICAL: Use proper JSON format - do NOT use ISODate() syntax. Use {{"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"}} format instead.
-
-    Account Number: {account_number}
-    Intent: {intent}
-    Extracted Filters: {filters}
+    IMPORTANT: Return ONLY a JSON object of the form {"pipeline": [ ...stages... ]}, no explanatory text, no markdown formatting.
+    CRITICAL: Use proper JSON format - do NOT use ISODate() syntax. Use {"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"} format instead.
 
     New Dataset Structure:
     - name: user's full name
@@ -230,29 +150,28 @@ pipeline_generation_prompt = PromptTemplate(
     5. $limit - for limiting results
     6. $project - for selecting specific fields
 
-    
     CRITICAL DATE HANDLING RULES:
     - If filters contain 'date_range' with start and end dates, use EXACT date range with proper JSON format
     - If filters contain BOTH 'month' and 'year' (both not null), use full month range
     - If filters contain ONLY 'year' without month or date_range, DO NOT add any date filter
     - If filters contain null/empty month AND null/empty date_range, DO NOT add any date filter regardless of year
     - ALWAYS prioritize date_range over month/year when both are present
-    - Use proper JSON date format: {{"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"}}
+    - Use proper JSON date format: {"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"}
     - For "right now" or "current" spending, use July 2025 data
 
     Month to date range mapping (use JSON format):
-    - january: {{"$gte": {{"$date": "2025-01-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-01-31T23:59:59.999Z"}}}}
-    - february: {{"$gte": {{"$date": "2025-02-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-02-28T23:59:59.999Z"}}}}
-    - march: {{"$gte": {{"$date": "2025-03-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-03-31T23:59:59.999Z"}}}}
-    - april: {{"$gte": {{"$date": "2025-04-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-04-30T23:59:59.999Z"}}}}
-    - may: {{"$gte": {{"$date": "2025-05-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-05-31T23:59:59.999Z"}}}}
-    - june: {{"$gte": {{"$date": "2025-06-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-06-30T23:59:59.999Z"}}}}
-    - july: {{"$gte": {{"$date": "2025-07-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-07-31T23:59:59.999Z"}}}}
-    - august: {{"$gte": {{"$date": "2025-08-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-08-31T23:59:59.999Z"}}}}
-    - september: {{"$gte": {{"$date": "2025-09-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-09-30T23:59:59.999Z"}}}}
-    - october: {{"$gte": {{"$date": "2025-10-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-10-31T23:59:59.999Z"}}}}
-    - november: {{"$gte": {{"$date": "2025-11-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-11-30T23:59:59.999Z"}}}}
-    - december: {{"$gte": {{"$date": "2025-12-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-12-31T23:59:59.999Z"}}}}
+    - january: {"$gte": {"$date": "2025-01-01T00:00:00.000Z"}, "$lte": {"$date": "2025-01-31T23:59:59.999Z"}}
+    - february: {"$gte": {"$date": "2025-02-01T00:00:00.000Z"}, "$lte": {"$date": "2025-02-28T23:59:59.999Z"}}
+    - march: {"$gte": {"$date": "2025-03-01T00:00:00.000Z"}, "$lte": {"$date": "2025-03-31T23:59:59.999Z"}}
+    - april: {"$gte": {"$date": "2025-04-01T00:00:00.000Z"}, "$lte": {"$date": "2025-04-30T23:59:59.999Z"}}
+    - may: {"$gte": {"$date": "2025-05-01T00:00:00.000Z"}, "$lte": {"$date": "2025-05-31T23:59:59.999Z"}}
+    - june: {"$gte": {"$date": "2025-06-01T00:00:00.000Z"}, "$lte": {"$date": "2025-06-30T23:59:59.999Z"}}
+    - july: {"$gte": {"$date": "2025-07-01T00:00:00.000Z"}, "$lte": {"$date": "2025-07-31T23:59:59.999Z"}}
+    - august: {"$gte": {"$date": "2025-08-01T00:00:00.000Z"}, "$lte": {"$date": "2025-08-31T23:59:59.999Z"}}
+    - september: {"$gte": {"$date": "2025-09-01T00:00:00.000Z"}, "$lte": {"$date": "2025-09-30T23:59:59.999Z"}}
+    - october: {"$gte": {"$date": "2025-10-01T00:00:00.000Z"}, "$lte": {"$date": "2025-10-31T23:59:59.999Z"}}
+    - november: {"$gte": {"$date": "2025-11-01T00:00:00.000Z"}, "$lte": {"$date": "2025-11-30T23:59:59.999Z"}}
+    - december: {"$gte": {"$date": "2025-12-01T00:00:00.000Z"}, "$lte": {"$date": "2025-12-31T23:59:59.999Z"}}
 
     General Rules:
     - Always include account_number in $match
@@ -260,78 +179,33 @@ pipeline_generation_prompt = PromptTemplate(
     - For spending analysis or category_spending, group by null and sum amount_deducted_from_account (NOT transaction_amount)
     - For transaction history, sort by date descending and _id descending
     - Handle currency filtering when specified
-    - NEVER use ISODate() syntax - always use {{"$date": "ISO-string"}} format
+    - NEVER use ISODate() syntax - always use {"$date": "ISO-string"} format
     - For queries asking average balance, average spending, or total spending, use $group with $avg or $sum as appropriate
 
-    Examples:
-
-    Intent: spending_analysis, Query: "how much did i spend on McDonald's in june" (WANTS TOTAL - FLEXIBLE MATCHING)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "type": "debit", "description": {{"$regex": "mcdonald", "$options": "i"}}, "date": {{"$gte": {{"$date": "2025-06-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-06-30T23:59:59.999Z"}}}}}}}},
-        {{"$group": {{"_id": null, "total_amount": {{"$sum": "$amount_deducted_from_account"}}, "currency": {{"$first": "$account_currency"}}}}}}
-    ]
-
-    Intent: spending_analysis, Query: "how much did i spend on netflix in april" (WANTS TOTAL)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "type": "debit", "description": {{"$regex": "netflix", "$options": "i"}}, "date": {{"$gte": {{"$date": "2025-04-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-04-30T23:59:59.999Z"}}}}}}}},
-        {{"$group": {{"_id": null, "total_amount": {{"$sum": "$amount_deducted_from_account"}}, "currency": {{"$first": "$account_currency"}}}}}}
-    ]
-
-    Intent: transaction_history, Query: "show me all netflix transactions" (WANTS LIST)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "description": {{"$regex": "netflix", "$options": "i"}}}}}},
-        {{"$sort": {{"date": -1, "_id": -1}}}}
-    ]
-
-    Intent: transaction_history, Query: "list of mcdonald transactions" (WANTS LIST - FLEXIBLE MATCHING)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "description": {{"$regex": "mcdonald", "$options": "i"}}}}}},
-        {{"$sort": {{"date": -1, "_id": -1}}}}
-    ]
-
-    Intent: transaction_history, Query: "show my last 12 transactions" (WANTS LIST with limit)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}"}}}},
-        {{"$sort": {{"date": -1, "_id": -1}}}},
-        {{"$limit": 12}}
-    ]
-
-    Intent: category_spending, Filters: {{"category": "Food", "month": "april", "year": 2025, "transaction_type": "debit"}}
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "type": "debit", "category": {{"$regex": "Food", "$options": "i"}}, "date": {{"$gte": {{"$date": "2025-04-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-04-30T23:59:59.999Z"}}}}}}}},
-        {{"$group": {{"_id": null, "total_amount": {{"$sum": "$amount_deducted_from_account"}}, "currency": {{"$first": "$account_currency"}}}}}}
-    ]
-
-    Intent: balance_inquiry , Query: "what was my balance on may 15th" (BALANCE QUERY)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "date": {{"$lte": {{"$date": "2025-05-15T23:59:59.999Z"}}}}}}}},
-        {{"$sort": {{"date": -1, "_id": -1}}}},
-        {{"$limit": 1}},
-        {{"$project": {{"account_balance": 1, "date": 1, "account_currency": 1}}}}
-    ]
-
-    Intent: balance_inquiry, Query: "average balance in june" (BALANCE QUERY)
-    Pipeline: [
-        {{"$match": {{"account_number": "{account_number}", "date": {{"$gte": {{"$date": "2025-06-01T00:00:00.000Z"}}, "$lte": {{"$date": "2025-06-30T23:59:59.999Z"}}}}}}}},
-        {{"$group": {{"_id": null, "average_balance": {{"$avg": "$account_balance"}}, "currency": {{"$first": "$account_currency"}}}}}}
-    ]
-
-    Return only the JSON array pipeline.
+    Return only the JSON object with the stages under "pipeline"; the examples show that stage array.
     ### RESPONSE FORMAT – READ CAREFULLY
     Return **exactly one** valid JSON value that fits the schema above.
     • No Markdown, no ``` fences, no comments, no keys other than the schema.
     • Do not pretty‑print; a single‑line minified object/array is required.
     • If a value is unknown, use null.
-    • NEVER use ISODate() - always use {{"$date": "ISO-string"}} format.
+    • NEVER use ISODate() - always use {"$date": "ISO-string"} format.
     Your entire reply must be parsable by `json.loads`.
+    """,
+    dynamic="""
+    Account Number: {account_number}
+    Intent: {intent}
+    Extracted Filters: {filters}
+
+    Examples:
+
+    {examples}
     """
 )
 
 
-
-response_prompt = PromptTemplate(
-    input_variables=["user_message", "data", "intent"],
-    template="""
+response_prompt = prompt_registry.register(
+    "response",
+    static="""
     You are Sage, a professional banking AI assistant. Format the API response data into a natural language answer with excellent presentation.
 
     🎯 **MANDATORY PROFESSIONAL BANKING FORMATTING:**
@@ -360,10 +234,6 @@ response_prompt = PromptTemplate(
     - Use warning emojis and professional tone
     - Provide clear next steps
 
-    User query: {user_message}
-    Intent: {intent}
-    API response data: {data}
-
     Guidelines for dataset structure:
     - For balance_inquiry: Use the mandatory balance format above
     - For transaction_history: Use the mandatory transaction table format
@@ -375,25 +245,27 @@ response_prompt = PromptTemplate(
     - Handle both PKR and USD currencies with consistent formatting
     - Use transaction_amount and transaction_currency appropriately
 
-
     **Apply the mandatory formatting rules above to create a professional banking experience.**
     Convert the data into a finished, professionally formatted message.
+    """,
+    dynamic="""
+    User query: {user_message}
+    Intent: {intent}
+    API response data: {data}
     """
 )
 
 
-query_prompt = PromptTemplate(
-    input_variables=["user_message", "current_date"],
-    template="""
+query_prompt = prompt_registry.register(
+    "query",
+    static="""
     You are a banking AI assistant. Analyze the user's query and return a valid JSON response with:
     1. "intent" - one of: balance_inquiry, transaction_history, spending_analysis, category_spending, transfer_money, general
     2. "pipeline" - MongoDB aggregation pipeline to fetch the required data
     3. "response_format" - "natural_language"
 
-    Current date: {current_date}
-
     MongoDB collection structure (transactions):
-    {{
+    {
         "name": "string (user's full name)",
         "cnic": "string (National ID)",
         "account_number": "string (bank account number)",
@@ -406,7 +278,7 @@ query_prompt = PromptTemplate(
         "transaction_amount": "number",
         "transaction_currency": "string (pkr/usd)",
         "account_balance": "number (current balance)"
-    }}
+    }
 
     Guidelines:
     - For balance_inquiry, get latest transaction for account balance. Set pipeline to get most recent transaction.
@@ -414,25 +286,29 @@ query_prompt = PromptTemplate(
     - For spending_analysis, use $match and $group to aggregate transaction_amount by description, category, or date range.
     - For category_spending, use $match and $group for category aggregation.
     - For transfer_money, set pipeline to [] and handle via API.
-    - IMPORTANT: Use proper JSON date format: {{"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"}} NOT ISODate() syntax.
-    - For relative dates (e.g., "last month"), calculate appropriate date ranges based on {current_date}.
+    - IMPORTANT: Use proper JSON date format: {"$date": "YYYY-MM-DDTHH:mm:ss.sssZ"} NOT ISODate() syntax.
+    - For relative dates (e.g., "last month"), calculate appropriate date ranges based on the current date given below.
     - Ensure the pipeline is valid MongoDB syntax and safe to execute.
     - Handle both PKR and USD currencies appropriately.
 
-    User query: {user_message}
     ### RESPONSE FORMAT – READ CAREFULLY
     Return **exactly one** valid JSON value that fits the schema above.
     • No Markdown, no ``` fences, no comments, no keys other than the schema.
     • Do not pretty‑print; a single‑line minified object/array is required.
     • If a value is unknown, use null.
-    • NEVER use ISODate() - always use {{"$date": "ISO-string"}} format.
+    • NEVER use ISODate() - always use {"$date": "ISO-string"} format.
     Your entire reply must be parsable by `json.loads`.
+    """,
+    dynamic="""
+    Current date: {current_date}
+    User query: {user_message}
     """
 )
 
-intent_prompt = PromptTemplate(
-    input_variables=["user_message", "filters"],
-    template="""
+
+intent_prompt = prompt_registry.register(
+    "intent",
+    static="""
     You are a banking AI assistant. Analyze the user's query and classify it into one of these intents:
 
     Available intents:
@@ -468,44 +344,41 @@ intent_prompt = PromptTemplate(
     - If filters.category is set → likely "category_spending"
     - If filters.transaction_type is "debit" and specific merchant → likely "spending_analysis"
 
+    Respond with only the intent name (e.g., "balance_inquiry", "spending_analysis", etc.)
+    """,
+    dynamic="""
     User query: "{user_message}"
     Extracted filters: {filters}
-
-    Respond with only the intent name (e.g., "balance_inquiry", "spending_analysis", etc.)
     """
 )
 
-transfer_prompt = PromptTemplate(
-    input_variables=["user_message"],
-    template="""
+
+transfer_prompt = prompt_registry.register(
+    "transfer",
+    static="""
     Extract transfer details from the query for the new dataset structure:
     - amount: number
     - currency: "PKR" or "USD" (default to "PKR" if not specified, since most transactions are in PKR)
     - recipient: string
     
-    Return JSON: {{"amount": number, "currency": string, "recipient": string}}
+    Return JSON: {"amount": number, "currency": string, "recipient": string}
     
     Examples:
-    "Transfer 500 to John" → {{"amount": 500, "currency": "PKR", "recipient": "John"}}
-    "Send 50 USD to Alice" → {{"amount": 50, "currency": "USD", "recipient": "Alice"}}
-    "Pay 1000 PKR to Ahmed" → {{"amount": 1000, "currency": "PKR", "recipient": "Ahmed"}}
-    
+    "Transfer 500 to John" → {"amount": 500, "currency": "PKR", "recipient": "John"}
+    "Send 50 USD to Alice" → {"amount": 50, "currency": "USD", "recipient": "Alice"}
+    "Pay 1000 PKR to Ahmed" → {"amount": 1000, "currency": "PKR", "recipient": "Ahmed"}
+    """,
+    dynamic="""
     Query: {user_message}
     """
 )
 
 
-
-account_selection_prompt = PromptTemplate(
-    input_variables=["user_input", "account_details"],
-    template="""
+account_selection_prompt = prompt_registry.register(
+    "account_selection",
+    static="""
     You are a banking assistant helping a user select their account. Analyze the user's input and return the exact account number they want to select.
 
-    User input: "{user_input}"
-    
-    Available accounts:
-    {account_details}
-
     The user can specify accounts in various ways:
     - Currency: "usd account", "pkr account", "my USD account", "pakistani rupee account"
     - Position: "first account", "1st account", "second account", "2nd account", "third", etc.
@@ -530,20 +403,21 @@ account_selection_prompt = PromptTemplate(
     - "savings" → return PKR account (more common for savings)
 
     Return ONLY the exact account number (e.g., "1234567890") or "NO_MATCH" if no clear selection can be made.
+    """,
+    dynamic="""
+    User input: "{user_input}"
+
+    Available accounts:
+    {account_details}
     """
 )
 
 
-currency_conversion_intent_prompt = PromptTemplate(
-    input_variables=["user_message", "conversation_history"],
-    template="""
+currency_conversion_intent_prompt = prompt_registry.register(
+    "currency_conversion_intent",
+    static="""
     You are analyzing if a user wants to convert currency amounts from their banking conversation.
 
-    Conversation History (last few messages):
-    {conversation_history}
-
-    Current User Message: "{user_message}"
-
     Currency conversion indicators:
     - "convert this to [currency]"
     - "what is this in USD/GBP/EUR"  
@@ -553,18 +427,20 @@ currency_conversion_intent_prompt = PromptTemplate(
     - "what's that in USD"
 
     Return "YES" if user wants currency conversion, "NO" otherwise.
+    """,
+    dynamic="""
+    Conversation History (last few messages):
+    {conversation_history}
+
+    Current User Message: "{user_message}"
     """
 )
 
-currency_extraction_prompt = PromptTemplate(
-    input_variables=["user_message", "conversation_history"],
-    template="""
-    Extract currency conversion details from the conversation.
-
-    Conversation History:
-    {conversation_history}
 
-    User Message: "{user_message}"
+currency_extraction_prompt = prompt_registry.register(
+    "currency_extraction",
+    static="""
+    Extract currency conversion details from the conversation.
 
     Find:
     1. The amount to convert (look in recent conversation history)
@@ -572,34 +448,419 @@ currency_extraction_prompt = PromptTemplate(
     3. Target currency (what user wants to convert to)
 
     Return JSON:
-    {{
+    {
         "amount": number (the amount to convert from conversation),
         "from_currency": "string (PKR/USD/EUR/GBP etc.)",
         "to_currency": "string (target currency user wants)",
         "context": "brief description of what amount is being converted"
-    }}
+    }
 
     Examples:
     History: "Your balance is 50,000 PKR"
     Query: "convert this to USD" 
-    → {{"amount": 50000, "from_currency": "PKR", "to_currency": "USD", "context": "account balance"}}
+    → {"amount": 50000, "from_currency": "PKR", "to_currency": "USD", "context": "account balance"}
 
     History: "You spent $125.50 on groceries"  
     Query: "what's that in GBP"
-    → {{"amount": 125.50, "from_currency": "USD", "to_currency": "GBP", "context": "grocery spending"}}
+    → {"amount": 125.50, "from_currency": "USD", "to_currency": "GBP", "context": "grocery spending"}
 
     History: "Your balance is 150,000 KES"
     Query: "convert to USD"
-    → {{"amount": 150000, "from_currency": "KES", "to_currency": "USD", "context": "account balance"}}
+    → {"amount": 150000, "from_currency": "KES", "to_currency": "USD", "context": "account balance"}
     
     History: "You sent 500,000 UGX to John"
     Query: "what's that in KES"
-    → {{"amount": 500000, "from_currency": "UGX", "to_currency": "KES", "context": "money transfer"}}
+    → {"amount": 500000, "from_currency": "UGX", "to_currency": "KES", "context": "money transfer"}
     
     History: "Transaction of 1,200 ETB for groceries"
     Query: "show me in dollars"
-    → {{"amount": 1200, "from_currency": "ETB", "to_currency": "USD", "context": "grocery spending"}}
+    → {"amount": 1200, "from_currency": "ETB", "to_currency": "USD", "context": "grocery spending"}
 
     Return only valid JSON.
+    """,
+    dynamic="""
+    Conversation History:
+    {conversation_history}
+
+    User Message: "{user_message}"
+    """
+)
+
+
+history_summary_prompt = prompt_registry.register(
+    "history_summary",
+    static="""
+    Create a structured summary of the banking conversation below that preserves ALL important context for future queries.
+
+    Create a summary with these sections:
+    1. RECENT BALANCE INFO: Any balance amounts, account numbers mentioned
+    2. TRANSACTION DATA: Recent transactions shown (amounts, descriptions, dates)
+    3. SPENDING ANALYSIS: Any spending totals, categories, comparisons discussed
+    4. TRANSFER CONTEXT: Any transfer amounts, recipients, percentages mentioned
+    5. USER PATTERNS: What the user typically asks about or references
+    6. PENDING ACTIONS: Any incomplete requests or multi-step processes
+
+    Focus on preserving:
+    - Exact amounts, percentages, and calculations
+    - Specific transaction details and timeframes
+    - Any "that amount", "those transactions" references
+    - Transfer recipients and amounts
+    - Categories and spending breakdowns
+
+    Keep it detailed enough for contextual query resolution.
+    """,
+    dynamic="""
+    CONVERSATION:
+    {conversation}
+    """
+)
+
+
+contextual_resolution_prompt = prompt_registry.register(
+    "contextual_resolution",
+    static="""
+    You are an advanced query resolver for banking conversations. Analyze the ENTIRE conversation history to resolve contextual queries that may reference information from multiple previous exchanges.
+
+    CRITICAL REQUIREMENT: Return ONLY the resolved standalone query - NO explanations, NO reasoning, just the final query.
+
+    ADVANCED RESOLUTION RULES:
+
+    1. MULTI-TURN CONTEXT ANALYSIS:
+    - Look across previous messages, not just the last one
+    - Track evolving context (e.g., user asked about transactions, then spending, now asking "what about that category")
+    - Identify chains of related queries and their evolution
+    - emphasize on latest entity in case of multiple references (like if 2nd last transaction talks about july and last one talks about june, then resolve to june)
+
+    2. REFERENCE RESOLUTION PATTERNS:
+
+    a) TRANSACTION REFERENCES:
+    - "which one" → find most recent transaction list
+    - "that transaction" → identify specific transaction mentioned
+    - "those amounts" → find all amounts in recent context
+    - "the expensive one" → find highest amount mentioned
+
+    b) BALANCE & TRANSFER REFERENCES:
+    - "that balance" → find most recent balance mentioned
+    - "1% of that" → calculate percentage of most recent amount
+    - "from that account" → identify account number in context
+    - "to that person" → find recipient name in conversation
+
+    c) CATEGORY & SPENDING REFERENCES:
+    - "food spending" after showing categories → reference food category data
+    - "that month" → identify timeframe from previous discussion
+    - "those expenses" → find expense list from conversation
+
+    d) CROSS-MESSAGE REFERENCES:
+    - User: "show transactions" → Assistant: [shows 5 transactions] → User: "what about june ones" 
+    - Resolve: "show me transactions for June" (combining transaction request + timeframe)
+
+    3. CONTEXT CHAIN EXAMPLES:
+
+    Message 1: "show my balance" → "Balance: $1,500"
+    Message 2: "show my spending" → "June spending: $800"  
+    Message 3: "can I afford 1000 with that" 
+    → Resolve: "can I afford $1000 based on my current balance of $1500"
+
+    Message 1: "transaction history" → "Last 5 transactions: Netflix $15, Grocery $50..."
+    Message 2: "which category spent most" → "Grocery category spent $200 total"
+    Message 3: "show me more of those" 
+    → Resolve: "show me more grocery transactions from my transaction history"
+
+    4. PERCENTAGE & CALCULATION HANDLING:
+    - Always calculate percentages when referenced
+    - Include both percentage and calculated amount
+    - Reference the original amount being calculated from
+
+    5. MULTI-LANGUAGE SUPPORT:
+    - "inka total" = "their total" 
+    - "kitna" = "how much"
+    - "usmein se" = "from those"
+    - Convert to English while preserving intent
+
+    6. INCOMPLETE TRANSFER RESOLUTION:
+    Message 1: "transfer 100" → "Need recipient"
+    Message 2: "to john"
+    → Resolve: "transfer 100 to john" (combining amount + recipient)
+
+    7. EVOLVING CONTEXT:
+    - Track how user's focus shifts (balance → transactions → specific category)
+    - Maintain context of what data was last shown
+    - Understand follow-up questions in context of previous answers
+
+    ENHANCED EXAMPLES:
+
+    History: 
+    Human: "show my transactions"
+    Assistant: "Here are your last 4 transactions: 1. Netflix $15, 2. Grocery $77, 3. Gas $45, 4. Coffee $8"
+    Human: "spending breakdown"  
+    Assistant: "Entertainment: $15, Food: $85, Transportation: $45"
+    Query: "food wala expand karo"
+    → "show me detailed breakdown of food category spending including grocery and coffee transactions"
+
+    History:
+    Human: "my balance"
+    Assistant: "Account Balance: PKR 245,600 as of July 29"
+    Human: "recent spending"
+    Assistant: "July spending: PKR 25,000 across 15 transactions"  
+    Query: "kitna bacha hai percentage mein"
+    → "what percentage of my PKR 245,600 balance remains after PKR 25,000 spending"
+
+    RESOLUTION STRATEGY:
+    1. Identify ALL relevant context from conversation history
+    2. Determine what "that", "those", "it", "them" refer to specifically
+    3. Include exact amounts, names, timeframes from context
+    4. Calculate any percentages or math operations
+    5. Preserve user's original intent and language preference
+    6. Create a complete, standalone query
+    """,
+    dynamic="""
+    FULL CONVERSATION HISTORY:
+    {conversation_history}
+
+    CURRENT CONTEXTUAL QUERY: "{user_message}"
+
+    RESOLVED STANDALONE QUERY:
+    """
+)
+
+
+entity_extraction_prompt = prompt_registry.register(
+    "entity_extraction",
+    static="""
+    Extract key banking entities and context from the conversation history below for contextual query resolution.
+
+    Extract and return JSON with:
+    {
+        "balances": [
+            {"amount": 1500, "currency": "USD", "date": "recent", "context": "current balance"}
+        ],
+        "transactions": [
+            {"description": "Netflix", "amount": 15, "type": "debit", "mentioned_when": "recent"}
+        ],
+        "amounts_mentioned": [
+            {"value": 1000, "currency": "USD", "context": "affordability question"}
+        ],
+        "recipients": ["john", "ali raza"],
+        "categories": [
+            {"name": "food", "amount": 85, "context": "spending breakdown"}
+        ],
+        "timeframes": ["june", "last month", "recent"],
+        "pending_transfers": [
+            {"amount": 100, "recipient": "john", "status": "needs_confirmation"}
+        ],
+        "user_focus": "last thing user was asking about",
+        "conversation_flow": "summary of how conversation evolved"
+    }
+
+    Focus on preserving exact amounts, names, and contextual relationships.
+    """,
+    dynamic="""
+    CONVERSATION HISTORY:
+    {conversation_history}
+    """
+)
+
+
+entity_resolution_prompt = prompt_registry.register(
+    "entity_resolution",
+    static="""
+    Resolve this contextual query using extracted banking entities from conversation history.
+
+    Resolution rules:
+    1. Map references like "that", "those", "it" to specific entities
+    2. Calculate percentages using actual amounts from context
+    3. Combine incomplete information (amount + recipient, etc.)
+    4. Reference specific timeframes, categories, or transactions
+    5. Preserve user's intent while making query standalone
+    """,
+    dynamic="""
+    USER QUERY: "{user_message}"
+
+    AVAILABLE CONTEXT:
+    {entities}
+
+    Return the resolved standalone query:
+    """
+)
+
+
+exit_detection_prompt = prompt_registry.register(
+    "exit_detection",
+    static="""
+    You are an exit intent detector for a banking application. Analyze if the user wants to exit, logout, end session, or quit.
+
+    Exit Intent Indicators:
+    - Direct commands: "exit", "quit", "logout", "end", "bye", "goodbye"
+    - Natural phrases: "ok exit", "I want to exit", "please logout", "end session", "log me out"
+    - Contextual: "I'm done", "that's all", "finish", "close", "stop"
+    - Polite: "thank you, exit", "thanks, bye", "good day, logout"
+
+    NOT Exit Intent:
+    - Banking queries: "exit strategy", "quit spending", "end of month"
+    - General conversation: "exit the building", "quit my job"
+    - Questions: "how do I exit?", "what does exit mean?"
+
+    Rules:
+    1. If the message contains clear exit/logout/quit/end intent → return "YES"
+    2. If it's a banking query or general conversation → return "NO"
+    3. When in doubt, lean towards "NO" for security
+
+    Return ONLY "YES" or "NO".
+    """,
+    dynamic="""
+    User message: "{user_message}"
+    """
+)
+
+
+cancel_detection_prompt = prompt_registry.register(
+    "cancel_detection",
+    static="""
+    You are analyzing if a user wants to cancel their current money transfer process.
+
+    Cancel Transfer Intent Indicators:
+    - Direct commands: "cancel", "cancel transfer", "cancel transaction", "stop", "abort"
+    - Natural phrases: "leave this", "forget it", "never mind", "don't want to", "changed my mind"
+    - Contextual: "go back", "exit transfer", "stop transfer", "cancel this process"
+    - Polite: "please cancel", "can you cancel", "I don't want to proceed"
+
+    NOT Cancel Intent:
+    - Banking queries: "cancel my card", "cancel subscription" (different context)
+    - Asking questions: "how do I cancel?", "what happens if I cancel?"
+    - Transfer details: "cancel the Netflix payment" (referring to other transactions)
+
+    Rules:
+    1. If the message contains clear intent to stop/cancel the CURRENT transfer process → return "YES"
+    2. If it's asking about other cancellations or just questions → return "NO"
+    3. When in doubt about transfer cancellation, lean towards "YES" for user safety
+
+    Return ONLY "YES" or "NO".
+    """,
+    dynamic="""
+    User message: "{user_message}"
     """
-)
\ No newline at end of file
+)
+
+
+transfer_extraction_prompt = prompt_registry.register(
+    "transfer_extraction",
+    static="""
+    Extract transfer details from the query, using conversation history for context. Handle multi-turn transfer conversations.
+
+    Rules:
+    - If message mentions percentages of "that" or "it", calculate based on amounts in conversation history
+    - Extract exact amount, currency, and recipient
+    - For "1% of that $1,554.41" → amount should be 15.54, currency USD
+    - For "transfer 10% of that PKR amount" → calculate 10% of the PKR amount mentioned
+    - If only recipient is provided ("to ahmed abrar"), look for amount/percentage in recent conversation
+    - If only amount is provided, look for recipient in recent conversation
+    - Combine information from multiple recent messages to complete transfer details
+
+    Enhanced Examples:
+    History: "Here's your current account balance: USD 1,554.41"
+    Current: "ok transfer 1% of that" → {"amount": 15.54, "currency": "USD", "recipient": null}
+
+    History: "transfer 1% of 1554.41 USD which is 15.54 USD"  
+    Current: "to ahmed abrar" → {"amount": 15.54, "currency": "USD", "recipient": "ahmed abrar"}
+
+    History: "send 100 USD"
+    Current: "to john smith" → {"amount": 100, "currency": "USD", "recipient": "john smith"}
+
+    History: "Assistant: I need more details. User: transfer 50 PKR"
+    Current: "to sarah" → {"amount": 50, "currency": "PKR", "recipient": "sarah"}
+
+    Multi-turn completion rules:
+    - Look at last 3-4 conversation turns for missing transfer details
+    - If current message only has recipient, search history for amount
+    - If current message only has amount, search history for recipient
+    - Prioritize most recent complete transfer attempt
+
+    Return JSON: {"amount": number, "currency": string, "recipient": string}
+    Set null for missing fields, but try to complete from conversation history first.
+    """,
+    dynamic="""
+    CONVERSATION HISTORY:
+    {conversation_history}
+
+    CURRENT TRANSFER REQUEST: "{user_message}"
+    """
+)
+
+
+non_banking_check_prompt = prompt_registry.register(
+    "non_banking_check",
+    static="""
+    You are a banking query analyzer. Determine if this query is clearly non-banking and should be blocked.
+
+    **DEFINITELY ALLOW (return "ALLOW"):**
+    ✅ Account operations: balance, transactions, transfer, payments, spending analysis
+    ✅ Financial calculations: currency conversion of amounts, budgeting
+    ✅ Banking assistance: "what can you do", general banking help
+    ✅ Language support: translation requests for banking responses
+
+    **DEFINITELY BLOCK (return "BLOCK"):**
+    ❌ General knowledge: "Who is president", "Weather today", "Sports scores"
+    ❌ Entertainment: "Tell jokes", "Sing songs", "Recommend movies"
+    ❌ Technology help: "How to program", "Fix computer"
+    ❌ Personal advice: "Health tips", "Dating advice"
+    ❌ Academic help: "Solve homework", "Write essay"
+    ❌ Company info (non-financial): "Apple's history", "Google's products"
+
+    **CRITICAL DECISION RULE:**
+    - If it's clearly about general knowledge, entertainment, technology, etc. → "BLOCK"
+    - If it's banking-related or unclear → "ALLOW"
+
+    **EXAMPLES:**
+    "Who is CEO of Apple?" → BLOCK
+    "What's the weather?" → BLOCK  
+    "Who is president of USA?" → BLOCK
+    "Convert $100 to PKR" → ALLOW
+    "What can you do?" → ALLOW
+    "How much is my balance?" → ALLOW
+
+    Return ONLY "BLOCK" or "ALLOW".
+    """,
+    dynamic="""
+    CONVERSATION CONTEXT:
+    {conversation_context}
+
+    USER MESSAGE: "{user_message}"
+    """
+)
+
+
+tool_agent_prompt = prompt_registry.register(
+    "tool_agent",
+    static="""
+    You are Sage, a professional banking assistant. Fetch account data with the tools and answer the customer's question from the tool results only.
+
+    Tools:
+    - get_balance: current balance, or the balance on a given date
+    - list_transactions: transactions matching filters (description, category, type, month/year or date range, amount range, limit)
+    - spending_by_category: debit or credit totals per category for a month or date range
+    - convert_currency: convert an amount between currencies at the live rate
+    - request_transfer: the customer wants to send money; call it and stop, the transfer flow takes over
+
+    Rules:
+    1. Call every tool you need in one turn when the calls do not depend on each other
+    2. Never invent amounts, dates or transactions; if a tool returns nothing, say so
+    3. Resolve references like "that", "those" or "last month" from the conversation history and today's date
+    4. Dates are YYYY-MM-DD; months are lowercase English names
+    5. Only answer banking questions about this customer's account
+
+    Answer format:
+    - First line: "Hello [FirstName]! [brief context-appropriate greeting]"
+    - Then the answer, direct and structured; bullet points (•) for lists of transactions or categories
+    - Amounts with their currency, e.g. "PKR 12,500.00"
+    - Never use asterisks (*)
+    """,
+    dynamic="""
+    Customer first name: {first_name}
+    Today's date: {current_date}
+
+    CONVERSATION HISTORY:
+    {conversation_history}
+
+    User message: "{user_message}"
+    """
+)
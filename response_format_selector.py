@@ -0,0 +1,238 @@
+"""
+Deterministic response-format selection for Banking AI Assistant.
+Chooses one of the ResponseFormats values from data shape, intent and query wording.
+"""
+import json
+import logging
+import os
+import random
+from typing import Any, Dict, Optional, Tuple
+
+from constants import (
+    BankingIntents, ResponseFormats, ResponseFormatKeywords, ResponseFormatConfig
+)
+
+logger = logging.getLogger(__name__)
+
+# Formatting instructions injected into the generation prompt (NO ASTERISKS)
+FORMAT_INSTRUCTIONS = {
+    ResponseFormats.CONCISE_ONE_LINER: """
+            FORMAT: CONCISE ONE-LINER
+            - Give a direct, single sentence answer with the specific number
+            - Reference previous context naturally but keep it brief
+            - No bullet points or lists needed
+            - Example: "Your current balance is $1,234.56" or "You spent $45.20 on Netflix in April"
+            - NEVER use asterisks in your response
+            """,
+    ResponseFormats.STRUCTURED_LIST: """
+            FORMAT: STRUCTURED DATA PRESENTATION
+            - Use bullet points (•) or numbering for multiple items/transactions
+            - Organize data clearly with proper formatting
+            - Include all relevant details, amounts, dates, and descriptions
+            - Group related information logically
+            - End with a helpful summary line if appropriate
+            - Preserve ALL data - never omit important details
+            - NEVER use asterisks in your response
+            """,
+    ResponseFormats.DETAILED_EXPLANATION: """
+            FORMAT: DETAILED EXPLANATION WITH CONTEXT
+            - Provide thorough explanation with context
+            - Include all relevant numbers and comparisons
+            - Use paragraphs and logical flow
+            - Reference previous conversation context
+            - Help user understand patterns or insights
+            - Structure with natural breaks between topics
+            - NEVER use asterisks in your response
+            """,
+    ResponseFormats.HELPFUL_GUIDANCE: """
+            FORMAT: HELPFUL GUIDANCE
+            - Provide clear, supportive guidance
+            - Explain what's needed or what went wrong
+            - Offer specific next steps
+            - Keep it friendly and helpful
+            - Include examples if relevant
+            - NEVER use asterisks in your response
+            """
+}
+
+# Keys that carry a single scalar answer
+SINGLE_VALUE_KEYS = [
+    "current_balance", "total_spent", "total_amount", "average_balance",
+    "account_balance", "current_balance_pkr", "current_balance_usd", "converted_amount"
+]
+
+# Keys that carry multiple items
+LIST_KEYS = ["transactions", "category_breakdown", "top_categories", "available_accounts"]
+
+# Keys that indicate data needing interpretation
+COMPLEX_KEYS = ["comparison", "analysis", "breakdown", "facet"]
+
+
+def profile_data(data: Any) -> Dict[str, Any]:
+    """Reduce response data to the shape features the selector uses."""
+    profile = {
+        "empty": not data,
+        "single_values": 0,
+        "item_count": 0,
+        "has_error": False,
+        "is_complex": False
+    }
+    if not data:
+        return profile
+
+    if isinstance(data, list):
+        profile["item_count"] = len(data)
+        if len(data) == 1 and isinstance(data[0], dict):
+            profile["single_values"] = sum(1 for key in SINGLE_VALUE_KEYS if key in data[0])
+        return profile
+
+    if not isinstance(data, dict):
+        return profile
+
+    # Unwrap backend envelopes: /execute_pipeline -> {"data": [...]}, /user_balance -> {"user": {...}}
+    payload = data
+    if isinstance(data.get("data"), list):
+        rows = data["data"]
+        profile["item_count"] = len(rows)
+        if len(rows) == 1 and isinstance(rows[0], dict):
+            payload = rows[0]
+            profile["item_count"] = 0
+        if rows and isinstance(rows[0], dict) and any(key in rows[0] for key in COMPLEX_KEYS):
+            profile["is_complex"] = True
+    elif isinstance(data.get("user"), dict):
+        payload = data["user"]
+    elif isinstance(data.get("conversion_result"), dict):
+        payload = data["conversion_result"]
+
+    profile["single_values"] = sum(1 for key in SINGLE_VALUE_KEYS if key in payload)
+
+    for key in LIST_KEYS:
+        value = data.get(key)
+        if isinstance(value, list):
+            profile["item_count"] = max(profile["item_count"], len(value))
+
+    # Same test as the LLM format analysis used: an error key, or "missing" anywhere in the data
+    if "error" in data or "missing" in str(data):
+        profile["has_error"] = True
+
+    if any(key in data for key in COMPLEX_KEYS):
+        profile["is_complex"] = True
+
+    return profile
+
+
+def summarize_profile(profile: Dict[str, Any]) -> str:
+    """Render a data profile as the short summary used in the format prompt."""
+    if profile.get("empty"):
+        return "No data available"
+
+    summary_parts = []
+    if profile.get("single_values"):
+        summary_parts.append(f"Single values: {profile['single_values']}")
+    if profile.get("item_count"):
+        summary_parts.append(f"Item list: {profile['item_count']} items")
+    if profile.get("has_error"):
+        summary_parts.append("Error or missing information")
+    if profile.get("is_complex"):
+        summary_parts.append("Complex analysis data")
+
+    return "; ".join(summary_parts) if summary_parts else "Simple data object"
+
+
+def score_response_formats(user_message: str, context_state: str, profile: Dict[str, Any],
+                           intent: Optional[str] = None) -> Dict[str, int]:
+    """Score every response format from data shape, intent and query keywords."""
+    scores = {response_format: 0 for response_format in ResponseFormats.ALL}
+    user_lower = f" {user_message.lower().strip()} " if user_message else " "
+    context_lower = (context_state or "").lower()
+
+    # Error and guidance signals dominate everything else
+    if profile.get("has_error"):
+        scores[ResponseFormats.HELPFUL_GUIDANCE] += 4
+    if any(word in context_lower for word in ResponseFormatKeywords.GUIDANCE_CONTEXT):
+        scores[ResponseFormats.HELPFUL_GUIDANCE] += 3
+
+    # Data shape
+    if profile.get("item_count", 0) > 1:
+        scores[ResponseFormats.STRUCTURED_LIST] += 3
+    elif profile.get("single_values"):
+        scores[ResponseFormats.CONCISE_ONE_LINER] += 2
+    if profile.get("is_complex"):
+        scores[ResponseFormats.DETAILED_EXPLANATION] += 2
+    if profile.get("empty") or (profile.get("item_count") == 0 and not profile.get("single_values")):
+        scores[ResponseFormats.DETAILED_EXPLANATION] += 1
+
+    # Intent
+    if intent == BankingIntents.BALANCE_INQUIRY:
+        scores[ResponseFormats.CONCISE_ONE_LINER] += 2
+    elif intent == BankingIntents.TRANSACTION_HISTORY:
+        scores[ResponseFormats.STRUCTURED_LIST] += 2
+    elif intent == BankingIntents.CATEGORY_SPENDING:
+        scores[ResponseFormats.CONCISE_ONE_LINER] += 1
+    elif intent == BankingIntents.SPENDING_ANALYSIS:
+        scores[ResponseFormats.DETAILED_EXPLANATION] += 1
+
+    # Query wording
+    if any(keyword in user_lower for keyword in ResponseFormatKeywords.DETAILED):
+        scores[ResponseFormats.DETAILED_EXPLANATION] += 2
+    if any(keyword in user_lower for keyword in ResponseFormatKeywords.LIST):
+        scores[ResponseFormats.STRUCTURED_LIST] += 1
+    if any(keyword in user_lower for keyword in ResponseFormatKeywords.CONCISE):
+        scores[ResponseFormats.CONCISE_ONE_LINER] += 1
+
+    return scores
+
+
+def select_response_format_from_profile(user_message: str, context_state: str, profile: Dict[str, Any],
+                                        intent: Optional[str] = None) -> Tuple[str, bool]:
+    """Pick a response format; returns (format, decisive) where decisive means no tie."""
+    scores = score_response_formats(user_message, context_state, profile, intent)
+    ranked = sorted(ResponseFormats.ALL, key=lambda response_format: scores[response_format], reverse=True)
+    best, runner_up = ranked[0], ranked[1]
+
+    if scores[best] == 0:
+        return ResponseFormatConfig.DEFAULT_FORMAT, False
+
+    decisive = scores[best] - scores[runner_up] >= ResponseFormatConfig.MIN_SCORE_MARGIN
+    return best, decisive
+
+
+def get_format_instruction(response_format: str) -> str:
+    """Map a response format to its prompt instructions."""
+    return FORMAT_INSTRUCTIONS.get(response_format, FORMAT_INSTRUCTIONS[ResponseFormatConfig.DEFAULT_FORMAT])
+
+
+def should_shadow_format_choice() -> bool:
+    """Whether this turn should also ask the LLM for a format, for the parity report only."""
+    if not os.getenv(ResponseFormatConfig.CHOICE_LOG_ENV):
+        return False
+    try:
+        rate = float(os.getenv(ResponseFormatConfig.SHADOW_SAMPLE_RATE_ENV, ResponseFormatConfig.SHADOW_SAMPLE_RATE))
+    except ValueError:
+        rate = ResponseFormatConfig.SHADOW_SAMPLE_RATE
+    return random.random() < rate
+
+
+def log_llm_format_choice(user_message: str, context_state: str, profile: Dict[str, Any],
+                          intent: Optional[str], llm_format: str, rule_format: str, source: str = "tiebreaker") -> None:
+    """Append an LLM format decision to the choice log used by the parity report.
+
+    source is "tiebreaker" when the choice was used, "shadow" when it was only sampled.
+    """
+    log_path = os.getenv(ResponseFormatConfig.CHOICE_LOG_ENV)
+    if not log_path:
+        return
+    record = {
+        "user_message": user_message,
+        "context_state": context_state,
+        "profile": profile,
+        "intent": intent,
+        "llm_format": llm_format,
+        "rule_format": rule_format,
+        "source": source
+    }
+    try:
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.error(f"Could not write response format choice log: {e}")
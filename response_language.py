@@ -0,0 +1,92 @@
+"""
+Direct response language for Banking AI Assistant.
+When DirectResponseConfig is enabled, the multilingual handlers open a response language
+for the turn and the response generators write in it, so no separate back-translation
+call is needed. Responses produced in the target language are remembered; anything else
+the turn returns (fixed messages, fallbacks) is still translated as before.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Set
+
+from constants import DirectResponseConfig, Languages
+
+logger = logging.getLogger(__name__)
+
+_current_language: ContextVar[Optional["ResponseLanguage"]] = ContextVar("current_response_language", default=None)
+
+LANGUAGE_INSTRUCTIONS = {
+    Languages.URDU_ROMAN: (
+        "Write the ENTIRE response in Roman Urdu (Urdu written in English letters; NEVER use Arabic script). "
+        "Keep banking terms in English when commonly used: balance, account, transaction, transfer, statement, "
+        "and merchant names such as Amazon or Uber. Keep ALL numbers, amounts, currencies, dates, names and "
+        "account numbers exactly as they appear in the data. Follow the same structure and formatting rules."
+    ),
+    Languages.URDU_ARABIC: (
+        "Write the ENTIRE response in natural Urdu in Arabic script. Keep banking terms in English when commonly "
+        "used: balance, account, transaction, transfer. Keep ALL numbers, amounts, currencies, dates, names and "
+        "account numbers exactly as they appear in the data. Follow the same structure and formatting rules."
+    ),
+}
+
+
+class ResponseLanguage:
+    """Target language of one turn and the responses already generated in it."""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.generated: Set[str] = set()
+
+    def mark(self, text: str) -> str:
+        self.generated.add(text)
+        return text
+
+    def covers(self, text: str) -> bool:
+        """Whether text was generated in the target language and needs no translation."""
+        return text in self.generated
+
+
+def current_response_language() -> Optional[ResponseLanguage]:
+    return _current_language.get()
+
+
+@contextmanager
+def respond_in(language: Optional[str]):
+    """Generate this turn's responses in language; yields None when they stay English."""
+    existing = _current_language.get()
+    if existing is not None:
+        yield existing
+        return
+    if not DirectResponseConfig.ENABLED or language not in DirectResponseConfig.LANGUAGES:
+        yield None
+        return
+
+    response_language = ResponseLanguage(language)
+    token = _current_language.set(response_language)
+    try:
+        yield response_language
+    finally:
+        _current_language.reset(token)
+
+
+def target_language(explicit: Optional[str] = None) -> Optional[str]:
+    """Language a generator should write in: explicit, else the turn's, else None for English."""
+    if explicit:
+        return explicit if explicit in LANGUAGE_INSTRUCTIONS else None
+    current = _current_language.get()
+    return current.language if current else None
+
+
+def language_instruction(language: Optional[str]) -> str:
+    """Prompt block that switches a response prompt to language; empty for English."""
+    instruction = LANGUAGE_INSTRUCTIONS.get(language or "")
+    return f"\n\nRESPONSE LANGUAGE (CRITICAL): {instruction}" if instruction else ""
+
+
+def mark_generated(text: str, language: Optional[str]) -> str:
+    """Record that text was written in the turn's target language."""
+    current = _current_language.get()
+    if language and current is not None and current.language == language:
+        current.mark(text)
+    return text
@@ -0,0 +1,343 @@
+"""
+Roman Urdu command grammar for Banking AI Assistant.
+Common Roman Urdu requests ("balance batao", "pichli 5 transactions dikhao", "500 rupay Ali
+ko bhejo") are read locally into an intent, the filters they carry and a canonical English
+query, so the inbound translation call is skipped. Every word has to be accounted for by
+the lexicon; anything else returns None and is translated as before.
+"""
+import logging
+import re
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from constants import (
+    BankingIntents, LanguageMarkers, Months, NumberWords, RomanUrduConfig, RomanUrduLexicon, TransactionTypes
+)
+from number_normalizer import normalize_numbers
+from structured_output import DateRange, FilterExtraction
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\d+(?:,\d+)*(?:\.\d+)?|[^\W\d_]+")
+_DIGITS = re.compile(r"\d+(?:,\d+)*(?:\.\d+)?$")
+
+_ROMAN_URDU = frozenset(LanguageMarkers.ROMAN_URDU_STRONG)
+_FILLERS = frozenset(RomanUrduLexicon.FILLERS) | frozenset(RomanUrduLexicon.REQUEST_VERBS)
+_BALANCE = frozenset(RomanUrduLexicon.BALANCE_WORDS)
+_MONEY = frozenset(RomanUrduLexicon.MONEY_WORDS)
+_TRANSACTIONS = frozenset(RomanUrduLexicon.TRANSACTION_WORDS)
+_SPEND = frozenset(RomanUrduLexicon.SPEND_WORDS)
+_TRANSFER = frozenset(RomanUrduLexicon.TRANSFER_VERBS)
+_CREDIT = frozenset(RomanUrduLexicon.CREDIT_WORDS)
+_DEBIT = frozenset(RomanUrduLexicon.DEBIT_WORDS)
+_ANAPHORA = frozenset(RomanUrduLexicon.ANAPHORA)
+_LIMIT = frozenset(RomanUrduLexicon.LIMIT_WORDS)
+_PREVIOUS = frozenset(RomanUrduLexicon.PREVIOUS)
+_CURRENT = frozenset(RomanUrduLexicon.CURRENT)
+_TARGETS = frozenset(RomanUrduLexicon.TARGET_POSTPOSITIONS)
+_WENT = frozenset(["gaye", "gaya", "gayi", "lage", "lagay", "hue", "hua", "hui"])
+_MONTH_NUMBERS = {**Months.NAMES_TO_NUMBERS,
+                  **{word: Months.NAMES_TO_NUMBERS[month] for word, month in RomanUrduLexicon.MONTHS.items()}}
+_MONTH_NAMES = {number: name for name, number in Months.NAMES_TO_NUMBERS.items()}
+
+
+class RomanUrduCommand(NamedTuple):
+    intent: str
+    filters: FilterExtraction
+    english: str
+
+
+class _Reading:
+    """Everything one scan of a message found."""
+
+    def __init__(self):
+        self.roman_urdu = False
+        self.topics = set()
+        self.money = False
+        self.went = False
+        self.amount: Optional[float] = None
+        self.bare_numbers: List[float] = []
+        self.currency: Optional[str] = None
+        self.limit: Optional[int] = None
+        self.month: Optional[int] = None
+        self.year: Optional[int] = None
+        self.relative: Optional[Tuple[str, str]] = None  # ("last" | "this", "month" | "week" | "year")
+        self.day: Optional[str] = None
+        self.transaction_type: Optional[str] = None
+        self.category: Optional[str] = None
+        self.description: Optional[str] = None
+        self.recipient: Optional[str] = None
+
+
+def _number_value(word: str) -> Optional[float]:
+    if _DIGITS.match(word):
+        return float(word.replace(",", ""))
+    return NumberWords.UNITS.get(word)
+
+
+def _quantity(words: List[str], start: int) -> Tuple[Optional[float], int]:
+    """Number at start and the index after it; amounts arrive normalized ("do hazaar" is "2000")."""
+    value = _number_value(words[start])
+    if value is None:
+        return None, start
+    following = words[start + 1] if start + 1 < len(words) else ""
+    # A number word on its own ("bhej do") is only a number before a currency or a count noun
+    if not _DIGITS.match(words[start]) and following not in RomanUrduLexicon.CURRENCIES \
+            and following not in _TRANSACTIONS:
+        return None, start
+    return value, start + 1
+
+
+def _format_amount(amount: float) -> str:
+    return str(int(amount)) if amount.is_integer() else str(amount)
+
+
+class RomanUrduGrammar:
+    """Lexicon-driven reader of Roman Urdu balance, transaction, spending and transfer requests."""
+
+    def __init__(self):
+        self.stats = Counter()
+        self.unknown_words = Counter()
+
+    def _scan(self, text: str) -> Tuple[Optional[_Reading], str]:
+        """Reading of text, or None and the reason it could not be fully read."""
+        originals = _TOKEN.findall(normalize_numbers(text))
+        words = [word.lower() for word in originals]
+        reading = _Reading()
+        pending: List[str] = []  # Unknown words waiting for "ko" / "pe" to make them a name
+        index = 0
+
+        while index < len(words):
+            word = words[index]
+            following = words[index + 1] if index + 1 < len(words) else ""
+            if word in _ROMAN_URDU:
+                reading.roman_urdu = True
+
+            if word in _ANAPHORA:
+                return None, "anaphora"
+
+            if word in _LIMIT and _DIGITS.match(following):
+                reading.limit = int(float(following.replace(",", "")))
+                index += 2
+                continue
+
+            if (word in _PREVIOUS or word in _CURRENT) and following in RomanUrduLexicon.PERIODS:
+                reading.relative = ("last" if word in _PREVIOUS else "this", RomanUrduLexicon.PERIODS[following])
+                reading.roman_urdu = reading.roman_urdu or following in _ROMAN_URDU
+                index += 2
+                continue
+
+            quantity, after = _quantity(words, index)
+            if quantity is not None:
+                next_word = words[after] if after < len(words) else ""
+                if next_word in RomanUrduLexicon.CURRENCIES:
+                    reading.amount, reading.currency = quantity, RomanUrduLexicon.CURRENCIES[next_word]
+                    after += 1
+                elif next_word in _TRANSACTIONS and quantity.is_integer():
+                    reading.limit = int(quantity)
+                elif reading.month and not reading.year and 1900 <= quantity <= 2100:
+                    reading.year = int(quantity)
+                else:
+                    reading.bare_numbers.append(quantity)
+                index = after
+                continue
+
+            if word in _MONTH_NUMBERS:
+                reading.month = _MONTH_NUMBERS[word]
+            elif word in RomanUrduLexicon.DAYS:
+                reading.day = RomanUrduLexicon.DAYS[word]
+            elif word == RomanUrduLexicon.RECIPIENT_POSTPOSITION:
+                if not pending or reading.recipient:
+                    return None, "recipient"
+                reading.recipient = " ".join(pending).title()
+                reading.roman_urdu = True
+                pending = []
+            elif word in _TARGETS:
+                if pending:
+                    reading.description = " ".join(pending).title()
+                    pending = []
+                elif not reading.category:
+                    return None, "target"
+                reading.roman_urdu = True
+            elif word in RomanUrduLexicon.CATEGORIES:
+                reading.category = RomanUrduLexicon.CATEGORIES[word]
+            elif word in RomanUrduLexicon.CURRENCIES:
+                reading.currency = RomanUrduLexicon.CURRENCIES[word]
+            elif word in _BALANCE:
+                reading.topics.add("balance")
+            elif word in _MONEY:
+                reading.money = True
+            elif word in _TRANSACTIONS:
+                reading.topics.add("transactions")
+            elif word in _SPEND:
+                reading.topics.add("spending")
+            elif word in _TRANSFER:
+                reading.topics.add("transfer")
+            elif word in _CREDIT:
+                reading.transaction_type = TransactionTypes.CREDIT
+            elif word in _DEBIT:
+                reading.transaction_type = TransactionTypes.DEBIT
+            elif word in _FILLERS:
+                reading.went = reading.went or word in _WENT
+            else:
+                pending.append(originals[index])
+                if len(pending) > RomanUrduConfig.MAX_NAME_WORDS:
+                    return None, f"unknown:{pending[0].lower()}"
+            index += 1
+
+        if pending:
+            return None, f"unknown:{pending[0].lower()}"
+        if not reading.roman_urdu:
+            return None, "not_roman_urdu"
+        return reading, "ok"
+
+    @staticmethod
+    def _intent(reading: _Reading) -> Optional[str]:
+        topics = set(reading.topics)
+        if reading.money:
+            topics.add("spending" if reading.went or reading.transaction_type else "balance")
+        if len(topics) != 1:
+            return None
+
+        topic = topics.pop()
+        if topic == "balance":
+            return BankingIntents.BALANCE_INQUIRY if not reading.bare_numbers else None
+        if topic == "transactions":
+            return BankingIntents.TRANSACTION_HISTORY if not reading.bare_numbers else None
+        if topic == "spending":
+            if reading.bare_numbers or reading.limit:
+                return None
+            return BankingIntents.CATEGORY_SPENDING if reading.category else BankingIntents.SPENDING_ANALYSIS
+        if reading.amount is None and len(reading.bare_numbers) == 1:
+            reading.amount, reading.bare_numbers = reading.bare_numbers[0], []
+        if reading.bare_numbers or (reading.amount is None and not reading.recipient):
+            return None
+        return BankingIntents.TRANSFER_MONEY
+
+    @staticmethod
+    def _time(reading: _Reading, today: date) -> Tuple[Dict[str, Any], str]:
+        """Filter fields and English phrase of the time the message refers to."""
+        if reading.month:
+            year = reading.year or today.year
+            name = _MONTH_NAMES[reading.month]
+            return {"month": name, "year": year}, f"in {name} {reading.year}" if reading.year else f"in {name}"
+        if reading.day == "today":
+            return {"date_range": DateRange(start=today.isoformat(), end=today.isoformat())}, "today"
+        if reading.day == "yesterday":
+            yesterday = (today - timedelta(days=1)).isoformat()
+            return {"date_range": DateRange(start=yesterday, end=yesterday)}, "yesterday"
+        if not reading.relative:
+            return ({"year": reading.year}, f"in {reading.year}") if reading.year else ({}, "")
+
+        which, period = reading.relative
+        phrase = f"{which} {period}"
+        if period == "year":
+            return {"year": today.year - (which == "last")}, phrase
+        if period == "month":
+            first = today.replace(day=1)
+            month = (first - timedelta(days=1)) if which == "last" else first
+            return {"month": _MONTH_NAMES[month.month], "year": month.year}, phrase
+        monday = today - timedelta(days=today.weekday())
+        if which == "last":
+            start, end = monday - timedelta(days=7), monday - timedelta(days=1)
+        else:
+            start, end = monday, today
+        return {"date_range": DateRange(start=start.isoformat(), end=end.isoformat())}, phrase
+
+    @staticmethod
+    def _english(intent: str, reading: _Reading, time_phrase: str) -> str:
+        """Canonical English wording of the command for the English pipeline."""
+        if intent == BankingIntents.BALANCE_INQUIRY:
+            parts = ["what is my balance"]
+            if reading.currency and reading.currency != "PKR":
+                parts.append(f"in {reading.currency}")
+        elif intent == BankingIntents.TRANSACTION_HISTORY:
+            parts = ["show my"]
+            if reading.limit:
+                parts.append(f"last {reading.limit}")
+            if reading.transaction_type:
+                parts.append(reading.transaction_type)
+            parts.append("transactions")
+            if reading.description or reading.category:
+                parts.append(f"for {reading.description or reading.category}")
+        elif intent == BankingIntents.TRANSFER_MONEY:
+            parts = ["transfer"]
+            if reading.amount is not None:
+                parts.append(f"{_format_amount(reading.amount)} {reading.currency or 'PKR'}")
+            else:
+                parts.append("money")
+            if reading.recipient:
+                parts.append(f"to {reading.recipient}")
+            return " ".join(parts)
+        elif reading.transaction_type == TransactionTypes.CREDIT:
+            parts = ["how much money was credited to my account"]
+            if reading.description or reading.category:
+                parts.append(f"from {reading.description or reading.category}")
+        else:
+            parts = ["how much did I spend"]
+            if reading.description or reading.category:
+                parts.append(f"on {(reading.description or reading.category).lower()}")
+        if time_phrase:
+            parts.append(time_phrase)
+        return " ".join(parts)
+
+    def parse_with_reason(self, text: str, today: Optional[date] = None) -> Tuple[Optional[RomanUrduCommand], str]:
+        """Command for text, or None and why it was left to translation."""
+        reading, reason = self._scan(text)
+        if reading is None:
+            return None, reason
+        intent = self._intent(reading)
+        if intent is None:
+            return None, "ambiguous"
+
+        time_filters, time_phrase = self._time(reading, today or date.today())
+        hints = {
+            BankingIntents.BALANCE_INQUIRY: "balance_query",
+            BankingIntents.TRANSACTION_HISTORY: "transaction_list",
+            BankingIntents.SPENDING_ANALYSIS: "spending_total"
+        }
+        filters = FilterExtraction(
+            description=reading.description,
+            category=reading.category,
+            transaction_type=reading.transaction_type or (
+                TransactionTypes.DEBIT if intent in (BankingIntents.SPENDING_ANALYSIS, BankingIntents.CATEGORY_SPENDING) else None
+            ),
+            limit=reading.limit,
+            currency=reading.currency.lower() if reading.currency else None,
+            intent_hint=hints.get(intent),
+            **(time_filters if intent != BankingIntents.TRANSFER_MONEY else {})
+        )
+        return RomanUrduCommand(intent, filters, self._english(intent, reading, time_phrase)), "ok"
+
+    def parse(self, text: str) -> Optional[RomanUrduCommand]:
+        """Command for a Roman Urdu message the lexicon fully covers, else None."""
+        command, reason = self.parse_with_reason(text)
+        if command is None:
+            self.stats["unparsed"] += 1
+            self.stats[f"unparsed_{reason.split(':')[0]}"] += 1
+            if reason.startswith("unknown:"):
+                self.unknown_words[reason.split(":", 1)[1]] += 1
+            return None
+
+        self.stats["parsed"] += 1
+        self.stats[f"parsed_{command.intent}"] += 1
+        logger.info({
+            "action": "roman_urdu_parsed",
+            "intent": command.intent,
+            "english": command.english,
+            "filters": command.filters.dict(exclude_none=True)
+        })
+        return command
+
+    def get_stats(self) -> Dict[str, Any]:
+        seen = self.stats["parsed"] + self.stats["unparsed"]
+        return {
+            **dict(self.stats),
+            "coverage": round(self.stats["parsed"] / seen, 3) if seen else 0.0,
+            "top_unknown_words": dict(self.unknown_words.most_common(20))
+        }
+
+
+# Global instance
+roman_urdu_grammar = RomanUrduGrammar()
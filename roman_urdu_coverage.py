@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+roman_urdu_coverage.py
+
+Coverage of the local Roman Urdu grammar over logged Roman Urdu traffic: how many messages
+it reads without the inbound translation call, per intent, and which unknown words stop the
+rest. Traffic comes from the LLM decision logs (messages the LLM labeled "ur-roman"); with
+no logs a built-in labeled sample is used. Exits non-zero if a labeled message is read with
+the wrong intent.
+
+Usage:
+    LLM_DECISION_LOG=llm_decisions.jsonl  (set while the assistant runs with the LLM deciding)
+    python roman_urdu_coverage.py llm_decisions.jsonl [--show-unparsed] [--show-parsed]
+    python roman_urdu_coverage.py                      (built-in sample)
+"""
+
+import argparse
+import sys
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from constants import BankingIntents, Languages
+from local_classifiers import load_decisions
+from roman_urdu import roman_urdu_grammar
+
+# (message, expected intent or None when the grammar should leave it to translation)
+SAMPLE: List[Tuple[str, Optional[str]]] = [
+    ("balance batao", BankingIntents.BALANCE_INQUIRY),
+    ("mera balance kya hai", BankingIntents.BALANCE_INQUIRY),
+    ("balance check karo", BankingIntents.BALANCE_INQUIRY),
+    ("account me kitna paisa hai", BankingIntents.BALANCE_INQUIRY),
+    ("mere account mein kitne paise hain", BankingIntents.BALANCE_INQUIRY),
+    ("mujhe apna balance dollar mein chahiye", BankingIntents.BALANCE_INQUIRY),
+    ("pichli 5 transactions dikhao", BankingIntents.TRANSACTION_HISTORY),
+    ("meri pichli 8 transactions batao", BankingIntents.TRANSACTION_HISTORY),
+    ("mujhe apni transactions dikhao", BankingIntents.TRANSACTION_HISTORY),
+    ("pichle hafte ki transactions batao", BankingIntents.TRANSACTION_HISTORY),
+    ("june 2024 ki transactions dikhao", BankingIntents.TRANSACTION_HISTORY),
+    ("is mahine ki jama transactions dikhao", BankingIntents.TRANSACTION_HISTORY),
+    ("meine last mahine kitna khracha kiya", BankingIntents.SPENDING_ANALYSIS),
+    ("aaj kitna kharcha hua", BankingIntents.SPENDING_ANALYSIS),
+    ("netflix pe kitne paise gaye is saal", BankingIntents.SPENDING_ANALYSIS),
+    ("pichle mahine kitne paise jama hue", BankingIntents.SPENDING_ANALYSIS),
+    ("khane pe kitna kharch kiya june mein", BankingIntents.CATEGORY_SPENDING),
+    ("pichle saal shopping pe kitna kharcha hua", BankingIntents.CATEGORY_SPENDING),
+    ("500 rupay Ali ko bhejo", BankingIntents.TRANSFER_MONEY),
+    ("ali ko 5000 bhej do", BankingIntents.TRANSFER_MONEY),
+    ("do hazaar rupay ammi ko bhejna hai", BankingIntents.TRANSFER_MONEY),
+    ("1 lakh 50 hazaar rupay Ahmed Khan ko transfer kardo", BankingIntents.TRANSFER_MONEY),
+    # Left to translation: context, small talk, or words outside the lexicon
+    ("usmein se kitna grocery pe gaya", None),
+    ("shukriya bhai", None),
+    ("haan theek hai bhej do", None),
+    ("kya meri salary aa gayi", None),
+]
+
+
+def logged_roman_urdu(paths: List[str]) -> List[str]:
+    """Messages the LLM labeled Roman Urdu in the decision logs."""
+    decisions = load_decisions(paths)
+    return [text for text, label in decisions.get("language", []) if label == Languages.URDU_ROMAN]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Roman Urdu grammar coverage over logged traffic")
+    parser.add_argument("logs", nargs="*", help="LLM decision logs (JSONL); built-in sample when omitted")
+    parser.add_argument("--show-unparsed", action="store_true")
+    parser.add_argument("--show-parsed", action="store_true")
+    args = parser.parse_args()
+
+    if args.logs:
+        labeled = [(text, None) for text in logged_roman_urdu(args.logs)]
+        source = f"{len(labeled)} logged Roman Urdu messages"
+    else:
+        labeled = SAMPLE
+        source = f"{len(labeled)} built-in sample messages"
+    if not labeled:
+        print("No Roman Urdu messages found")
+        return 0
+
+    intents, reasons, unknown = Counter(), Counter(), Counter()
+    parsed, unparsed, wrong = [], [], []
+    for text, expected in labeled:
+        command, reason = roman_urdu_grammar.parse_with_reason(text)
+        if command is None:
+            reasons[reason.split(":")[0]] += 1
+            if reason.startswith("unknown:"):
+                unknown[reason.split(":", 1)[1]] += 1
+            unparsed.append((text, reason))
+            if expected is not None and not args.logs:
+                wrong.append((text, expected, None))
+            continue
+        intents[command.intent] += 1
+        parsed.append((text, command))
+        if not args.logs and command.intent != expected:
+            wrong.append((text, expected, command.intent))
+
+    print(source)
+    print(f"read locally: {len(parsed)} ({len(parsed) / len(labeled):.1%}), "
+          f"left to translation: {len(unparsed)} ({len(unparsed) / len(labeled):.1%})")
+    for intent, count in intents.most_common():
+        print(f"    {intent:<22}{count:>6}")
+    if reasons:
+        print("left to translation because of:")
+    for reason, count in reasons.most_common():
+        print(f"    {reason:<22}{count:>6}")
+    if unknown:
+        print("top unknown words: " + ", ".join(f"{word} ({count})" for word, count in unknown.most_common(15)))
+
+    if args.show_parsed:
+        for text, command in parsed:
+            print(f"    '{text}' -> {command.intent}: '{command.english}' {command.filters.dict(exclude_none=True)}")
+    if args.show_unparsed:
+        for text, reason in unparsed:
+            print(f"    '{text}' ({reason})")
+
+    if wrong:
+        for text, expected, got in wrong:
+            print(f"FAIL: '{text}' expected {expected}, got {got}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
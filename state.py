@@ -3,7 +3,7 @@ import time
 import re
 from typing import Dict, Set, Optional
 import logging
-from constants import VerificationStages, RegexPatterns, Limits
+from constants import VerificationStages, RegexPatterns, Limits, LanguageProfileConfig
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ authenticated_users: Dict[str, Dict] = {}
 processed_messages: Set[str] = set()
 user_languages = {}
 user_last_languages = {}
+user_language_profiles: Dict[str, Dict] = {}
 
 def set_user_language(sender_id: str, language: str):
     """Set the current language for user's message."""
@@ -27,12 +28,55 @@ def get_user_last_language(sender_id: str) -> str:
     """Get the last detected language for user (useful for number-only messages)."""
     return user_last_languages.get(sender_id, 'en')
 
+def update_language_profile(sender_id: str, language: str, confidence: float):
+    """Fold one detection into the user's language profile (EMA of per-language confidence)."""
+    profile = user_language_profiles.get(sender_id)
+    if profile is None:
+        # First detection seeds the average instead of being smoothed towards zero
+        profile = user_language_profiles[sender_id] = {"scores": {language: confidence}, "detections": 0}
+    else:
+        scores = profile["scores"]
+        scores.setdefault(language, 0.0)
+        for known in scores:
+            observed = confidence if known == language else 0.0
+            scores[known] += LanguageProfileConfig.SMOOTHING * (observed - scores[known])
+    profile["detections"] += 1
+    profile["language"], profile["confidence"] = max(profile["scores"].items(), key=lambda item: item[1])
+    if profile["language"] != language:
+        logger.info(f"Language drift for user {sender_id}: detected {language}, profile stays "
+                    f"{profile['language']} ({profile['confidence']:.2f})")
+
+def get_language_profile(sender_id: str) -> Optional[Dict]:
+    """Get the user's language profile: language, confidence, per-language scores and detection count."""
+    return user_language_profiles.get(sender_id)
+
+def get_trusted_language_profile(sender_id: str) -> Optional[Dict]:
+    """Get the user's language profile when it is confident enough to skip detection."""
+    profile = user_language_profiles.get(sender_id)
+    if (not LanguageProfileConfig.ENABLED or profile is None
+            or profile["detections"] < LanguageProfileConfig.MIN_DETECTIONS
+            or profile["confidence"] < LanguageProfileConfig.SKIP_THRESHOLD):
+        return None
+    return profile
+
+def get_language_profile_stats() -> Dict:
+    """Profiles per language and how many are trusted to skip detection."""
+    languages = {}
+    for profile in user_language_profiles.values():
+        languages[profile["language"]] = languages.get(profile["language"], 0) + 1
+    return {
+        "profiles": len(user_language_profiles),
+        "trusted_profiles": sum(1 for sender_id in user_language_profiles if get_trusted_language_profile(sender_id)),
+        "profile_languages": languages
+    }
+
 def clear_user_language(sender_id: str):
     """Clear language data for user."""
     if sender_id in user_languages:
         del user_languages[sender_id]
     if sender_id in user_last_languages:
         del user_last_languages[sender_id]
+    user_language_profiles.pop(sender_id, None)
 
 def cleanup_old_user_languages():
     """Clean up old user language data."""
@@ -54,6 +98,9 @@ def cleanup_old_user_languages():
     for sender_id in last_languages_to_remove:
         del user_last_languages[sender_id]
     
+    for sender_id in [sender_id for sender_id in user_language_profiles if sender_id not in active_users]:
+        del user_language_profiles[sender_id]
+    
     if languages_to_remove or last_languages_to_remove:
         logger.info(f"Cleaned up language data for {len(languages_to_remove)} users")
 
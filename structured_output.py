@@ -0,0 +1,206 @@
+"""
+Schema-constrained JSON output for the prompts that return data.
+The pydantic models here are the source of truth: each one becomes the OpenAI
+response_format of its prompt, and the same model validates the reply. Parse outcomes
+are counted per task so free-form repair and fallbacks can be tracked.
+"""
+import copy
+import json
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from constants import StructuredOutputConfig
+from number_normalizer import parse_amount
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def _as_amount(value: Any) -> Any:
+    """Amount strings such as "5 hazaar" or "1,50,000" as numbers; anything else is left to validation."""
+    if isinstance(value, str):
+        amount = parse_amount(value)
+        return amount if amount is not None else value
+    return value
+
+
+# === OUTPUT MODELS ===
+class AmountRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class DateRange(BaseModel):
+    start: Optional[str] = None
+    end: Optional[str] = None
+
+class FilterExtraction(BaseModel):
+    description: Optional[str] = None
+    category: Optional[str] = None
+    month: Optional[str] = None
+    year: Optional[int] = None
+    transaction_type: Optional[str] = None
+    amount_range: Optional[AmountRange] = None
+    date_range: Optional[DateRange] = None
+    limit: Optional[int] = None
+    currency: Optional[str] = None
+    intent_hint: Optional[str] = None
+
+    @field_validator("limit", mode="before")
+    @classmethod
+    def _limit(cls, value: Any) -> Any:
+        value = _as_amount(value)
+        return int(value) if isinstance(value, float) and value.is_integer() else value
+
+class PipelineOutput(BaseModel):
+    pipeline: List[Dict[str, Any]] = Field(default_factory=list)
+
+class EntityExtraction(BaseModel):
+    balances: List[Dict[str, Any]] = Field(default_factory=list)
+    transactions: List[Dict[str, Any]] = Field(default_factory=list)
+    amounts_mentioned: List[Dict[str, Any]] = Field(default_factory=list)
+    recipients: List[str] = Field(default_factory=list)
+    categories: List[Dict[str, Any]] = Field(default_factory=list)
+    timeframes: List[str] = Field(default_factory=list)
+    pending_transfers: List[Dict[str, Any]] = Field(default_factory=list)
+    user_focus: Optional[str] = None
+    conversation_flow: Optional[str] = None
+
+class CurrencyConversionDetails(BaseModel):
+    amount: Optional[float] = None
+    from_currency: Optional[str] = None
+    to_currency: Optional[str] = None
+    context: Optional[str] = None
+
+    _amount = field_validator("amount", mode="before")(_as_amount)
+
+class TransferDetails(BaseModel):
+    amount: Optional[float] = None
+    currency: Optional[str] = None
+    recipient: Optional[str] = None
+
+    _amount = field_validator("amount", mode="before")(_as_amount)
+
+class SegmentTranslations(BaseModel):
+    translations: List[str] = Field(default_factory=list)
+
+class InboundNormalization(BaseModel):
+    language: str
+    english_text: str
+    confidence: float = 1.0
+
+
+# === RESPONSE FORMATS ===
+class _OpenSchema(Exception):
+    pass
+
+def _strict_schema(schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The schema in OpenAI strict form, or None when it has free-form objects."""
+    def visit(node: Any) -> None:
+        if isinstance(node, list):
+            for item in node:
+                visit(item)
+            return
+        if not isinstance(node, dict):
+            return
+        node.pop("title", None)
+        node.pop("default", None)
+        if node.get("type") == "object":
+            if "properties" not in node or node.get("additionalProperties", False) is not False:
+                raise _OpenSchema()
+            node["additionalProperties"] = False
+            node["required"] = list(node["properties"])
+        for key, value in node.items():
+            if key == "properties":
+                for field_schema in value.values():
+                    visit(field_schema)
+            else:
+                visit(value)
+
+    strict = copy.deepcopy(schema)
+    try:
+        visit(strict)
+    except _OpenSchema:
+        return None
+    return strict
+
+_response_formats: Dict[str, Dict[str, Any]] = {}
+
+def response_format(model: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """OpenAI response_format for model under the configured mode; None when disabled."""
+    mode = StructuredOutputConfig.MODE
+    if mode == "off":
+        return None
+    if mode == "json_object":
+        return {"type": "json_object"}
+
+    cached = _response_formats.get(model.__name__)
+    if cached is None:
+        schema = model.model_json_schema()
+        strict = _strict_schema(schema)
+        cached = {
+            "type": "json_schema",
+            "json_schema": {"name": model.__name__, "schema": strict or schema, "strict": strict is not None}
+        }
+        _response_formats[model.__name__] = cached
+    return cached
+
+def llm_kwargs(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Extra invoke() arguments that constrain the reply to model."""
+    fmt = response_format(model)
+    return {"response_format": fmt} if fmt else {}
+
+
+# === PARSING ===
+class StructuredOutputStats:
+    """Parse outcomes per task: direct, repaired, invalid, unparseable, fallback."""
+
+    def __init__(self):
+        self.outcomes: Dict[str, Counter] = {}
+
+    def record(self, task: str, outcome: str) -> None:
+        self.outcomes.setdefault(task, Counter())[outcome] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        tasks = {}
+        for task, counts in self.outcomes.items():
+            parsed = counts["direct"] + counts["repaired"] + counts["invalid"] + counts["unparseable"]
+            failures = counts["invalid"] + counts["unparseable"]
+            tasks[task] = {
+                **dict(counts),
+                "parse_failure_rate": round(failures / parsed, 4) if parsed else 0.0,
+                "repair_rate": round(counts["repaired"] / parsed, 4) if parsed else 0.0
+            }
+        return {"mode": StructuredOutputConfig.MODE, "tasks": tasks}
+
+structured_output_stats = StructuredOutputStats()
+
+def parse_structured(raw: str, model: Type[T], task: str,
+                     repair: Callable[[str], Optional[Any]]) -> Optional[T]:
+    """Validate an LLM reply against model; free-form repair only when strict JSON fails."""
+    outcome = "direct"
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        outcome = "repaired"
+        data = repair(raw or "")
+        if data is None:
+            structured_output_stats.record(task, "unparseable")
+            return None
+
+    # Older replies return a bare array for single-list models such as the pipeline
+    if isinstance(data, list) and len(model.model_fields) == 1:
+        data = {next(iter(model.model_fields)): data}
+
+    try:
+        result = model.model_validate(data)
+    except ValidationError as e:
+        structured_output_stats.record(task, "invalid")
+        logger.error({"action": "structured_output_invalid", "task": task, "error": str(e)[:300]})
+        return None
+
+    structured_output_stats.record(task, outcome)
+    return result
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+structured_output_report.py
+
+Parse failures and fallback round-trips of the filter and pipeline prompts with free-form
+replies (response_format off) and with schema-constrained replies (json_schema), over the
+few-shot regression queries. Calls the configured LLM.
+
+Usage:
+    python structured_output_report.py
+    python structured_output_report.py --modes off,json_object,json_schema --repeat 3
+"""
+
+import argparse
+import sys
+from typing import Any, Dict
+
+from constants import StructuredOutputConfig
+from few_shot_report import ACCOUNT_NUMBER, REGRESSION_SET
+from structured_output import StructuredOutputStats, structured_output_stats
+
+OUTCOMES = ["direct", "repaired", "invalid", "unparseable", "fallback"]
+
+
+def run_mode(ai_agent: Any, mode: str, repeat: int) -> Dict[str, Any]:
+    """Run every regression query through filter extraction and pipeline generation under one mode."""
+    StructuredOutputConfig.MODE = mode
+    structured_output_stats.outcomes = StructuredOutputStats().outcomes
+    for _ in range(repeat):
+        for query, _, intent, _ in REGRESSION_SET:
+            filters = ai_agent.extract_filters_with_llm(query)
+            ai_agent.generate_pipeline_from_filters(filters, intent, ACCOUNT_NUMBER)
+    return structured_output_stats.to_dict()["tasks"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Free-form vs schema-constrained JSON output")
+    parser.add_argument("--modes", default="off,json_schema", help="Comma-separated StructuredOutputConfig modes")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the regression set per mode")
+    args = parser.parse_args()
+
+    from ai_agent import BankingAIAgent
+    ai_agent = BankingAIAgent()
+
+    configured = StructuredOutputConfig.MODE
+    results = {}
+    try:
+        for mode in [mode for mode in args.modes.split(",") if mode]:
+            results[mode] = run_mode(ai_agent, mode, args.repeat)
+    finally:
+        StructuredOutputConfig.MODE = configured
+
+    calls = len(REGRESSION_SET) * args.repeat
+    print(f"{calls} calls per task and mode")
+    print(f"{'mode':<13}{'task':<10}" + "".join(f"{outcome:>13}" for outcome in OUTCOMES))
+    for mode, tasks in results.items():
+        for task in ("filters", "pipeline"):
+            counts = tasks.get(task, {})
+            print(f"{mode:<13}{task:<10}" + "".join(f"{counts.get(outcome, 0):>13}" for outcome in OUTCOMES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
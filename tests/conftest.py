@@ -0,0 +1,8 @@
+"""Shared setup for the test suite: modules live at the repository root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Clients are created at import time; no call reaches OpenAI in the tests
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
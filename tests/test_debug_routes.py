@@ -0,0 +1,33 @@
+"""Trace endpoints are hidden unless a debug token is configured and sent."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from constants import APIEndpoints, TraceConfig
+from debug_routes import router
+from turn_trace import turn_trace
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.delenv(TraceConfig.DEBUG_TOKEN_ENV, raising=False)
+    assert client.get(APIEndpoints.DEBUG_TRACES).status_code == 404
+
+
+def test_requires_the_token(client, monkeypatch):
+    monkeypatch.setenv(TraceConfig.DEBUG_TOKEN_ENV, "secret")
+    assert client.get(APIEndpoints.DEBUG_TRACES).status_code == 403
+    assert client.get(APIEndpoints.DEBUG_TRACES, headers={TraceConfig.DEBUG_TOKEN_HEADER: "wrong"}).status_code == 403
+
+    with turn_trace("debug-test") as trace:
+        pass
+    headers = {TraceConfig.DEBUG_TOKEN_HEADER: "secret"}
+    assert client.get(APIEndpoints.DEBUG_TRACES, headers=headers).json()["traces"]
+    assert client.get(f"{APIEndpoints.DEBUG_TRACES}/{trace.trace_id}", headers=headers).status_code == 200
+    assert client.get(f"{APIEndpoints.DEBUG_TRACES}/unknown", headers=headers).status_code == 404
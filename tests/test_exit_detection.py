@@ -0,0 +1,22 @@
+"""Local exit detection decides only clear cases."""
+import pytest
+
+from ai_agent import detect_exit_locally
+
+
+@pytest.mark.parametrize("message", ["bye", "logout please", "ok exit", "thanks, goodbye"])
+def test_exit_commands_exit(message):
+    assert detect_exit_locally(message)[0] is True
+
+
+@pytest.mark.parametrize("message", [
+    "what is my balance", "show my last 5 transactions", "how much did I spend on food in june",
+    "transfer 5000 PKR to Ahmed Abrar", "mera balance kitna hai"
+])
+def test_banking_queries_are_not_exits(message):
+    assert detect_exit_locally(message) == (False, "banking_query")
+
+
+@pytest.mark.parametrize("message", ["bas shukriya, that's all", "shukriya, chalta hoon", "ok thanks"])
+def test_other_phrasings_are_left_undecided(message):
+    assert detect_exit_locally(message)[0] is None
@@ -0,0 +1,19 @@
+"""The scripted conversation flows stay within the LLM budgets recorded in llm_budgets.json."""
+import asyncio
+
+import httpx
+
+import ai_agent
+import llm_budget_gate
+import webhook
+
+
+def test_flows_stay_within_llm_budgets(monkeypatch):
+    # install_fakes() patches these globals; let monkeypatch put them back afterwards
+    for target, name in [(ai_agent, "llm"), (webhook, "llm"), (webhook.ai_agent, "llm"),
+                         (webhook.ai_agent, "collection"), (httpx, "AsyncClient")]:
+        monkeypatch.setattr(target, name, getattr(target, name))
+
+    measured = asyncio.run(llm_budget_gate.run_all())
+    budgets = llm_budget_gate.load_budgets(llm_budget_gate.BUDGETS_PATH)
+    assert llm_budget_gate.check_budgets(measured, budgets) == []
@@ -0,0 +1,51 @@
+"""Back-translation of replies in process_multilingual_message."""
+import asyncio
+import json
+
+import pytest
+
+import translation_service as translation_service_module
+import webhook
+from constants import Languages
+from state import authenticated_users
+from translation_batcher import TranslationBatcher
+from translation_memory import TranslationMemory
+from translation_service import InboundMessage, translation_service
+
+SENDER = "test-multilingual-user"
+
+
+@pytest.fixture
+def roman_urdu_turn(monkeypatch, tmp_path):
+    """A Roman Urdu turn of an authenticated user with the LLM calls replaced."""
+    memory_path = tmp_path / "translation_memory.jsonl"
+
+    async def translate_segments(segments, source, target):
+        return [f"<{target}> {segment}" for segment in segments]
+
+    async def normalize_inbound(text, *args, **kwargs):
+        return InboundMessage(Languages.URDU_ROMAN, "what is my balance", 0.95, "local")
+
+    async def process_user_message(sender_id, message):
+        return "Hello Ali! Your current balance is PKR 245,600."
+
+    monkeypatch.setattr(translation_service, "use_llm", True)
+    monkeypatch.setattr(translation_service, "batcher", TranslationBatcher(translate_segments))
+    monkeypatch.setattr(translation_service, "anormalize_inbound", normalize_inbound)
+    monkeypatch.setattr(translation_service_module, "translation_memory", TranslationMemory(str(memory_path)))
+    monkeypatch.setattr(webhook, "process_user_message", process_user_message)
+    monkeypatch.setitem(authenticated_users, SENDER, {"name": "Ali Khan"})
+    return memory_path
+
+
+def test_user_names_is_a_plain_function():
+    assert webhook.user_names("nobody") == []
+    assert hasattr(webhook.process_multilingual_message, "__wrapped__")  # Keeps its trace and turn deadline
+
+
+def test_roman_urdu_reply_is_translated(roman_urdu_turn):
+    reply = asyncio.run(webhook.process_multilingual_message(SENDER, "mera balance kya hai"))
+
+    assert reply == "<ur-roman> Hello Ali! <ur-roman> Your current balance is PKR 245,600."
+    segments = [json.loads(line)["segment"] for line in roman_urdu_turn.read_text(encoding="utf-8").splitlines()]
+    assert segments == ["Hello [[1]]!", "Your current balance is [[1]]."]
@@ -0,0 +1,14 @@
+"""Data profiles behind the rule-based response-format selector."""
+from response_format_selector import profile_data
+
+
+def test_missing_anywhere_in_the_data_marks_an_error():
+    assert profile_data({"missing": "transfer_details"})["has_error"]
+    assert profile_data({"status": "success", "missing_info": ["amount"]})["has_error"]
+    assert profile_data({"context": "Transfer request incomplete, missing: recipient"})["has_error"]
+    assert profile_data({"error": "Account not found"})["has_error"]
+
+
+def test_complete_results_are_not_errors():
+    assert not profile_data({"status": "success", "data": [{"current_balance": 245600.0}]})["has_error"]
+    assert not profile_data({"status": "fail"})["has_error"]  # Only an error key or "missing" counts
@@ -0,0 +1,39 @@
+"""What the translation memory keeps on disk."""
+import json
+
+from translation_memory import TranslationMemory
+
+
+def translate_segments(segments):
+    return [f"<ur> {segment}" for segment in segments]
+
+
+def stored_segments(path):
+    return [json.loads(line)["segment"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_names_never_reach_the_file(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    memory = TranslationMemory(str(path))
+
+    translated = memory.translate(
+        "Hello Ali! Your transfer of PKR 5,000 to Ahmed has been completed. Your biggest expense was PKR 900 at Amazon.",
+        "en", "ur", translate_segments, names=["Ali", "Khan"]
+    )
+
+    assert translated == ("<ur> Hello Ali! <ur> Your transfer of PKR 5,000 to Ahmed has been completed. "
+                          "<ur> Your biggest expense was PKR 900 at Amazon.")
+    assert stored_segments(path) == ["Hello [[1]]!"]
+    assert memory.get_stats()["not_stored_names"] == 2
+
+
+def test_file_is_compacted_to_the_newest_entries(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    memory = TranslationMemory(str(path), max_entries=4)
+    for letter in "abcdefghij":
+        memory.translate(f"Segment {letter} is here.", "en", "ur", translate_segments)
+
+    assert len(stored_segments(path)) <= 6
+    reloaded = TranslationMemory(str(path), max_entries=4)
+    assert reloaded.lookup("Segment j is here.", "en", "ur") == "<ur> Segment j is here."
+    assert reloaded.lookup("Segment a is here.", "en", "ur") is None
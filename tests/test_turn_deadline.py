@@ -0,0 +1,54 @@
+"""Mandatory stages give way to the catalog fallback when the turn runs out of budget."""
+import asyncio
+
+import pytest
+
+import ai_agent
+from ai_agent import BankingAIAgent
+from constants import DeadlineConfig, LLMConfig
+from message_catalog import message_catalog
+from turn_deadline import budget_exhausted, deadline_stats, stage_timeout, turn_deadline
+
+
+class FailingLLM:
+    """Fails the test if a stage still calls the LLM."""
+
+    def invoke(self, *args, **kwargs):
+        pytest.fail("LLM called after the turn budget ran out")
+
+    async def ainvoke(self, *args, **kwargs):
+        pytest.fail("LLM called after the turn budget ran out")
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(ai_agent, "llm", FailingLLM())
+    return BankingAIAgent()
+
+
+def test_stage_timeout_keeps_the_response_reserve():
+    assert stage_timeout(LLMConfig.TIMEOUT_SECONDS) == LLMConfig.TIMEOUT_SECONDS
+    with turn_deadline(budget_seconds=10.0):
+        timeout = stage_timeout(LLMConfig.TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+        assert timeout <= 10.0 - DeadlineConfig.RESPONSE_RESERVE_SECONDS
+
+
+def test_budget_exhausted_only_inside_a_short_turn():
+    assert not budget_exhausted("filters", DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+    before = deadline_stats.exhausted["filters"]
+    with turn_deadline(budget_seconds=DeadlineConfig.RESPONSE_RESERVE_SECONDS):
+        assert budget_exhausted("filters", DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+    assert deadline_stats.exhausted["filters"] == before + 1
+
+
+def test_generation_returns_the_catalog_fallback(agent):
+    with turn_deadline(budget_seconds=0.0):
+        reply = asyncio.run(agent.generate_natural_response("balance inquiry", {"balance": 1000}, "my balance", "Ali"))
+    assert reply == message_catalog.message("turn_budget_exhausted", first_name="Ali")
+
+
+def test_pipeline_falls_back_to_rules(agent):
+    filters = ai_agent.FilterExtraction()
+    with turn_deadline(budget_seconds=0.0):
+        pipeline = agent.generate_pipeline_from_filters(filters, "balance_inquiry", "1234")
+    assert pipeline == agent._generate_fallback_pipeline(filters, "balance_inquiry", "1234")
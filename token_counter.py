@@ -0,0 +1,49 @@
+"""
+Token counting for prompt budgets.
+Uses tiktoken when it is installed, otherwise a four-characters-per-token estimate.
+"""
+import logging
+import math
+
+from constants import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    try:
+        _encoding = tiktoken.encoding_for_model(LLMConfig.MODEL_NAME)
+    except KeyError:
+        _encoding = tiktoken.get_encoding("o200k_base")
+except Exception as e:  # ImportError, or the BPE file could not be fetched
+    _encoding = None
+    logger.info(f"tiktoken unavailable, estimating tokens from characters: {e}")
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens the model will see for text."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, math.ceil(len(text) / 4))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """First max_tokens tokens of text."""
+    if not text or max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def truncate_to_last_tokens(text: str, max_tokens: int) -> str:
+    """Last max_tokens tokens of text."""
+    if not text or max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[-max_tokens:])
+    return text[-max_tokens * 4:]
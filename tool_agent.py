@@ -0,0 +1,305 @@
+"""
+Tool-calling agent mode for Banking AI Assistant.
+Instead of intent -> pipeline -> /execute_pipeline -> response, the model calls typed
+in-process tools for exactly the data it needs and phrases the answer itself. Tool calls
+requested together in one turn run concurrently.
+"""
+import asyncio
+import calendar
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from langchain_core.messages import AIMessage, ToolMessage
+from pydantic import BaseModel, Field, ValidationError
+
+from constants import (
+    Currencies, DatabaseFields, DeadlineConfig, Limits, Months, ToolAgentConfig, TransactionTypes
+)
+from currency_service import currency_converter
+from prompts import tool_agent_prompt
+from turn_trace import trace_stage
+from turn_deadline import allow_optional_stage, stage_timeout
+
+logger = logging.getLogger(__name__)
+
+
+# === TOOL ARGUMENTS ===
+class GetBalanceArgs(BaseModel):
+    as_of_date: Optional[str] = Field(None, description="YYYY-MM-DD; omit for the current balance")
+
+class ListTransactionsArgs(BaseModel):
+    description: Optional[str] = Field(None, description="Merchant or description, e.g. Netflix, Careem")
+    category: Optional[str] = Field(None, description="Food, Travel, Telecom, Shopping, Finance, Utilities, Income, Entertainment")
+    transaction_type: Optional[str] = Field(None, description="debit or credit")
+    month: Optional[str] = Field(None, description="Lowercase English month name")
+    year: Optional[int] = None
+    start_date: Optional[str] = Field(None, description="YYYY-MM-DD, inclusive")
+    end_date: Optional[str] = Field(None, description="YYYY-MM-DD, inclusive")
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    limit: int = Field(Limits.DEFAULT_TRANSACTION_LIMIT, description="Most recent transactions to return")
+
+class SpendingByCategoryArgs(BaseModel):
+    month: Optional[str] = Field(None, description="Lowercase English month name")
+    year: Optional[int] = None
+    start_date: Optional[str] = Field(None, description="YYYY-MM-DD, inclusive")
+    end_date: Optional[str] = Field(None, description="YYYY-MM-DD, inclusive")
+    transaction_type: str = Field(TransactionTypes.DEBIT, description="debit for spending, credit for income")
+
+class ConvertCurrencyArgs(BaseModel):
+    amount: float
+    from_currency: str = Field(..., description="ISO code, e.g. PKR")
+    to_currency: str = Field(..., description="ISO code, e.g. USD")
+
+class RequestTransferArgs(BaseModel):
+    amount: Optional[float] = None
+    currency: Optional[str] = None
+    recipient: Optional[str] = None
+
+
+# === TOOLS ===
+def _parse_date(value: str, end_of_day: bool = False) -> datetime:
+    parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+    return parsed + timedelta(days=1) - timedelta(microseconds=1) if end_of_day else parsed
+
+def _date_match(month: Optional[str], year: Optional[int],
+                start_date: Optional[str], end_date: Optional[str]) -> Optional[Dict[str, datetime]]:
+    """Mongo date condition for a month/year or an explicit range; None when unbounded."""
+    if start_date or end_date:
+        condition = {}
+        if start_date:
+            condition["$gte"] = _parse_date(start_date)
+        if end_date:
+            condition["$lte"] = _parse_date(end_date, end_of_day=True)
+        return condition
+    if month:
+        month_number = Months.NAMES_TO_NUMBERS.get(month.lower())
+        if month_number is None:
+            raise ValueError(f"Unknown month: {month}")
+        year = year or datetime.now().year
+        last_day = calendar.monthrange(year, month_number)[1]
+        return {"$gte": datetime(year, month_number, 1), "$lte": datetime(year, month_number, last_day, 23, 59, 59, 999999)}
+    if year:
+        return {"$gte": datetime(year, 1, 1), "$lte": datetime(year, 12, 31, 23, 59, 59, 999999)}
+    return None
+
+def _iso(value: Any) -> Any:
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else value
+
+
+class TransferRequested(Exception):
+    """Raised by request_transfer so the agent hands the turn to the OTP transfer flow."""
+
+
+class BankingTools:
+    """Typed data tools bound to one account; Mongo reads run in worker threads."""
+
+    def __init__(self, collection: Any, account_number: str):
+        self.collection = collection
+        self.account_number = account_number
+
+    async def get_balance(self, args: GetBalanceArgs) -> Dict[str, Any]:
+        query: Dict[str, Any] = {DatabaseFields.ACCOUNT_NUMBER: self.account_number}
+        if args.as_of_date:
+            query[DatabaseFields.DATE] = {"$lte": _parse_date(args.as_of_date, end_of_day=True)}
+        latest = await asyncio.to_thread(
+            self.collection.find_one, query,
+            {DatabaseFields.ACCOUNT_BALANCE: 1, DatabaseFields.DATE: 1, DatabaseFields.ACCOUNT_CURRENCY: 1},
+            sort=[(DatabaseFields.DATE, -1), ("_id", -1)]
+        )
+        if not latest:
+            return {"found": False}
+        return {
+            "found": True,
+            "balance": latest.get(DatabaseFields.ACCOUNT_BALANCE, 0),
+            "currency": latest.get(DatabaseFields.ACCOUNT_CURRENCY, Currencies.PKR_LOWER).upper(),
+            "as_of": _iso(latest.get(DatabaseFields.DATE))
+        }
+
+    async def list_transactions(self, args: ListTransactionsArgs) -> Dict[str, Any]:
+        match: Dict[str, Any] = {DatabaseFields.ACCOUNT_NUMBER: self.account_number}
+        date_condition = _date_match(args.month, args.year, args.start_date, args.end_date)
+        if date_condition:
+            match[DatabaseFields.DATE] = date_condition
+        if args.description:
+            match[DatabaseFields.DESCRIPTION] = {"$regex": re.escape(args.description), "$options": "i"}
+        if args.category:
+            match[DatabaseFields.CATEGORY] = {"$regex": f"^{re.escape(args.category)}$", "$options": "i"}
+        if args.transaction_type:
+            match[DatabaseFields.TYPE] = args.transaction_type.lower()
+        if args.min_amount is not None or args.max_amount is not None:
+            amount = {}
+            if args.min_amount is not None:
+                amount["$gte"] = args.min_amount
+            if args.max_amount is not None:
+                amount["$lte"] = args.max_amount
+            match[DatabaseFields.TRANSACTION_AMOUNT] = amount
+
+        limit = max(1, min(args.limit, Limits.MAX_TRANSACTION_LIMIT))
+        pipeline = [
+            {"$match": match},
+            {"$sort": {DatabaseFields.DATE: -1, "_id": -1}},
+            {"$facet": {
+                "rows": [{"$limit": limit}],
+                "totals": [{"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "total_amount": {"$sum": f"${DatabaseFields.AMOUNT_DEDUCTED_FROM_ACCOUNT}"}
+                }}]
+            }}
+        ]
+        result = (await asyncio.to_thread(lambda: list(self.collection.aggregate(pipeline))))[0]
+        totals = result["totals"][0] if result["totals"] else {"count": 0, "total_amount": 0}
+        return {
+            "matching_count": totals["count"],
+            "total_amount": round(totals["total_amount"], 2),
+            "transactions": [{
+                "date": _iso(row.get(DatabaseFields.DATE)),
+                "description": row.get(DatabaseFields.DESCRIPTION),
+                "category": row.get(DatabaseFields.CATEGORY),
+                "type": row.get(DatabaseFields.TYPE),
+                "amount": row.get(DatabaseFields.TRANSACTION_AMOUNT),
+                "currency": (row.get(DatabaseFields.TRANSACTION_CURRENCY) or "").upper(),
+                "amount_deducted_from_account": row.get(DatabaseFields.AMOUNT_DEDUCTED_FROM_ACCOUNT),
+                "balance_after": row.get(DatabaseFields.ACCOUNT_BALANCE)
+            } for row in result["rows"]]
+        }
+
+    async def spending_by_category(self, args: SpendingByCategoryArgs) -> Dict[str, Any]:
+        match: Dict[str, Any] = {
+            DatabaseFields.ACCOUNT_NUMBER: self.account_number,
+            DatabaseFields.TYPE: args.transaction_type.lower()
+        }
+        date_condition = _date_match(args.month, args.year, args.start_date, args.end_date)
+        if date_condition:
+            match[DatabaseFields.DATE] = date_condition
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": f"${DatabaseFields.CATEGORY}",
+                "total": {"$sum": f"${DatabaseFields.AMOUNT_DEDUCTED_FROM_ACCOUNT}"},
+                "count": {"$sum": 1},
+                "currency": {"$first": f"${DatabaseFields.ACCOUNT_CURRENCY}"}
+            }},
+            {"$sort": {"total": -1}}
+        ]
+        rows = await asyncio.to_thread(lambda: list(self.collection.aggregate(pipeline)))
+        return {
+            "currency": (rows[0].get("currency") or "").upper() if rows else None,
+            "total": round(sum(row["total"] for row in rows), 2),
+            "categories": [
+                {"category": row["_id"], "total": round(row["total"], 2), "count": row["count"]} for row in rows
+            ]
+        }
+
+    async def convert_currency(self, args: ConvertCurrencyArgs) -> Dict[str, Any]:
+        result = await currency_converter.convert_currency(args.amount, args.from_currency, args.to_currency)
+        return result or {"conversion_successful": False}
+
+    async def request_transfer(self, args: RequestTransferArgs) -> Dict[str, Any]:
+        raise TransferRequested()
+
+
+TOOL_SPECS: Dict[str, Tuple[Type[BaseModel], str]] = {
+    "get_balance": (GetBalanceArgs, "Current account balance, or the balance at the end of a given date."),
+    "list_transactions": (ListTransactionsArgs, "Most recent transactions matching the filters, with the matching count and total."),
+    "spending_by_category": (SpendingByCategoryArgs, "Totals per category for a month or date range, largest first."),
+    "convert_currency": (ConvertCurrencyArgs, "Convert an amount between two currencies at the live exchange rate."),
+    "request_transfer": (RequestTransferArgs, "The customer wants to send money; hands over to the secure transfer flow."),
+}
+
+def tool_schemas() -> List[Dict[str, Any]]:
+    """OpenAI function-tool definitions for the enabled tools."""
+    schemas = []
+    for name in ToolAgentConfig.TOOLS:
+        args_model, description = TOOL_SPECS[name]
+        parameters = args_model.model_json_schema()
+        parameters.pop("title", None)
+        schemas.append({"type": "function", "function": {"name": name, "description": description, "parameters": parameters}})
+    return schemas
+
+
+# === AGENT LOOP ===
+class ToolAgentResult:
+    """Final answer of a tool-calling turn, or a hand-off to the transfer flow."""
+
+    def __init__(self, response: str = "", transfer_requested: bool = False, rounds: int = 0, tool_calls: int = 0):
+        self.response = response
+        self.transfer_requested = transfer_requested
+        self.rounds = rounds
+        self.tool_calls = tool_calls
+
+
+class ToolCallingAgent:
+    """Runs the model with tools until it answers, at most ToolAgentConfig.MAX_ROUNDS tool round-trips."""
+
+    def __init__(self, llm: Any, collection: Any):
+        self.llm = llm
+        self.collection = collection
+
+    async def _run_tool(self, tools: BankingTools, call: Dict[str, Any]) -> Dict[str, Any]:
+        name = call.get("name")
+        if name not in TOOL_SPECS or name not in ToolAgentConfig.TOOLS:
+            return {"error": f"Unknown tool: {name}"}
+        args_model, _ = TOOL_SPECS[name]
+        try:
+            args = args_model.model_validate(call.get("args") or {})
+        except ValidationError as e:
+            return {"error": f"Invalid arguments: {e.errors()}"}
+
+        with trace_stage("tool", tool=name):
+            started = time.perf_counter()
+            try:
+                timeout = stage_timeout(ToolAgentConfig.TOOL_TIMEOUT_SECONDS, DeadlineConfig.RESPONSE_RESERVE_SECONDS)
+                result = await asyncio.wait_for(getattr(tools, name)(args), timeout)
+            except TransferRequested:
+                raise
+            except asyncio.TimeoutError:
+                result = {"error": f"{name} timed out"}
+            except Exception as e:
+                logger.error({"action": "tool_call_failed", "tool": name, "error": str(e)})
+                result = {"error": str(e)}
+            logger.info({"action": "tool_call", "tool": name, "args": args.model_dump(exclude_none=True),
+                         "duration_ms": round((time.perf_counter() - started) * 1000, 1)})
+            return result
+
+    async def run(self, user_message: str, account_number: str, first_name: str,
+                  conversation_history: str = "") -> ToolAgentResult:
+        tools = BankingTools(self.collection, account_number)
+        schemas = tool_schemas()
+        messages: List[Any] = tool_agent_prompt.messages(
+            first_name=first_name,
+            current_date=datetime.now().strftime("%Y-%m-%d"),
+            conversation_history=conversation_history or "No previous conversation.",
+            user_message=user_message
+        )
+
+        total_calls = 0
+        for round_number in range(ToolAgentConfig.MAX_ROUNDS + 1):
+            # The last round, or a turn running out of time, forbids further calls so the model has to answer
+            more_rounds = round_number < ToolAgentConfig.MAX_ROUNDS and (
+                round_number == 0 or allow_optional_stage("tool_round")
+            )
+            tool_choice = "auto" if more_rounds else "none"
+            response = await self.llm.ainvoke(messages, tools=schemas, tool_choice=tool_choice)
+            calls = getattr(response, "tool_calls", None) or []
+            if not calls:
+                logger.info({"action": "tool_agent_turn", "rounds": round_number, "tool_calls": total_calls})
+                return ToolAgentResult(response.content.strip(), rounds=round_number, tool_calls=total_calls)
+
+            total_calls += len(calls)
+            messages.append(AIMessage(content=response.content or "", tool_calls=calls))
+            try:
+                results = await asyncio.gather(*(self._run_tool(tools, call) for call in calls))
+            except TransferRequested:
+                logger.info({"action": "tool_agent_transfer_handoff", "rounds": round_number + 1})
+                return ToolAgentResult(transfer_requested=True, rounds=round_number + 1, tool_calls=total_calls)
+
+            for call, result in zip(calls, results):
+                messages.append(ToolMessage(content=json.dumps(result, default=str), tool_call_id=call.get("id", "")))
+
+        return ToolAgentResult("", rounds=ToolAgentConfig.MAX_ROUNDS, tool_calls=total_calls)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+train_classifiers.py
+
+Trains and evaluates the distilled local classifiers from harvested LLM decisions.
+
+Usage:
+    LLM_DECISION_LOG=llm_decisions.jsonl  (set while the assistant runs with the LLM deciding)
+    python train_classifiers.py train llm_decisions.jsonl [--tasks exit cancel] [--model-dir classifier_models]
+    python train_classifiers.py evaluate llm_decisions.jsonl [--model-dir classifier_models]
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from constants import ClassifierConfig
+from local_classifiers import CharNgramClassifier, load_decisions, model_path
+
+
+def split_examples(examples: List[Tuple[str, str]], test_percent: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Stable hash-based split so retraining never leaks test texts into training."""
+    train, test = [], []
+    for text, label in examples:
+        bucket = int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % 100
+        (test if bucket < test_percent else train).append((text, label))
+    return train, test
+
+
+def evaluate_model(model: CharNgramClassifier, examples: List[Tuple[str, str]], threshold: float) -> Dict:
+    """Accuracy overall and above the confidence threshold, plus per-label precision/recall."""
+    confusion = Counter()
+    confident = confident_correct = 0
+    started = time.perf_counter()
+    for text, label in examples:
+        predicted, confidence = model.predict(text)
+        confusion[(label, predicted)] += 1
+        if confidence >= threshold:
+            confident += 1
+            confident_correct += predicted == label
+    elapsed = time.perf_counter() - started
+
+    total = len(examples)
+    per_label = {}
+    for label in model.labels:
+        true_positive = confusion[(label, label)]
+        predicted_count = sum(count for (_, predicted), count in confusion.items() if predicted == label)
+        actual_count = sum(count for (actual, _), count in confusion.items() if actual == label)
+        per_label[label] = {
+            "precision": true_positive / predicted_count if predicted_count else 0.0,
+            "recall": true_positive / actual_count if actual_count else 0.0,
+            "support": actual_count
+        }
+
+    return {
+        "examples": total,
+        "accuracy": sum(count for (actual, predicted), count in confusion.items() if actual == predicted) / total if total else 0.0,
+        "coverage": confident / total if total else 0.0,
+        "confident_accuracy": confident_correct / confident if confident else 0.0,
+        "per_label": per_label,
+        "us_per_prediction": elapsed / total * 1e6 if total else 0.0
+    }
+
+
+def print_evaluation(task: str, report: Dict, threshold: float) -> None:
+    print(f"[{task}] {report['examples']} test examples, threshold {threshold}")
+    print(f"  accuracy            {report['accuracy']:.3f}")
+    print(f"  local coverage      {report['coverage']:.3f}  (share answered without the LLM)")
+    print(f"  accuracy when local {report['confident_accuracy']:.3f}")
+    print(f"  latency             {report['us_per_prediction']:.1f} us/prediction")
+    for label, stats in report["per_label"].items():
+        print(f"  {label:<22} precision {stats['precision']:.3f}  recall {stats['recall']:.3f}  n={stats['support']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Train/evaluate local classifiers distilled from LLM decisions")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("logs", nargs="+", help="JSONL files written via LLM_DECISION_LOG")
+    parser.add_argument("--tasks", nargs="+", default=ClassifierConfig.TASKS, choices=ClassifierConfig.TASKS)
+    parser.add_argument("--model-dir", default=ClassifierConfig.MODEL_DIR)
+    parser.add_argument("--test-percent", type=int, default=20)
+    parser.add_argument("--min-examples", type=int, default=50)
+    args = parser.parse_args()
+
+    decisions = load_decisions(args.logs)
+    exit_code = 0
+
+    for task in args.tasks:
+        examples = decisions.get(task, [])
+        threshold = ClassifierConfig.THRESHOLDS.get(task, ClassifierConfig.DEFAULT_THRESHOLD)
+        train, test = split_examples(examples, args.test_percent)
+
+        if args.command == "train":
+            labels = Counter(label for _, label in train)
+            if len(train) < args.min_examples or len(labels) < 2:
+                print(f"[{task}] skipped: {len(train)} training examples, labels {dict(labels)}")
+                continue
+            started = time.perf_counter()
+            model = CharNgramClassifier().fit([text for text, _ in train], [label for _, label in train])
+            print(f"[{task}] trained on {len(train)} examples in {time.perf_counter() - started:.1f}s "
+                  f"({len(model.weights)} n-grams)")
+            model.save(model_path(task, args.model_dir))
+        else:
+            try:
+                model = CharNgramClassifier.load(model_path(task, args.model_dir))
+            except OSError:
+                print(f"[{task}] no model in {args.model_dir}")
+                exit_code = 1
+                continue
+
+        if test:
+            print_evaluation(task, evaluate_model(model, test, threshold), threshold)
+        print()
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
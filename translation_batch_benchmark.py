@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+translation_batch_benchmark.py
+
+Throughput of back-translation with and without micro-batching. Simulated users finish
+their turns at random (Poisson) times and each asks for its response's untranslated
+segments; the unbatched path sends one call per request, the batched path goes through
+TranslationBatcher with each --wait setting. Reports requests/sec, LLM calls and request
+latency, and exits non-zero if any caller gets back segments that are not its own.
+
+By default the provider is simulated in-process (fixed call latency plus a per-segment
+cost, with TranslationConfig.MAX_CONCURRENT_REQUESTS calls in flight); with --live the
+calls go through the translation service to OPENAI_BASE_URL, e.g. fake_openai_server.py.
+
+Usage:
+    python translation_batch_benchmark.py [--requests 300] [--arrival-ms 2] [--waits 2,5,10]
+    python fake_openai_server.py --port 8900 --latency lognormal:5.5,0.4 &
+    OPENAI_BASE_URL=http://localhost:8900/v1 OPENAI_API_KEY=fake python translation_batch_benchmark.py --live
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from constants import Languages, TranslationBatchConfig, TranslationConfig
+from translation_batcher import TranslateBatch, TranslationBatcher
+
+# Masked response sentences as the translation memory sends them
+SEGMENTS = [
+    "Your current balance is [[1]].",
+    "Your available balance in your USD account is [[1]].",
+    "Here are your last [[1]] transactions:",
+    "You spent [[1]] on Food in [[2]].",
+    "Your biggest expense this month was [[1]] at Amazon.",
+    "You have made [[1]] transactions since [[2]].",
+    "Your transfer of [[1]] to Ali has been completed.",
+    "Please enter the OTP sent to your registered number.",
+    "Your account ending in [[1]] has been selected.",
+    "Is there anything else I can help you with?",
+    "You can ask me about your balance, transactions or spending.",
+    "Your spending on Uber went down by [[1]] compared to last month.",
+    "Your salary of [[1]] was credited on [[2]].",
+    "Please confirm the transfer by replying yes or no.",
+    "The transfer was cancelled and no money was sent.",
+    "Your largest deposit in [[1]] was [[2]].",
+    "Shopping accounts for [[1]] of your spending this month.",
+    "You have no transactions in this period.",
+    "Let me know if you want a breakdown by category.",
+    "Your remaining monthly budget is [[1]].",
+]
+
+
+class SimulatedProvider:
+    """Segment translation with a call latency, a per-segment cost and a concurrency cap."""
+
+    def __init__(self, latency_ms: float, per_segment_ms: float, concurrency: int):
+        self.latency_ms = latency_ms
+        self.per_segment_ms = per_segment_ms
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.calls = 0
+
+    async def translate(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        async with self.semaphore:
+            self.calls += 1
+            await asyncio.sleep((self.latency_ms + self.per_segment_ms * len(segments)) / 1000)
+        return [f"<{target}> {segment}" for segment in segments]
+
+
+class LiveProvider:
+    """Segment translation through the translation service's batched LLM call."""
+
+    def __init__(self):
+        from translation_service import translation_service  # Needs OPENAI_API_KEY
+        self.service = translation_service
+        self.calls = 0
+
+    async def translate(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        self.calls += 1
+        return await self.service.atranslate_segments_with_llm(segments, source, target)
+
+
+def workload(requests: int, arrival_ms: float, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    arrivals, at = [], 0.0
+    for _ in range(requests):
+        at += rng.expovariate(1 / arrival_ms) / 1000 if arrival_ms > 0 else 0.0
+        target = rng.choice([Languages.URDU_ROMAN, Languages.URDU_ARABIC])
+        arrivals.append({"at": at, "target": target, "segments": rng.sample(SEGMENTS, rng.randint(1, 4))})
+    return arrivals
+
+
+async def run(arrivals: List[Dict], translate: TranslateBatch, check: bool) -> Dict:
+    latencies: List[float] = []
+    wrong: List[str] = []
+    started = time.perf_counter()
+
+    async def request(item: Dict) -> None:
+        await asyncio.sleep(max(0.0, started + item["at"] - time.perf_counter()))
+        sent = time.perf_counter()
+        translated = await translate(item["segments"], Languages.ENGLISH, item["target"])
+        latencies.append((time.perf_counter() - sent) * 1000)
+        expected = [f"<{item['target']}> {segment}" for segment in item["segments"]]
+        if translated is None or len(translated) != len(item["segments"]) or (check and translated != expected):
+            wrong.append(f"{item['segments']} -> {translated}")
+
+    await asyncio.gather(*(request(item) for item in arrivals))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(arrivals) / elapsed,
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "wrong": wrong
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Back-translation throughput with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--arrival-ms", type=float, default=2.0, help="mean gap between requests (Poisson)")
+    parser.add_argument("--waits", default=f"2,{TranslationBatchConfig.MAX_WAIT_MS:g},10", help="batch waits in ms")
+    parser.add_argument("--max-batch", type=int, default=TranslationBatchConfig.MAX_BATCH_SEGMENTS)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="simulated call latency")
+    parser.add_argument("--per-segment-ms", type=float, default=15.0, help="simulated cost per segment")
+    parser.add_argument("--concurrency", type=int, default=TranslationConfig.MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--live", action="store_true", help="call the LLM endpoint instead of simulating it")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    def provider():
+        if args.live:
+            return LiveProvider()
+        return SimulatedProvider(args.latency_ms, args.per_segment_ms, args.concurrency)
+
+    arrivals = workload(args.requests, args.arrival_ms, args.seed)
+    offered = args.requests / arrivals[-1]["at"] if arrivals[-1]["at"] else float("inf")
+    print(f"{args.requests} requests, offered {offered:.0f} req/s, "
+          f"{'live endpoint' if args.live else f'simulated {args.latency_ms:g} ms + {args.per_segment_ms:g} ms/segment'}")
+    print(f"{'path':<26}{'req/s':>9}{'LLM calls':>11}{'mean ms':>10}{'p95 ms':>10}")
+
+    waits = [float(wait) for wait in args.waits.split(",")]
+    rows = [("unbatched", None)] + [(f"batched wait={wait:g}ms max={args.max_batch}", wait) for wait in waits]
+
+    async def benchmark() -> bool:
+        failed = False
+        for name, wait in rows:  # One event loop for every row: the live client's pool is bound to it
+            backend = provider()
+            translate = backend.translate if wait is None else TranslationBatcher(backend.translate, args.max_batch, wait).translate
+            result = await run(arrivals, translate, check=not args.live)
+            print(f"{name:<26}{result['rps']:>9.1f}{backend.calls:>11}{result['mean_ms']:>10.0f}{result['p95_ms']:>10.0f}")
+            if result["wrong"]:
+                failed = True
+                print(f"    FAIL: {len(result['wrong'])} callers got wrong translations, e.g. {result['wrong'][0]}")
+        return failed
+
+    return 1 if asyncio.run(benchmark()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Micro-batching for segment translations in Banking AI Assistant.
+When several turns finish at nearly the same time, their untranslated segments (from the
+translation memory) are held for up to TranslationBatchConfig.MAX_WAIT_MS and sent as one
+structured multi-segment call per language pair; each caller gets back its own slice.
+Identical segments of different callers are translated once. The batched call is recorded
+on the trace of the turn that sent it. Batching is off while the cassette records or
+replays, so cassette keys stay deterministic.
+"""
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from cassette import cassette
+from constants import TranslationBatchConfig
+
+logger = logging.getLogger(__name__)
+
+TranslateBatch = Callable[[List[str], str, str], Awaitable[Optional[List[str]]]]
+
+
+class _Batch:
+    """Distinct segments waiting for one call, and each caller's positions in them."""
+
+    def __init__(self):
+        self.segments: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.callers: List[Tuple[List[int], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def new_segments(self, segments: List[str]) -> int:
+        return len(set(segment for segment in segments if segment not in self.index))
+
+    def add(self, segments: List[str]) -> asyncio.Future:
+        positions = []
+        for segment in segments:
+            if segment not in self.index:
+                self.index[segment] = len(self.segments)
+                self.segments.append(segment)
+            positions.append(self.index[segment])
+        future = asyncio.get_running_loop().create_future()
+        self.callers.append((positions, future))
+        return future
+
+
+class TranslationBatcher:
+    """Coalesces concurrent translate_batch calls of the same language pair into one."""
+
+    def __init__(self, translate_batch: TranslateBatch,
+                 max_segments: int = TranslationBatchConfig.MAX_BATCH_SEGMENTS,
+                 max_wait_ms: float = TranslationBatchConfig.MAX_WAIT_MS):
+        self.translate_batch = translate_batch
+        self.max_segments = max_segments
+        self.max_wait_ms = max_wait_ms
+        self._pending: Dict[Tuple[str, str], _Batch] = {}
+        self._sending: Set[asyncio.Task] = set()
+        self.stats = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return TranslationBatchConfig.ENABLED and self.max_wait_ms > 0 and not cassette.enabled
+
+    async def translate(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        """Translations of segments, in order; None when the (batched) reply is unusable."""
+        self.stats["requests"] += 1
+        self.stats["segments"] += len(segments)
+        if not self.enabled:
+            self.stats["unbatched_calls"] += 1
+            return await self.translate_batch(segments, source, target)
+
+        key = (source, target)
+        batch = self._pending.get(key)
+        if batch is not None and len(batch.segments) + batch.new_segments(segments) > self.max_segments:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = self._pending[key] = _Batch()
+            batch.timer = asyncio.get_running_loop().call_later(self.max_wait_ms / 1000, self._flush, key)
+        future = batch.add(segments)
+        if len(batch.segments) >= self.max_segments:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(key, batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key: Tuple[str, str], batch: _Batch) -> None:
+        self.stats["batched_calls"] += 1
+        self.stats["batched_segments"] += len(batch.segments)
+        self.stats["max_callers_per_call"] = max(self.stats["max_callers_per_call"], len(batch.callers))
+        try:
+            translated = await self.translate_batch(batch.segments, *key)
+        except Exception as e:
+            logger.error(f"Batched translation of {len(batch.segments)} segments failed: {e}")
+            translated = None
+        if translated is not None and len(translated) != len(batch.segments):
+            logger.warning({"action": "translation_batch_mismatch", "segments": len(batch.segments),
+                            "translations": len(translated), "callers": len(batch.callers)})
+            translated = None
+        if translated is None:
+            self.stats["failed_calls"] += 1
+
+        for positions, future in batch.callers:
+            if not future.done():  # The caller's turn may have been cancelled meanwhile
+                future.set_result([translated[position] for position in positions] if translated else None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["batched_calls"] + self.stats["unbatched_calls"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "max_segments": self.max_segments,
+            "max_wait_ms": self.max_wait_ms,
+            "requests_per_call": round(self.stats["requests"] / calls, 2) if calls else 0.0,
+            "calls_saved": self.stats["requests"] - calls
+        }
@@ -0,0 +1,266 @@
+"""
+Translation memory for Banking AI Assistant responses.
+Responses are split into sentences and the variable parts (CNICs, dates, amounts, account
+numbers and other numbers) are masked with numbered placeholders, so "Your current balance
+is PKR 245,600" and "Your current balance is PKR 1,020" share one remembered translation.
+The user's name is masked the same way, so "Hello Ali!" is remembered as "Hello [[1]]!", and
+segments that still name someone (a recipient or merchant) are not remembered at all. Only segments not seen before are translated, in a single batched
+call, and the values are put back afterwards. Entries are appended to a JSONL file that is
+rewritten with only the live entries once it grows past COMPACT_RATIO times MAX_ENTRIES
+lines, and reloaded on startup.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+
+from constants import TranslationMemoryConfig
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_MASKABLE = re.compile(
+    r"\b\d{5}-\d{7}-\d\b"                                        # CNIC
+    r"|\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b"        # dates
+    r"|(?:PKR|USD|EUR|GBP|Rs\.?|\$|€|£)\s?\d+(?:,\d+)*(?:\.\d+)?"  # amounts with a leading currency
+    r"|\d+(?:,\d+)*(?:\.\d+)?(?:\s?(?:PKR|USD|EUR|GBP)\b|%)?",   # account numbers, counts, trailing currency
+    re.IGNORECASE
+)
+_PLACEHOLDER = re.compile(r"\[\[(\d+)\]\]")
+_SENTENCE_BREAK = re.compile(r"(\n+|(?<=[.!?۔])[ \t]+)")
+_LETTER = re.compile(r"[^\W\d_]")
+_CAPITALIZED = re.compile(r"(?<![\w\[])[A-Z][A-Za-z'’-]*")
+_COMMON_CAPITALIZED = set(TranslationMemoryConfig.COMMON_CAPITALIZED)
+
+Key = Tuple[str, str, str]
+
+
+@lru_cache(maxsize=1024)
+def _maskable(names: Tuple[str, ...]) -> Pattern:
+    """_MASKABLE plus the given names as whole, case-sensitive words."""
+    names = tuple(name for name in names if len(name) > 1)
+    if not names:
+        return _MASKABLE
+    alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf"(?-i:\b(?:{alternatives})\b)|{_MASKABLE.pattern}", re.IGNORECASE)
+
+
+def mask(segment: str, names: Optional[List[str]] = None) -> Tuple[str, List[str]]:
+    """Segment with its variable values (and names) replaced by [[1]], [[2]], ... and the values in order."""
+    values: List[str] = []
+
+    def placeholder(match: re.Match) -> str:
+        values.append(match.group(0))
+        return f"[[{len(values)}]]"
+
+    return _maskable(tuple(names or ())).sub(placeholder, segment), values
+
+
+def proper_nouns(segment: str) -> List[str]:
+    """Capitalized words of a masked segment that may be names: not common words, and not starting a
+    sentence or list item unless they label a value ("Uber: [[1]]")."""
+    found = []
+    for match in _CAPITALIZED.finditer(segment):
+        before = _PLACEHOLDER.sub("", segment[:match.start()]).rstrip()
+        starts = not _LETTER.search(before) or before[-1] in ".!?:;-•*(\"“'"
+        if starts and not segment[match.end():].lstrip().startswith(":"):
+            continue
+        if match.group(0) not in _COMMON_CAPITALIZED:
+            found.append(match.group(0))
+    return found
+
+
+def unmask(segment: str, values: List[str]) -> str:
+    """Put masked values back; placeholders the translation moved are filled by number."""
+    return _PLACEHOLDER.sub(lambda match: values[int(match.group(1)) - 1], segment)
+
+
+def placeholders_intact(masked: str, translated: str) -> bool:
+    """Whether a translation kept exactly the placeholders of its source segment."""
+    return sorted(_PLACEHOLDER.findall(masked)) == sorted(_PLACEHOLDER.findall(translated))
+
+
+class TranslationPlan:
+    """A text split into sentences and separators, with the masked sentences still to translate."""
+
+    def __init__(self, text: str, source: str, target: str):
+        self.text = text
+        self.source = source
+        self.target = target
+        self.pieces: List[str] = _SENTENCE_BREAK.split(text)
+        self.segments: Dict[int, Tuple[str, List[str]]] = {}
+        self.translations: Dict[str, str] = {}
+        self.misses: List[str] = []
+
+
+class TranslationMemory:
+    """Sentence-level translation cache keyed by (masked segment, source, target)."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = TranslationMemoryConfig.MAX_ENTRIES):
+        self.path = path or os.getenv(TranslationMemoryConfig.PATH_ENV, TranslationMemoryConfig.DEFAULT_PATH)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_lines = 0
+        self.stats = {"texts": 0, "segments": 0, "hits": 0, "misses": 0, "batch_calls": 0,
+                      "batch_failures": 0, "saved_tokens": 0, "compactions": 0, "not_stored_names": 0}
+        self._load()
+
+    @property
+    def _compact_after(self) -> int:
+        return int(self.max_entries * TranslationMemoryConfig.COMPACT_RATIO)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as memory_file:
+                for line in memory_file:
+                    self._file_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        self._remember((entry["segment"], entry["source"], entry["target"]), entry["translation"])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            logger.error(f"Could not read translation memory {self.path}: {e}")
+            return
+        logger.info({"action": "translation_memory_loaded", "path": self.path, "segments": len(self._entries),
+                     "lines": self._file_lines})
+        if self._file_lines > self._compact_after:
+            with self._lock:
+                self._compact()
+
+    @staticmethod
+    def _line(key: Key, translation: str) -> str:
+        return json.dumps(
+            {"segment": key[0], "source": key[1], "target": key[2], "translation": translation},
+            ensure_ascii=False
+        ) + "\n"
+
+    def _compact(self) -> None:
+        """Rewrite the file with only the live entries, least recently used first; caller holds the lock."""
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as memory_file:
+                memory_file.writelines(self._line(key, translation) for key, translation in self._entries.items())
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logger.error(f"Could not compact translation memory {self.path}: {e}")
+            return
+        logger.info({"action": "translation_memory_compacted", "path": self.path,
+                     "lines_before": self._file_lines, "lines_after": len(self._entries)})
+        self._file_lines = len(self._entries)
+        self.stats["compactions"] += 1
+
+    def _remember(self, key: Key, translation: str) -> None:
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key: Key, translation: str) -> None:
+        with self._lock:
+            self._remember(key, translation)
+            try:
+                with open(self.path, "a", encoding="utf-8") as memory_file:
+                    memory_file.write(self._line(key, translation))
+            except OSError as e:
+                logger.error(f"Could not write translation memory {self.path}: {e}")
+                return
+            self._file_lines += 1
+            if self._file_lines > self._compact_after:
+                self._compact()
+
+    def lookup(self, segment: str, source: str, target: str) -> Optional[str]:
+        with self._lock:
+            translation = self._entries.get((segment, source, target))
+            if translation is not None:
+                self._entries.move_to_end((segment, source, target))
+            return translation
+
+    def plan(self, text: str, source: str, target: str, names: Optional[List[str]] = None) -> TranslationPlan:
+        """Mask every sentence (and the user's names) and resolve what the memory already knows."""
+        plan = TranslationPlan(text, source, target)
+        self.stats["texts"] += 1
+        for index in range(0, len(plan.pieces), 2):
+            piece = plan.pieces[index]
+            masked, values = mask(piece.strip(), names)
+            if not _LETTER.search(masked):
+                continue  # Numbers, placeholders or punctuation only: nothing to translate
+            plan.segments[index] = (masked, values)
+            self.stats["segments"] += 1
+            if masked in plan.translations or masked in plan.misses:
+                continue
+
+            remembered = self.lookup(masked, source, target)
+            if remembered is not None:
+                plan.translations[masked] = remembered
+                self.stats["hits"] += 1
+                self.stats["saved_tokens"] += count_tokens(masked) + count_tokens(remembered)
+            else:
+                plan.misses.append(masked)
+                self.stats["misses"] += 1
+        return plan
+
+    def complete(self, plan: TranslationPlan, translated: Optional[List[str]]) -> Optional[str]:
+        """Assemble the translated text; None when the batch reply cannot be trusted."""
+        if plan.misses:
+            self.stats["batch_calls"] += 1
+            if not translated or len(translated) != len(plan.misses):
+                self.stats["batch_failures"] += 1
+                return None
+            for masked, translation in zip(plan.misses, translated):
+                translation = translation.strip()
+                if not translation or not placeholders_intact(masked, translation):
+                    self.stats["batch_failures"] += 1
+                    logger.warning({"action": "translation_memory_rejected", "segment": masked[:80]})
+                    return None
+                plan.translations[masked] = translation
+
+            for masked in plan.misses:
+                if len(masked) > TranslationMemoryConfig.MAX_SEGMENT_CHARS:
+                    continue
+                if proper_nouns(masked):
+                    self.stats["not_stored_names"] += 1
+                    continue
+                self._store((masked, plan.source, plan.target), plan.translations[masked])
+
+        pieces = list(plan.pieces)
+        for index, (masked, values) in plan.segments.items():
+            original = pieces[index]
+            leading = original[:len(original) - len(original.lstrip())]
+            trailing = original[len(original.rstrip()):]
+            pieces[index] = leading + unmask(plan.translations[masked], values) + trailing
+        return "".join(pieces)
+
+    def translate(self, text: str, source: str, target: str,
+                  translate_batch: Callable[[List[str]], Optional[List[str]]],
+                  names: Optional[List[str]] = None) -> Optional[str]:
+        """Translate text through the memory; translate_batch handles the misses in one call."""
+        plan = self.plan(text, source, target, names)
+        return self.complete(plan, translate_batch(plan.misses) if plan.misses else None)
+
+    async def atranslate(self, text: str, source: str, target: str,
+                         translate_batch: Callable[[List[str]], Awaitable[Optional[List[str]]]],
+                         names: Optional[List[str]] = None) -> Optional[str]:
+        """Async variant of translate."""
+        plan = self.plan(text, source, target, names)
+        return self.complete(plan, await translate_batch(plan.misses) if plan.misses else None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "remembered_segments": len(self._entries),
+            "file_lines": self._file_lines,
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance
+translation_memory = TranslationMemory()
@@ -1,29 +1,78 @@
 from langdetect import detect
 from googletrans import Translator, LANGUAGES
+import asyncio
 import logging
 from dotenv import load_dotenv
+import httpx
+import json
 import os
-import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
 
 # Import constants
 from constants import (
-    Languages, LLMConfig, RegexPatterns
+    Languages, LLMConfig, RegexPatterns, TranslationConfig, LanguageIdConfig, TranslationMemoryConfig, RomanUrduConfig,
+    LanguageProfileConfig
 )
+from turn_trace import traced_stage, record_llm_call
+from turn_deadline import stage_timeout
+from cassette import cassette
+from language_id import LanguageGuess, language_identifier
+from local_classifiers import log_llm_decision
+from roman_urdu import roman_urdu_grammar
+from number_normalizer import is_number_only, normalize_numbers, restore_numbers
+from structured_output import InboundNormalization, SegmentTranslations, parse_structured, response_format
+from translation_memory import translation_memory
+from translation_batcher import TranslationBatcher
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+
+def _repair_json(raw: str) -> Optional[Any]:
+    """First {...} object in a free-form reply."""
+    start, end = raw.find("{"), raw.rfind("}")
+    try:
+        return json.loads(raw[start:end + 1]) if start != -1 and end > start else None
+    except json.JSONDecodeError:
+        return None
+
+
+class InboundMessage(NamedTuple):
+    language: str
+    english_text: str
+    confidence: float
+    method: str  # local, context, profile, grammar, <context|profile>+grammar, <local|context|profile>+translate, combined, two_step, error
+
+
 class TranslationService:
     def __init__(self):
         self.translator = Translator()
-        
+        self.async_openai_client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.inbound_stats = Counter()
+        self.profile_stats = Counter()
+        self.batcher = TranslationBatcher(self.atranslate_segments_with_llm)
+
         # Initialize OpenAI client only if API key is available
         try:
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI
             api_key = os.getenv("OPENAI_API_KEY")
             if api_key:
-                self.openai_client = OpenAI(api_key=api_key)
+                self.openai_client = OpenAI(api_key=api_key, base_url=os.getenv(LLMConfig.BASE_URL_ENV))
+                # One pooled async client shared by every turn; keeps connections warm to the API
+                self.async_openai_client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=os.getenv(LLMConfig.BASE_URL_ENV),
+                    timeout=TranslationConfig.TIMEOUT_SECONDS,
+                    max_retries=TranslationConfig.MAX_RETRIES,
+                    http_client=httpx.AsyncClient(limits=httpx.Limits(
+                        max_connections=TranslationConfig.MAX_CONNECTIONS,
+                        max_keepalive_connections=TranslationConfig.MAX_KEEPALIVE_CONNECTIONS
+                    ))
+                )
                 self.use_llm = True
                 logger.info("OpenAI client initialized for language detection and translation")
             else:
@@ -34,14 +83,56 @@ class TranslationService:
             self.openai_client = None
             self.use_llm = False
             logger.warning("OpenAI package not installed, using fallback detection only")
-    
-    def detect_language_with_llm(self, text: str) -> str:
-        """Use LLM to accurately detect language including Roman Urdu."""
-        if not self.use_llm or not self.openai_client:
-            return self.fallback_detection(text)
-            
-        try:
-            prompt = f"""You are a language detection expert. Analyze the following text and determine its language.
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Caps in-flight async translation calls across all turns."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(TranslationConfig.MAX_CONCURRENT_REQUESTS)
+        return self._semaphore
+
+    @staticmethod
+    def _completion_result(response: Any) -> Dict[str, Any]:
+        usage = response.usage
+        return {
+            "content": response.choices[0].message.content,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "cached_tokens": getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        }
+
+    @staticmethod
+    def _record_completion(params: Dict[str, Any], started: float, result: Dict[str, Any]) -> None:
+        record_llm_call(params.get("model", ""), (time.perf_counter() - started) * 1000,
+                        result.get("prompt_tokens", 0), result.get("completion_tokens", 0), source="openai",
+                        cached_tokens=result.get("cached_tokens", 0))
+
+    def _create_chat_completion(self, **params) -> str:
+        """Chat completion through the cassette; records the call on the turn trace."""
+        def live():
+            return self._completion_result(self.openai_client.chat.completions.create(**params))
+
+        started = time.perf_counter()
+        result = cassette.call("openai_chat", params, live)
+        self._record_completion(params, started, result)
+        return result["content"]
+
+    async def _acreate_chat_completion(self, **params) -> str:
+        """Async chat completion on the pooled client, bounded by the semaphore and the turn deadline."""
+        async def live():
+            async with self.semaphore:
+                response = await self.async_openai_client.chat.completions.create(
+                    **params, timeout=stage_timeout(TranslationConfig.TIMEOUT_SECONDS)
+                )
+            return self._completion_result(response)
+
+        started = time.perf_counter()
+        result = await cassette.acall("openai_chat", params, live)
+        self._record_completion(params, started, result)
+        return result["content"]
+
+    def _detection_prompt(self, text: str) -> str:
+        return f"""You are a language detection expert. Analyze the following text and determine its language.
 
 Text: "{text}"
 
@@ -64,44 +155,65 @@ Examples:
 
 Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.URDU_ROMAN}, {Languages.URDU_ARABIC}, de, fr, etc.). Nothing else."""
 
-            response = self.openai_client.chat.completions.create(
+    def _checked_detection(self, text: str, content: str) -> str:
+        """Validate an LLM language code, falling back to langdetect when it is unknown."""
+        detected_lang = content.strip().lower()
+
+        if detected_lang in LANGUAGES or detected_lang in Languages.URDU_VARIANTS:
+            logger.info(f"LLM detected language '{detected_lang}' for text: '{text}'")
+            log_llm_decision("language", text, detected_lang)
+            return detected_lang
+        else:
+            logger.warning(f"LLM returned invalid language code '{detected_lang}', falling back")
+            return self.fallback_detection(text)
+
+    def detect_language_with_llm(self, text: str) -> str:
+        """Use LLM to accurately detect language including Roman Urdu."""
+        if not self.use_llm or not self.openai_client:
+            return self.fallback_detection(text)
+
+        try:
+            content = self._create_chat_completion(
                 model=LLMConfig.MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": self._detection_prompt(text)}],
                 max_tokens=LLMConfig.MAX_TOKENS_OTP,
                 temperature=0
             )
-            
-            detected_lang = response.choices[0].message.content.strip().lower()
-            
-            if detected_lang in LANGUAGES or detected_lang in Languages.URDU_VARIANTS:
-                logger.info(f"LLM detected language '{detected_lang}' for text: '{text}'")
-                return detected_lang
-            else:
-                logger.warning(f"LLM returned invalid language code '{detected_lang}', falling back")
-                return self.fallback_detection(text)
-                
+            return self._checked_detection(text, content)
+
         except Exception as e:
             logger.error(f"LLM language detection failed: {e}, falling back")
             return self.fallback_detection(text)
-    
-    def translate_with_llm(self, text: str, source_lang: str, target_lang: str) -> str:
-        """Use LLM for accurate translation, especially for Roman Urdu."""
-        if not self.use_llm or not self.openai_client:
-            return self.translate_with_google(text, source_lang, target_lang)
-        
+
+    async def adetect_language_with_llm(self, text: str) -> str:
+        """Async variant of detect_language_with_llm."""
+        if not self.use_llm or not self.async_openai_client:
+            return self.fallback_detection(text)
+
         try:
-            # Special handling for Roman Urdu to English
-            if source_lang == Languages.URDU_ROMAN and target_lang == Languages.ENGLISH:
-                prompt = f"""You are an expert Roman Urdu to English translator. Translate this text accurately while preserving all numbers, names, and banking terms.
+            content = await self._acreate_chat_completion(
+                model=LLMConfig.MODEL_NAME,
+                messages=[{"role": "user", "content": self._detection_prompt(text)}],
+                max_tokens=LLMConfig.MAX_TOKENS_OTP,
+                temperature=0
+            )
+            return self._checked_detection(text, content)
+
+        except Exception as e:
+            logger.error(f"LLM language detection failed: {e}, falling back")
+            return self.fallback_detection(text)
+
+    def _translation_prompt(self, text: str, source_lang: str, target_lang: str) -> str:
+        # Special handling for Roman Urdu to English
+        if source_lang == Languages.URDU_ROMAN and target_lang == Languages.ENGLISH:
+            prompt = f"""You are an expert Roman Urdu to English translator. Translate this text accurately while preserving names and banking terms.
 
     Text to translate: "{text}"
 
     Translation Rules:
-    1. Keep ALL numbers EXACTLY as they are (8 stays 8, never change to 3 or any other number)
-    2. Keep banking terms in English: transactions, balance, account, transfer, etc.
-    3. Keep proper nouns and names unchanged
-    4. Preserve CNIC format: 12345-1234567-1 stays exactly the same
-    5. Common Roman Urdu translations:
+    1. Keep banking terms in English: transactions, balance, account, transfer, etc.
+    2. Keep proper nouns, names and CNICs (12345-1234567-1) unchanged
+    3. Common Roman Urdu translations:
     - "mera/meri" = "my"
     - "pichli/pichle/akhri" = "last/previous" 
     - "batao/dikhao" = "tell me/show me"
@@ -117,8 +229,8 @@ Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.
 
     Return ONLY the English translation, nothing else."""
 
-            elif source_lang == Languages.ENGLISH and target_lang == Languages.URDU_ROMAN:
-                prompt = f"""You are an expert English to Roman Urdu translator. Translate this COMPLETE English text to Roman Urdu (Urdu written in English letters) while preserving all numbers and technical terms. TRANSLATE THE ENTIRE TEXT - DO NOT TRUNCATE.
+        elif source_lang == Languages.ENGLISH and target_lang == Languages.URDU_ROMAN:
+            prompt = f"""You are an expert English to Roman Urdu translator. Translate this COMPLETE English text to Roman Urdu (Urdu written in English letters) while preserving all numbers and technical terms. TRANSLATE THE ENTIRE TEXT - DO NOT TRUNCATE.
 
     Text to translate: "{text}"
 
@@ -142,23 +254,21 @@ Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.
 
     Return ONLY the complete Roman Urdu translation in English letters, nothing else."""
 
-            elif source_lang == Languages.URDU_ARABIC and target_lang == Languages.ENGLISH:
-                # Arabic script Urdu to English
-                prompt = f"""You are an expert Urdu to English translator. Translate this Arabic script Urdu text accurately while preserving all numbers, names, and banking terms.
+        elif source_lang == Languages.URDU_ARABIC and target_lang == Languages.ENGLISH:
+            # Arabic script Urdu to English
+            prompt = f"""You are an expert Urdu to English translator. Translate this Arabic script Urdu text accurately while preserving names and banking terms.
 
     Text to translate: "{text}"
 
     Translation Rules:
-    1. Keep ALL numbers EXACTLY as they are
-    2. Keep banking terms in English: transactions, balance, account, transfer, etc.
-    3. Keep proper nouns and names unchanged
-    4. Preserve CNIC format exactly
+    1. Keep banking terms in English: transactions, balance, account, transfer, etc.
+    2. Keep proper nouns, names and CNICs (12345-1234567-1) unchanged
 
     Return ONLY the English translation, nothing else."""
 
-            elif source_lang == Languages.ENGLISH and target_lang == Languages.URDU_ARABIC:
-                # English to Arabic script Urdu
-                prompt = f"""You are an expert English to Urdu translator. Translate this COMPLETE English text to natural Urdu in Arabic script while preserving all numbers and technical terms. TRANSLATE THE ENTIRE TEXT - DO NOT TRUNCATE.
+        elif source_lang == Languages.ENGLISH and target_lang == Languages.URDU_ARABIC:
+            # English to Arabic script Urdu
+            prompt = f"""You are an expert English to Urdu translator. Translate this COMPLETE English text to natural Urdu in Arabic script while preserving all numbers and technical terms. TRANSLATE THE ENTIRE TEXT - DO NOT TRUNCATE.
 
     Text to translate: "{text}"
 
@@ -173,99 +283,293 @@ Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.
 
     Return ONLY the complete Urdu translation in Arabic script, nothing else."""
 
-            else:
-                # For other language pairs, use a general prompt
-                prompt = f"""Translate this COMPLETE text from {source_lang} to {target_lang}. Keep all numbers, names, and technical terms exactly as they are. TRANSLATE THE ENTIRE TEXT.
+        else:
+            # For other language pairs, use a general prompt
+            prompt = f"""Translate this COMPLETE text from {source_lang} to {target_lang}. Keep all numbers, names, and technical terms exactly as they are. TRANSLATE THE ENTIRE TEXT.
 
     Text: "{text}"
 
     Return only the complete translation."""
 
-            response = self.openai_client.chat.completions.create(
+        return prompt
+
+    def _clean_translation(self, text: str, content: str, source_lang: str, target_lang: str) -> str:
+        translated = content.strip()
+
+        # Remove quotes if LLM adds them
+        if translated.startswith('"') and translated.endswith('"'):
+            translated = translated[1:-1]
+
+        # Numbers reach the LLM canonical; put back any it changed
+        if target_lang == Languages.ENGLISH:
+            translated = restore_numbers(text, translated)
+
+        logger.info(f"LLM translated '{text[:50]}...' from {source_lang} to {target_lang}: '{translated[:100]}...'")
+        return translated
+
+    def translate_with_llm(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Use LLM for accurate translation, especially for Roman Urdu."""
+        if not self.use_llm or not self.openai_client:
+            return self.translate_with_google(text, source_lang, target_lang)
+
+        try:
+            content = self._create_chat_completion(
                 model=LLMConfig.MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": self._translation_prompt(text, source_lang, target_lang)}],
                 temperature=LLMConfig.TEMPERATURE_TRANSLATION
             )
-            
-            translated = response.choices[0].message.content.strip()
-            
-            # Remove quotes if LLM adds them
-            if translated.startswith('"') and translated.endswith('"'):
-                translated = translated[1:-1]
-            
-            logger.info(f"LLM translated '{text[:50]}...' from {source_lang} to {target_lang}: '{translated[:100]}...'")
-            return translated
-            
+            return self._clean_translation(text, content, source_lang, target_lang)
+
         except Exception as e:
             logger.error(f"LLM translation failed: {e}, falling back to Google")
             return self.translate_with_google(text, source_lang, target_lang)
-    
+
+    async def atranslate_with_llm(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Async variant of translate_with_llm."""
+        if not self.use_llm or not self.async_openai_client:
+            return await self.atranslate_with_google(text, source_lang, target_lang)
+
+        try:
+            content = await self._acreate_chat_completion(
+                model=LLMConfig.MODEL_NAME,
+                messages=[{"role": "user", "content": self._translation_prompt(text, source_lang, target_lang)}],
+                temperature=LLMConfig.TEMPERATURE_TRANSLATION
+            )
+            return self._clean_translation(text, content, source_lang, target_lang)
+
+        except Exception as e:
+            logger.error(f"LLM translation failed: {e}, falling back to Google")
+            return await self.atranslate_with_google(text, source_lang, target_lang)
+
+    def _segments_prompt(self, segments: List[str], source_lang: str, target_lang: str) -> str:
+        source_name, target_name = self.get_language_name(source_lang).title(), self.get_language_name(target_lang)
+        script_rule = (
+            "Use ONLY English letters (Roman script) - DO NOT use Arabic script"
+            if target_lang == Languages.URDU_ROMAN else "Use natural Urdu grammar and vocabulary in Arabic script"
+        )
+        return f"""You are an expert {source_name} to {target_name} translator. Translate each segment of a banking assistant reply to {target_name}.
+
+Translation Rules:
+1. Keep every placeholder such as [[1]] exactly as written; it stands for a number, amount, date or account number
+2. Keep banking terms in English when commonly used: balance, account, transaction, transfer, etc.
+3. {script_rule}
+4. Preserve proper nouns and names unchanged
+5. Translate every segment completely and keep the segments in the same order
+
+Return JSON: {{"translations": ["...", ...]}} with exactly {len(segments)} entries.
+
+Segments: {json.dumps(segments, ensure_ascii=False)}"""
+
+    def _parse_segments(self, content: str) -> Optional[List[str]]:
+        parsed = parse_structured(content, SegmentTranslations, "segment_translation", _repair_json)
+        return parsed.translations if parsed else None
+
+    def _segments_params(self, segments: List[str], source_lang: str, target_lang: str) -> Dict[str, Any]:
+        params = {
+            "model": LLMConfig.MODEL_NAME,
+            "messages": [{"role": "user", "content": self._segments_prompt(segments, source_lang, target_lang)}],
+            "temperature": LLMConfig.TEMPERATURE_TRANSLATION
+        }
+        fmt = response_format(SegmentTranslations)
+        if fmt:
+            params["response_format"] = fmt
+        return params
+
+    def translate_segments_with_llm(self, segments: List[str], source_lang: str, target_lang: str) -> Optional[List[str]]:
+        """Translate masked segments in one call; None when the reply is unusable."""
+        try:
+            content = self._create_chat_completion(**self._segments_params(segments, source_lang, target_lang))
+            return self._parse_segments(content)
+        except Exception as e:
+            logger.error(f"Batched segment translation failed: {e}")
+            return None
+
+    async def atranslate_segments_with_llm(self, segments: List[str], source_lang: str, target_lang: str) -> Optional[List[str]]:
+        """Async variant of translate_segments_with_llm."""
+        try:
+            content = await self._acreate_chat_completion(**self._segments_params(segments, source_lang, target_lang))
+            return self._parse_segments(content)
+        except Exception as e:
+            logger.error(f"Batched segment translation failed: {e}")
+            return None
+
     def translate_with_google(self, text: str, source_lang: str, target_lang: str) -> str:
         """Fallback Google translation."""
         try:
-            result = self.translator.translate(text, src=source_lang, dest=target_lang)
-            return result.text
+            return cassette.call(
+                "google_translate",
+                {"text": text, "src": source_lang, "dest": target_lang},
+                lambda: self.translator.translate(text, src=source_lang, dest=target_lang).text
+            )
         except Exception as e:
             logger.error(f"Google translation failed: {e}")
             return text
-    
+
+    async def atranslate_with_google(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Google translation on a worker thread, bounded by the semaphore and a timeout."""
+        async def live():
+            async with self.semaphore:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(lambda: self.translator.translate(text, src=source_lang, dest=target_lang).text),
+                    stage_timeout(TranslationConfig.TIMEOUT_SECONDS)
+                )
+
+        try:
+            return await cassette.acall(
+                "google_translate", {"text": text, "src": source_lang, "dest": target_lang}, live
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Google translation timed out after {TranslationConfig.TIMEOUT_SECONDS}s")
+            return text
+        except Exception as e:
+            logger.error(f"Google translation failed: {e}")
+            return text
+
+    @traced_stage("translation")
     def translate_to_english(self, text: str, source_lang: str) -> str:
         """Enhanced translation to English with LLM priority."""
         try:
+            text = normalize_numbers(text)
             if source_lang == Languages.ENGLISH:
                 return text
-            
+
             # Don't translate number-only text
             if self.is_number_only_text(text):
                 logger.info(f"Skipping translation for number-only text: '{text}'")
                 return text
-            
+
             # Use LLM for better translation, especially Roman Urdu and Arabic Urdu
             if self.use_llm and source_lang in Languages.URDU_VARIANTS:
                 return self.translate_with_llm(text, source_lang, Languages.ENGLISH)
             else:
                 return self.translate_with_google(text, source_lang, Languages.ENGLISH)
-            
+
+        except Exception as e:
+            logger.error(f"Translation to English failed: {e}")
+            return text
+
+    @traced_stage("translation")
+    async def atranslate_to_english(self, text: str, source_lang: str) -> str:
+        """Async variant of translate_to_english."""
+        try:
+            text = normalize_numbers(text)
+            if source_lang == Languages.ENGLISH:
+                return text
+
+            # Don't translate number-only text
+            if self.is_number_only_text(text):
+                logger.info(f"Skipping translation for number-only text: '{text}'")
+                return text
+
+            if self.use_llm and source_lang in Languages.URDU_VARIANTS:
+                return await self.atranslate_with_llm(text, source_lang, Languages.ENGLISH)
+            else:
+                return await self.atranslate_with_google(text, source_lang, Languages.ENGLISH)
+
         except Exception as e:
             logger.error(f"Translation to English failed: {e}")
             return text
 
-    def translate_from_english(self, text: str, target_lang: str) -> str:
-        """Enhanced translation from English with LLM priority."""
+    @traced_stage("back_translation")
+    def translate_from_english(self, text: str, target_lang: str, names: Optional[List[str]] = None) -> str:
+        """Enhanced translation from English with LLM priority; names (the user's) are kept out of the memory."""
         try:
             if target_lang == Languages.ENGLISH:
                 return text
-            
+
             # Use LLM for better translation, especially to Urdu variants
             if self.use_llm and target_lang in Languages.URDU_VARIANTS:
+                if TranslationMemoryConfig.ENABLED:
+                    remembered = translation_memory.translate(
+                        text, Languages.ENGLISH, target_lang,
+                        lambda segments: self.translate_segments_with_llm(segments, Languages.ENGLISH, target_lang),
+                        names
+                    )
+                    if remembered is not None:
+                        return remembered
                 return self.translate_with_llm(text, Languages.ENGLISH, target_lang)
             else:
                 return self.translate_with_google(text, Languages.ENGLISH, target_lang)
-            
+
         except Exception as e:
             logger.error(f"Translation from English failed: {e}")
             return text
-    
+
+    @traced_stage("back_translation")
+    async def atranslate_from_english(self, text: str, target_lang: str, names: Optional[List[str]] = None) -> str:
+        """Async variant of translate_from_english."""
+        try:
+            if target_lang == Languages.ENGLISH:
+                return text
+
+            if self.use_llm and target_lang in Languages.URDU_VARIANTS:
+                if TranslationMemoryConfig.ENABLED:
+                    remembered = await translation_memory.atranslate(
+                        text, Languages.ENGLISH, target_lang,
+                        lambda segments: self.batcher.translate(segments, Languages.ENGLISH, target_lang),
+                        names
+                    )
+                    if remembered is not None:
+                        return remembered
+                return await self.atranslate_with_llm(text, Languages.ENGLISH, target_lang)
+            else:
+                return await self.atranslate_with_google(text, Languages.ENGLISH, target_lang)
+
+        except Exception as e:
+            logger.error(f"Translation from English failed: {e}")
+            return text
+
+    def _detect_without_llm(self, text: str, sender_id: str = None, get_last_language_func=None) -> Optional[str]:
+        """Language for short and number-only text, which carries no signal of its own."""
+        if len(text.strip()) < 3:
+            if sender_id and get_last_language_func:
+                last_lang = get_last_language_func(sender_id)
+                if last_lang != Languages.ENGLISH:
+                    logger.info(f"Short text detected, using last language: {last_lang}")
+                    return last_lang
+            return Languages.ENGLISH
+
+        # Check if text is number-only
+        if self.is_number_only_text(text):
+            if sender_id and get_last_language_func:
+                last_lang = get_last_language_func(sender_id)
+                logger.info(f"Number-only text detected: '{text}', using last language: {last_lang}")
+                return last_lang
+            else:
+                return Languages.ENGLISH
+        return None
+
+    def _local_guess(self, text: str) -> Optional[LanguageGuess]:
+        """Local identifier's guess when it is confident enough to skip the LLM."""
+        if not LanguageIdConfig.ENABLED:
+            return None
+        guess = language_identifier.identify(text)
+        confident = guess.confidence >= LanguageIdConfig.THRESHOLD
+        language_identifier.record_outcome(confident)
+        if not confident:
+            return None
+        logger.info(f"Local detection result: '{guess.language}' ({guess.method}, {guess.confidence:.2f}) for text: '{text}'")
+        return guess
+
+    def _detect_locally(self, text: str) -> Optional[str]:
+        guess = self._local_guess(text)
+        return guess.language if guess else None
+
+    def _supported_or_english(self, detected: str) -> str:
+        if detected in LANGUAGES or detected in Languages.URDU_VARIANTS:
+            return detected
+        else:
+            logger.warning(f"Detected language '{detected}' not supported, defaulting to English")
+            return Languages.ENGLISH
+
+    @traced_stage("language_detection")
     def detect_language_smart(self, text: str, sender_id: str = None, get_last_language_func=None) -> str:
         """Smart language detection with LLM priority and number handling."""
         try:
-            if len(text.strip()) < 3:
-                if sender_id and get_last_language_func:
-                    last_lang = get_last_language_func(sender_id)
-                    if last_lang != Languages.ENGLISH:
-                        logger.info(f"Short text detected, using last language: {last_lang}")
-                        return last_lang
-                return Languages.ENGLISH
-            
-            # Check if text is number-only
-            if self.is_number_only_text(text):
-                if sender_id and get_last_language_func:
-                    last_lang = get_last_language_func(sender_id)
-                    logger.info(f"Number-only text detected: '{text}', using last language: {last_lang}")
-                    return last_lang
-                else:
-                    return Languages.ENGLISH
-            
+            known = self._detect_without_llm(text, sender_id, get_last_language_func) or self._detect_locally(text)
+            if known:
+                return known
+
             # Use LLM for detection if available
             if self.use_llm:
                 detected = self.detect_language_with_llm(text)
@@ -273,17 +577,211 @@ Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.
             else:
                 detected = self.fallback_detection(text)
                 logger.info(f"Fallback detection result: '{detected}' for text: '{text}'")
-            
-            if detected in LANGUAGES or detected in Languages.URDU_VARIANTS:
-                return detected
+
+            return self._supported_or_english(detected)
+
+        except Exception as e:
+            logger.warning(f"Language detection failed: {e}, defaulting to English")
+            return Languages.ENGLISH
+
+    @traced_stage("language_detection")
+    async def adetect_language_smart(self, text: str, sender_id: str = None, get_last_language_func=None) -> str:
+        """Async variant of detect_language_smart."""
+        try:
+            known = self._detect_without_llm(text, sender_id, get_last_language_func) or self._detect_locally(text)
+            if known:
+                return known
+
+            if self.use_llm:
+                detected = await self.adetect_language_with_llm(text)
+                logger.info(f"LLM detection result: '{detected}' for text: '{text}'")
             else:
-                logger.warning(f"Detected language '{detected}' not supported, defaulting to English")
-                return Languages.ENGLISH
-                
+                detected = self.fallback_detection(text)
+                logger.info(f"Fallback detection result: '{detected}' for text: '{text}'")
+
+            return self._supported_or_english(detected)
+
         except Exception as e:
             logger.warning(f"Language detection failed: {e}, defaulting to English")
             return Languages.ENGLISH
-        
+
+    def _normalize_prompt(self, text: str) -> str:
+        return f"""You are a language detection and translation expert for a banking assistant. Detect the language of the user's message and translate it to English in one step.
+
+Language codes:
+- "{Languages.ENGLISH}" for standard English
+- "{Languages.URDU_ROMAN}" for Roman Urdu (Urdu/Hindi words written in English letters), e.g. "mera balance kya hai"
+- "{Languages.URDU_ARABIC}" for Urdu in Arabic script, e.g. "میرا بیلنس کیا ہے"
+- the 2-letter ISO code for any other language (de, fr, es, ar, etc.)
+
+Translation Rules:
+1. Keep banking terms in English: transactions, balance, account, transfer, etc.
+2. Keep proper nouns, names and CNICs (12345-1234567-1) unchanged
+3. If the message is already English, english_text is the message unchanged
+
+Return JSON: {{"language": "<code>", "english_text": "<English translation>", "confidence": <0.0-1.0>}}
+
+Text: "{text}"
+"""
+
+    def _normalize_params(self, text: str) -> Dict[str, Any]:
+        params = {
+            "model": LLMConfig.MODEL_NAME,
+            "messages": [{"role": "user", "content": self._normalize_prompt(text)}],
+            "temperature": 0
+        }
+        fmt = response_format(InboundNormalization)
+        if fmt:
+            params["response_format"] = fmt
+        return params
+
+    def _parse_inbound(self, text: str, content: str) -> Optional[InboundMessage]:
+        """Validated combined reply; None when the language code is unsupported or the JSON unusable."""
+        parsed = parse_structured(content, InboundNormalization, "inbound_normalization", _repair_json)
+        if parsed is None:
+            return None
+        language = parsed.language.strip().lower()
+        if language not in LANGUAGES and language not in Languages.URDU_VARIANTS:
+            logger.warning(f"Combined normalization returned invalid language code '{language}'")
+            return None
+        log_llm_decision("language", text, language)
+        if language == Languages.ENGLISH or not parsed.english_text.strip():
+            english_text = normalize_numbers(text)
+        else:
+            english_text = restore_numbers(text, parsed.english_text.strip())
+        return InboundMessage(language, english_text, min(max(parsed.confidence, 0.0), 1.0), "combined")
+
+    @staticmethod
+    def _matches_profile(text: str, language: str) -> bool:
+        """Cheap script/lexicon check that text does not contradict the user's profile language."""
+        urdu_script = language_identifier.script_guess(text).confidence > 0.0
+        if language == Languages.URDU_ARABIC or urdu_script:
+            return language == Languages.URDU_ARABIC and urdu_script
+        p_roman = language_identifier.roman_urdu_probability(text)
+        if language == Languages.URDU_ROMAN:
+            return p_roman >= LanguageProfileConfig.CONSISTENCY_MIN
+        return language == Languages.ENGLISH and 1 - p_roman >= LanguageProfileConfig.CONSISTENCY_MIN
+
+    def _profile_guess(self, text: str, sender_id: str = None, get_profile_func=None) -> Optional[LanguageGuess]:
+        """The user's trusted profile language when text is consistent with it; None re-detects on drift."""
+        if not LanguageProfileConfig.ENABLED or not (sender_id and get_profile_func):
+            return None
+        profile = get_profile_func(sender_id)
+        if not profile:
+            return None
+        if not self._matches_profile(text, profile["language"]):
+            self.profile_stats["drift"] += 1
+            logger.info(f"Message inconsistent with {profile['language']} profile, re-detecting: '{text}'")
+            return None
+        self.profile_stats["detections_skipped"] += 1
+        return LanguageGuess(profile["language"], profile["confidence"], "profile")
+
+    def _inbound_shortcut(self, text: str, sender_id: str = None, get_last_language_func=None,
+                          get_profile_func=None) -> Optional[LanguageGuess]:
+        """Language known without an LLM: short or number-only text, a confident local guess, or the user's profile."""
+        known = self._detect_without_llm(text, sender_id, get_last_language_func)
+        if known:
+            return LanguageGuess(known, 1.0, "context")
+        return self._local_guess(text) or self._profile_guess(text, sender_id, get_profile_func)
+
+    @staticmethod
+    def _shortcut_method(guess: LanguageGuess) -> str:
+        """Inbound method of a shortcut guess: "context", "profile", or "local" for the identifier's methods."""
+        return guess.method if guess.method in ("context", "profile") else "local"
+
+    def _inbound_english(self, text: str, guess: LanguageGuess) -> InboundMessage:
+        if guess.method == "profile":
+            self.profile_stats["llm_calls_saved"] += 1  # Would otherwise have gone to the combined call
+        return self._inbound_result(
+            InboundMessage(Languages.ENGLISH, normalize_numbers(text), guess.confidence, self._shortcut_method(guess))
+        )
+
+    def _inbound_from_grammar(self, text: str, guess: Optional[LanguageGuess]) -> Optional[InboundMessage]:
+        """Roman Urdu commands the local grammar fully reads need no translation call.
+        The method keeps a context or profile guess ("profile+grammar"), so it is not taken as a fresh detection."""
+        if not RomanUrduConfig.ENABLED or (guess and guess.language != Languages.URDU_ROMAN):
+            return None
+        command = roman_urdu_grammar.parse(text)
+        if command is None:
+            return None
+        method = "grammar" if guess is None or self._shortcut_method(guess) == "local" else f"{guess.method}+grammar"
+        return InboundMessage(Languages.URDU_ROMAN, command.english, guess.confidence if guess else 1.0, method)
+
+    def _inbound_result(self, message: InboundMessage) -> InboundMessage:
+        self.inbound_stats[message.method] += 1
+        logger.info({
+            "action": "inbound_normalized",
+            "language": message.language,
+            "confidence": round(message.confidence, 3),
+            "method": message.method
+        })
+        return message
+
+    @traced_stage("inbound_normalization")
+    def normalize_inbound(self, text: str, sender_id: str = None, get_last_language_func=None,
+                          get_profile_func=None) -> InboundMessage:
+        """Language and English text of an inbound message: no LLM call for confident English, one call otherwise."""
+        try:
+            guess = self._inbound_shortcut(text, sender_id, get_last_language_func, get_profile_func)
+            if guess and guess.language == Languages.ENGLISH:
+                return self._inbound_english(text, guess)
+            parsed = self._inbound_from_grammar(text, guess)
+            if parsed:
+                return self._inbound_result(parsed)
+            if guess:
+                english_text = self.translate_to_english(text, guess.language)
+                return self._inbound_result(InboundMessage(guess.language, english_text, guess.confidence, f"{self._shortcut_method(guess)}+translate"))
+
+            if self.use_llm and self.openai_client:
+                try:
+                    combined = self._parse_inbound(text, self._create_chat_completion(**self._normalize_params(normalize_numbers(text))))
+                    if combined:
+                        return self._inbound_result(combined)
+                except Exception as e:
+                    logger.error(f"Combined inbound normalization failed: {e}, falling back to two steps")
+
+            language = self._supported_or_english(
+                self.detect_language_with_llm(text) if self.use_llm else self.fallback_detection(text)
+            )
+            return self._inbound_result(InboundMessage(language, self.translate_to_english(text, language), 0.0, "two_step"))
+
+        except Exception as e:
+            logger.warning(f"Inbound normalization failed: {e}, treating message as English")
+            return InboundMessage(Languages.ENGLISH, text, 0.0, "error")
+
+    @traced_stage("inbound_normalization")
+    async def anormalize_inbound(self, text: str, sender_id: str = None, get_last_language_func=None,
+                                 get_profile_func=None) -> InboundMessage:
+        """Async variant of normalize_inbound."""
+        try:
+            guess = self._inbound_shortcut(text, sender_id, get_last_language_func, get_profile_func)
+            if guess and guess.language == Languages.ENGLISH:
+                return self._inbound_english(text, guess)
+            parsed = self._inbound_from_grammar(text, guess)
+            if parsed:
+                return self._inbound_result(parsed)
+            if guess:
+                english_text = await self.atranslate_to_english(text, guess.language)
+                return self._inbound_result(InboundMessage(guess.language, english_text, guess.confidence, f"{self._shortcut_method(guess)}+translate"))
+
+            if self.use_llm and self.async_openai_client:
+                try:
+                    combined = self._parse_inbound(text, await self._acreate_chat_completion(**self._normalize_params(normalize_numbers(text))))
+                    if combined:
+                        return self._inbound_result(combined)
+                except Exception as e:
+                    logger.error(f"Combined inbound normalization failed: {e}, falling back to two steps")
+
+            language = self._supported_or_english(
+                await self.adetect_language_with_llm(text) if self.use_llm else self.fallback_detection(text)
+            )
+            english_text = await self.atranslate_to_english(text, language)
+            return self._inbound_result(InboundMessage(language, english_text, 0.0, "two_step"))
+
+        except Exception as e:
+            logger.warning(f"Inbound normalization failed: {e}, treating message as English")
+            return InboundMessage(Languages.ENGLISH, text, 0.0, "error")
+
     def fallback_detection(self, text: str) -> str:
         """Simple fallback using langdetect only."""
         try:
@@ -298,9 +796,8 @@ Response format: Return ONLY the language code ({Languages.ENGLISH}, {Languages.
             return Languages.ENGLISH
 
     def is_number_only_text(self, text: str) -> bool:
-        """Check if text contains only numbers, spaces, and basic punctuation."""
-        clean_text = re.sub(r'[\s\-\.\,\(\)\/]+', '', text)
-        return clean_text.isdigit() and len(clean_text) > 0
+        """Check if text contains only numbers (any script, or amounts like "5 lakh"), spaces, and basic punctuation."""
+        return is_number_only(text)
     
     def get_language_name(self, lang_code: str) -> str:
         """Get human-readable language name."""
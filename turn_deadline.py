@@ -0,0 +1,137 @@
+"""
+Per-turn deadlines for Banking AI Assistant.
+A deadline is opened when a message reaches the webhook and travels with the turn (as a
+context variable in-process and as a header to the backend). Stages derive their
+timeouts from the remaining budget, and optional stages are skipped when it runs low.
+"""
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from constants import DeadlineConfig
+
+logger = logging.getLogger(__name__)
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("current_turn_deadline", default=None)
+
+
+class Deadline:
+    """Absolute end time of one turn on the monotonic clock."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """Timeout for a stage: what is left after reserve, never above cap."""
+        available = max(self.remaining() - reserve, 0.001)
+        return min(available, cap) if cap is not None else available
+
+    def to_header(self) -> str:
+        """Remaining budget for the next hop, minus the time its reply needs to come back."""
+        return str(int(max(self.remaining() - DeadlineConfig.NETWORK_MARGIN_SECONDS, 0.0) * 1000))
+
+
+class DeadlineStats:
+    """Optional stages skipped, mandatory stages cut short and turns that ran out of budget."""
+
+    def __init__(self):
+        self.turns = 0
+        self.skipped: Counter = Counter()
+        self.exhausted: Counter = Counter()
+        self.expired = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "turn_budget_seconds": DeadlineConfig.TURN_BUDGET_SECONDS,
+            "skipped_stages": dict(self.skipped),
+            "exhausted_stages": dict(self.exhausted),
+            "expired": self.expired
+        }
+
+deadline_stats = DeadlineStats()
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the turn being processed in this context, if any."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def turn_deadline(budget_seconds: Optional[float] = None, header_value: Optional[str] = None):
+    """Open a turn deadline, or join the one already active in this context.
+
+    header_value is the remaining budget in milliseconds sent by the previous hop.
+    """
+    existing = _current_deadline.get()
+    if existing is not None:
+        yield existing
+        return
+
+    if header_value:
+        try:
+            budget_seconds = int(header_value) / 1000
+        except ValueError:
+            logger.warning({"action": "invalid_deadline_header", "value": header_value})
+    deadline = Deadline(budget_seconds if budget_seconds is not None else DeadlineConfig.TURN_BUDGET_SECONDS)
+    deadline_stats.turns += 1
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+        if deadline.expired():
+            deadline_stats.expired += 1
+            logger.warning({"action": "turn_deadline_expired", "budget_seconds": deadline.budget_seconds})
+
+
+def with_turn_deadline(func):
+    """Run an async message handler inside a turn deadline."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with turn_deadline():
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+def stage_timeout(cap: float, reserve: float = 0.0) -> float:
+    """Timeout for a stage: cap outside a turn, otherwise bounded by the remaining budget."""
+    deadline = _current_deadline.get()
+    return deadline.timeout(cap, reserve) if deadline is not None else cap
+
+
+def allow_optional_stage(stage: str) -> bool:
+    """Whether an optional stage still fits in the turn; records the skip when it does not."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return True
+    remaining = deadline.remaining()
+    if remaining >= DeadlineConfig.OPTIONAL_STAGE_MIN_SECONDS.get(stage, 0.0):
+        return True
+    deadline_stats.skipped[stage] += 1
+    logger.info({"action": "optional_stage_skipped", "stage": stage, "remaining_seconds": round(remaining, 2)})
+    return False
+
+
+def budget_exhausted(stage: str, reserve: float = 0.0) -> bool:
+    """Whether a mandatory stage no longer fits in the turn after reserve; records it when it does not."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return False
+    remaining = deadline.remaining()
+    if remaining - reserve >= DeadlineConfig.MANDATORY_STAGE_MIN_SECONDS:
+        return False
+    deadline_stats.exhausted[stage] += 1
+    logger.warning({"action": "turn_budget_exhausted", "stage": stage, "remaining_seconds": round(remaining, 2)})
+    return True
@@ -0,0 +1,388 @@
+"""
+Per-turn tracing for Banking AI Assistant.
+Records every stage of a user turn (duration, LLM calls, tokens, DB commands)
+and exports it as JSON or OpenTelemetry-style spans.
+"""
+import functools
+import inspect
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pymongo import monitoring
+
+from constants import TraceConfig
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional["TurnTrace"]] = ContextVar("current_turn_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_turn_span", default=None)
+
+# Most recent finished traces, newest last
+recent_traces: "OrderedDict[str, TurnTrace]" = OrderedDict()
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed unit of work inside a turn."""
+
+    def __init__(self, trace_id: str, name: str, kind: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+
+    def end(self, status: str = "ok") -> None:
+        """Close the span once."""
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._start_perf) * 1000
+            self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OpenTelemetry JSON span representation."""
+        start_ns = int(self.start_time * 1e9)
+        end_ns = start_ns + int((self.duration_ms or 0) * 1e6)
+        attributes = [{"key": "banking.kind", "value": {"stringValue": self.kind}}]
+        for key, value in self.attributes.items():
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            attributes.append({"key": f"banking.{key}", "value": typed})
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_CLIENT" if self.kind in ("llm", "db", "http") else "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": attributes,
+            "status": {"code": "STATUS_CODE_OK" if self.status == "ok" else "STATUS_CODE_ERROR"}
+        }
+
+    @classmethod
+    def from_dict(cls, trace_id: str, data: Dict[str, Any]) -> "Span":
+        span = cls(trace_id, data.get("name", "unknown"), data.get("kind", "stage"),
+                   data.get("parent_id"), data.get("attributes") or {})
+        span.span_id = data.get("span_id", span.span_id)
+        span.start_time = data.get("start_time", span.start_time)
+        span.duration_ms = data.get("duration_ms")
+        span.status = data.get("status", "ok")
+        return span
+
+
+class TurnTrace:
+    """All spans and LLM usage for a single user turn."""
+
+    def __init__(self, sender_id: str = "", trace_id: Optional[str] = None, service: str = "webhook"):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.sender_id = sender_id
+        self.service = service
+        self.root = Span(self.trace_id, "turn", "turn", attributes={"service": service})
+        self.spans: List[Span] = []
+
+    def add_span(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def merge(self, exported: Optional[Dict[str, Any]]) -> None:
+        """Attach spans exported by a downstream service under the current span."""
+        if not exported:
+            return
+        parent = _current_span.get()
+        for span_data in exported.get("spans", []):
+            span = Span.from_dict(self.trace_id, span_data)
+            if not span.parent_id or span.parent_id == exported.get("root_span_id"):
+                span.parent_id = parent.span_id if parent else self.root.span_id
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals per turn and per stage."""
+        llm_spans = [span for span in self.spans if span.kind == "llm"]
+        stages: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            if span.kind != "stage":
+                continue
+            stage = stages.setdefault(span.name, {"count": 0, "duration_ms": 0.0})
+            stage["count"] += 1
+            stage["duration_ms"] = round(stage["duration_ms"] + (span.duration_ms or 0), 2)
+
+        prompt_tokens = sum(span.attributes.get("prompt_tokens", 0) for span in llm_spans)
+        completion_tokens = sum(span.attributes.get("completion_tokens", 0) for span in llm_spans)
+        cached_tokens = sum(span.attributes.get("cached_tokens", 0) for span in llm_spans)
+        return {
+            "llm_calls": len(llm_spans),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_prompt_tokens": cached_tokens,
+            "cached_token_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "llm_ms": round(sum(span.duration_ms or 0 for span in llm_spans), 2),
+            "db_calls": sum(1 for span in self.spans if span.kind == "db"),
+            "duration_ms": round(self.root.duration_ms, 2) if self.root.duration_ms is not None else None,
+            "budget_exceeded": len(llm_spans) > TraceConfig.MAX_LLM_CALLS_PER_TURN,
+            "stages": stages
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "sender_id": self.sender_id,
+            "service": self.service,
+            "root_span_id": self.root.span_id,
+            "start_time": self.root.start_time,
+            "summary": self.summary(),
+            "spans": [span.to_dict() for span in self.spans]
+        }
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON resourceSpans payload."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": f"banking-{self.service}"}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "turn_trace"},
+                    "spans": [self.root.to_otel()] + [span.to_otel() for span in self.spans]
+                }]
+            }]
+        }
+
+
+def current_trace() -> Optional[TurnTrace]:
+    """Trace of the turn being processed in this context, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def turn_trace(sender_id: str = "", trace_id: Optional[str] = None, service: str = "webhook"):
+    """Open a turn trace, or join the one already active in this context."""
+    existing = _current_trace.get()
+    if existing is not None:
+        yield existing
+        return
+
+    trace = TurnTrace(sender_id, trace_id, service)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        _store_trace(trace)
+
+
+def traced_turn(func):
+    """Run an async message handler whose first argument is sender_id inside a turn trace."""
+    @functools.wraps(func)
+    async def wrapper(sender_id, *args, **kwargs):
+        with turn_trace(sender_id):
+            return await func(sender_id, *args, **kwargs)
+    return wrapper
+
+
+def list_traces(limit: int = 20) -> List[Dict[str, Any]]:
+    """Summaries of the most recent finished traces, newest first."""
+    traces = list(recent_traces.values())[-limit:]
+    return [
+        {"trace_id": trace.trace_id, "sender_id": trace.sender_id, "service": trace.service,
+         "start_time": trace.root.start_time, **trace.summary()}
+        for trace in reversed(traces)
+    ]
+
+
+def get_trace(trace_id: str, export_format: str = "json") -> Optional[Dict[str, Any]]:
+    """Export one stored trace as JSON or OTLP/JSON."""
+    trace = recent_traces.get(trace_id)
+    if trace is None:
+        return None
+    return trace.to_otel() if export_format == "otel" else trace.to_dict()
+
+
+def _store_trace(trace: TurnTrace) -> None:
+    summary = trace.summary()
+    recent_traces[trace.trace_id] = trace
+    while len(recent_traces) > TraceConfig.MAX_STORED_TRACES:
+        recent_traces.popitem(last=False)
+
+    log = logger.warning if summary["budget_exceeded"] else logger.info
+    log({
+        "action": "turn_trace_complete",
+        "trace_id": trace.trace_id,
+        "sender_id": trace.sender_id,
+        "service": trace.service,
+        "llm_calls": summary["llm_calls"],
+        "total_tokens": summary["total_tokens"],
+        "cached_token_ratio": summary["cached_token_ratio"],
+        "duration_ms": summary["duration_ms"],
+        "budget_exceeded": summary["budget_exceeded"]
+    })
+
+
+@contextmanager
+def trace_stage(name: str, **attributes):
+    """Time a pipeline stage; a no-op outside a turn trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    span = Span(trace.trace_id, name, "stage", parent.span_id if parent else trace.root.span_id, attributes)
+    trace.add_span(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception:
+        span.end("error")
+        raise
+    finally:
+        span.end()
+        _current_span.reset(token)
+
+
+def traced_stage(name: str):
+    """Decorator form of trace_stage for sync and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with trace_stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(model: str, duration_ms: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    source: str = "langchain", status: str = "ok", cached_tokens: int = 0) -> None:
+    """Record a completed LLM call against the current stage."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    span = Span(trace.trace_id, "llm_call", "llm", parent.span_id if parent else trace.root.span_id, {
+        "model": model or "unknown",
+        "source": source,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "cached_tokens": cached_tokens or 0
+    })
+    span.start_time -= duration_ms / 1000
+    span.duration_ms = duration_ms
+    span.status = status
+    trace.add_span(span)
+
+
+class LLMTraceCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that turns every chat-model call into an llm span."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._starts.pop(run_id, None)
+        duration_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+
+        if not usage and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage_metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens = usage_metadata.get("input_tokens", 0)
+            completion_tokens = usage_metadata.get("output_tokens", 0)
+            cached_tokens = (usage_metadata.get("input_token_details") or {}).get("cache_read", 0)
+
+        record_llm_call(llm_output.get("model_name", ""), duration_ms, prompt_tokens, completion_tokens,
+                        cached_tokens=cached_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started = self._starts.pop(run_id, None)
+        duration_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+        record_llm_call("", duration_ms, status="error")
+
+
+class MongoTraceListener(monitoring.CommandListener):
+    """pymongo command listener that records each DB command as a db span."""
+
+    def __init__(self):
+        self._pending: Dict[int, tuple] = {}
+
+    def started(self, event):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        parent = _current_span.get()
+        span = Span(trace.trace_id, f"mongo.{event.command_name}", "db",
+                    parent.span_id if parent else trace.root.span_id,
+                    {"command": event.command_name, "database": event.database_name})
+        self._pending[event.request_id] = (trace, span)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+    def _finish(self, event, status: str) -> None:
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        trace, span = pending
+        span.duration_ms = event.duration_micros / 1000
+        span.status = status
+        trace.add_span(span)
+
+
+llm_trace_handler = LLMTraceCallbackHandler()
+mongo_trace_listener = MongoTraceListener()
@@ -13,7 +13,7 @@ from ai_agent import llm
 from constants import (
     VerificationStages, GreetingWords, ConfirmationWords, ExitCommands,
     Limits, WebhookConfig, RegexPatterns, Currencies, StatusMessages,
-    TransferSignals, DatabaseFields, LLMConfig
+    TransferSignals, DatabaseFields, LLMConfig, TraceConfig, DeadlineConfig, LanguageProfileConfig
 )
 
 import os
@@ -21,6 +21,11 @@ import requests
 import re
 from typing import Dict, Any, List
 from translation_service import translation_service
+from language_id import language_identifier
+from translation_memory import translation_memory
+from roman_urdu import roman_urdu_grammar
+from response_language import respond_in, current_response_language
+from message_catalog import message_catalog
 from state import (
     authenticated_users, processed_messages, periodic_cleanup,
     get_user_verification_stage, set_user_verification_stage,
@@ -28,18 +33,26 @@ from state import (
     is_otp_pending, is_transfer_otp_pending, is_valid_otp, extract_cnic_from_text,
     get_pending_transfer_info, set_pending_transfer_info, clear_pending_transfer_info,
     is_transfer_confirmation_pending, get_user_accounts_with_details, set_user_accounts_with_details,
-    set_user_language, get_user_language, get_user_last_language, clear_user_language
+    set_user_language, get_user_language, get_user_last_language, clear_user_language,
+    update_language_profile, get_trusted_language_profile, get_language_profile_stats
 )
 import time
+import base64
+import hashlib
 import logging
 from datetime import datetime
 from ai_agent import BankingAIAgent
+from turn_trace import traced_turn, traced_stage, current_trace
+from turn_deadline import with_turn_deadline, current_deadline, stage_timeout
+from cassette import cassette
+from debug_routes import router as debug_router
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.include_router(debug_router)
 
 VERIFY_TOKEN = WebhookConfig.VERIFY_TOKEN
 
@@ -132,6 +145,8 @@ async def receive_message(request: Request):
     return JSONResponse(content={"status": "ok"})
 
 voice_message_cache = {}
+@traced_turn
+@with_turn_deadline
 async def handle_voice_message(sender_id: str, audio_url: str) -> str:
     """Handle voice messages with deduplication and proper language handling."""
     try:
@@ -143,14 +158,17 @@ async def handle_voice_message(sender_id: str, audio_url: str) -> str:
             last_time, last_response = voice_message_cache[cache_key]
             if current_time - last_time < 10:  # 10 second cooldown
                 logger.info(f"🎤 Voice message too soon, returning cached response for {sender_id}")
-                return "I'm still processing your previous voice message. Please wait a moment."
+                return message_catalog.message("voice_cooldown", get_user_last_language(sender_id))
         
         # Download audio
-        async with aiohttp.ClientSession() as session:
-            async with session.get(audio_url) as response:
-                if response.status != 200:
-                    raise Exception("Failed to download audio file")
-                audio_data = await response.read()
+        async def download_audio():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(audio_url) as response:
+                    if response.status != 200:
+                        raise Exception("Failed to download audio file")
+                    return base64.b64encode(await response.read()).decode("ascii")
+        
+        audio_data = base64.b64decode(await cassette.acall("graph_audio_download", {"url": audio_url}, download_audio))
 
         # Create unique filename to avoid conflicts
         audio_file_path = f"temp_audio_{sender_id}_{int(current_time)}.mp3"
@@ -172,29 +190,39 @@ async def handle_voice_message(sender_id: str, audio_url: str) -> str:
                     logger.info(f"🎤 Duplicate transcription detected: '{transcription[:50]}...'")
                     return last_response
 
-            # Detect language of transcription
-            detected_language = translation_service.detect_language_smart(
-                transcription, sender_id, get_user_last_language
+            # Detect language of transcription and translate it to English in one step
+            inbound = await translation_service.anormalize_inbound(
+                transcription, sender_id, get_user_last_language, get_trusted_language_profile
             )
+            detected_language = inbound.language
+            english_transcription = inbound.english_text
             
-            logger.info(f"🎤 VOICE: Detected language '{detected_language}' for transcription: '{transcription}'")
+            logger.info(f"🎤 VOICE: Detected language '{detected_language}' ({inbound.method}) for transcription: '{transcription}'")
             
             # Store the detected language BEFORE processing
             set_user_language(sender_id, detected_language)
+            if inbound.method not in LanguageProfileConfig.UNOBSERVED_METHODS:
+                update_language_profile(sender_id, detected_language, inbound.confidence or 1.0)  # two_step has no score
             
-            # Translate to English for processing if needed
             if detected_language != "en":
-                english_transcription = translation_service.translate_to_english(transcription, detected_language)
                 logger.info(f"🎤 VOICE: Translated '{transcription}' to '{english_transcription}'")
-            else:
-                english_transcription = transcription
 
             # Process the English transcription directly (not through multilingual processor)
-            english_response = await process_user_message(sender_id, english_transcription)
+            with respond_in(detected_language) as direct_language:
+                english_response = await process_user_message(sender_id, english_transcription)
             
-            # Translate response back to user's ORIGINAL language
-            if detected_language != "en":
-                final_response = translation_service.translate_from_english(english_response, detected_language)
+            # Translate response back to user's ORIGINAL language (unless it was generated in it or is a catalog message)
+            catalog_response = message_catalog.localize(english_response, detected_language)
+            if direct_language and direct_language.covers(english_response):
+                final_response = english_response
+                logger.info(f"🎤 VOICE: Response generated directly in {detected_language}, skipping back-translation")
+            elif catalog_response:
+                final_response = catalog_response
+                logger.info(f"🎤 VOICE: System message served from the catalog in {detected_language}")
+            elif detected_language != "en":
+                final_response = await translation_service.atranslate_from_english(
+                    english_response, detected_language, user_names(sender_id)
+                )
                 logger.info(f"🎤 VOICE: Final response translated to {detected_language}: '{final_response[:100]}...'")
             else:
                 final_response = english_response
@@ -216,25 +244,38 @@ async def handle_voice_message(sender_id: str, audio_url: str) -> str:
 
     except Exception as e:
         logger.error(f"Error handling voice message: {e}")
-        return "Sorry, I couldn't process your voice message. Please try typing your question instead."
+        return message_catalog.message("voice_error", get_user_last_language(sender_id))
     
 
-client = OpenAI(api_key=os.environ["OPENAI_API_KEY"]) 
+client = OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=os.getenv(LLMConfig.BASE_URL_ENV))
 
+@traced_stage("transcription")
 async def transcribe_audio(audio_file_path: str) -> str:
     """Transcribe audio using OpenAI's new SDK (>=1.0.0)"""
     try:
+        def transcribe():
+            with open(audio_file_path, "rb") as audio_file:
+                return client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="text"  # ensures raw string instead of JSON
+                )
+        
         with open(audio_file_path, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"  # ensures raw string instead of JSON
-            )
-        return response
+            audio_digest = hashlib.sha256(audio_file.read()).hexdigest()
+        return cassette.call("openai_transcription", {"model": "whisper-1", "audio_sha256": audio_digest}, transcribe)
     except Exception as e:
         logger.error(f"Error transcribing audio: {e}")
         raise Exception("Failed to transcribe audio")
 
+def user_names(sender_id: str) -> List[str]:
+    """Name parts of an authenticated user and of their pending transfer's recipient, masked out of remembered translations."""
+    user_data = authenticated_users.get(sender_id, {})
+    recipient = get_pending_transfer_info(sender_id)["recipient"] if user_data else None
+    return (user_data.get(DatabaseFields.NAME) or "").split() + (recipient or "").split()
+
+@traced_turn
+@with_turn_deadline
 async def process_multilingual_message(sender_id: str, user_message: str) -> str:
     """Process message with language detection and translation support."""
     
@@ -249,26 +290,31 @@ async def process_multilingual_message(sender_id: str, user_message: str) -> str
                 logger.info(f"🌐 TRANSLATION DUPLICATE BLOCKED: '{user_message[:50]}...' (sent {current_time - last_time:.1f}s ago)")
                 return last_response
         
-        # Detect language of incoming message - SAVE THIS FOR LATER USE
-        original_detected_language = translation_service.detect_language_smart(
+        # Detect language of incoming message and translate it to English - SAVE THE LANGUAGE FOR LATER USE
+        inbound = await translation_service.anormalize_inbound(
             user_message, 
             sender_id, 
-            get_user_last_language
+            get_user_last_language,
+            get_trusted_language_profile
         )
+        original_detected_language = inbound.language
+        english_message = inbound.english_text
         
-        # Store the detected language for this user
+        # Store the detected language for this user and fold real detections into their language profile
         set_user_language(sender_id, original_detected_language)
+        if inbound.method not in LanguageProfileConfig.UNOBSERVED_METHODS:
+            update_language_profile(sender_id, original_detected_language, inbound.confidence or 1.0)  # two_step has no score
         
         logger.info({
             "action": "language_detected",
             "sender_id": sender_id,
             "detected_language": original_detected_language,
+            "confidence": inbound.confidence,
+            "method": inbound.method,
             "original_message": user_message
         })
         
-        # Translate to English for processing if needed
         if original_detected_language != 'en':
-            english_message = translation_service.translate_to_english(user_message, original_detected_language)
             logger.info({
                 "action": "message_translated_to_english",
                 "sender_id": sender_id,
@@ -276,15 +322,32 @@ async def process_multilingual_message(sender_id: str, user_message: str) -> str
                 "translated": english_message,
                 "source_language": original_detected_language
             })
-        else:
-            english_message = user_message
         
         # Process the English message through existing flow
-        english_response = await process_user_message(sender_id, english_message)
+        with respond_in(original_detected_language) as direct_language:
+            english_response = await process_user_message(sender_id, english_message)
         
-        # Translate response back to user's ORIGINAL language (not re-detected)
-        if original_detected_language != 'en':
-            final_response = translation_service.translate_from_english(english_response, original_detected_language)
+        # Translate response back to user's ORIGINAL language (not re-detected), unless it was generated in it
+        # or is a system message the catalog already has in that language
+        catalog_response = message_catalog.localize(english_response, original_detected_language)
+        if direct_language and direct_language.covers(english_response):
+            final_response = english_response
+            logger.info({
+                "action": "response_generated_in_user_language",
+                "sender_id": sender_id,
+                "target_language": original_detected_language
+            })
+        elif catalog_response:
+            final_response = catalog_response
+            logger.info({
+                "action": "system_message_from_catalog",
+                "sender_id": sender_id,
+                "target_language": original_detected_language
+            })
+        elif original_detected_language != 'en':
+            final_response = await translation_service.atranslate_from_english(
+                english_response, original_detected_language, user_names(sender_id)
+            )
             logger.info({
                 "action": "response_translated_to_user_language",
                 "sender_id": sender_id,
@@ -376,15 +439,10 @@ async def smart_account_selection(user_input: str, account_details: List[Dict])
         account_details_str = "\n".join(account_info)
        
         # Use LLM to understand the selection
-        response = await ai_agent.llm.ainvoke([
-            {
-                "role": "system", 
-                "content": account_selection_prompt.format(
-                    user_input=user_input,
-                    account_details=account_details_str
-                )
-            }
-        ])
+        response = await ai_agent.llm.ainvoke(account_selection_prompt.messages(
+            user_input=user_input,
+            account_details=account_details_str
+        ))
         
         selected_account = response.content.strip()
         
@@ -471,6 +529,8 @@ def is_confirmation_negative(message: str) -> bool:
     return any(word in message_lower for word in ConfirmationWords.NEGATIVE)
 
 user_request_cache = {}
+@traced_turn
+@with_turn_deadline
 async def process_user_message(sender_id: str, user_message: str) -> str:
     """Process user message with enhanced LLM-based exit detection."""
     
@@ -489,17 +549,20 @@ async def process_user_message(sender_id: str, user_message: str) -> str:
     # Rate limiting (existing code) - FIXED: Remove duplicate rate limiting
     if sender_id in user_last_message_time:
         if current_time - user_last_message_time[sender_id] < Limits.MESSAGE_RATE_LIMIT_SECONDS:
-            return "I appreciate your enthusiasm! Please give me just a moment to process your previous message before sending another."
+            return message_catalog.message("rate_limited")
     
     user_last_message_time[sender_id] = current_time
 
-    # LLM-based exit command detection - NEW AND IMPROVED!
-    if await ai_agent.detect_exit_intent_with_llm(user_message):
+    # Get current verification stage
+    verification_stage = get_user_verification_stage(sender_id)
+
+    # Exit detection: local fast path for unambiguous input, LLM for free text
+    if await ai_agent.detect_exit_intent_with_llm(user_message, verification_stage):
         logger.info({
             "action": "llm_exit_intent_detected",
             "sender_id": sender_id,
             "original_message": user_message,
-            "detection_method": "llm_based"
+            "verification_stage": verification_stage
         })
         
         user_info = get_user_account_info(sender_id)
@@ -531,9 +594,6 @@ async def process_user_message(sender_id: str, user_message: str) -> str:
         # Cache the exit response
         user_request_cache[cache_key] = (current_time, response)
         return response
-
-    # Get current verification stage
-    verification_stage = get_user_verification_stage(sender_id)
     
     logger.info({
         "action": "processing_user_message",
@@ -585,7 +645,7 @@ async def process_user_message(sender_id: str, user_message: str) -> str:
     except Exception as e:
         # Don't cache errors
         logger.error(f"Processing error: {e}")
-        return "Sorry, there was an error processing your request."
+        return message_catalog.message("processing_error")
 
 async def handle_cnic_verification(sender_id: str, user_message: str) -> str:
     """Handle CNIC verification with flexible input format and non-banking query protection."""
@@ -878,7 +938,7 @@ async def handle_banking_queries(sender_id: str, user_message: str) -> str:
                 
                 return await ai_agent.handle_transfer_otp_request(amount, currency, recipient, first_name)
             else:
-                return "Sorry, there was an error processing your transfer request. Please try again."
+                return message_catalog.message("transfer_request_error")
         
         logger.info({
             "action": "banking_query_processed_successfully",
@@ -909,7 +969,7 @@ async def handle_transfer_otp_verification(sender_id: str, user_message: str) ->
                 "action": "transfer_otp_no_user_data",
                 "sender_id": sender_id
             })
-            return "Session expired. Please start over by sending 'hi'."
+            return message_catalog.message("session_expired")
         
         user_name = user_data.get(DatabaseFields.NAME, "")
         first_name = user_name.split()[0] if user_name else "there"
@@ -942,7 +1002,7 @@ async def handle_transfer_otp_verification(sender_id: str, user_message: str) ->
                 "action": "transfer_otp_no_account",
                 "sender_id": sender_id
             })
-            return "Account information missing. Please restart your session."
+            return message_catalog.message("account_missing")
         
         # Rest of the existing OTP verification logic...
         if is_valid_otp(user_message.strip()):
@@ -958,7 +1018,7 @@ async def handle_transfer_otp_verification(sender_id: str, user_message: str) ->
                     "sender_id": sender_id,
                     "transfer_info": transfer_info
                 })
-                return "No pending transfer found. Please start the transfer process again."
+                return message_catalog.message("no_pending_transfer")
             
             amount = transfer_info["amount"]
             currency = transfer_info["currency"]
@@ -1000,7 +1060,7 @@ async def handle_transfer_otp_verification(sender_id: str, user_message: str) ->
             "user_message": user_message
         })
         
-        return "Sorry, there was an error processing your transfer OTP. Please try again or restart the transfer process."
+        return message_catalog.message("transfer_otp_error")
         
     
 async def handle_transfer_confirmation(sender_id: str, user_message: str) -> str:
@@ -1056,7 +1116,7 @@ async def handle_transfer_confirmation(sender_id: str, user_message: str) -> str
                 "action": "transfer_confirmation_no_pending_transfer",
                 "sender_id": sender_id
             })
-            return "No pending transfer found. Please start the transfer process again."
+            return message_catalog.message("no_pending_transfer")
         
         amount = transfer_info["amount"]
         currency = transfer_info["currency"]
@@ -1129,16 +1189,19 @@ async def handle_transfer_confirmation(sender_id: str, user_message: str) -> str
             "user_message": user_message
         })
         
-        return "Sorry, there was an error processing your confirmation. Please try again."
+        return message_catalog.message("confirmation_error")
         
 
+@traced_stage("backend_query")
 async def call_process_query_api(user_message: str, account_number: str, first_name: str) -> str:
     """Make API call to backend process_query endpoint."""
     try:
+        direct_language = current_response_language()
         payload = {
             "user_message": user_message,
             "account_number": account_number,
-            "first_name": first_name
+            "first_name": first_name,
+            "language": direct_language.language if direct_language else None
         }
         
         logger.info({
@@ -1146,21 +1209,34 @@ async def call_process_query_api(user_message: str, account_number: str, first_n
             "payload": payload
         })
         
-        async with httpx.AsyncClient(timeout=LLMConfig.TIMEOUT_SECONDS) as client:
+        trace = current_trace()
+        headers = {TraceConfig.TRACE_ID_HEADER: trace.trace_id} if trace else {}
+        deadline = current_deadline()
+        if deadline:
+            headers[DeadlineConfig.HEADER] = deadline.to_header()
+        
+        async with httpx.AsyncClient(timeout=stage_timeout(LLMConfig.TIMEOUT_SECONDS)) as client:
             response = await client.post(
                 f"{BACKEND_URL}/process_query",
-                json=payload
+                json=payload,
+                headers=headers
             )
             response.raise_for_status()
             
             result = response.json()
             
+            # Fold the backend's stage spans into this turn
+            if trace:
+                trace.merge(result.get("trace"))
+            
             if result["status"] == StatusMessages.SUCCESS:
                 logger.info({
                     "action": "process_query_api_success",
                     "account_number": account_number,
                     "response_preview": result["response"][:100] + "..."
                 })
+                if direct_language and result.get("language") == direct_language.language:
+                    direct_language.mark(result["response"])
                 return result["response"]
             else:
                 logger.error({
@@ -1168,7 +1244,7 @@ async def call_process_query_api(user_message: str, account_number: str, first_n
                     "error": result.get("error", "Unknown error"),
                     "account_number": account_number
                 })
-                return result.get("response", "Sorry, I couldn't process your request. Please try again.")
+                return result.get("response", message_catalog.message("request_failed"))
                 
     except httpx.TimeoutException:
         logger.error({
@@ -1176,7 +1252,7 @@ async def call_process_query_api(user_message: str, account_number: str, first_n
             "account_number": account_number,
             "user_message": user_message
         })
-        return "Request timed out. Please try again with a simpler query."
+        return message_catalog.message("turn_budget_exhausted", first_name=first_name)
         
     except httpx.HTTPStatusError as e:
         logger.error({
@@ -1185,7 +1261,7 @@ async def call_process_query_api(user_message: str, account_number: str, first_n
             "account_number": account_number,
             "error": str(e)
         })
-        return "Backend service error. Please try again later."
+        return message_catalog.message("backend_error")
         
     except Exception as e:
         logger.error({
@@ -1193,7 +1269,7 @@ async def call_process_query_api(user_message: str, account_number: str, first_n
             "error": str(e),
             "account_number": account_number
         })
-        return "Unexpected error occurred. Please try again."
+        return message_catalog.message("unexpected_error")
 
 def send_message(recipient_id, message_text):
     """Send response to Facebook Messenger."""
@@ -1203,13 +1279,17 @@ def send_message(recipient_id, message_text):
         "message": {"text": message_text}
     }
     headers = {"Content-Type": "application/json"}
-    try:
+    def post_message():
         response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
+        return {"status_code": response.status_code}
+    
+    try:
+        result = cassette.call("graph_send_message", {"url": url, "payload": payload}, post_message)
         logger.info({
             "action": "message_sent_successfully",
             "recipient_id": recipient_id,
-            "response_status": response.status_code
+            "response_status": result["status_code"]
         })
     except requests.exceptions.RequestException as e:
         logger.error({
@@ -1218,6 +1298,42 @@ def send_message(recipient_id, message_text):
             "error": str(e)
         })
 
+@app.get("/metrics/language_id")
+async def get_language_id_metrics():
+    """Languages identified locally vs by the LLM, per method, with average latency and inbound paths."""
+    return {
+        "status": StatusMessages.SUCCESS,
+        "metrics": {**language_identifier.get_stats(), "inbound": dict(translation_service.inbound_stats)}
+    }
+
+@app.get("/metrics/language_profiles")
+async def get_language_profile_metrics():
+    """Per-user language profiles and the detection calls they saved by skipping detection."""
+    return {
+        "status": StatusMessages.SUCCESS,
+        "metrics": {**get_language_profile_stats(), **translation_service.profile_stats}
+    }
+
+@app.get("/metrics/roman_urdu")
+async def get_roman_urdu_metrics():
+    """Share of Roman Urdu messages read by the local grammar instead of translated, per intent."""
+    return {"status": StatusMessages.SUCCESS, "metrics": roman_urdu_grammar.get_stats()}
+
+@app.get("/metrics/message_catalog")
+async def get_message_catalog_metrics():
+    """System messages served from the pre-translated catalog instead of translated at runtime."""
+    return {"status": StatusMessages.SUCCESS, "metrics": message_catalog.get_stats()}
+
+@app.get("/metrics/translation_batching")
+async def get_translation_batching_metrics():
+    """Back-translation requests coalesced into shared multi-segment calls."""
+    return {"status": StatusMessages.SUCCESS, "metrics": translation_service.batcher.get_stats()}
+
+@app.get("/metrics/translation_memory")
+async def get_translation_memory_metrics():
+    """Segment hit ratio of the response translation memory and the tokens it saved."""
+    return {"status": StatusMessages.SUCCESS, "metrics": translation_memory.get_stats()}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""